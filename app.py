@@ -1,15 +1,57 @@
+import time
 import streamlit as st
+
+
+@st.cache_resource
+def startup_clock():
+    """Server start (first rerun) and the time its first map took, per process."""
+    return {"start": time.perf_counter(), "first_map_s": None}
+
+
+startup_clock()
+
 from streamlit_folium import st_folium
-import osmnx as ox
 import folium
 import random
+import json
+import itertools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from src.environment.map_downloader import download_graph, download_boundaries
-from src.environment.graph_enricher import enrich_graph
-from src.utils.visualizer import visualize_graph_static
-from src.ai.pathfinding import find_path_astar
-from src.roles import ArmyRole, RescuerRole, VolunteerRole
-from src.ai.mission_narrator import generate_briefing
-from config import MAP_CENTER_LAT, MAP_CENTER_LON, MAP_DEFAULT_RADIUS
+from src.environment.graph_cache import GraphCache
+from src.environment.load_pipeline import LoadPipeline, street_index
+from src.environment.warm_start import load_snapshot
+from src.utils.visualizer import (
+    preview_map,
+    visualize_graph_static,
+    add_isochrones_to_map,
+    add_depots_to_map,
+)
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import find_path_astar, extract_path_coords
+from src.ai.q_learning import QLearningAgent
+from src.ai.isochrone import compute_isochrones
+from src.ai.facility_location import place_depots, export_depot_plan
+from src.ai.route_metrics import route_metrics, route_slots
+from src.ai.spatial_index import snap_to_node
+from src.ai.survival import simulate_route_survival
+from src.roles import ArmyRole, RescuerRole, VolunteerRole, load_custom_roles
+from src.ai.mission_narrator import request_briefing
+from src.utils import profiler
+from config import (
+    DEFAULT_TRAVEL_SPEED,
+    DEPOT_CANDIDATES,
+    DEPOT_COUNT,
+    DEPOT_COVERAGE_RADIUS,
+    ISOCHRONE_BUDGETS,
+    MAP_CENTER_LAT,
+    MAP_CENTER_LON,
+    MAP_DEFAULT_RADIUS,
+    PROFILING_ENABLED,
+    SIMULATION_AGENT_SPEEDS,
+    SURVIVAL_CORRELATION,
+    WARM_START_ENABLED,
+)
 
 st.set_page_config(page_title="A Perfect Pathway", layout="wide")
 
@@ -42,29 +84,186 @@ ROLES = {
     "Rescuer": RescuerRole(),
     "Volunteer": VolunteerRole(),
 }
+# Roles defined in config / data/custom_roles.json
+ROLES.update({role.name: role for role in load_custom_roles()})
 
 selected_role_name = st.sidebar.selectbox("Mission Role", list(ROLES.keys()))
 selected_role = ROLES[selected_role_name]
 st.sidebar.caption(selected_role.description)
+use_q_learning = selected_role.name == "Rescuer" and st.sidebar.checkbox(
+    "Use learned policy (Q-Learning)",
+    help="Trains a Q-Learning agent for the destination and follows its policy.",
+)
+st.sidebar.markdown("---")
+
+# Per-rerun instrumentation (see src/utils/profiler.py); the toggle only
+# affects this session's rerun, not the process-wide default
+rerun_recorder = profiler.activate(
+    enabled=st.sidebar.toggle("Performance profiling", value=PROFILING_ENABLED)
+)
+rerun_start_ns = time.perf_counter_ns()
+
+
+@st.cache_resource
+def get_warm_start():
+    """Warm-start snapshot (see src/environment/warm_start.py), or None."""
+    return load_snapshot() if WARM_START_ENABLED else None
 
 
 @st.cache_resource
-def load_and_enrich_graph(lat, lon, radius):
-    """Downloads and enriches the graph. Cached to avoid re-downloading."""
-    location = (lat, lon)
-    G = download_graph(location=location, dist=radius)
-    if G:
-        G = enrich_graph(G)
-        return G
-    return None
+def get_graph_cache():
+    """One GraphCache per server process, shared by every session, seeded with the warm-start graph."""
+    cache = GraphCache()
+    snapshot = get_warm_start()
+    if snapshot is not None:
+        cache.put(snapshot["key"], snapshot["graph"])
+    return cache
 
 
 @st.cache_resource
+def get_load_pipelines():
+    """Running LoadPipelines by quantized (lat, lon, radius), shared by every session."""
+    return {}
+
+
+@st.cache_resource
+def get_boundary_cache():
+    """Boundaries by quantized (lat, lon), most recent last."""
+    return OrderedDict()
+
+
+@st.cache_resource
+def get_boundary_fetches():
+    """Running boundary downloads by quantized (lat, lon), shared by every session."""
+    return {}
+
+
+def load_graph(lat, lon, radius):
+    """
+    The enriched graph of an area, or the still running LoadPipeline that
+    is loading it (see src/environment/load_pipeline.py).
+
+    Graphs are cached on a quantized (lat, lon, radius) with byte-bounded
+    LRU eviction; smaller radii are cut out of a cached larger graph (see
+    src/environment/graph_cache.py).
+
+    Returns:
+        tuple: (graph or None, pipeline or None); a pipeline is returned
+            only while it is running.
+    """
+    cache = get_graph_cache()
+    G = cache.lookup(lat, lon, radius)
+    if G is not None:
+        return G, None
+
+    key = cache.quantize(lat, lon, radius)
+    pipelines = get_load_pipelines()
+    pipeline = pipelines.get(key)
+    if pipeline is None:
+        # The snapshot's model keeps risk levels consistent with the warm-start graph
+        snapshot = get_warm_start()
+        pipeline = pipelines[key] = LoadPipeline(
+            *key,
+            risk_model_state=snapshot["risk_model"] if snapshot else None,
+            download=download_graph,
+            boundaries=download_boundaries,
+        )
+    if not pipeline.done:
+        return None, pipeline
+
+    pipelines.pop(key, None)
+    st.session_state["load_stages"] = pipeline.status()
+    if "boundaries" in pipeline.results:
+        store_boundaries(key[0], key[1], pipeline.results["boundaries"])
+    G = pipeline.results.get("graph") if "index" in pipeline.results else None
+    if G is not None:
+        cache.put(key, G)
+    return G, None
+
+
+def store_boundaries(q_lat, q_lon, boundaries):
+    cache = get_boundary_cache()
+    cache[(q_lat, q_lon)] = boundaries
+    cache.move_to_end((q_lat, q_lon))
+    while len(cache) > 16:
+        cache.popitem(last=False)
+
+
 def load_boundaries(lat, lon):
-    return download_boundaries(location=(lat, lon))
+    """
+    Boundaries of the area, and the Future of their download if it is still
+    running. The download (osmnx + geocoding) runs off the critical path:
+    the map is drawn without boundaries until it finishes.
+    """
+    q_lat, q_lon, _ = get_graph_cache().quantize(lat, lon, 0)
+    cache = get_boundary_cache()
+    if (q_lat, q_lon) in cache:
+        return cache[(q_lat, q_lon)], None
+
+    snapshot = get_warm_start()
+    if snapshot is not None and snapshot["boundaries"] is not None and snapshot["key"][:2] == (q_lat, q_lon):
+        store_boundaries(q_lat, q_lon, snapshot["boundaries"])
+        return snapshot["boundaries"], None
+
+    fetches = get_boundary_fetches()
+    future = fetches.get((q_lat, q_lon))
+    if future is None:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="boundaries")
+        future = fetches[(q_lat, q_lon)] = executor.submit(
+            profiler.bind(download_boundaries), location=(q_lat, q_lon)
+        )
+        executor.shutdown(wait=False)
+    if not future.done():
+        return None, future
+
+    fetches.pop((q_lat, q_lon), None)
+    store_boundaries(q_lat, q_lon, future.result())
+    return cache[(q_lat, q_lon)], None
+
+
+def render_boundary_fetch(future):
+    """Polls a running boundary download and reruns the app once it is done."""
+
+    def poll():
+        if future.done():
+            st.rerun()
+
+    st.fragment(poll, run_every=1.0)()
 
 
-def get_map(_G, _boundaries, lat, lon, radius, path_coords=None, path_color="#FF4B4B"):
+def render_loading(pipeline):
+    """
+    Progress of a running LoadPipeline: stage table and a preview map that
+    fills in as stages finish. Polls until the pipeline is done, then
+    reruns the app with the loaded graph.
+    """
+
+    def progress():
+        if pipeline.done:
+            st.rerun()
+        st.info(f"Loading map area ({pipeline.radius} m around {pipeline.lat}, {pipeline.lon})...")
+        st.dataframe(pipeline.status(), hide_index=True)
+        streets = pipeline.results.get("streets")
+        if streets:
+            preview = preview_map(
+                streets["geojson"], streets["center"], boundaries_gdf=pipeline.results.get("boundaries")
+            )
+            st_folium(preview, height=600, use_container_width=True, key="preview_map", returned_objects=[])
+
+    st.fragment(progress, run_every=0.5)()
+
+
+def get_map(
+    _G,
+    _boundaries,
+    lat,
+    lon,
+    radius,
+    path_coords=None,
+    path_color="#FF4B4B",
+    isochrones=None,
+    depot_plan=None,
+):
     """
     Generates the folium map object.
     Not cached to allow dynamic path updates.
@@ -81,12 +280,20 @@ def get_map(_G, _boundaries, lat, lon, radius, path_coords=None, path_color="#FF
         enemy_zones=ENEMY_ZONES,
     )
 
+    if m and isochrones:
+        add_isochrones_to_map(m, isochrones, color=path_color)
+    if m and depot_plan:
+        add_depots_to_map(m, depot_plan)
+
     if path_coords:
         # Reverse geocode to get place names
+        import osmnx as ox  # Heavy; only needed once a path is shown
+
         try:
-            start_address = ox.geocode_to_gdf(
-                f"{path_coords[0][0]}, {path_coords[0][1]}", which_result=1
-            )
+            with profiler.span("geocode", point="start"):
+                start_address = ox.geocode_to_gdf(
+                    f"{path_coords[0][0]}, {path_coords[0][1]}", which_result=1
+                )
             start_name = (
                 start_address.iloc[0].get("display_name", "Start").split(",")[0]
             )
@@ -94,9 +301,10 @@ def get_map(_G, _boundaries, lat, lon, radius, path_coords=None, path_color="#FF
             start_name = "Start Point"
 
         try:
-            end_address = ox.geocode_to_gdf(
-                f"{path_coords[-1][0]}, {path_coords[-1][1]}", which_result=1
-            )
+            with profiler.span("geocode", point="end"):
+                end_address = ox.geocode_to_gdf(
+                    f"{path_coords[-1][0]}, {path_coords[-1][1]}", which_result=1
+                )
             end_name = (
                 end_address.iloc[0].get("display_name", "Destination").split(",")[0]
             )
@@ -152,13 +360,74 @@ def add_preview_markers(m, _G, start_node, end_node, start_name, end_name):
         ).add_to(m)
 
 
+def find_mission_path(G, start_node, end_node, zones_to_block):
+    """Runs A* for the selected role, or the Rescuer's Q-Learning policy if enabled."""
+    if not use_q_learning:
+        return find_path_astar(
+            G,
+            start_node,
+            end_node,
+            weight_mode=selected_role.weight_mode,
+            blocked_zones=zones_to_block,
+        )
+
+    zones = list(zones_to_block or [])
+    agent = st.session_state.get("q_agent")
+    if agent is None or agent.G is not G or agent.goal != end_node or agent.danger_zones != zones:
+        agent = QLearningAgent(G, end_node, danger_zones=zones)
+        progress = st.progress(0.0, text="Training Q-Learning agent...")
+        agent.train(
+            progress_callback=lambda done, total: progress.progress(
+                done / total, text=f"Training Q-Learning agent... {done}/{total} episodes"
+            )
+        )
+        progress.empty()
+        st.session_state["q_agent"] = agent
+
+    path_nodes = agent.get_path(start_node)
+    if path_nodes is None:
+        st.warning("Q-Learning policy did not reach the destination; falling back to A*.")
+        return find_path_astar(
+            G,
+            start_node,
+            end_node,
+            weight_mode=selected_role.weight_mode,
+            blocked_zones=zones_to_block,
+        )
+    return path_nodes, extract_path_coords(G, path_nodes, selected_role.weight_mode)
+
+
 # Main logic
-G = load_and_enrich_graph(lat, lon, radius)
-boundaries = load_boundaries(lat, lon)
+G, loading = load_graph(lat, lon, radius)
+if loading is not None:
+    render_loading(loading)
+    st.stop()
+boundaries, boundary_fetch = load_boundaries(lat, lon)
+if boundary_fetch is not None:
+    render_boundary_fetch(boundary_fetch)
+cache_stats = get_graph_cache().stats()
+st.sidebar.caption(
+    f"Graph cache: {cache_stats['graphs']} graphs, {cache_stats['bytes'] / 2**20:.0f}"
+    f"/{cache_stats['max_bytes'] / 2**20:.0f} MiB, {cache_stats['hits']} hits, "
+    f"{cache_stats['subgraph_hits']} cut from larger graphs"
+)
+if st.session_state.get("load_stages"):
+    with st.sidebar.expander("Last map load", expanded=False):
+        st.dataframe(st.session_state["load_stages"], hide_index=True)
 
 # Pathfinding State
 if "path_coords" not in st.session_state:
     st.session_state["path_coords"] = None
+if "path_nodes" not in st.session_state:
+    st.session_state["path_nodes"] = None
+if "role_comparison" not in st.session_state:
+    st.session_state["role_comparison"] = None
+if "isochrones" not in st.session_state:
+    st.session_state["isochrones"] = None
+if "depot_plan" not in st.session_state:
+    st.session_state["depot_plan"] = None
+if "map_points" not in st.session_state:
+    st.session_state["map_points"] = {}  # label -> node snapped from a map click
 
 if G:
     # Navigation Controls
@@ -167,23 +436,18 @@ if G:
     with col2:
         st.subheader("Mission Control")
 
-        # Extract unique street names from the graph
-        gdf_nodes_temp, gdf_edges_temp = ox.graph_to_gdfs(G)
-        # Get all names, filter for strings only (some are lists)
-        all_names = gdf_edges_temp["name"].dropna().tolist()
-        street_names = [s for s in all_names if isinstance(s, str)]
-        street_names = ["-- Select a Street --"] + sorted(set(street_names))
-
-        # Create a mapping of street names to node IDs
-        street_node_map = {}
-        for idx, row in gdf_edges_temp.iterrows():
-            name = row.get("name")
-            if isinstance(name, str) and name not in street_node_map:
-                street_node_map[name] = idx[0]  # idx is (u, v, key)
+        # Unique street names -> node IDs (built while loading, see load_pipeline)
+        with profiler.span("street_index"):
+            street_node_map = dict(street_index(G))
+        street_names = ["-- Select a Street --"] + sorted(street_node_map)
 
         # Create reverse mapping: node ID -> street name
         node_street_map = {v: k for k, v in street_node_map.items()}
 
+        # Points picked on the map are selectable like streets
+        street_names += list(st.session_state["map_points"])
+        street_node_map.update(st.session_state["map_points"])
+
         # Initialize session state for selections
         if "selected_source" not in st.session_state:
             st.session_state["selected_source"] = "-- Select a Street --"
@@ -216,6 +480,10 @@ if G:
         else:
             end_node = end_selection
 
+        click_target = st.radio(
+            "Map click sets", ["Source", "Destination"], horizontal=True
+        )
+
         col_btn1, col_btn2, col_btn3 = st.columns(3)
         with col_btn1:
             plan_mission = st.button(
@@ -229,6 +497,11 @@ if G:
         # Clear Mission Logic
         if clear_mission:
             st.session_state["path_coords"] = None
+            st.session_state["path_nodes"] = None
+            st.session_state["role_comparison"] = None
+            st.session_state["isochrones"] = None
+            st.session_state["depot_plan"] = None
+            st.session_state["map_points"] = {}
             st.session_state["selected_source"] = "-- Select a Street --"
             st.session_state["selected_destination"] = "-- Select a Street --"
             st.rerun()
@@ -238,20 +511,18 @@ if G:
             # Get actual end_node from street_node_map
             actual_end_node = street_node_map.get(end_selection)
             if start_node and actual_end_node:
-                # Army blocks enemy zones
+                # Roles like the Army block enemy zones
                 from config import ENEMY_ZONES
 
-                zones_to_block = ENEMY_ZONES if selected_role.name == "Army" else None
+                zones_to_block = ENEMY_ZONES if selected_role.avoids_zones else None
 
                 with st.spinner("AI calculating optimal path..."):
-                    path_nodes, path_coords = find_path_astar(
-                        G,
-                        start_node,
-                        actual_end_node,
-                        weight_mode=selected_role.weight_mode,
-                        blocked_zones=zones_to_block,
+                    path_nodes, path_coords = find_mission_path(
+                        G, start_node, actual_end_node, zones_to_block
                     )
                     st.session_state["path_coords"] = path_coords
+                    st.session_state["path_nodes"] = path_nodes
+                    st.session_state["role_comparison"] = None
                     if path_coords:
                         st.success(f"Path Found! Steps: {len(path_nodes)}")
                     else:
@@ -276,20 +547,18 @@ if G:
                 if end_street:
                     st.session_state["selected_destination"] = end_street
 
-                # Army blocks enemy zones
+                # Roles like the Army block enemy zones
                 from config import ENEMY_ZONES
 
-                zones_to_block = ENEMY_ZONES if selected_role.name == "Army" else None
+                zones_to_block = ENEMY_ZONES if selected_role.avoids_zones else None
 
                 with st.spinner("AI calculating optimal path..."):
-                    path_nodes, path_coords = find_path_astar(
-                        G,
-                        start_node,
-                        end_node,
-                        weight_mode=selected_role.weight_mode,
-                        blocked_zones=zones_to_block,
+                    path_nodes, path_coords = find_mission_path(
+                        G, start_node, end_node, zones_to_block
                     )
                     st.session_state["path_coords"] = path_coords
+                    st.session_state["path_nodes"] = path_nodes
+                    st.session_state["role_comparison"] = None
                     if path_coords:
                         st.success(f"Path Found! Steps: {len(path_nodes)}")
                     else:
@@ -297,6 +566,76 @@ if G:
             else:
                 st.error("Graph has too few nodes.")
 
+        # Reachability from the source street within role cost budgets
+        with st.expander("Reachable Area"):
+            budget_text = st.text_input(
+                "Cost budgets",
+                ", ".join(str(b) for b in ISOCHRONE_BUDGETS),
+                help="Comma-separated budgets in the role's cost units (meters for fast routes).",
+            )
+            if st.button("Show Reachable Area", use_container_width=True):
+                try:
+                    budgets = [float(b) for b in budget_text.split(",") if b.strip()]
+                except ValueError:
+                    budgets = []
+                if not start_node:
+                    st.warning("Please select a Source street.")
+                elif not budgets:
+                    st.warning("Please enter at least one numeric budget.")
+                else:
+                    from config import ENEMY_ZONES
+
+                    st.session_state["isochrones"] = compute_isochrones(
+                        G,
+                        start_node,
+                        budgets,
+                        weight_mode=selected_role.weight_mode,
+                        blocked_zones=ENEMY_ZONES if selected_role.avoids_zones else None,
+                    )
+            if st.session_state["isochrones"]:
+                for iso in st.session_state["isochrones"]:
+                    st.caption(f"Budget {iso['budget']:.0f}: {len(iso['nodes'])} reachable nodes")
+
+        # Depot placement: every node is a demand point, candidates are sampled
+        with st.expander("Depot Placement"):
+            n_depots = st.number_input("Depots", 1, 20, DEPOT_COUNT)
+            objective = st.radio(
+                "Objective",
+                ["p_median", "max_coverage"],
+                format_func=lambda o: "Min. response cost" if o == "p_median" else "Max. coverage",
+                horizontal=True,
+            )
+            coverage = st.number_input("Coverage radius (cost)", 100, 20000, DEPOT_COVERAGE_RADIUS)
+            if st.button("Place Depots", use_container_width=True):
+                from config import ENEMY_ZONES
+
+                nodes = list(G.nodes())
+                rng = random.Random(0)
+                candidates = rng.sample(nodes, min(DEPOT_CANDIDATES, len(nodes)))
+                st.session_state["depot_plan"] = place_depots(
+                    G,
+                    candidates,
+                    nodes,
+                    int(n_depots),
+                    objective=objective,
+                    weight_mode=selected_role.weight_mode,
+                    blocked_zones=ENEMY_ZONES if selected_role.avoids_zones else None,
+                    radius=float(coverage),
+                )
+            plan = st.session_state["depot_plan"]
+            if plan:
+                st.caption(
+                    f"{len(plan['depots'])} depots, {plan['covered']:.0%} of points "
+                    f"within {plan['radius']:.0f}"
+                )
+                st.download_button(
+                    "Export Depot Plan",
+                    json.dumps(export_depot_plan(plan), default=str),
+                    file_name="depot_plan.geojson",
+                    mime="application/geo+json",
+                    use_container_width=True,
+                )
+
         st.metric("Nodes", G.number_of_nodes())
         st.metric("Edges", G.number_of_edges())
 
@@ -306,13 +645,77 @@ if G:
             st.info(f"Route Segments: {len(st.session_state['path_coords'])}")
             st.caption(f"Role: {selected_role.name}")
 
+            path_nodes = st.session_state["path_nodes"]
+            if path_nodes and len(path_nodes) > 1:
+                stats = simulate_route_survival(
+                    G, [path_nodes], correlation=SURVIVAL_CORRELATION
+                )["routes"][0]
+                low, high = stats["survival_ci"]
+                st.metric(
+                    "Survival Probability",
+                    f"{stats['survival']:.1%}",
+                    help=f"95% CI {low:.1%} - {high:.1%} ({stats['edges']} edges, Monte Carlo)",
+                )
+                st.metric("Expected Encounters", f"{stats['expected_encounters']:.2f}")
+
+                arrays = get_graph_arrays(G)
+                speed = SIMULATION_AGENT_SPEEDS.get(selected_role.name, DEFAULT_TRAVEL_SPEED)
+                metrics = route_metrics(G, [route_slots(arrays, path_nodes)], speed=speed)
+                st.metric("Route Length", f"{metrics['length'][0]:.0f} m")
+                st.metric(
+                    "Time in Enemy Zones",
+                    f"{metrics['zone_time'][0]:.0f} s",
+                    help=f"{metrics['zone_length'][0]:.0f} m inside zones at {speed:g} m/s",
+                )
+                st.metric("Accumulated Risk", f"{metrics['risk'][0]:.0f}", help="Length-weighted risk_level")
+                st.metric("Resource Cost", f"{metrics['resource_cost'][0]:.1f}")
+                worst = metrics["max_risk_slot"][0]
+                u, v, _ = arrays.edge_keys[worst]
+                st.caption(f"Riskiest segment: {u} -> {v} (risk {metrics['max_risk'][0]:.2f})")
+
+                if st.button("Compare Roles", use_container_width=True):
+                    from config import ENEMY_ZONES
+
+                    role_paths = {}
+                    for name, role in ROLES.items():
+                        nodes, _ = role.decide_path(
+                            G,
+                            path_nodes[0],
+                            path_nodes[-1],
+                            find_path_astar,
+                            blocked_zones=ENEMY_ZONES if role.avoids_zones else None,
+                        )
+                        if nodes:
+                            role_paths[name] = nodes
+                    comparison = simulate_route_survival(
+                        G, list(role_paths.values()), correlation=SURVIVAL_CORRELATION
+                    )
+                    role_metrics = route_metrics(
+                        G,
+                        [route_slots(arrays, nodes) for nodes in role_paths.values()],
+                        speed=[SIMULATION_AGENT_SPEEDS.get(n, DEFAULT_TRAVEL_SPEED) for n in role_paths],
+                    )
+                    st.session_state["role_comparison"] = [
+                        {
+                            "Role": name,
+                            "Survival": f"{r['survival']:.1%}",
+                            "95% CI": f"{r['survival_ci'][0]:.1%} - {r['survival_ci'][1]:.1%}",
+                            "Encounters": round(r["expected_encounters"], 2),
+                            "Length (m)": round(float(role_metrics["length"][i])),
+                            "Zone Time (s)": round(float(role_metrics["zone_time"][i])),
+                        }
+                        for i, (name, r) in enumerate(zip(role_paths, comparison["routes"]))
+                    ]
+                if st.session_state["role_comparison"]:
+                    st.dataframe(st.session_state["role_comparison"], hide_index=True)
+
         # Display some edge data
         st.subheader("Intel Feed")
-        gdf_nodes, gdf_edges = ox.graph_to_gdfs(G)
-        if not gdf_edges.empty:
-            sample_data = gdf_edges[
-                ["risk_level", "enemy_probability", "resource_cost"]
-            ].head(5)
+        sample_data = [
+            {key: data.get(key) for key in ("risk_level", "enemy_probability", "resource_cost")}
+            for _, _, data in itertools.islice(G.edges(data=True), 5)
+        ]
+        if sample_data:
             st.dataframe(sample_data, hide_index=True)
 
     with col1:
@@ -325,6 +728,8 @@ if G:
             radius,
             st.session_state["path_coords"],
             path_color=selected_role.path_color,
+            isochrones=st.session_state["isochrones"],
+            depot_plan=st.session_state["depot_plan"],
         )
 
         # Add preview markers if locations selected but no path yet
@@ -341,13 +746,29 @@ if G:
             )
 
         if m:
-            st_folium(
+            map_state = st_folium(
                 m,
                 height=600,
                 use_container_width=True,
                 key="main_map",
-                returned_objects=[],
+                returned_objects=["last_clicked"],
             )
+            clock = startup_clock()
+            if clock["first_map_s"] is None:
+                clock["first_map_s"] = time.perf_counter() - clock["start"]
+                start_kind = "warm" if get_warm_start() is not None else "cold"
+                print(f"Time to first map: {clock['first_map_s']:.2f}s ({start_kind} start)")
+
+            # Snap a new click to the nearest node and use it as an endpoint
+            clicked = (map_state or {}).get("last_clicked")
+            if clicked and clicked != st.session_state.get("last_click"):
+                st.session_state["last_click"] = clicked
+                node = snap_to_node(G, clicked["lat"], clicked["lng"])
+                label = f"Map point ({clicked['lat']:.5f}, {clicked['lng']:.5f})"
+                st.session_state["map_points"][label] = node
+                st.session_state[f"selected_{click_target.lower()}"] = label
+                st.session_state["path_coords"] = None
+                st.rerun()
 
             # Auto-generate Mission Briefing when path exists
             if st.session_state["path_coords"]:
@@ -355,21 +776,74 @@ if G:
 
                 st.markdown("---")
                 st.subheader("Mission Briefing")
-                briefing = generate_briefing(
+                briefing_args = dict(
                     role_name=selected_role.name,
                     source=st.session_state.get("selected_source", "Unknown"),
                     destination=st.session_state.get("selected_destination", "Unknown"),
                     steps=len(st.session_state["path_coords"]),
                     danger_zones_count=len(ENEMY_ZONES),
                 )
-                if briefing:
-                    st.info(briefing)
-                else:
-                    st.warning(
-                        "Mission briefing could not be generated. Proceed with caution."
-                    )
+                with profiler.span("generate_briefing"):
+                    briefing, briefing_final = request_briefing(**briefing_args)
+
+                def render_briefing():
+                    # While the AI briefing is pending this fragment polls the
+                    # cache and swaps the template out without a full rerun.
+                    text, final = request_briefing(**briefing_args, budget=0)
+                    if text:
+                        st.info(text)
+                    else:
+                        st.warning(
+                            "Mission briefing could not be generated. Proceed with caution."
+                        )
+                    if not final:
+                        st.caption("Generating AI briefing...")
+
+                st.fragment(
+                    render_briefing, run_every=None if briefing_final else 1.0
+                )()
         else:
             st.error("Failed to generate map object.")
 
 else:
     st.error("Could not load the graph. Please check your coordinates or try again.")
+
+
+def render_performance_panel(recorder, start_ns):
+    """Collapsible per-rerun timing breakdown with a Chrome-trace download."""
+    total_ms = (time.perf_counter_ns() - start_ns) / 1e6
+    recorder.add_span("streamlit_rerun", start_ns, int(total_ms * 1e6), {})
+
+    with st.sidebar.expander("Performance", expanded=False):
+        st.caption(f"Last rerun: {total_ms:.0f} ms")
+        if startup_clock()["first_map_s"] is not None:
+            st.caption(f"Time to first map: {startup_clock()['first_map_s']:.2f} s")
+        rows = [
+            {
+                "Span": entry["name"],
+                "Calls": entry["calls"],
+                "Total (ms)": round(entry["total_ms"], 1),
+                "Max (ms)": round(entry["max_ms"], 1),
+                "Share": f"{entry['total_ms'] / total_ms:.0%}" if total_ms else "-",
+            }
+            for entry in recorder.summary()
+            if entry["name"] != "streamlit_rerun"
+        ]
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        else:
+            st.caption("No instrumented calls in this rerun (cached results).")
+
+        for name, value in sorted(recorder.counters.items()):
+            st.caption(f"{name}: {value:,}")
+
+        st.download_button(
+            "Download trace (Chrome / Perfetto JSON)",
+            data=json.dumps(recorder.to_chrome_trace()),
+            file_name="pathway_trace.json",
+            mime="application/json",
+        )
+
+
+if profiler.is_enabled():
+    render_performance_panel(rerun_recorder, rerun_start_ns)
@@ -9,21 +9,133 @@ MAP_CENTER_LAT = 23.738113
 MAP_CENTER_LON = 90.395857
 MAP_DEFAULT_RADIUS = 2000
 
+# Graph Cache Settings (src/environment/graph_cache.py)
+GRAPH_CACHE_MAX_BYTES = 512 * 2**20  # Estimated bytes of cached graphs before LRU eviction
+GRAPH_CACHE_GRID = 50.0  # Map centers are snapped to this grid (meters)
+GRAPH_CACHE_RADIUS_STEP = 100  # Radii are rounded up to a multiple of this (meters)
+GRAPH_CACHE_SIZE_SAMPLE = 500  # Nodes/edges measured to estimate a graph's size
+
+# Graph Slimming Settings (src/environment/graph_slimmer.py)
+# Attributes kept after enrichment; everything else is dropped
+SLIM_NODE_ATTRIBUTES = ("x", "y", "street_count")
+SLIM_EDGE_ATTRIBUTES = (
+    "length", "highway", "maxspeed", "lanes", "bridge", "tunnel",  # RiskModel features
+    "name",  # Street list
+    "risk_level", "enemy_probability", "resource_cost",  # Enrichment results
+)
+
+# Warm Start Settings (src/environment/warm_start.py)
+WARM_START_PATH = "data/warm_start.pkl"  # Built by scripts/setup_environment.py or build_warm_start.py
+WARM_START_ENABLED = os.getenv("PATHWAY_WARM_START", "1") == "1"
+IMPORT_TIME_BUDGET = 1.5  # Seconds to import the app's modules cold (scripts/measure_startup.py)
+
 # AI Settings
 A_STAR_WEIGHT = "combined"  # distance, time, risk, combined
 RISK_PREDICTION_THRESHOLD = 0.5  # Classify as unsafe if > threshold
 
+# Online Risk Update Settings (src/ai/online_risk.py)
+RISK_UPDATE_THRESHOLD = 0.02  # Edges are re-scored only if their predicted risk moves by more than this
+RISK_LEARNING_RATE = 0.02  # Gradient step of RiskModel.partial_fit
+RISK_UPDATE_EPOCHS = 5  # Gradient steps per batch of field reports
+
 # Role Settings
 ARMY_SAFETY_THRESHOLD = 0.7  # Min safety score for Army
 RESCUER_SPEED_PRIORITY = 0.7  # Speed vs safety ratio
 VOLUNTEER_EFFICIENCY_RATIO = 0.8  # Efficiency priority
 
+# Role Cost Coefficients (src/ai/cost_model.py)
+# weight = length * (base + risk_level * c + resource_cost * c + enemy_probability * c)
+WEIGHT_MODE_COEFFICIENTS = {
+    "safe": {"base": 1.0, "risk_level": 100.0},  # Army
+    "balanced": {"base": 1.0, "risk_level": 5.0},  # Rescuer
+    "efficient": {"base": 1.0, "resource_cost": 1.0},  # Volunteer
+    "fast": {"base": 1.0},
+}
+# Extra roles without code changes, also read from CUSTOM_ROLES_PATH (JSON list), e.g.
+# {"name": "Medic", "coefficients": {"base": 1, "risk_level": 20, "enemy_probability": 50},
+#  "path_color": "#6f42c1", "description": "...", "avoid_zones": false}
+CUSTOM_ROLES = []
+CUSTOM_ROLES_PATH = os.getenv("PATHWAY_CUSTOM_ROLES", "data/custom_roles.json")
+
 # Training Settings
 ML_TRAINING_SAMPLES = 500
 ML_MODEL_TYPE = "logistic"  # logistic or decision_tree
-Q_LEARNING_EPISODES = 100
-Q_LEARNING_LEARNING_RATE = 0.1
-Q_LEARNING_DISCOUNT_RATE = 0.95
+Q_LEARNING_EPISODES = 10000  # Episodes run in parallel batches, see src/ai/q_learning.py
+Q_LEARNING_LEARNING_RATE = 1.0  # Street moves are deterministic, so full Bellman backups are safe
+Q_LEARNING_DISCOUNT_RATE = 1.0  # Undiscounted: with gamma < 1, circling cheap streets can outscore a far goal
+Q_LEARNING_EPSILON = 0.3  # Initial exploration rate (decays to 0.05)
+Q_LEARNING_BATCH_SIZE = 512  # Episodes simulated simultaneously
+Q_LEARNING_COVERAGE_ROUNDS = 20  # Extra rounds from starts the greedy policy still misses
+Q_TABLE_PATH = "data/q_table.npz"
+
+# Simulation Settings (simulations/engine.py)
+SIMULATION_AGENT_SPEEDS = {"Army": 8.0, "Rescuer": 11.0, "Volunteer": 5.0}  # m/s
+SIMULATION_PEOPLE_PER_RESCUE = 2
+SIMULATION_SUPPLIES_PER_DELIVERY = 10
+
+# Replay Trace Settings (simulations/trace.py)
+TRACE_CHUNK_RECORDS = 65_536  # Records per independently decodable chunk
+TRACE_TIME_RESOLUTION = 0.001  # Seconds per stored time step
+TRACE_COORD_PRECISION = 5  # Decimal places kept for lat/lon (~1 m)
+
+# Traffic Assignment Settings (src/ai/traffic_assignment.py)
+TRAFFIC_LANE_CAPACITY = 900  # Agents per lane per assignment period
+TRAFFIC_BPR_ALPHA = 0.15  # BPR volume-delay: cost * (1 + alpha * (flow / capacity) ** beta)
+TRAFFIC_BPR_BETA = 4.0
+TRAFFIC_MAX_ITERATIONS = 50  # Frank-Wolfe iterations
+TRAFFIC_GAP_TOLERANCE = 1e-3  # Stop once the relative gap is below this
+TRAFFIC_WORKERS = 1  # Processes computing shortest-path trees (1 = serial)
+
+# Multi-objective Routing Settings (src/ai/pareto.py)
+PARETO_EPSILON = 0.02  # Labels within 2% of another on every objective are dropped
+PARETO_MAX_LABELS_PER_NODE = 16
+PARETO_MAX_LABELS = 200_000  # Search stops early after creating this many labels
+
+# Customizable Route Planning Settings (src/ai/crp.py)
+CRP_CELL_SIZES = (32, 256, 2048, 16384)  # Most nodes per cell, finest level first (single-cell levels are dropped)
+CRP_WORKERS = 1  # Processes re-customizing cells after a weight change (1 = serial)
+
+# Alternative Route Settings (src/ai/alternatives.py)
+ALTERNATIVE_ROUTES_K = 3
+ALTERNATIVE_MIN_DISSIMILARITY = 0.3  # Share of each route not shared with any other
+ALTERNATIVE_MAX_STRETCH = 1.5  # Alternatives cost at most 1.5x the best route
+
+# Isochrone Settings (src/ai/isochrone.py)
+ISOCHRONE_BUDGETS = [1000, 2000, 3000]  # Default cost budgets shown in the app
+ISOCHRONE_HULL_RATIO = 0.3  # Concave hull tightness (0 = tightest, 1 = convex hull)
+ISOCHRONE_CACHE_SIZE = 128  # Isochrones kept per graph
+
+# Depot Placement Settings (src/ai/facility_location.py)
+DEPOT_COUNT = 3  # Depots placed by default in the app
+DEPOT_CANDIDATES = 400  # Candidate nodes sampled in the app (demand = every node)
+DEPOT_COVERAGE_RADIUS = 2000  # Cost within which a depot covers a demand point
+DEPOT_LOCAL_SEARCH_ROUNDS = 20  # Swap rounds after the greedy solution
+
+# Supply Tour Settings (src/ai/tour_planning.py)
+TOUR_WORKERS = 1  # Processes building the stop-to-stop cost table
+TOUR_IMPROVEMENT_MOVES = 10_000  # 2-opt / Or-opt moves per trip before stopping
+VOLUNTEER_VEHICLE_CAPACITY = 20  # Supply units per Volunteer trip
+
+# Coordinate Snapping Settings (src/ai/spatial_index.py)
+SNAP_MAX_PIECE_LENGTH = 25.0  # Edge geometries are indexed in pieces of at most this many meters
+SNAP_CANDIDATES = 8  # Nearest pieces checked per point before widening the search
+
+# Route Survival Settings (src/ai/survival.py)
+SURVIVAL_TRIALS = 100_000  # Monte Carlo trials per analysis
+SURVIVAL_TRIAL_CHUNK = 20_000  # Trials sampled per batch (bounds memory)
+SURVIVAL_ENCOUNTER_LETHALITY = 0.05  # Chance a single hostile encounter ends the mission
+SURVIVAL_CORRELATION = 0.5  # Latent variance shared by edges in the same cell (0 = independent)
+SURVIVAL_CORRELATION_LENGTH = 200.0  # Cell size in meters for correlated encounters
+
+# Routing Service Settings (src/ai/routing_service.py)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_WORKERS = 2  # Worker processes answering route/matrix/isochrone batches
+SERVICE_BATCH_WINDOW = 0.002  # Seconds a batch waits for more requests after its first
+SERVICE_MAX_BATCH = 64  # Requests per batch at most
+SERVICE_REQUEST_TIMEOUT = 30.0  # Seconds before a request is answered with 504
+SERVICE_LATENCY_WINDOW = 10_000  # Latest requests kept for the p50/p99 metrics
+SERVICE_THROUGHPUT_INTERVAL = 10.0  # Seconds of history behind the throughput metric
 
 # Visualization
 MAP_ZOOM_LEVEL = 13
@@ -45,11 +157,31 @@ ENEMY_ZONES = [
     (23.7290, 90.4050, 120, "Danger Zone Hotel"),
 ]
 
+# Moving Zones (track of (time_seconds, lat, lon), radius_meters, name[, active_from, active_until])
+# Default zones of the time-dependent router, see src/ai/time_dependent.py
+ENEMY_PATROLS = [
+    ([(0, 23.7330, 90.3860), (600, 23.7400, 90.3860), (1200, 23.7400, 90.3960)], 120, "Patrol Kilo"),
+    ([(0, 23.7280, 90.4000), (900, 23.7360, 90.4060), (1800, 23.7280, 90.4000)], 100, "Patrol Lima"),
+    ([(0, 23.7350, 90.3920)], 100, "Curfew Checkpoint", 900, 2700),
+]
+DEFAULT_TRAVEL_SPEED = 8.0  # m/s, for time-dependent routing
+TIME_DEPENDENT_SCHEDULE_CACHE_SIZE = 8  # ZoneSchedules kept per graph
+
 # Logging
 LOG_LEVEL = "INFO"
 SAVE_PLOTS = True
 PLOT_DPI = 300
 
+# Profiling (span/timer instrumentation, see src/utils/profiler.py)
+PROFILING_ENABLED = os.getenv("PATHWAY_PROFILING", "0") == "1"
+
 # LLM Settings (for Mission Briefings)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", " ")
-LLM_ENABLED = bool(GEMINI_API_KEY)
+LLM_ENABLED = bool(GEMINI_API_KEY.strip())
+GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_API_URL = os.getenv(
+    "GEMINI_API_URL", "https://generativelanguage.googleapis.com/v1beta"
+)
+LLM_TIMEOUT_SECONDS = 20  # Hard timeout of the background HTTP request
+LLM_LATENCY_BUDGET_SECONDS = 0.25  # Max time a rerun waits before using the template
+LLM_CACHE_SIZE = 256  # Briefings kept per process
@@ -0,0 +1,62 @@
+"""
+Builds the warm-start snapshot the app loads instead of downloading its
+default area (see src/environment/warm_start.py).
+
+Usage:
+    python scripts/build_warm_start.py                 # from data/processed_graph.pkl, offline
+    python scripts/build_warm_start.py --download      # fresh OSM download of the config area
+    python scripts/build_warm_start.py --boundaries    # also store administrative boundaries
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import random
+
+import numpy as np
+
+from config import MAP_CENTER_LAT, MAP_CENTER_LON, MAP_DEFAULT_RADIUS, WARM_START_PATH
+from src.ai.risk_model import RiskModel
+from src.environment.graph_cache import GraphCache
+from src.environment.graph_enricher import enrich_graph
+from src.environment.graph_slimmer import slim_graph
+from src.environment.map_downloader import download_boundaries, download_graph, load_custom_graph
+from src.environment.warm_start import build_snapshot, save_snapshot
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--graph", default="data/processed_graph.pkl",
+                        help="Graph pickle covering the config area (ignored with --download).")
+    parser.add_argument("--download", action="store_true", help="Download the config area instead.")
+    parser.add_argument("--boundaries", action="store_true", help="Download and store boundaries.")
+    parser.add_argument("--output", default=WARM_START_PATH)
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the risk model and enrichment.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    key = GraphCache().quantize(MAP_CENTER_LAT, MAP_CENTER_LON, MAP_DEFAULT_RADIUS)
+
+    G = download_graph(location=key[:2], dist=key[2]) if args.download else load_custom_graph(args.graph)
+    if G is None:
+        raise SystemExit("No graph to snapshot.")
+
+    # Enriched with the stored model, so later downloads score consistently
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    risk_model = RiskModel()
+    risk_model.train_on_synthetic_data()
+    slim_graph(enrich_graph(G, risk_model))
+
+    boundaries = download_boundaries(location=key[:2]) if args.boundaries else None
+    save_snapshot(build_snapshot(G, key, risk_model, boundaries), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Load test for the routing service (src/ai/routing_service.py).
+
+Fires route/matrix/isochrone requests between random points of the graph's
+bounding box from many concurrent clients and reports client-side p50/p99
+latency and throughput next to the service's own /metrics.
+
+Usage:
+    python scripts/load_test_service.py                     # starts a local service
+    python scripts/load_test_service.py --url http://127.0.0.1:8765
+    python scripts/load_test_service.py --requests 5000 --concurrency 32 --mix route=1
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+WEIGHT_MODES = ["safe", "balanced", "efficient", "fast"]
+
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=60) as response:
+        return json.loads(response.read())
+
+
+def _post(url, body):
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read())
+
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        kind, _, share = part.partition("=")
+        mix[kind.strip()] = float(share or 1)
+    return mix
+
+
+def make_requests(bbox, count, mix, seed):
+    """Random (path, body) requests with [lat, lon] endpoints inside bbox."""
+    rng = random.Random(seed)
+    south, west, north, east = bbox
+
+    def point():
+        return [rng.uniform(south, north), rng.uniform(west, east)]
+
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    requests = []
+    for kind in kinds:
+        body = {"weight_mode": rng.choice(WEIGHT_MODES), "avoid_zones": rng.random() < 0.3}
+        if kind == "route":
+            body.update(source=point(), target=point())
+        elif kind == "matrix":
+            body.update(sources=[point() for _ in range(5)], targets=[point() for _ in range(5)])
+        elif kind == "isochrone":
+            body.update(source=point(), budgets=[500, 1000, 2000], weight_mode="fast")
+        else:
+            raise ValueError(f"Unknown request kind '{kind}'")
+        requests.append((f"/{kind}", body))
+    return requests
+
+
+def run_load(url, requests, concurrency):
+    """
+    Sends all requests with `concurrency` client threads.
+
+    Returns:
+        dict: requests, errors, wall_s, throughput_rps, p50_ms, p99_ms.
+    """
+    def send(request):
+        path, body = request
+        start = time.perf_counter()
+        try:
+            _post(url + path, body)
+            ok = True
+        except (urllib.error.URLError, OSError):
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(send, requests))
+    wall = time.perf_counter() - start
+
+    latency = np.array([seconds for seconds, ok in results if ok]) * 1000
+    return {
+        "requests": len(results),
+        "errors": sum(1 for _, ok in results if not ok),
+        "wall_s": wall,
+        "throughput_rps": len(results) / wall if wall > 0 else 0.0,
+        "p50_ms": float(np.percentile(latency, 50)) if len(latency) else None,
+        "p99_ms": float(np.percentile(latency, 99)) if len(latency) else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="Running service; default starts one on localhost.")
+    parser.add_argument("--graph", default="data/processed_graph.pkl",
+                        help="Graph for the local service.")
+    parser.add_argument("--workers", type=int, help="Worker processes of the local service.")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client threads.")
+    parser.add_argument("--mix", default="route=0.8,matrix=0.1,isochrone=0.1",
+                        help="Request kinds and their shares.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    service = None
+    url = args.url
+    if url is None:
+        from config import SERVICE_WORKERS
+        from src.ai.routing_service import RoutingService
+        from src.environment.map_downloader import load_custom_graph
+
+        G = load_custom_graph(args.graph)
+        if G is None:
+            return 1
+        service = RoutingService(G, workers=args.workers or SERVICE_WORKERS)
+        host, port = service.serve("127.0.0.1", 0)
+        url = f"http://{host}:{port}"
+
+    try:
+        health = _get(url + "/health")
+        print(f"Service at {url}: {health['nodes']} nodes, {health['edges']} edges")
+        requests = make_requests(health["bbox"], args.requests, _parse_mix(args.mix), args.seed)
+        client = run_load(url, requests, args.concurrency)
+        server = _get(url + "/metrics")
+    finally:
+        if service is not None:
+            service.close()
+
+    print(f"\nClient: {client['requests']} requests, {client['errors']} errors in {client['wall_s']:.2f}s")
+    print(f"  throughput {client['throughput_rps']:.0f} req/s, "
+          f"p50 {client['p50_ms']:.1f} ms, p99 {client['p99_ms']:.1f} ms")
+    print(f"Service: p50 {server['latency']['p50_ms']:.1f} ms, p99 {server['latency']['p99_ms']:.1f} ms, "
+          f"mean batch {server['mean_batch_size']:.1f}")
+    for kind, stats in server["by_kind"].items():
+        if stats["count"]:
+            print(f"  {kind:<10} {stats['count']:>6} requests, p50 {stats['p50_ms']:.1f} ms, "
+                  f"p99 {stats['p99_ms']:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
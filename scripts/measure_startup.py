@@ -0,0 +1,189 @@
+"""
+Cold-start measurements of the app, each in a fresh interpreter:
+
+    import_time: importing every module app.py imports at the top level,
+        checked against IMPORT_TIME_BUDGET, plus which heavy dependencies
+        (HEAVY_MODULES) that pulled in.
+    first_map_warm: imports + load_snapshot() + the first map, as the app
+        renders it with the warm-start snapshot: with its boundaries if it
+        has them, otherwise with the boundary download started in the
+        background (as app.load_boundaries does) and the map drawn without.
+        Skipped if there is no snapshot (scripts/build_warm_start.py).
+    first_map_cold: imports + loading data/processed_graph.pkl (standing in
+        for the download, whose network time is not counted) + training
+        the risk model, enrich_graph, slim_graph + the first map.
+
+Usage:
+    python scripts/measure_startup.py
+    python scripts/measure_startup.py --repeat 5 --compare outputs/benchmarks/<old>.json
+    python scripts/measure_startup.py --check   # exit 1 if over the import budget
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import time
+
+from config import IMPORT_TIME_BUDGET, WARM_START_PATH
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_PATH = os.path.join(ROOT, "app.py")
+DEFAULT_OUTPUT_DIR = "outputs/benchmarks"
+# Dependencies the first map should not need
+HEAVY_MODULES = ["osmnx", "sklearn", "geopandas"]
+
+
+def app_imports(path=APP_PATH):
+    """Top-level modules imported by app.py, in order."""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+_PRELUDE = """
+import sys, time, json, importlib, tempfile, os
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+os.chdir({root!r})
+for name in {modules!r}:
+    importlib.import_module(name)
+imported = time.perf_counter()
+"""
+
+_FIRST_MAP = """
+from config import ENEMY_ZONES, MAP_CENTER_LAT, MAP_CENTER_LON, MAP_DEFAULT_RADIUS
+from src.utils.visualizer import visualize_graph_static
+{load}
+visualize_graph_static(
+    G, filename=os.path.join(tempfile.mkdtemp(), "map.html"), edge_color="#5474D0",
+    boundaries_gdf=boundaries, center_coords=(MAP_CENTER_LAT, MAP_CENTER_LON),
+    radius=MAP_DEFAULT_RADIUS, enemy_zones=ENEMY_ZONES,
+)
+"""
+
+_WARM_LOAD = """
+from src.environment.warm_start import load_snapshot
+snapshot = load_snapshot()
+G, boundaries = snapshot["graph"], snapshot["boundaries"]
+if boundaries is None:
+    import threading
+    from src.environment.map_downloader import download_boundaries
+    threading.Thread(target=download_boundaries, kwargs={"location": snapshot["key"][:2]}, daemon=True).start()
+"""
+
+_COLD_LOAD = """
+from src.environment.map_downloader import load_custom_graph
+from src.environment.graph_enricher import enrich_graph
+from src.environment.graph_slimmer import slim_graph
+G = slim_graph(enrich_graph(load_custom_graph("data/processed_graph.pkl")))
+boundaries = None
+"""
+
+_RESULT = """
+print("RESULT " + json.dumps({{
+    "import_s": imported - start,
+    "total_s": time.perf_counter() - start,
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_fresh(body, modules):
+    """Runs the import prelude + `body` in a new interpreter; returns its timings."""
+    code = (
+        _PRELUDE.format(root=ROOT, modules=modules)
+        + body
+        + _RESULT.format(heavy=HEAVY_MODULES)
+    )
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, env=env, check=True
+    ).stdout
+    line = [l for l in out.splitlines() if l.startswith("RESULT ")][-1]
+    return json.loads(line[len("RESULT "):])
+
+
+def measure(repeat=3):
+    """Runs every measurement `repeat` times; returns {name: result}."""
+    modules = app_imports()
+    bodies = {
+        "import_time": "",
+        "first_map_warm": _FIRST_MAP.format(load=_WARM_LOAD),
+        "first_map_cold": _FIRST_MAP.format(load=_COLD_LOAD),
+    }
+    results = {}
+    if not os.path.exists(os.path.join(ROOT, WARM_START_PATH)):
+        print(f"  first_map_warm   skipped: no {WARM_START_PATH} (run scripts/build_warm_start.py)")
+        del bodies["first_map_warm"]
+    for name, body in bodies.items():
+        runs = [run_fresh(body, modules) for _ in range(repeat)]
+        key = "import_s" if name == "import_time" else "total_s"
+        timings = [r[key] for r in runs]
+        results[name] = {
+            "timings": timings,
+            "median_s": statistics.median(timings),
+            "heavy_modules": runs[-1]["heavy_modules"],
+        }
+        print(f"  {name:<16} median {results[name]['median_s']:.3f}s  "
+              f"heavy: {', '.join(runs[-1]['heavy_modules']) or '-'}")
+    results["import_time"]["budget_s"] = IMPORT_TIME_BUDGET
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per measurement.")
+    parser.add_argument("--output", help="Path of the JSON report.")
+    parser.add_argument("--compare", help="Previous startup report to compare against.")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if the import budget is exceeded.")
+    args = parser.parse_args(argv)
+
+    print(f"Startup of {APP_PATH} ({len(app_imports())} top-level imports):")
+    results = measure(args.repeat)
+    import_s = results["import_time"]["median_s"]
+    within = import_s <= IMPORT_TIME_BUDGET
+    print(f"Import time {import_s:.2f}s, budget {IMPORT_TIME_BUDGET:.2f}s: {'OK' if within else 'OVER BUDGET'}")
+
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True, cwd=ROOT
+        ).strip()
+    except Exception:
+        commit = None
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "git_commit": commit, "results": results}
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"startup_{commit or 'nogit'}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Startup report saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)["results"]
+        print(f"\nComparison against {args.compare} (median, new / old):")
+        for name in sorted(set(old) & set(results)):
+            before, after = old[name]["median_s"], results[name]["median_s"]
+            print(f"  {name:<16} {before:.3f}s -> {after:.3f}s  x{after / before:.2f}")
+
+    if args.check and not within:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
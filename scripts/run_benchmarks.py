@@ -0,0 +1,603 @@
+"""
+Benchmark suite for the enrichment, routing, persistence and rendering hot paths.
+
+Every run uses fixed seeds so results are reproducible, works fully offline
+(synthetic street graphs + the bundled data/processed_graph.pkl) and writes a
+JSON report that can be diffed against the report of another commit.
+
+Usage:
+    python scripts/run_benchmarks.py                      # full run (1k - 1M edges)
+    python scripts/run_benchmarks.py --quick              # 1k and 10k edges only
+    python scripts/run_benchmarks.py --sizes 1000 50000 --cases astar_safe enrich_graph
+    python scripts/run_benchmarks.py --compare outputs/benchmarks/old.json
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import networkx as nx
+import numpy as np
+
+from config import MAP_CENTER_LAT, MAP_CENTER_LON, ENEMY_ZONES
+from src.ai.alternatives import find_alternative_routes
+from src.ai.batch_routing import BatchRouter
+from src.ai.crp import CRPRouter
+from src.ai.facility_location import build_cost_matrix, solve_max_coverage, solve_p_median
+from src.ai.pathfinding import find_path_astar
+from src.ai.risk_model import RiskModel
+from src.ai.route_metrics import edge_zone_exposure, route_metrics
+from src.ai.spatial_index import SpatialIndex
+from src.ai.survival import simulate_route_survival
+from src.ai.tour_planning import plan_supply_tours
+from src.ai.traffic_assignment import TrafficAssignment
+from src.environment.graph_enricher import enrich_graph
+from src.environment.map_downloader import save_custom_graph, load_custom_graph
+from src.environment.synthetic_city import generate_city_graph
+from src.utils.visualizer import visualize_graph_static
+
+BUNDLED_GRAPH_PATH = "data/processed_graph.pkl"
+DEFAULT_OUTPUT_DIR = "outputs/benchmarks"
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUICK_SIZES = [1_000, 10_000]
+WEIGHT_MODES = ["safe", "balanced", "efficient", "fast"]
+
+# Cases whose cost grows so fast that running them on the largest graphs
+# takes far longer than the rest of the suite. Above the cap the case is
+# recorded as skipped (override with --no-caps).
+CASE_EDGE_CAPS = {
+    "visualize_graph_static": 100_000,
+    "traffic_assignment": 100_000,
+    "depot_placement": 100_000,
+    "crp": 100_000,
+}
+
+
+# ---------------------------------------------------------------------------
+# Benchmark inputs
+# ---------------------------------------------------------------------------
+
+
+def load_graphs(sizes, seed, layout="grid", include_bundled=True):
+    """Yields (graph_name, graph) for every benchmark input."""
+    for size in sizes:
+        G = generate_city_graph(size, layout=layout, seed=seed, with_geometry=True)
+        yield f"synthetic_{layout}_{size}", G
+
+    if include_bundled and os.path.exists(BUNDLED_GRAPH_PATH):
+        with redirect_stdout(io.StringIO()):
+            G = load_custom_graph(BUNDLED_GRAPH_PATH)
+        if G is not None:
+            yield "processed_graph", G
+
+
+# ---------------------------------------------------------------------------
+# Benchmark cases
+# ---------------------------------------------------------------------------
+
+
+def _time_call(func, repeat):
+    """Runs func `repeat` times and returns the list of wall-clock durations."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _reseed(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def _od_pairs(G, count, seed):
+    rng = random.Random(seed)
+    nodes = sorted(G.nodes())
+    return [(rng.choice(nodes), rng.choice(nodes)) for _ in range(count)]
+
+
+def bench_enrich_graph(G, args):
+    def run():
+        _reseed(args.seed)
+        enrich_graph(G)
+
+    return {"timings": _time_call(run, args.repeat)}
+
+
+def bench_predict_risk(G, args):
+    edges = [d for _, _, d in G.edges(data=True)]
+    sample = random.Random(args.seed).sample(edges, min(len(edges), args.risk_samples))
+
+    _reseed(args.seed)
+    model = RiskModel()
+    model.train_on_synthetic_data()
+
+    def run():
+        for data in sample:
+            model.predict_risk(data)
+
+    timings = _time_call(run, args.repeat)
+    return {
+        "timings": timings,
+        "calls": len(sample),
+        "per_call_us": [t / len(sample) * 1e6 for t in timings],
+    }
+
+
+def make_astar_case(weight_mode, blocked):
+    def bench(G, args):
+        pairs = _od_pairs(G, args.queries, args.seed)
+        zones = ENEMY_ZONES if blocked else None
+        found = 0
+
+        def run():
+            nonlocal found
+            found = 0
+            for start, end in pairs:
+                path_nodes, _ = find_path_astar(
+                    G, start, end, weight_mode=weight_mode, blocked_zones=zones
+                )
+                found += path_nodes is not None
+
+        timings = _time_call(run, args.repeat)
+        return {
+            "timings": timings,
+            "queries": len(pairs),
+            "paths_found": found,
+            "per_query_ms": [t / len(pairs) * 1e3 for t in timings],
+        }
+
+    return bench
+
+
+def make_alternatives_case(k):
+    def bench(G, args):
+        pairs = _od_pairs(G, args.queries, args.seed)
+        router = BatchRouter(G, "safe")
+        found = 0
+
+        def run():
+            nonlocal found
+            found = 0
+            for start, end in pairs:
+                found += len(find_alternative_routes(G, start, end, k=k, router=router))
+
+        timings = _time_call(run, args.repeat)
+        return {
+            "timings": timings,
+            "queries": len(pairs),
+            "k": k,
+            "routes_found": found,
+            "per_query_ms": [t / len(pairs) * 1e3 for t in timings],
+        }
+
+    return bench
+
+
+def bench_traffic_assignment(G, args):
+    pairs = _od_pairs(G, args.od_pairs, args.seed)
+    origins, destinations = [p[0] for p in pairs], [p[1] for p in pairs]
+    result = {}
+
+    def run():
+        nonlocal result
+        result = TrafficAssignment(G, "balanced").assign(
+            origins, destinations, max_iterations=args.assignment_iterations, tolerance=0.0
+        )
+
+    timings = _time_call(run, args.repeat)
+    return {
+        "timings": timings,
+        "od_pairs": len(pairs),
+        "iterations": result["iterations"],
+        "gaps": result["gaps"],
+        "per_iteration_s": [t / (result["iterations"] + 1) for t in timings],
+    }
+
+
+def bench_crp(G, args):
+    start = time.perf_counter()
+    router = CRPRouter(G)
+    partition_s = time.perf_counter() - start
+
+    # Fresh metric names so every run is a full customization
+    runs = iter(range(args.repeat + 1))
+    timings = _time_call(lambda: router.customize_mode("safe", name=f"safe_{next(runs)}"), args.repeat)
+    update = router.customize_mode("safe", ENEMY_ZONES, name="safe_0")
+
+    a = router.arrays
+    rng = np.random.default_rng(args.seed)
+    pairs = rng.integers(0, a.n_nodes, (args.queries, 2))
+    query_timings = _time_call(lambda: [router.route(s, t, "safe_0") for s, t in pairs], args.repeat)
+    return {
+        "timings": timings,
+        "partition_s": partition_s,
+        "cells": update["total_cells"],
+        "zone_update_s": update["seconds"],
+        "zone_update_cells": update["cells"],
+        "queries": len(pairs),
+        "per_query_ms": [t / len(pairs) * 1e3 for t in query_timings],
+    }
+
+
+def bench_depot_placement(G, args):
+    rng = random.Random(args.seed)
+    nodes = list(G.nodes())
+    candidates = rng.sample(nodes, min(args.depot_candidates, len(nodes)))
+    demand = rng.sample(nodes, min(2 * args.depot_candidates, len(nodes)))
+    costs = None
+    solve_timings = {"p_median": [], "max_coverage": []}
+    radius = 0.0
+
+    def run():
+        nonlocal costs, radius
+        costs = build_cost_matrix(G, candidates, demand, "safe")
+        finite = costs[np.isfinite(costs)]
+        radius = float(np.median(finite)) / 2 if len(finite) else 0.0
+        start = time.perf_counter()
+        solve_p_median(costs, args.depots)
+        solve_timings["p_median"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        solve_max_coverage(costs, args.depots, radius)
+        solve_timings["max_coverage"].append(time.perf_counter() - start)
+
+    timings = _time_call(run, args.repeat)
+    return {
+        "timings": timings,
+        "candidates": len(candidates),
+        "demand": len(demand),
+        "depots": args.depots,
+        "p_median_s": solve_timings["p_median"][-len(timings):],
+        "max_coverage_s": solve_timings["max_coverage"][-len(timings):],
+    }
+
+
+def bench_tour_planning(G, args):
+    rng = random.Random(args.seed)
+    nodes = list(G.nodes())
+    stops = rng.sample(nodes, min(args.tour_stops + 1, len(nodes)))
+    router = BatchRouter(G, "efficient")
+    plan = {}
+
+    def run():
+        nonlocal plan
+        plan = plan_supply_tours(G, stops[0], stops[1:], router=router)
+
+    timings = _time_call(run, args.repeat)
+    return {
+        "timings": timings,
+        "stops": len(stops) - 1,
+        "unreachable": len(plan["unreachable"]),
+        "moves": plan["moves"],
+        "total_cost": plan["total_cost"],
+    }
+
+
+def bench_snap_points(G, args):
+    start = time.perf_counter()
+    index = SpatialIndex(G)
+    build_s = time.perf_counter() - start
+
+    a = index.arrays
+    rng = np.random.default_rng(args.seed)
+    lat = rng.uniform(a.y.min(), a.y.max(), args.snap_points)
+    lon = rng.uniform(a.x.min(), a.x.max(), args.snap_points)
+    node_timings = _time_call(lambda: index.nearest_nodes(lat, lon), args.repeat)
+    edge_timings = _time_call(lambda: index.nearest_edges(lat, lon), args.repeat)
+    return {
+        "timings": [n + e for n, e in zip(node_timings, edge_timings)],
+        "points": args.snap_points,
+        "build_s": build_s,
+        "nearest_nodes_s": node_timings,
+        "nearest_edges_s": edge_timings,
+    }
+
+
+def bench_route_metrics(G, args):
+    # Few distinct sources keep the routing setup cheap; only the metrics are timed
+    rng = np.random.default_rng(args.seed)
+    router = BatchRouter(G, "efficient")
+    a = router.arrays
+    sources = rng.choice(a.n_nodes, 10)
+    pick = rng.integers(0, len(sources), args.metric_routes)
+    routes, _ = router.routes(sources[pick], rng.integers(0, a.n_nodes, args.metric_routes))
+
+    start = time.perf_counter()
+    edge_zone_exposure(G, ENEMY_ZONES)
+    exposure_s = time.perf_counter() - start
+    timings = _time_call(lambda: route_metrics(G, routes), args.repeat)
+    return {
+        "timings": timings,
+        "routes": len(routes),
+        "route_edges": int(sum(len(r) for r in routes if r is not None)),
+        "exposure_s": exposure_s,
+    }
+
+
+def make_survival_case(correlation):
+    def bench(G, args):
+        pairs = _od_pairs(G, 10 * args.queries, args.seed)
+        routes = []
+        for start, end in pairs:
+            for mode in ("safe", "efficient", "fast"):
+                with redirect_stdout(io.StringIO()):
+                    path, _ = find_path_astar(G, start, end, weight_mode=mode)
+                if path and len(path) > 1:
+                    routes.append(path)
+            if len(routes) >= 3:
+                break
+        timings = _time_call(
+            lambda: simulate_route_survival(G, routes, trials=args.trials, correlation=correlation),
+            args.repeat,
+        )
+        return {
+            "timings": timings,
+            "routes": len(routes),
+            "trials": args.trials,
+            "correlation": correlation,
+            "edges": sum(len(r) - 1 for r in routes),
+        }
+
+    return bench
+
+
+def bench_save_load(G, args):
+    tmp_dir = tempfile.mkdtemp(prefix="pathway_bench_")
+    path = os.path.join(tmp_dir, "graph.pkl")
+
+    save_timings = _time_call(lambda: save_custom_graph(G, path), args.repeat)
+    load_timings = _time_call(lambda: load_custom_graph(path), args.repeat)
+    size_bytes = os.path.getsize(path)
+
+    os.remove(path)
+    os.rmdir(tmp_dir)
+    return {
+        "timings": [s + l for s, l in zip(save_timings, load_timings)],
+        "save_timings": save_timings,
+        "load_timings": load_timings,
+        "file_bytes": size_bytes,
+    }
+
+
+def bench_visualize(G, args):
+    tmp_dir = tempfile.mkdtemp(prefix="pathway_bench_")
+    path = os.path.join(tmp_dir, "map.html")
+
+    def run():
+        visualize_graph_static(
+            G,
+            filename=path,
+            edge_color="#5474D0",
+            center_coords=(MAP_CENTER_LAT, MAP_CENTER_LON),
+            radius=2000,
+            enemy_zones=ENEMY_ZONES,
+        )
+
+    timings = _time_call(run, args.repeat)
+    size_bytes = os.path.getsize(path) if os.path.exists(path) else 0
+
+    if os.path.exists(path):
+        os.remove(path)
+    os.rmdir(tmp_dir)
+    return {"timings": timings, "html_bytes": size_bytes}
+
+
+def build_cases():
+    """Returns the ordered {case_name: bench_function} registry."""
+    cases = {
+        # enrich_graph runs first so every later case sees enriched attributes
+        "enrich_graph": bench_enrich_graph,
+        "predict_risk": bench_predict_risk,
+    }
+    for mode in WEIGHT_MODES:
+        cases[f"astar_{mode}"] = make_astar_case(mode, blocked=False)
+        cases[f"astar_{mode}_blocked"] = make_astar_case(mode, blocked=True)
+    cases["alternatives_k3"] = make_alternatives_case(3)
+    cases["alternatives_k10"] = make_alternatives_case(10)
+    cases["traffic_assignment"] = bench_traffic_assignment
+    cases["crp"] = bench_crp
+    cases["depot_placement"] = bench_depot_placement
+    cases["tour_planning"] = bench_tour_planning
+    cases["snap_points"] = bench_snap_points
+    cases["route_metrics"] = bench_route_metrics
+    cases["route_survival"] = make_survival_case(0.0)
+    cases["route_survival_correlated"] = make_survival_case(0.5)
+    cases["save_load_graph"] = bench_save_load
+    cases["visualize_graph_static"] = bench_visualize
+    return cases
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+
+def _summarize(timings):
+    return {
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "max_s": max(timings),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def environment_info():
+    import sklearn
+    import osmnx
+    import folium
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "networkx": nx.__version__,
+        "scikit-learn": sklearn.__version__,
+        "osmnx": osmnx.__version__,
+        "folium": folium.__version__,
+        "git_commit": _git_commit(),
+    }
+
+
+def compare_reports(old_path, new_report):
+    """Prints the median-time ratio of every case present in both reports."""
+    with open(old_path) as f:
+        old_report = json.load(f)
+
+    def index(report):
+        return {
+            (r["graph"], r["case"]): r["median_s"]
+            for r in report["results"]
+            if r.get("status") == "ok"
+        }
+
+    old, new = index(old_report), index(new_report)
+    print(f"\nComparison against {old_path} (median, new / old):")
+    for key in sorted(set(old) & set(new)):
+        ratio = new[key] / old[key] if old[key] else float("inf")
+        flag = "  <-- slower" if ratio > 1.1 else ("  <-- faster" if ratio < 0.9 else "")
+        print(f"  {key[0]:<22} {key[1]:<28} {old[key]:>10.4f}s -> {new[key]:>10.4f}s  x{ratio:.2f}{flag}")
+
+
+def run_suite(args):
+    cases = build_cases()
+    selected = args.cases or list(cases)
+    unknown = set(selected) - set(cases)
+    if unknown:
+        raise SystemExit(f"Unknown benchmark cases: {', '.join(sorted(unknown))}")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "environment": environment_info(),
+        "results": [],
+    }
+
+    for graph_name, G in load_graphs(args.sizes, args.seed, args.layout, not args.no_bundled):
+        n_edges = G.number_of_edges()
+        print(f"\n== {graph_name}: {G.number_of_nodes()} nodes, {n_edges} edges ==")
+
+        # Cases always need enriched attributes, even if enrich_graph is not selected
+        if "enrich_graph" not in selected and "risk_level" not in next(
+            iter(G.edges(data=True))
+        )[2]:
+            _reseed(args.seed)
+            with redirect_stdout(io.StringIO()):
+                enrich_graph(G)
+
+        for case_name in [c for c in cases if c in selected]:
+            result = {
+                "graph": graph_name,
+                "case": case_name,
+                "nodes": G.number_of_nodes(),
+                "edges": n_edges,
+            }
+            cap = CASE_EDGE_CAPS.get(case_name)
+            if cap is not None and n_edges > cap and not args.no_caps:
+                result.update(status="skipped", reason=f"edges > cap ({cap})")
+                print(f"  {case_name:<28} skipped (edges > {cap})")
+                report["results"].append(result)
+                continue
+
+            try:
+                # The functions under test report progress with print()
+                with redirect_stdout(io.StringIO()):
+                    measured = cases[case_name](G, args)
+                result.update(status="ok", **measured, **_summarize(measured["timings"]))
+                print(f"  {case_name:<28} median {result['median_s']:.4f}s")
+            except Exception as e:
+                result.update(status="error", reason=repr(e))
+                print(f"  {case_name:<28} error: {e!r}")
+            report["results"].append(result)
+
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Synthetic graph sizes in edges.")
+    parser.add_argument("--layout", choices=["grid", "delaunay"], default="grid",
+                        help="Synthetic street layout (see src/environment/synthetic_city.py).")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"Shortcut for --sizes {' '.join(map(str, QUICK_SIZES))}.")
+    parser.add_argument("--cases", nargs="+", help="Subset of cases to run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per case.")
+    parser.add_argument("--queries", type=int, default=10, help="A* queries per repetition.")
+    parser.add_argument("--risk-samples", type=int, default=500,
+                        help="Edges scored per predict_risk repetition.")
+    parser.add_argument("--od-pairs", type=int, default=10_000,
+                        help="Origin-destination pairs in the traffic_assignment case.")
+    parser.add_argument("--assignment-iterations", type=int, default=5,
+                        help="Frank-Wolfe iterations in the traffic_assignment case.")
+    parser.add_argument("--depot-candidates", type=int, default=1_000,
+                        help="Candidate depots in the depot_placement case (demand is twice that).")
+    parser.add_argument("--depots", type=int, default=5, help="Depots placed in the depot_placement case.")
+    parser.add_argument("--tour-stops", type=int, default=100, help="Drop points in the tour_planning case.")
+    parser.add_argument("--snap-points", type=int, default=100_000,
+                        help="Points snapped per repetition in the snap_points case.")
+    parser.add_argument("--metric-routes", type=int, default=10_000,
+                        help="Routes measured per repetition in the route_metrics case.")
+    parser.add_argument("--trials", type=int, default=100_000,
+                        help="Monte Carlo trials in the route_survival cases.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-bundled", action="store_true",
+                        help=f"Do not benchmark {BUNDLED_GRAPH_PATH}.")
+    parser.add_argument("--no-caps", action="store_true",
+                        help="Run every case on every graph, ignoring CASE_EDGE_CAPS.")
+    parser.add_argument("--output", help="Path of the JSON report.")
+    parser.add_argument("--compare", help="Previous JSON report to compare against.")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit.")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.sizes = QUICK_SIZES
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.list:
+        print("\n".join(build_cases()))
+        return
+
+    report = run_suite(args)
+
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR,
+        f"benchmark_{report['environment']['git_commit'] or 'nogit'}_{time.strftime('%Y%m%d_%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nBenchmark report saved to {output}")
+
+    if args.compare:
+        compare_reports(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
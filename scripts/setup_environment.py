@@ -4,14 +4,18 @@ import os
 # Add the project root to sys.path so we can import src
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.ai.risk_model import RiskModel
 from src.environment.map_downloader import (
     download_graph,
     save_custom_graph,
-    # download_boundaries,
+    download_boundaries,
 )
+from src.environment.graph_cache import GraphCache
 from src.environment.graph_enricher import enrich_graph
+from src.environment.graph_slimmer import slim_graph
+from src.environment.warm_start import build_snapshot, save_snapshot
 from src.utils.visualizer import visualize_graph_static
-from config import MAP_CENTER_LAT, MAP_CENTER_LON, MAP_DEFAULT_RADIUS
+from config import MAP_CENTER_LAT, MAP_CENTER_LON, MAP_DEFAULT_RADIUS, WARM_START_PATH
 
 
 def main():
@@ -20,25 +24,31 @@ def main():
 
     print("=== Environment Setup Started ===")
 
-    # 1. Download Graph (uses default coordinates from config)
-    G = download_graph()
+    # 1. Download Graph (default area from config, as the app's GraphCache keys it)
+    key = GraphCache().quantize(MAP_CENTER_LAT, MAP_CENTER_LON, MAP_DEFAULT_RADIUS)
+    G = download_graph(location=key[:2], dist=key[2])
 
     # 2. Download Boundaries
-    # boundaries = download_boundaries()
+    boundaries = download_boundaries(location=key[:2])
 
     if G is not None:
-        # 3. Enrich
-        G = enrich_graph(G)
-
-        # 4. Save
+        # 3. Enrich (the model is stored in the snapshot for later downloads)
+        risk_model = RiskModel()
+        risk_model.train_on_synthetic_data()
+        G = enrich_graph(G, risk_model)
+        G = slim_graph(G)
+
+        # 4. Save, plus the app's warm-start snapshot (with boundaries, so
+        #    its first map needs no download at all)
         save_custom_graph(G, OUTPUT_GRAPH_PATH)
+        save_snapshot(build_snapshot(G, key, risk_model, boundaries), WARM_START_PATH)
 
         # 5. Visualize
         visualize_graph_static(
             G,
             OUTPUT_MAP_PATH,
             edge_color="#5474D0",
-            # boundaries_gdf=boundaries,
+            boundaries_gdf=boundaries,
             center_coords=(MAP_CENTER_LAT, MAP_CENTER_LON),
             radius=MAP_DEFAULT_RADIUS,
         )
@@ -0,0 +1,71 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from src.ai.alternatives import find_alternative_routes
+from src.ai.batch_routing import BatchRouter
+from src.ai.pathfinding import find_path_astar
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.graph_enricher import enrich_graph
+
+
+def test_alternatives_are_dissimilar():
+    print("Testing alternative routes...")
+    G = enrich_graph(generate_city_graph(2000, seed=9))
+    nodes = list(G.nodes())
+    start, end = nodes[5], nodes[-5]
+
+    for k in (3, 10):
+        routes = find_alternative_routes(G, start, end, k=k, weight_mode="balanced", min_dissimilarity=0.3)
+        assert 1 <= len(routes) <= k
+        optimal, _ = find_path_astar(G, start, end, weight_mode="balanced")
+        assert abs(routes[0]["stretch"] - 1.0) < 1e-9
+        assert len(routes[0]["path_nodes"]) == len(optimal)
+
+        edge_sets = []
+        for r in routes:
+            path = r["path_nodes"]
+            assert path[0] == start and path[-1] == end and len(set(path)) == len(path)
+            assert all(G.has_edge(u, v) for u, v in zip(path, path[1:]))
+            assert type(r["stretch"]) is float and r["stretch"] <= 1.5 + 1e-9 and r["path_coords"]
+            edge_sets.append({(u, v): G[u][v][0]["length"] for u, v in zip(path, path[1:])})
+
+        for i, a in enumerate(edge_sets):
+            for b in edge_sets[i + 1:]:
+                shared = sum(length for edge, length in a.items() if edge in b)
+                assert shared <= 0.7 * min(sum(b.values()), sum(a.values())) + 1e-6
+        print(f"PASS: k={k} gave {len(routes)} routes, stretches {[round(r['stretch'], 2) for r in routes]}.")
+
+
+def test_penalized_router_matches_rebuild():
+    print("Testing penalized router copies...")
+    G = enrich_graph(generate_city_graph(1000, seed=9))
+    router = BatchRouter(G, "balanced")
+    slots = np.arange(0, router.arrays.n_edges, 7)
+    penalized = router.copy()
+    penalized.penalize(slots, 1.5)
+    weights = router.weights.copy()
+    weights[slots] *= 1.5
+    rebuilt = BatchRouter(G, weights=weights)
+    assert (penalized.matrix != rebuilt.matrix).nnz == 0
+    assert (router.matrix != BatchRouter(G, "balanced").matrix).nnz == 0  # original untouched
+    assert np.isclose(penalized.route(0, 50)[1], rebuilt.route(0, 50)[1])
+    print("PASS: Re-weighted matrix equals a rebuilt one.")
+
+
+def test_unreachable():
+    print("Testing unreachable destination...")
+    G = enrich_graph(generate_city_graph(1000, seed=9))
+    G.add_node(-1, x=0.0, y=0.0)
+    assert find_alternative_routes(G, list(G.nodes())[0], -1) == []
+    print("PASS: No routes to an isolated node.")
+
+
+if __name__ == "__main__":
+    test_alternatives_are_dissimilar()
+    test_penalized_router_matches_rebuild()
+    test_unreachable()
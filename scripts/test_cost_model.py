@@ -0,0 +1,111 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import tempfile
+
+import numpy as np
+
+from config import ENEMY_ZONES
+from src.ai.cost_model import mode_weight_matrix, mode_weights, register_weight_mode, weight_coefficients, weight_modes
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import calculate_edge_weights, calculate_single_edge_weight, find_path_astar
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.graph_enricher import enrich_graph
+from src.roles import ArmyRole, CustomRole, RescuerRole, load_custom_roles
+
+
+def test_builtin_modes_keep_their_formulas():
+    print("Testing built-in weight modes...")
+    G = enrich_graph(generate_city_graph(1000, seed=2))
+    a = get_graph_arrays(G)
+    expected = {
+        "safe": a.length * (1 + 100 * a.risk_level),
+        "balanced": a.length * (1 + 5 * a.risk_level),
+        "efficient": a.length * (1 + a.resource_cost),
+        "fast": a.length,
+    }
+    for mode, weights in expected.items():
+        assert np.allclose(calculate_edge_weights(a, mode), weights, rtol=1e-12)
+        u, v, k = a.edge_keys[0]
+        assert np.isclose(calculate_single_edge_weight(G.edges[u, v, k], mode), weights[0], rtol=1e-12)
+
+    matrix, _ = mode_weight_matrix(a)
+    assert mode_weight_matrix(a)[0] is matrix
+    print("PASS: All modes come from one cached weight matrix.")
+
+
+def test_custom_role_from_config():
+    print("Testing custom roles...")
+    G = enrich_graph(generate_city_graph(1000, seed=2))
+    a = get_graph_arrays(G)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "roles.json")
+        with open(filepath, "w") as f:
+            json.dump([
+                {"name": "Medic", "coefficients": {"base": 1, "enemy_probability": 50}},
+                {"name": "Broken", "coefficients": {"speed": 3}},
+            ], f)
+        roles = load_custom_roles(filepath)
+
+    assert [r.name for r in roles] == ["Medic"]
+    medic = roles[0]
+    assert medic.cost_coefficients["enemy_probability"] == 50
+    assert np.allclose(mode_weights(a, medic.weight_mode), a.length * (1 + 50 * a.enemy_probability))
+
+    nodes = list(G.nodes())
+    path, _ = find_path_astar(G, nodes[0], nodes[-1], weight_mode=medic.weight_mode)
+    assert path[0] == nodes[0] and path[-1] == nodes[-1]
+    print("PASS: Custom role routes without code changes.")
+
+
+def test_decide_path_passes_blocked_zones():
+    print("Testing decide_path with blocked zones...")
+    calls = []
+
+    def pathfinder(G, start, end, weight_mode, blocked_zones=None):
+        calls.append((weight_mode, blocked_zones))
+        return None, None
+
+    RescuerRole().decide_path(None, 1, 2, pathfinder, blocked_zones=ENEMY_ZONES)
+    ArmyRole().decide_path(None, 1, 2, pathfinder, blocked_zones=ENEMY_ZONES)
+    assert calls == [("balanced", ENEMY_ZONES), ("safe", ENEMY_ZONES)]
+    assert ArmyRole().avoids_zones and not CustomRole("Scout", {"base": 1}).avoids_zones
+    print("PASS: Blocked zones reach the pathfinder.")
+
+
+def test_invalid_modes_are_rejected():
+    print("Testing invalid cost coefficients and role names...")
+    bad = [
+        {"base": 1, "risk_level": -5},  # negative weights break Dijkstra
+        {"base": 0.5, "risk_level": 10},  # cheaper than length breaks the A* heuristic
+        {"risk_level": 10},  # base defaults to 0
+    ]
+    for coefficients in bad:
+        try:
+            register_weight_mode("test_invalid", coefficients)
+            assert False, f"{coefficients} was accepted"
+        except ValueError:
+            pass
+    assert "test_invalid" not in weight_modes()
+
+    CustomRole("Pathfinder", {"base": 1, "risk_level": 3})
+    CustomRole("Pathfinder", {"base": 1, "risk_level": 3})  # the same role again is fine
+    try:
+        CustomRole("PATHFINDER", {"base": 1})
+        assert False, "a role differing only in case was accepted"
+    except ValueError:
+        pass
+    assert weight_coefficients("custom:pathfinder") == (1.0, 3.0, 0.0, 0.0)
+    print("PASS: Negative, sub-length and clashing modes are rejected.")
+
+
+if __name__ == "__main__":
+    test_builtin_modes_keep_their_formulas()
+    test_custom_role_from_config()
+    test_decide_path_passes_blocked_zones()
+    test_invalid_modes_are_rejected()
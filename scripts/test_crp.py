@@ -0,0 +1,146 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import random
+
+import numpy as np
+
+from src.ai.batch_routing import BatchRouter
+from src.ai.cost_model import register_weight_mode
+from src.ai.crp import CRPRouter, partition_nodes
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import calculate_edge_weights
+from src.environment.graph_enricher import enrich_graph
+from src.environment.synthetic_city import generate_city_graph
+
+
+def _graph(n_edges=4000, seed=4):
+    random.seed(seed)
+    return enrich_graph(generate_city_graph(n_edges, seed=seed))
+
+
+def _check_routes(G, crp, metric, weights, pairs):
+    """Every CRP route is a connected path costing what full Dijkstra finds."""
+    a = crp.arrays
+    _, expected = BatchRouter(G, weights=weights).routes(pairs[:, 0], pairs[:, 1])
+    for (s, t), cost in zip(pairs, expected):
+        route, found = crp.route(s, t, metric)
+        if np.isinf(cost):
+            assert route is None and np.isinf(found)
+            continue
+        assert np.isclose(found, cost), (s, t, found, cost)
+        if s != t:
+            assert a.edge_u[route[0]] == s and a.edge_v[route[-1]] == t
+            assert np.all(a.edge_v[route[:-1]] == a.edge_u[route[1:]])
+            assert np.isclose(weights[route].sum(), cost)
+
+
+def test_partition_is_nested():
+    print("Testing the multi-level partition...")
+    G = _graph()
+    levels = partition_nodes(get_graph_arrays(G), (32, 256))
+    assert len(levels) == 2
+    fine, coarse = levels
+    assert np.bincount(fine).max() <= 32 and np.bincount(coarse).max() <= 256
+    # Every fine cell lies inside one coarse cell
+    for cell in range(fine.max() + 1):
+        assert len(np.unique(coarse[fine == cell])) == 1
+    print(f"PASS: {fine.max() + 1} cells inside {coarse.max() + 1}")
+
+
+def test_routes_match_dijkstra():
+    print("Testing overlay queries against full-graph Dijkstra...")
+    G = _graph()
+    crp = CRPRouter(G, cell_sizes=(32, 256))
+    pairs = np.random.default_rng(0).integers(0, crp.arrays.n_nodes, (60, 2))
+    pairs[0, 1] = pairs[0, 0]
+    for mode in ("safe", "efficient", "fast"):
+        crp.customize_mode(mode)
+        _check_routes(G, crp, mode, calculate_edge_weights(crp.arrays, mode), pairs)
+    print("PASS: Same costs as Dijkstra for every mode")
+
+
+def test_partial_recustomization():
+    print("Testing re-customization after a zone is blocked...")
+    G = _graph()
+    crp = CRPRouter(G, cell_sizes=(32, 256))
+    crp.customize_mode("safe")
+    a = crp.arrays
+    zones = [(float(np.median(a.y)), float(np.median(a.x)), 150, "Checkpoint")]
+    weights = calculate_edge_weights(a, "safe", zones)
+
+    stats = crp.customize("safe", weights)
+    assert 0 < stats["cells"][0] < stats["total_cells"][0]
+    pairs = np.random.default_rng(1).integers(0, a.n_nodes, (60, 2))
+    _check_routes(G, crp, "safe", weights, pairs)
+
+    # Same cliques as customizing the blocked weights from scratch
+    crp.customize("fresh", weights)
+    for updated, fresh in zip(crp.metrics["safe"].cliques, crp.metrics["fresh"].cliques):
+        assert np.array_equal(updated, fresh)
+
+    # A pricier edge only touches the cell it lies in (and its parents if cliques move)
+    weights = weights.copy()
+    weights[np.flatnonzero(np.isfinite(weights))[0]] *= 3
+    stats = crp.customize("safe", weights)
+    assert stats["cells"][0] == 1
+    _check_routes(G, crp, "safe", weights, pairs)
+    print(f"PASS: Re-customized {stats['cells']} of {stats['total_cells']} cells")
+
+
+def test_recustomize_without_cell_changes():
+    print("Testing re-customization that touches no fine cell...")
+    G = _graph()
+    crp = CRPRouter(G, cell_sizes=(32, 256))
+    a, ov = crp.arrays, crp.overlay
+    weights = calculate_edge_weights(a, "fast").copy()
+    crp.customize("m", weights)
+    assert crp.customize("m", weights)["cells"] == [0, 0]
+
+    fine, coarse = ov.cells
+    u, v = a.edge_u, a.edge_v
+    pairs = np.random.default_rng(3).integers(0, a.n_nodes, (40, 2))
+    # A cut edge between fine cells of one coarse cell, then one between coarse cells
+    cuts = [((fine[u] != fine[v]) & (coarse[u] == coarse[v]), [0, 1]), (coarse[u] != coarse[v], [0, 0])]
+    for cut, expected in cuts:
+        weights[np.flatnonzero(cut)[0]] *= 3
+        assert crp.customize("m", weights)["cells"] == expected
+        _check_routes(G, crp, "m", weights, pairs)
+    print("PASS: Cut-edge updates re-customized only the enclosing cells")
+
+
+def test_new_role_needs_no_partition():
+    print("Testing a newly registered role mode...")
+    G = _graph()
+    crp = CRPRouter(G, cell_sizes=(32, 256))
+    overlay = crp.overlay
+    register_weight_mode("crp_test_medic", {"base": 1.0, "risk_level": 20.0, "enemy_probability": 5.0})
+    crp.customize_mode("crp_test_medic")
+    assert crp.overlay is overlay
+    pairs = np.random.default_rng(2).integers(0, crp.arrays.n_nodes, (40, 2))
+    _check_routes(G, crp, "crp_test_medic", calculate_edge_weights(crp.arrays, "crp_test_medic"), pairs)
+    print("PASS: New mode routed on the existing partition")
+
+
+def test_parallel_customization():
+    print("Testing parallel customization...")
+    G = _graph(2000)
+    serial = CRPRouter(G, cell_sizes=(32, 256))
+    parallel = CRPRouter(G, cell_sizes=(32, 256), workers=2)
+    serial.customize_mode("balanced")
+    parallel.customize_mode("balanced")
+    for a, b in zip(serial.metrics["balanced"].cliques, parallel.metrics["balanced"].cliques):
+        assert np.array_equal(a, b)
+    print("PASS: Worker processes give the same cliques")
+
+
+if __name__ == "__main__":
+    test_partition_is_nested()
+    test_routes_match_dijkstra()
+    test_partial_recustomization()
+    test_recustomize_without_cell_changes()
+    test_new_role_needs_no_partition()
+    test_parallel_customization()
@@ -0,0 +1,93 @@
+import sys
+import os
+import itertools
+import json
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import networkx as nx
+import numpy as np
+
+from src.ai.facility_location import (
+    build_cost_matrix,
+    export_depot_plan,
+    place_depots,
+    solve_max_coverage,
+    solve_p_median,
+)
+from src.ai.pathfinding import calculate_single_edge_weight
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.graph_enricher import enrich_graph
+
+
+def test_cost_matrix_matches_dijkstra():
+    print("Testing depot cost matrix...")
+    G = enrich_graph(generate_city_graph(600, seed=5))
+    nodes = list(G.nodes())
+    candidates, demand = nodes[:7], nodes[100:140]
+
+    costs = build_cost_matrix(G, candidates, demand, weight_mode="safe")
+    weight = lambda u, v, d: min(calculate_single_edge_weight(e, "safe") for e in d.values())
+    for i, c in enumerate(candidates):
+        lengths = nx.single_source_dijkstra_path_length(G, c, weight=weight)
+        expected = [lengths.get(d, np.inf) for d in demand]
+        assert np.allclose(costs[i], expected)
+    # Fewer demand points than candidates: trees grow on the reversed graph
+    flipped = build_cost_matrix(G, demand, candidates, weight_mode="safe")
+    assert flipped.shape == (len(demand), len(candidates))
+    print("PASS: Cost matrix matches networkx Dijkstra in both directions")
+
+
+def test_solvers_against_brute_force():
+    print("Testing depot solvers...")
+    rng = np.random.default_rng(3)
+    for _ in range(5):
+        costs = rng.random((10, 30)) * 100
+        weights = rng.integers(1, 5, 30)
+
+        selected, value, _ = solve_p_median(costs, 3, weights)
+        best = min(costs[list(c)].min(axis=0) @ weights for c in itertools.combinations(range(10), 3))
+        assert value <= best * 1.1
+        # Swap local optimum: no single exchange improves the solution
+        for pos, c in itertools.product(range(3), range(10)):
+            swapped = selected.copy()
+            swapped[pos] = c
+            assert costs[swapped].min(axis=0) @ weights >= value - 1e-9
+
+        _, covered, _ = solve_max_coverage(costs, 3, 25, weights)
+        best = max(
+            weights[(costs[list(c)] <= 25).any(axis=0)].sum()
+            for c in itertools.combinations(range(10), 3)
+        )
+        assert covered >= best * 0.9
+    print("PASS: Greedy + swap reaches a swap-optimal solution near the optimum")
+
+
+def test_place_depots_and_export():
+    print("Testing depot plan...")
+    G = enrich_graph(generate_city_graph(600, seed=5))
+    nodes = list(G.nodes())
+    plan = place_depots(
+        G, nodes[::10], nodes, 4, objective="max_coverage", weight_mode="fast", radius=1500
+    )
+
+    assert len(plan["depots"]) == 4 and len(set(plan["depots"])) == 4
+    assert set(plan["assignment"]) == set(nodes)
+    assert 0 < plan["covered"] <= 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plan.geojson")
+        export_depot_plan(plan, path)
+        with open(path) as f:
+            geojson = json.load(f)
+    kinds = [f["properties"]["kind"] for f in geojson["features"]]
+    assert kinds.count("depot") == 4 and kinds.count("demand") == len(nodes)
+    print(f"PASS: 4 depots cover {plan['covered']:.0%} of {len(nodes)} nodes")
+
+
+if __name__ == "__main__":
+    test_cost_matrix_matches_dijkstra()
+    test_solvers_against_brute_force()
+    test_place_depots_and_export()
@@ -0,0 +1,107 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import gc
+import pickle
+import tracemalloc
+
+from src.ai.spatial_index import get_spatial_index
+from src.environment.graph_cache import GraphCache, bbox_from_point, derived_graph_bytes, estimate_graph_bytes
+from src.environment.graph_enricher import enrich_graph
+from src.environment.synthetic_city import generate_city_graph
+
+CENTER = (23.738113, 90.395857)
+
+
+def _loader(calls):
+    def load(lat, lon, radius):
+        calls.append((lat, lon, radius))
+        # A grid comfortably larger than the requested box
+        return generate_city_graph(4 * (radius // 45) ** 2, center=(lat, lon), seed=len(calls))
+
+    return load
+
+
+def test_quantized_keys_share_graphs():
+    print("Testing quantized cache keys...")
+    cache = GraphCache(grid=50.0, radius_step=100)
+    calls = []
+    G = cache.get(*CENTER, 740, _loader(calls))
+    # A few meters off and a slightly different radius hit the same entry
+    assert cache.get(CENTER[0] + 0.00003, CENTER[1] - 0.00002, 790, _loader(calls)) is G
+    assert len(calls) == 1 and calls[0][2] == 800
+    assert cache.stats()["hits"] == 1
+    print("PASS: Nearby requests reuse one graph")
+
+
+def test_smaller_radius_cut_from_cached_graph():
+    print("Testing subgraph reuse...")
+    cache = GraphCache()
+    calls = []
+    big = cache.get(*CENTER, 1000, _loader(calls))
+    small = cache.get(*CENTER, 400, _loader(calls))
+    assert len(calls) == 1 and cache.stats()["subgraph_hits"] == 1
+    assert 0 < small.number_of_nodes() < big.number_of_nodes()
+
+    north, south, east, west = bbox_from_point(*cache.quantize(*CENTER, 400))
+    for _, d in small.nodes(data=True):
+        assert south <= d["y"] <= north and west <= d["x"] <= east
+    u, v, k = next(iter(small.edges(keys=True)))
+    assert small.edges[u, v, k] == big.edges[u, v, k]
+
+    # Outside the cached box means a new download
+    cache.get(CENTER[0] + 0.05, CENTER[1], 400, _loader(calls))
+    assert len(calls) == 2
+    print("PASS: Smaller radii are cut out instead of downloaded")
+
+
+def test_lru_eviction_by_bytes():
+    print("Testing byte-bounded LRU eviction...")
+    calls = []
+    load = _loader(calls)
+    size = estimate_graph_bytes(load(*CENTER, 500))
+    cache = GraphCache(max_bytes=int(2.5 * size))
+    first = cache.get(CENTER[0] + 0.1, CENTER[1], 500, load)
+    cache.get(CENTER[0] + 0.2, CENTER[1], 500, load)
+    cache.get(CENTER[0] + 0.1, CENTER[1], 500, load)  # first becomes most recent
+    cache.get(CENTER[0] + 0.3, CENTER[1], 500, load)
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["graphs"] == 2
+    assert stats["bytes"] <= cache.max_bytes
+    assert cache.get(CENTER[0] + 0.1, CENTER[1], 500, load) is first
+    print("PASS: Least recently used graph evicted within the byte budget")
+
+
+def test_size_estimate_matches_memory():
+    print("Testing graph size estimates...")
+    data = pickle.dumps(enrich_graph(generate_city_graph(3000, center=CENTER, seed=3)))
+    get_spatial_index(pickle.loads(data))  # imports and warm-up outside the measurement
+    gc.collect()
+    tracemalloc.start()
+    G = pickle.loads(data)
+    gc.collect()
+    graph_bytes = tracemalloc.get_traced_memory()[0]
+    get_spatial_index(G)
+    derived_bytes = tracemalloc.get_traced_memory()[0] - graph_bytes
+    tracemalloc.stop()
+
+    estimate = estimate_graph_bytes(G)
+    assert 0.75 < estimate / graph_bytes < 1.25, (estimate, graph_bytes)
+    assert 0.75 < derived_graph_bytes(G) / derived_bytes < 1.25, (derived_graph_bytes(G), derived_bytes)
+
+    cache = GraphCache()
+    cache.put(cache.quantize(*CENTER, 500), G)
+    assert cache.total_bytes == estimate + derived_graph_bytes(G)
+    print(f"PASS: Estimated {estimate / 1e6:.2f} MB for {graph_bytes / 1e6:.2f} MB, "
+          f"derived {derived_graph_bytes(G) / 1e6:.2f} MB for {derived_bytes / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    test_quantized_keys_share_graphs()
+    test_smaller_radius_cut_from_cached_graph()
+    test_lru_eviction_by_bytes()
+    test_size_estimate_matches_memory()
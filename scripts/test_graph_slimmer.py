@@ -0,0 +1,108 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import copy
+
+import numpy as np
+from shapely.geometry import LineString
+
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import slot_path_coords
+from src.ai.spatial_index import get_spatial_index
+from src.environment.graph_slimmer import (
+    PACKED_GEOMETRY_KEY,
+    edge_coords,
+    measure_graph_bytes,
+    slim_graph,
+)
+from src.environment.synthetic_city import generate_city_graph
+
+
+def _tagged_graph():
+    G = generate_city_graph(400, seed=3, with_geometry=True)
+    for i, (u, v, k, data) in enumerate(G.edges(keys=True, data=True)):
+        data["osmid"] = 1000 + i
+        data["reversed"] = False
+        data["name"] = "".join(["Road ", str(i % 7)])  # equal, but separate objects
+        if i % 3 == 0:
+            data.pop("geometry", None)  # some straight edges
+    for _, data in G.nodes(data=True):
+        data["street_count"] = 3
+        data["highway"] = "traffic_signals"
+    return G
+
+
+def test_prune_and_intern():
+    print("Testing attribute pruning and interning...")
+    G = slim_graph(_tagged_graph(), report=False)
+    names = {}
+    for _, _, data in G.edges(data=True):
+        assert "osmid" not in data and "reversed" not in data and "geometry" not in data
+        assert "risk_level" in data or "length" in data
+        assert names.setdefault(data["name"], data["name"]) is data["name"]
+    for _, data in G.nodes(data=True):
+        assert set(data) <= {"x", "y", "street_count"}
+    print("PASS: Unused attributes dropped, equal strings share one object")
+
+
+def test_packed_geometry_matches():
+    print("Testing packed geometry...")
+    raw = _tagged_graph()
+    G = slim_graph(copy.deepcopy(raw), report=False)
+    packed = G.graph[PACKED_GEOMETRY_KEY]
+    assert len(packed) == sum("geometry" in d for _, _, d in raw.edges(data=True))
+    for u, v, k, data in raw.edges(keys=True, data=True):
+        expected = data.get("geometry")
+        coords = edge_coords(G, G.edges[u, v, k])
+        if expected is None:
+            assert coords is None
+        else:
+            assert np.array_equal(np.asarray(coords), np.asarray(expected.coords))
+    lines = packed.linestrings([0, len(packed) - 1])
+    assert all(isinstance(line, LineString) for line in lines)
+
+    # Re-slimming keeps the packed shapes
+    again = slim_graph(copy.deepcopy(G), report=False)
+    for u, v, k, data in G.edges(keys=True, data=True):
+        a, b = edge_coords(G, data), edge_coords(again, again.edges[u, v, k])
+        assert (a is None) == (b is None) and (a is None or np.array_equal(a, b))
+    print("PASS: Packed coordinates equal the original LineStrings")
+
+
+def test_routing_unchanged():
+    print("Testing routes and snapping on a slimmed graph...")
+    raw = _tagged_graph()
+    G = slim_graph(copy.deepcopy(raw), report=False)
+    slots = list(range(0, get_graph_arrays(raw).n_edges, 5))
+    assert slot_path_coords(G, get_graph_arrays(G), slots) == slot_path_coords(raw, get_graph_arrays(raw), slots)
+
+    points = np.random.default_rng(0).uniform(size=(50, 2))
+    a = get_graph_arrays(raw)
+    lat = a.y.min() + points[:, 0] * np.ptp(a.y)
+    lon = a.x.min() + points[:, 1] * np.ptp(a.x)
+    before = get_spatial_index(raw).nearest_edges(lat, lon)
+    after = get_spatial_index(G).nearest_edges(lat, lon)
+    for key in before:
+        assert np.allclose(before[key], after[key])
+    print("PASS: Path coordinates and nearest edges unchanged")
+
+
+def test_bytes_reduced():
+    print("Testing memory report...")
+    G = _tagged_graph()
+    before = measure_graph_bytes(G)
+    slim_graph(G)
+    after = measure_graph_bytes(G)
+    assert after["bytes_per_edge"] < before["bytes_per_edge"]
+    assert after["bytes_per_node"] < before["bytes_per_node"]
+    print(f"PASS: {before['bytes_per_edge']:.0f} -> {after['bytes_per_edge']:.0f} bytes/edge")
+
+
+if __name__ == "__main__":
+    test_prune_and_intern()
+    test_packed_geometry_matches()
+    test_routing_unchanged()
+    test_bytes_reduced()
@@ -0,0 +1,83 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import networkx as nx
+import shapely
+
+from config import ENEMY_ZONES
+from src.ai.batch_routing import BatchRouter
+from src.ai.cost_model import register_weight_mode
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.isochrone import clear_isochrone_cache, compute_isochrone, compute_isochrones
+from src.ai.pathfinding import calculate_edge_weights, calculate_single_edge_weight
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.graph_enricher import enrich_graph
+from src.utils import profiler
+
+
+def test_isochrone_matches_dijkstra():
+    print("Testing isochrones...")
+    G = enrich_graph(generate_city_graph(2000, seed=12))
+    source = list(G.nodes())[len(G) // 2]
+    budgets = [300, 800, 1500]
+
+    results = compute_isochrones(G, source, budgets, weight_mode="efficient")
+    costs = nx.single_source_dijkstra_path_length(
+        G, source, cutoff=max(budgets),
+        weight=lambda u, v, d: min(calculate_single_edge_weight(e, "efficient") for e in d.values()),
+    )
+    for budget, iso in zip(budgets, results):
+        expected = {n for n, c in costs.items() if c <= budget}
+        assert set(iso["nodes"]) == expected
+        assert all(c <= budget for c in iso["costs"])
+    assert len(results[0]["nodes"]) < len(results[1]["nodes"]) < len(results[2]["nodes"])
+
+    polygon = results[2]["polygon"]
+    inside = shapely.intersects_xy(polygon, [G.nodes[n]["x"] for n in results[2]["nodes"]],
+                                 [G.nodes[n]["y"] for n in results[2]["nodes"]])
+    assert inside.all()
+    assert results[1]["polygon"].area < polygon.area
+    print(f"PASS: Reachable sets {[len(r['nodes']) for r in results]} match Dijkstra.")
+
+
+def test_isochrone_cache():
+    print("Testing isochrone cache...")
+    G = enrich_graph(generate_city_graph(1000, seed=12))
+    source = list(G.nodes())[0]
+    clear_isochrone_cache()
+    first = compute_isochrone(G, source, 500, "safe", ENEMY_ZONES)
+
+    profiler.enable()
+    try:
+        recorder = profiler.activate()
+        again = compute_isochrone(G, source, 500, "safe", ENEMY_ZONES)
+    finally:
+        profiler.disable()
+    assert again is first
+    assert recorder.counters.get("isochrone.cache_hits") == 1
+    assert compute_isochrone(G, source, 500, "safe") is not first
+    print("PASS: Same (source, mode, budget, zones) is served from the cache.")
+
+    # New coefficients for a mode, or a router with other weights, search again
+    register_weight_mode("isochrone_test", {"base": 1.0})
+    before = compute_isochrone(G, source, 500, "isochrone_test")
+    register_weight_mode("isochrone_test", {"base": 1.0, "risk_level": 100.0})
+    after = compute_isochrone(G, source, 500, "isochrone_test")
+    assert after is not before and len(after["nodes"]) < len(before["nodes"])
+
+    router = BatchRouter(G, weights=calculate_edge_weights(get_graph_arrays(G), "fast") * 2)
+    halved = compute_isochrones(G, source, [500], "fast", router=router)[0]
+    assert halved["nodes"] == compute_isochrone(G, source, 250, "fast")["nodes"]
+    assert compute_isochrones(G, source, [500], "fast", router=router)[0] is halved
+    assert len(compute_isochrone(G, source, 500, "fast")["nodes"]) > len(halved["nodes"])
+    clear_isochrone_cache(G)
+    assert compute_isochrones(G, source, [500], "fast", router=router)[0] is not halved
+    print("PASS: Mode coefficients and caller routers are part of the cache key.")
+
+
+if __name__ == "__main__":
+    test_isochrone_matches_dijkstra()
+    test_isochrone_cache()
@@ -0,0 +1,91 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import random
+import threading
+import time
+
+from src.ai.risk_model import RiskModel
+from src.environment.load_pipeline import LoadPipeline, street_index
+from src.environment.synthetic_city import generate_city_graph
+
+
+def _graph_loader(delay=0.0):
+    def download(location, dist):
+        time.sleep(delay)
+        G = generate_city_graph(400, center=location, seed=5, with_geometry=True)
+        for i, (_, _, data) in enumerate(G.edges(data=True)):
+            data["name"] = f"Street {i % 9}"
+        return G
+
+    return download
+
+
+def test_stages_overlap_and_publish_early():
+    print("Testing staged loading...")
+    random.seed(0)
+    release = threading.Event()
+
+    def boundaries(location):
+        release.wait(10)
+        return None
+
+    pipeline = LoadPipeline(
+        23.7, 90.4, 500,
+        risk_model_state=RiskModel().get_state(),
+        download=_graph_loader(),
+        boundaries=boundaries,
+    )
+    # Streets, enrichment and indexes finish while boundaries still download
+    deadline = time.time() + 30
+    while "index" not in pipeline.results and time.time() < deadline:
+        time.sleep(0.01)
+    states = {row["stage"]: row["state"] for row in pipeline.status()}
+    assert states["boundaries"] == "running" and not pipeline.done
+    assert states["streets"] == states["enrich"] == states["index"] == "done"
+    assert len(pipeline.results["streets"]["geojson"]["features"]) == pipeline.results["graph"].number_of_edges()
+
+    release.set()
+    assert pipeline.wait(10)
+    G = pipeline.results["graph"]
+    assert all("risk_level" in d for _, _, d in G.edges(data=True))
+    assert street_index(G) is pipeline.results["streets"]["street_index"]
+    assert set(street_index(G)) == {f"Street {i}" for i in range(9)}
+    assert all(row["seconds"] is not None for row in pipeline.status())
+    print("PASS: " + pipeline.summary())
+
+
+def test_downloads_run_concurrently():
+    print("Testing concurrent downloads...")
+    start = time.perf_counter()
+    pipeline = LoadPipeline(
+        23.7, 90.4, 500,
+        risk_model_state=RiskModel().get_state(),
+        download=_graph_loader(delay=0.5),
+        boundaries=lambda location: time.sleep(0.5),
+    )
+    assert pipeline.wait(30)
+    elapsed = time.perf_counter() - start
+    rows = {row["stage"]: row for row in pipeline.status()}
+    assert rows["boundaries"]["start_s"] < rows["graph"]["start_s"] + rows["graph"]["seconds"]
+    assert elapsed < rows["graph"]["seconds"] + rows["boundaries"]["seconds"] + rows["enrich"]["seconds"] + rows["index"]["seconds"]
+    print(f"PASS: Loaded in {elapsed:.2f}s with overlapping downloads")
+
+
+def test_failed_download():
+    print("Testing a failed download...")
+    pipeline = LoadPipeline(23.7, 90.4, 500, download=lambda location, dist: None, boundaries=lambda location: None)
+    assert pipeline.wait(30)
+    states = {row["stage"]: row["state"] for row in pipeline.status()}
+    assert pipeline.results["graph"] is None
+    assert states["streets"] == states["enrich"] == states["index"] == "skipped"
+    print("PASS: Later stages skipped, pipeline finishes")
+
+
+if __name__ == "__main__":
+    test_stages_overlap_and_publish_early()
+    test_downloads_run_concurrently()
+    test_failed_download()
@@ -0,0 +1,108 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.ai import mission_narrator
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """Answers generateContent requests like the Gemini REST API."""
+
+    delay = 0.0
+    requests = 0
+
+    def do_POST(self):
+        StubGeminiHandler.requests += 1
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["contents"][0]["parts"][0]["text"]
+        time.sleep(StubGeminiHandler.delay)
+
+        role = prompt.split("Role: ")[1].split("\n")[0]
+        reply = {"candidates": [{"content": {"parts": [{"text": f" Stub briefing for {role}. "}]}}]}
+        data = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGeminiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mission_narrator.GEMINI_API_URL = f"http://127.0.0.1:{server.server_port}/v1beta"
+    mission_narrator.LLM_ENABLED = True
+    mission_narrator.clear_briefing_cache()
+    StubGeminiHandler.requests = 0
+    return server
+
+
+def test_briefing_within_budget_is_cached():
+    print("Testing fast LLM response...")
+    server = _start_stub_server()
+    try:
+        StubGeminiHandler.delay = 0.0
+        briefing, final = mission_narrator.request_briefing("Army", "A", "B", 12, 3, budget=5)
+        print(f"Briefing: {briefing}")
+        assert final and briefing == "Stub briefing for Army."
+
+        again, final = mission_narrator.request_briefing("Army", "A", "B", 12, 3, budget=5)
+        assert final and again == briefing
+        assert StubGeminiHandler.requests == 1
+        print("PASS: AI briefing returned and served from cache.")
+    finally:
+        server.shutdown()
+
+
+def test_slow_llm_falls_back_then_swaps_in():
+    print("\nTesting slow LLM response...")
+    server = _start_stub_server()
+    try:
+        StubGeminiHandler.delay = 0.5
+        start = time.perf_counter()
+        briefing, final = mission_narrator.request_briefing("Rescuer", "A", "B", 7, 2, budget=0.05)
+        elapsed = time.perf_counter() - start
+        print(f"Fallback after {elapsed * 1000:.0f} ms: {briefing}")
+        assert not final
+        assert elapsed < 0.4
+        assert "Stub" not in briefing
+
+        # The placeholder stays stable while the request is pending
+        placeholder, _ = mission_narrator.request_briefing("Rescuer", "A", "B", 7, 2, budget=0)
+        assert placeholder == briefing
+
+        deadline = time.time() + 5
+        while not final and time.time() < deadline:
+            time.sleep(0.05)
+            briefing, final = mission_narrator.request_briefing("Rescuer", "A", "B", 7, 2, budget=0)
+        assert final and briefing == "Stub briefing for Rescuer."
+        assert StubGeminiHandler.requests == 1
+        print("PASS: Template shown immediately, AI briefing swapped in later.")
+    finally:
+        server.shutdown()
+
+
+def test_unreachable_llm_uses_template():
+    print("\nTesting unreachable LLM...")
+    _start_stub_server().shutdown()
+    mission_narrator.GEMINI_API_URL = "http://127.0.0.1:9/v1beta"
+    briefing, final = mission_narrator.request_briefing("Volunteer", "A", "B", 3, 1, budget=5)
+    print(f"Briefing: {briefing}")
+    assert final and "A" in briefing and "B" in briefing
+    print("PASS: Template briefing used when the API fails.")
+
+
+if __name__ == "__main__":
+    test_briefing_within_budget_is_cached()
+    test_slow_llm_falls_back_then_swaps_in()
+    test_unreachable_llm_uses_template()
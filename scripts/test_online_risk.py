@@ -0,0 +1,162 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import random
+
+import numpy as np
+
+from src.ai.batch_routing import BatchRouter
+from src.ai.cost_model import mode_weights
+from src.ai.crp import CRPRouter
+from src.ai.graph_arrays import GraphArrays, get_graph_arrays
+from src.ai.isochrone import compute_isochrones
+from src.ai.online_risk import OnlineRiskUpdater
+from src.ai.pathfinding import calculate_edge_weights, find_path_astar
+from src.ai.risk_model import RiskModel
+from src.environment.graph_enricher import enrich_graph
+from src.environment.synthetic_city import generate_city_graph
+
+
+def _setup(n_edges=3000, seed=6):
+    random.seed(seed)
+    model = RiskModel()
+    G = enrich_graph(generate_city_graph(n_edges, seed=seed), model)
+    return G, model
+
+
+def _edges_of(G, highway, count=3):
+    a = get_graph_arrays(G)
+    return [key for key in a.edge_keys if G.edges[key].get("highway") == highway][:count]
+
+
+def test_partial_fit_follows_reports():
+    print("Testing RiskModel.partial_fit...")
+    G, model = _setup()
+    hostile = [G.edges[e] for e in _edges_of(G, "residential")]
+    safe = [G.edges[e] for e in _edges_of(G, "primary")]
+    before_hostile, before_safe = model.predict_risk(hostile[0]), model.predict_risk(safe[0])
+
+    model.partial_fit(hostile, [1, 1, 1])
+    model.partial_fit(safe, [0, 0, 0])
+    assert model.predict_risk(hostile[0]) > before_hostile
+    assert model.predict_risk(safe[0]) < before_safe
+    features = model.feature_matrix(hostile + safe)
+    assert np.allclose(model.predict_risks(features), [model.predict_risk(d) for d in hostile + safe])
+    print(f"PASS: Hostile {before_hostile} -> {model.predict_risk(hostile[0])}, "
+          f"safe {before_safe} -> {model.predict_risk(safe[0])}")
+
+
+def test_report_pushes_only_large_changes():
+    print("Testing targeted re-scoring...")
+    G, model = _setup()
+    a = get_graph_arrays(G)
+    mode_weights(a, "safe")  # cached before the update, refreshed in place
+    before = a.risk_level.copy()
+    updater = OnlineRiskUpdater(model, threshold=0.05)
+
+    stats = updater.report(G, _edges_of(G, "primary"), hostile=False)
+    moved = np.flatnonzero(a.risk_level != before)
+    assert stats["rescored"] == len(moved) and 0 < len(moved) < a.n_edges
+    predicted = model.predict_risks(model.feature_matrix([G.edges[k] for k in a.edge_keys]))
+    assert np.all(np.abs(predicted - before)[moved] > 0.05)
+    assert np.array_equal(a.risk_level[moved], predicted[moved])
+
+    # Graph dicts, arrays and cached weights all agree with a full rebuild
+    fresh = GraphArrays(G)
+    assert np.array_equal(fresh.risk_level, a.risk_level)
+    assert np.array_equal(fresh.enemy_probability, a.enemy_probability)
+    assert np.allclose(mode_weights(a, "safe"), mode_weights(fresh, "safe"))
+    assert get_graph_arrays(G) is a  # nothing was rebuilt
+    assert updater.sync(G)["rescored"] == 0
+    print(f"PASS: {stats['rescored']} of {a.n_edges} edges re-scored in {stats['seconds'] * 1e3:.1f} ms")
+
+
+def test_routes_see_the_update():
+    print("Testing update-to-route visibility...")
+    G, model = _setup()
+    a = get_graph_arrays(G)
+    source, target = a.node_ids[0], a.node_ids[-1]
+    crp = CRPRouter(G, cell_sizes=(32, 256))
+    crp.customize_mode("safe")
+    crp.customize_mode("fast")  # does not depend on risk, nothing to re-customize
+    isochrones = compute_isochrones(G, source, [500.0])
+
+    updater = OnlineRiskUpdater(model)
+    path, _ = find_path_astar(G, source, target, weight_mode="safe")
+    route = list(zip(path[:-1], path[1:]))
+    edges = [(u, v, min(G[u][v], key=lambda k: G[u][v][k]["length"])) for u, v in route]
+    stats = updater.report(G, edges, hostile=True, routers=[crp])
+    assert stats["rescored"] > 0
+
+    # Every consumer routes on the new weights right after report() returns
+    weights = calculate_edge_weights(GraphArrays(G), "safe")  # rebuilt from the edge dicts
+    assert np.allclose(calculate_edge_weights(a, "safe"), weights)
+    router = BatchRouter(G, weights=weights)
+    s, t = a.node_index[source], a.node_index[target]
+    _, expected = router.route(s, t)
+    assert np.isclose(crp.route(s, t, "safe")[1], expected)
+    fast = calculate_edge_weights(a, "fast")
+    assert np.isclose(crp.route(s, t, "fast")[1], BatchRouter(G, weights=fast).route(s, t)[1])
+    path, _ = find_path_astar(G, source, target, weight_mode="safe")
+    slots = router.pair_slot(a.nodes_to_indices(path[:-1]), a.nodes_to_indices(path[1:]))
+    assert np.isclose(weights[slots].sum(), expected)
+    assert compute_isochrones(G, source, [500.0])[0] is not isochrones[0]
+    print(f"PASS: Routes updated {stats['seconds'] * 1e3:.1f} ms after the report "
+          f"(fit {stats['fit_s'] * 1e3:.1f}, score {stats['score_s'] * 1e3:.1f}, push {stats['push_s'] * 1e3:.1f} ms)")
+
+
+def test_failed_refresh_is_retried():
+    print("Testing a router refresh that fails once...")
+    G, model = _setup()
+    crp = CRPRouter(G, cell_sizes=(32, 256))
+    crp.customize_mode("safe")
+    refresh = crp.refresh
+
+    def failing_refresh():
+        raise RuntimeError("worker died")
+
+    crp.refresh = failing_refresh
+    updater = OnlineRiskUpdater(model)
+    try:
+        updater.report(G, _edges_of(G, "residential"), hostile=True, routers=[crp])
+        assert False, "refresh error was swallowed"
+    except RuntimeError:
+        pass
+
+    crp.refresh = refresh
+    stats = updater.sync(G, routers=[crp])
+    assert stats["rescored"] == 0  # graph already updated, only the router catches up
+    a = get_graph_arrays(G)
+    weights = calculate_edge_weights(a, "safe")
+    assert np.array_equal(crp.metrics["safe"].weights, weights)
+    s, t = 0, a.n_nodes - 1
+    assert np.isclose(crp.route(s, t, "safe")[1], BatchRouter(G, weights=weights).route(s, t)[1])
+    print("PASS: The stale overlay was refreshed on retry")
+
+
+def test_other_graphs_catch_up():
+    print("Testing sync of another graph...")
+    G, model = _setup()
+    random.seed(7)
+    H = enrich_graph(generate_city_graph(1500, seed=7), RiskModel.from_state(model.get_state()))
+    updater = OnlineRiskUpdater(model)
+    assert updater.sync(H)["rescored"] == 0  # nothing reported yet
+
+    updater.report(G, _edges_of(G, "residential"), hostile=True)
+    stats = updater.sync(H)
+    a = get_graph_arrays(H)
+    predicted = model.predict_risks(model.feature_matrix([H.edges[k] for k in a.edge_keys]))
+    assert stats["rescored"] > 0 and np.all(np.abs(predicted - a.risk_level) <= updater.threshold)
+    assert updater.sync(H)["rescored"] == 0
+    print(f"PASS: {stats['rescored']} edges of the second graph caught up")
+
+
+if __name__ == "__main__":
+    test_partial_fit_follows_reports()
+    test_report_pushes_only_large_changes()
+    test_routes_see_the_update()
+    test_failed_refresh_is_retried()
+    test_other_graphs_catch_up()
@@ -0,0 +1,99 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import networkx as nx
+
+from config import PARETO_EPSILON
+from src.ai.pareto import find_pareto_routes
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.graph_enricher import enrich_graph
+from src.utils import profiler
+
+
+def _objective(name):
+    def weight(u, v, d):
+        if name == "risk":
+            return min(e["length"] * e["risk_level"] for e in d.values())
+        return min(e[name] for e in d.values())
+    return weight
+
+
+def test_exact_front():
+    print("Testing exact Pareto front...")
+    G = enrich_graph(generate_city_graph(2000, seed=8))
+    nodes = list(G.nodes())
+    start, end = nodes[3], nodes[-3]
+
+    routes = find_pareto_routes(G, start, end, epsilon=0.0, max_labels_per_node=10**6)
+    assert routes
+    for name in ("length", "risk", "resource_cost"):
+        best = nx.shortest_path_length(G, start, end, weight=_objective(name))
+        assert abs(min(r[name] for r in routes) - best) < 1e-6 * max(best, 1.0)
+
+    vectors = [(r["length"], r["risk"], r["resource_cost"]) for r in routes]
+    for i, p in enumerate(vectors):
+        for j, q in enumerate(vectors):
+            assert i == j or not all(x <= y for x, y in zip(q, p)), "front contains a dominated route"
+    for r in routes:
+        assert r["path_nodes"][0] == start and r["path_nodes"][-1] == end
+        assert len(r["path_coords"]) >= len(r["path_nodes"])
+    print(f"PASS: {len(routes)} non-dominated routes, extremes match single-objective searches.")
+
+
+def _run_with_stats(G, start, end, **kwargs):
+    """find_pareto_routes plus the labels/routes/truncated arguments of its span."""
+    recorder = profiler.activate(enabled=True)
+    try:
+        routes = find_pareto_routes(G, start, end, **kwargs)
+    finally:
+        profiler.activate()
+    (stats,) = [args for name, _, _, _, args in recorder.spans if name == "find_pareto_routes"]
+    return routes, stats
+
+
+def _assert_valid_and_near_front(G, routes, start, end, exact, epsilon):
+    """Every route is a start -> end path not dominated by the exact front beyond epsilon."""
+    factor = (1.0 + epsilon) * (1.0 + 1e-9)
+    front = [(r["length"], r["risk"], r["resource_cost"]) for r in exact]
+    for r in routes:
+        path = r["path_nodes"]
+        assert path[0] == start and path[-1] == end
+        assert all(G.has_edge(u, v) for u, v in zip(path, path[1:]))
+        lengths = [[d["length"] for d in G[u][v].values()] for u, v in zip(path, path[1:])]
+        assert sum(map(min, lengths)) - 1e-6 <= r["length"] <= sum(map(max, lengths)) + 1e-6
+        costs = (r["length"], r["risk"], r["resource_cost"])
+        assert not any(all(q * factor < c for q, c in zip(p, costs)) for p in front), "route dominated beyond epsilon"
+
+
+def test_safeguards():
+    print("Testing epsilon-dominance and label caps...")
+    G = enrich_graph(generate_city_graph(2000, seed=8))
+    nodes = list(G.nodes())
+    start, end = nodes[3], nodes[-3]
+    exact = find_pareto_routes(G, start, end, epsilon=0.0, max_labels_per_node=10**6)
+    thinned = find_pareto_routes(G, start, end, epsilon=0.05)
+    assert 1 <= len(thinned) <= len(exact)
+    assert min(r["length"] for r in thinned) <= min(r["length"] for r in exact) * 1.05
+    _assert_valid_and_near_front(G, thinned, start, end, exact, 0.05)
+    print(f"PASS: epsilon=0.05 keeps {len(thinned)} of {len(exact)} routes.")
+
+    full, full_stats = _run_with_stats(G, start, end)
+    assert not full_stats["truncated"]
+    capped, stats = _run_with_stats(G, start, end, max_labels=50)
+    assert stats["truncated"] and stats["labels"] == 50 and capped == []
+
+    # A cap late in the search still returns the routes found so far
+    cap = int(full_stats["labels"] * 0.85)
+    partial, stats = _run_with_stats(G, start, end, max_labels=cap)
+    assert stats["truncated"] and stats["labels"] == cap
+    assert 1 <= len(partial) <= len(full)
+    _assert_valid_and_near_front(G, partial, start, end, exact, PARETO_EPSILON)
+    print(f"PASS: Search stops at the label cap ({cap} labels, {len(partial)} of {len(full)} routes).")
+
+
+if __name__ == "__main__":
+    test_exact_front()
+    test_safeguards()
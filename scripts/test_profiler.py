@@ -0,0 +1,119 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import networkx as nx
+
+from src.utils import profiler
+from src.ai.pathfinding import find_path_astar
+
+
+def _line_graph():
+    G = nx.MultiDiGraph()
+    for i in range(4):
+        G.add_node(i, x=0.0001 * i, y=0.0)
+    for i in range(3):
+        G.add_edge(i, i + 1, length=10, risk_level=0.0)
+    return G
+
+
+def test_disabled_records_nothing():
+    print("Testing disabled profiler...")
+    profiler.disable()
+    recorder = profiler.activate()
+
+    with profiler.span("noop"):
+        pass
+    profiler.count("noop.counter")
+    find_path_astar(_line_graph(), 0, 3)
+
+    assert recorder.spans == []
+    assert recorder.counters == {}
+    print("PASS: Nothing recorded while disabled.")
+
+
+def test_astar_span_and_counters():
+    print("\nTesting A* instrumentation...")
+    profiler.enable()
+    try:
+        recorder = profiler.activate()
+        path_nodes, _ = find_path_astar(_line_graph(), 0, 3, weight_mode="fast")
+    finally:
+        profiler.disable()
+
+    assert path_nodes == [0, 1, 2, 3]
+    (name, _, duration_ns, _, args), = recorder.spans
+    print(f"Span: {name} {duration_ns / 1e6:.3f} ms {args}")
+    assert name == "find_path_astar"
+    assert args["edges_relaxed"] == 3
+    assert args["nodes_expanded"] == 3
+    assert recorder.counters["astar.edges_relaxed"] == 3
+
+    trace = recorder.to_chrome_trace()
+    phases = {event["ph"] for event in trace["traceEvents"]}
+    assert phases == {"X", "C"}
+    print("PASS: Span, counters and Chrome trace recorded.")
+
+
+def test_enabled_flag_is_per_context():
+    print("\nTesting per-context enabled flag...")
+    profiler.disable()
+    recorders = {}
+
+    def session(name, enabled):
+        recorders[name] = profiler.activate(enabled=enabled)
+        with profiler.span("rerun"):
+            pass
+
+    threads = [threading.Thread(target=session, args=(name, name == "on")) for name in ("on", "off")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [span[0] for span in recorders["on"].spans] == ["rerun"]
+    assert recorders["off"].spans == []
+    assert not profiler.is_enabled()
+    print("PASS: One context's toggle does not affect another or the default.")
+
+
+def test_bind_propagates_to_executors():
+    print("\nTesting executor propagation...")
+    profiler.disable()
+
+    def session():
+        recorder = profiler.activate(enabled=True)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(profiler.bind(find_path_astar), _line_graph(), 0, 3).result()
+            executor.submit(find_path_astar, _line_graph(), 0, 3).result()
+        return recorder
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        recorder = executor.submit(session).result()
+    assert [span[0] for span in recorder.spans] == ["find_path_astar"]
+    print("PASS: Bound work records to the caller's recorder, unbound work does not.")
+
+
+def test_default_recorder_is_bounded():
+    print("\nTesting bounded recorder...")
+    recorder = profiler.Recorder(max_events=3)
+    for i in range(5):
+        recorder.add_span(f"span{i}", 0, 1, {})
+        recorder.add_count("counter", 1)
+    assert [span[0] for span in recorder.spans] == ["span2", "span3", "span4"]
+    assert len(recorder.counter_samples) == 3 and recorder.counters["counter"] == 5
+    assert profiler._default_recorder.spans.maxlen == profiler.DEFAULT_RECORDER_EVENTS
+    print("PASS: Only the latest events are kept.")
+
+
+if __name__ == "__main__":
+    test_disabled_records_nothing()
+    test_astar_span_and_counters()
+    test_enabled_flag_is_per_context()
+    test_bind_propagates_to_executors()
+    test_default_recorder_is_bounded()
@@ -0,0 +1,64 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pickle
+import tempfile
+
+import networkx as nx
+
+from src.ai.q_learning import QLearningAgent
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.graph_enricher import enrich_graph
+
+
+def test_q_learning_reaches_goal():
+    print("Testing Q-Learning agent...")
+    G = enrich_graph(generate_city_graph(1000, seed=7))
+    nodes = list(G.nodes())
+    goal = nodes[len(nodes) // 2]
+
+    agent = QLearningAgent(G, goal, seed=7)
+    progress = []
+    success_rate = agent.train(episodes=3000, progress_callback=lambda d, t: progress.append(d))
+    print(f"Success rate during training: {success_rate:.2f}")
+    assert progress[-1] == 3000
+
+    reached = sum(agent.get_path(n) is not None for n in nodes if n != goal)
+    print(f"Policy reaches the goal from {reached}/{len(nodes) - 1} nodes")
+    assert reached >= 0.9 * (len(nodes) - 1)
+
+    path = agent.get_path(nodes[0])
+    assert path[0] == nodes[0] and path[-1] == goal
+    assert all(G.has_edge(u, v) for u, v in zip(path, path[1:]))
+    print("PASS: Learned policy leads to the goal.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "q_table.npz")
+        agent.save(filepath)
+        restored = QLearningAgent.load(G, filepath)
+    assert restored.get_path(nodes[0]) == path
+    print("PASS: Q-table saved and restored.")
+
+
+def test_q_learning_covers_bundled_graph():
+    print("Testing Q-Learning coverage on data/processed_graph.pkl...")
+    with open(os.path.join(os.path.dirname(__file__), "..", "data", "processed_graph.pkl"), "rb") as f:
+        G = pickle.load(f)
+    nodes = list(G.nodes())
+
+    for goal in (nodes[len(nodes) // 3], nodes[2 * len(nodes) // 3]):
+        agent = QLearningAgent(G, goal, seed=1)
+        agent.train()
+        starts = nx.ancestors(G, goal)
+        missed = [n for n in starts if agent.get_path(n) is None]
+        print(f"Goal {goal}: policy misses {len(missed)}/{len(starts)} starts that can reach it")
+        assert len(missed) <= 0.01 * len(starts)
+    print("PASS: Greedy policy covers the bundled graph.")
+
+
+if __name__ == "__main__":
+    test_q_learning_reaches_goal()
+    test_q_learning_covers_bundled_graph()
@@ -0,0 +1,114 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import shapely
+from shapely.geometry import LineString, Point
+
+from src.ai.batch_routing import BatchRouter
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import find_path_astar
+from src.ai.route_metrics import edge_zone_exposure, route_metrics, route_slots
+from src.ai.spatial_index import get_spatial_index
+from src.environment.graph_enricher import enrich_graph
+from src.environment.synthetic_city import generate_city_graph
+
+
+def _graph_and_zones():
+    G = enrich_graph(generate_city_graph(1500, seed=5))
+    # Bend some edges so exposure has to follow the geometry
+    for i, (u, v, k) in enumerate(list(G.edges(keys=True))):
+        if i % 4 == 0:
+            x0, y0, x1, y1 = G.nodes[u]["x"], G.nodes[u]["y"], G.nodes[v]["x"], G.nodes[v]["y"]
+            G.edges[u, v, k]["geometry"] = LineString([(x0, y0), ((x0 + x1) / 2 + 0.0003, (y0 + y1) / 2), (x1, y1)])
+    a = get_graph_arrays(G)
+    lat, lon = float(a.y.mean()), float(a.x.mean())
+    # Two overlapping zones and one apart
+    zones = [
+        (lat, lon, 250, "A"),
+        (lat + 0.001, lon + 0.001, 200, "B"),
+        (lat - 0.004, lon - 0.003, 150, "C"),
+    ]
+    return G, zones
+
+
+def test_zone_exposure_matches_shapely():
+    print("Testing zone exposure against shapely...")
+    G, zones = _graph_and_zones()
+    a = get_graph_arrays(G)
+    index = get_spatial_index(G)
+    exposure = edge_zone_exposure(G, zones)
+
+    center = index._project([z[0] for z in zones], [z[1] for z in zones])
+    area = shapely.union_all([Point(c).buffer(z[2], quad_segs=512) for c, z in zip(center, zones)])
+    for slot in range(a.n_edges):
+        geometry = G.edges[a.edge_keys[slot]].get("geometry")
+        if geometry is not None:
+            lon, lat = np.asarray(geometry.coords).T
+        else:
+            u, v = a.edge_u[slot], a.edge_v[slot]
+            lon, lat = a.x[[u, v]], a.y[[u, v]]
+        line = LineString(index._project(lat, lon))
+        if line.length == 0:
+            continue
+        expected = line.intersection(area).length / line.length * a.length[slot]
+        assert abs(exposure[slot] - expected) <= 1e-3 * a.length[slot] + 1e-6, slot
+    assert exposure.sum() > 0
+    assert edge_zone_exposure(G, zones) is exposure
+    assert not edge_zone_exposure(G, []).any()
+    print("PASS: Exposure matches the shapely intersection")
+
+
+def test_metrics_match_loop():
+    print("Testing batch route metrics against a per-edge loop...")
+    G, zones = _graph_and_zones()
+    a = get_graph_arrays(G)
+    exposure = edge_zone_exposure(G, zones)
+    rng = np.random.default_rng(2)
+    router = BatchRouter(G, "safe")
+    routes, _ = router.routes(rng.integers(0, a.n_nodes, 200), rng.integers(0, a.n_nodes, 200))
+    routes.append(np.zeros(0, dtype=np.int64))  # source == target
+    routes.append(None)  # unreachable
+    metrics = route_metrics(G, routes, zones=zones, speed=4.0)
+
+    for i, slots in enumerate(routes):
+        slots = [] if slots is None else list(slots)
+        length = sum(a.length[s] for s in slots)
+        risk = sum(a.length[s] * a.risk_level[s] for s in slots)
+        assert np.isclose(metrics["length"][i], length)
+        assert np.isclose(metrics["risk"][i], risk)
+        assert np.isclose(metrics["resource_cost"][i], sum(a.resource_cost[s] for s in slots))
+        assert np.isclose(metrics["expected_encounters"][i], sum(a.enemy_probability[s] for s in slots))
+        assert np.isclose(metrics["zone_time"][i], sum(exposure[s] for s in slots) / 4.0)
+        assert metrics["edges"][i] == len(slots)
+        if slots:
+            worst = max(range(len(slots)), key=lambda j: (a.risk_level[slots[j]], -j))
+            assert metrics["max_risk_slot"][i] == slots[worst]
+            assert metrics["max_risk"][i] == a.risk_level[slots[worst]]
+        else:
+            assert metrics["max_risk_slot"][i] == -1
+    assert metrics["reachable"].tolist() == [True] * 201 + [False]
+    print("PASS: Metrics match the loop, including empty and missing routes")
+
+
+def test_route_slots_of_astar_path():
+    print("Testing route slots of a node path...")
+    G, _ = _graph_and_zones()
+    a = get_graph_arrays(G)
+    nodes = list(G.nodes())
+    path, _ = find_path_astar(G, nodes[0], nodes[-1], weight_mode="fast")
+    slots = route_slots(a, path)
+    assert a.edge_u[slots].tolist() == a.nodes_to_indices(path[:-1]).tolist()
+    assert a.edge_v[slots].tolist() == a.nodes_to_indices(path[1:]).tolist()
+    metrics = route_metrics(G, [slots])
+    assert metrics["length"][0] > 0
+    print("PASS: Node paths convert to edge slots")
+
+
+if __name__ == "__main__":
+    test_zone_exposure_matches_shapely()
+    test_metrics_match_loop()
+    test_route_slots_of_astar_path()
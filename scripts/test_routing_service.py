@@ -0,0 +1,96 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from src.ai.batch_routing import BatchRouter
+from src.ai.isochrone import compute_isochrones
+from src.ai.routing_service import RoutingService, attach_tables, share_tables
+from src.environment.graph_enricher import enrich_graph
+from src.environment.synthetic_city import generate_city_graph
+
+
+def _post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode())
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def test_shared_tables_round_trip():
+    print("Testing shared memory tables...")
+    tables = {"a": np.arange(10, dtype=np.int32), "b": np.random.default_rng(0).random((3, 4))}
+    block, manifest = share_tables(tables)
+    try:
+        other, views = attach_tables(block.name, manifest)
+        assert np.array_equal(views["a"], tables["a"]) and np.array_equal(views["b"], tables["b"])
+        assert not views["b"].flags.writeable
+        del views
+        other.close()
+    finally:
+        block.close()
+        block.unlink()
+    print("PASS: Arrays survive the shared block read-only")
+
+
+def test_service_matches_batch_router():
+    print("Testing routing service against BatchRouter...")
+    G = enrich_graph(generate_city_graph(1500, seed=9))
+    nodes = list(G.nodes())
+    rng = np.random.default_rng(4)
+    with RoutingService(G, workers=1, batch_window=0.05) as service:
+        host, port = service.serve("127.0.0.1", 0)
+        url = f"http://{host}:{port}"
+
+        # Many requests at once end up in shared batches
+        pairs = [(nodes[i], nodes[j]) for i, j in rng.integers(0, len(nodes), (40, 2))]
+        futures = [service.submit("route", {"source": s, "target": t, "weight_mode": "safe"}) for s, t in pairs]
+        router = BatchRouter(G, "safe")
+        _, costs = router.routes(router.arrays.nodes_to_indices([s for s, _ in pairs]),
+                                 router.arrays.nodes_to_indices([t for _, t in pairs]))
+        for future, cost, (source, target) in zip(futures, costs, pairs):
+            result = future.result(30)
+            assert result["found"] == np.isfinite(cost)
+            if result["found"]:
+                assert np.isclose(result["cost"], cost)
+                assert result["nodes"][0] == source and result["nodes"][-1] == target
+        assert service.stats.batches < len(pairs)
+
+        route = _post(url + "/route", {"source": nodes[0], "target": nodes[-1], "weight_mode": "fast"})
+        assert route["nodes"][0] == nodes[0] and route["nodes"][-1] == nodes[-1]
+        assert np.isclose(route["cost"], route["length"])
+        assert len(route["coords"]) == 2 * (len(route["nodes"]) - 1)
+
+        matrix = _post(url + "/matrix", {"sources": nodes[:3], "targets": nodes[3:7], "weight_mode": "balanced"})
+        router = BatchRouter(G, "balanced")
+        _, costs = router.routes(np.repeat(router.arrays.nodes_to_indices(nodes[:3]), 4),
+                                 np.tile(router.arrays.nodes_to_indices(nodes[3:7]), 3))
+        expected = [[c if np.isfinite(c) else None for c in row] for row in costs.reshape(3, 4).tolist()]
+        assert np.allclose(np.array(matrix["costs"], dtype=float), np.array(expected, dtype=float), equal_nan=True)
+
+        iso = _post(url + "/isochrone", {"source": nodes[5], "budgets": [300, 900], "weight_mode": "fast"})
+        reference = compute_isochrones(G, nodes[5], [300, 900], "fast")
+        assert [i["nodes"] for i in iso["isochrones"]] == [len(r["nodes"]) for r in reference]
+
+        try:
+            _post(url + "/route", {"source": "nowhere", "target": nodes[0]})
+            assert False, "unknown node accepted"
+        except urllib.error.HTTPError as e:
+            assert e.code == 400
+
+        with urllib.request.urlopen(url + "/metrics") as response:
+            metrics = json.loads(response.read())
+        assert metrics["by_kind"]["route"]["count"] >= 1
+        assert metrics["latency"]["p99_ms"] >= metrics["latency"]["p50_ms"] > 0
+    print("PASS: Service answers match BatchRouter and isochrones")
+
+
+if __name__ == "__main__":
+    test_shared_tables_round_trip()
+    test_service_matches_batch_router()
@@ -0,0 +1,97 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import networkx as nx
+
+from simulations.disaster_response import DisasterResponseSimulation
+from simulations.engine import ARRIVED, UNREACHABLE, SimulationEngine
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.graph_enricher import enrich_graph
+from src.ai.pathfinding import calculate_single_edge_weight
+from src.roles import RescuerRole
+
+
+def test_agent_follows_shortest_route():
+    print("Testing simulation engine routes and timing...")
+    G = enrich_graph(generate_city_graph(1000, seed=3))
+    nodes = list(G.nodes())
+    start, goal = nodes[0], nodes[-1]
+
+    engine = SimulationEngine(G, speeds={"Rescuer": 10.0})
+    visited = []
+    engine.add_listener(lambda t, agent, node: visited.append(engine.arrays.node_ids[node]))
+    agent = engine.add_agent(RescuerRole(), start, goal, depart_time=60.0)
+    stats = engine.run()
+
+    def weight(u, v, d):
+        return min(calculate_single_edge_weight(e, "balanced") for e in d.values())
+
+    expected = nx.shortest_path(G, start, goal, weight=weight)
+    assert visited == expected
+    assert engine.status[agent] == ARRIVED
+    distance = engine.distance[agent]
+    assert abs(engine.arrival_times[agent] - (60.0 + distance / 10.0)) < 1e-6
+    assert stats["people_rescued"] == 2
+    print(f"PASS: Rescuer arrived after {engine.arrival_times[agent]:.0f}s over {distance:.0f}m.")
+
+
+def test_many_agents():
+    print("Testing simulation with many agents...")
+    G = enrich_graph(generate_city_graph(2000, seed=4))
+    simulation = DisasterResponseSimulation(G, blocked_zones=[])
+    simulation.populate(3000, seed=4)
+
+    # Stopping halfway and resuming gives the same result as one run
+    first = simulation.run(until=600.0)
+    assert simulation.engine.now == 600.0
+    results = simulation.run()
+    single = DisasterResponseSimulation(G, blocked_zones=[])
+    single.populate(3000, seed=4)
+    expected = single.run()
+    timing = ("wall_time", "speedup")
+    assert {k: v for k, v in results.items() if k not in timing} == {
+        k: v for k, v in expected.items() if k not in timing
+    }
+    assert results["wall_time"] > first["wall_time"]
+    assert results["speedup"] == results["simulated_time"] / results["wall_time"]
+
+    assert results["missions_completed"] == 3000
+    assert results["by_role"]["Army"]["agents"] == 1000
+    stats = simulation.get_statistics()
+    assert stats["people_rescued"] == 2 * 1000
+    assert stats["supplies_delivered"] == 10 * 1000
+    assert results["speedup"] > 1
+    print(f"PASS: {results['events']} events, {results['speedup']:.0f}x real time.")
+
+
+def test_unreachable_agent_is_routed_once():
+    print("Testing an agent without a route...")
+    G = enrich_graph(generate_city_graph(1000, seed=3))
+    first = next(iter(G.nodes()))
+    G.add_node("island", x=G.nodes[first]["x"], y=G.nodes[first]["y"])  # no edges
+    engine = SimulationEngine(G)
+    router = engine.router_for(RescuerRole())
+    calls = []
+
+    def counted(method):
+        def wrapper(*args, **kwargs):
+            calls.append(method.__name__)
+            return method(*args, **kwargs)
+        return wrapper
+
+    router.route, router.routes = counted(router.route), counted(router.routes)
+
+    agent = engine.add_agent(RescuerRole(), first, "island")
+    stats = engine.run()
+    assert engine.status[agent] == UNREACHABLE and stats["missions_unreachable"] == 1
+    assert calls == ["routes"]  # the prefetch; DEPART does not ask again
+    print("PASS: Unreachable agent routed once.")
+
+
+if __name__ == "__main__":
+    test_agent_follows_shortest_route()
+    test_many_agents()
+    test_unreachable_agent_is_routed_once()
@@ -0,0 +1,83 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import shapely
+from shapely.geometry import LineString
+
+from src.ai.spatial_index import SpatialIndex, get_spatial_index, snap_to_node
+from src.environment.synthetic_city import generate_city_graph
+
+
+def _graph_with_curves():
+    G = generate_city_graph(800, seed=21)
+    # Bend every third edge through an offset midpoint
+    for i, (u, v, k) in enumerate(list(G.edges(keys=True))):
+        if i % 3 == 0:
+            x0, y0, x1, y1 = G.nodes[u]["x"], G.nodes[u]["y"], G.nodes[v]["x"], G.nodes[v]["y"]
+            bend = ((x0 + x1) / 2 + 0.0004, (y0 + y1) / 2 - 0.0003)
+            G.edges[u, v, k]["geometry"] = LineString([(x0, y0), bend, (x1, y1)])
+    return G
+
+
+def _random_points(index, count, seed):
+    a = index.arrays
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(a.y.min() - 0.003, a.y.max() + 0.003, count)
+    lon = rng.uniform(a.x.min() - 0.003, a.x.max() + 0.003, count)
+    return lat, lon
+
+
+def test_nearest_nodes():
+    print("Testing nearest-node snapping...")
+    G = _graph_with_curves()
+    index = get_spatial_index(G)
+    lat, lon = _random_points(index, 500, seed=1)
+    nodes, distance = index.nearest_nodes(lat, lon)
+
+    nodes_xy = index._project(index.arrays.y, index.arrays.x)
+    points = index._project(lat, lon)
+    brute = np.hypot(*(points[:, None, :] - nodes_xy[None, :, :]).transpose(2, 0, 1))
+    assert np.allclose(distance, brute.min(axis=1))
+    assert snap_to_node(G, lat[0], lon[0]) == nodes[0]
+    assert get_spatial_index(G) is index
+    print("PASS: Nearest nodes match brute force")
+
+
+def test_nearest_edges_exact():
+    print("Testing nearest-edge snapping...")
+    G = _graph_with_curves()
+    index = SpatialIndex(G, max_piece_length=10.0)
+    a = index.arrays
+    lat, lon = _random_points(index, 400, seed=2)
+    result = index.nearest_edges(lat, lon)
+
+    # Brute force over every edge polyline in the same metric frame
+    lines = []
+    for key in a.edge_keys:
+        geometry = G.edges[key].get("geometry")
+        if geometry is None:
+            u, v = key[0], key[1]
+            geometry = LineString([(G.nodes[u]["x"], G.nodes[u]["y"]), (G.nodes[v]["x"], G.nodes[v]["y"])])
+        coords = np.array(geometry.coords)
+        lines.append(LineString(index._project(coords[:, 1], coords[:, 0])))
+    lines = np.array(lines, dtype=object)
+    points = shapely.points(index._project(lat, lon))
+    brute = np.array([shapely.distance(lines, p).min() for p in points])
+    assert np.allclose(result["distance"], brute, atol=1e-6)
+
+    # The projected point lies on the reported edge at the reported fraction
+    for i in range(0, 400, 37):
+        line = lines[result["slot"][i]]
+        snapped = shapely.points(index._project([result["lat"][i]], [result["lon"][i]]))[0]
+        assert line.distance(snapped) < 1e-6
+        assert abs(line.project(snapped, normalized=True) - result["fraction"][i]) < 1e-6
+    print("PASS: Nearest edge points match brute force")
+
+
+if __name__ == "__main__":
+    test_nearest_nodes()
+    test_nearest_edges_exact()
@@ -0,0 +1,62 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import find_path_astar
+from src.ai.route_metrics import route_slots
+from src.ai.survival import simulate_route_survival
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.graph_enricher import enrich_graph
+
+
+def _routes():
+    G = enrich_graph(generate_city_graph(1500, seed=17))
+    nodes = list(G.nodes())
+    routes = []
+    for mode in ("safe", "fast"):
+        path, _ = find_path_astar(G, nodes[3], nodes[-3], weight_mode=mode)
+        routes.append(path)
+    return G, routes
+
+
+def test_independent_matches_exact():
+    print("Testing Monte Carlo survival (independent edges)...")
+    G, routes = _routes()
+    a = get_graph_arrays(G)
+    result = simulate_route_survival(G, routes, trials=100_000, lethality=0.1, seed=3)
+
+    def within(value, estimate, ci):
+        # Twice the 95% half-width, so the check itself rarely fails by chance
+        return abs(value - estimate) <= ci[1] - ci[0]
+
+    for path, stats in zip(routes, result["routes"]):
+        p = a.enemy_probability[route_slots(a, path)]
+        assert within(np.prod(1 - 0.1 * p), stats["survival"], stats["survival_ci"])
+        assert within(p.sum(), stats["expected_encounters"], stats["encounters_ci"])
+        assert abs(stats["p_no_encounter"] - np.prod(1 - p)) < 0.01
+    print("PASS: Survival and expected encounters match the exact values")
+
+
+def test_correlation_and_pairing():
+    print("Testing correlated encounters and paired comparison...")
+    G, routes = _routes()
+    independent = simulate_route_survival(G, routes[:1], trials=50_000, seed=5)
+    correlated = simulate_route_survival(G, routes[:1], trials=50_000, correlation=0.8, seed=5)
+    a, b = independent["routes"][0], correlated["routes"][0]
+    # Same marginal probabilities, but encounters cluster: wider spread
+    assert abs(a["expected_encounters"] - b["expected_encounters"]) < 0.1 * a["expected_encounters"] + 0.05
+    assert np.diff(b["encounters_ci"])[0] > np.diff(a["encounters_ci"])[0]
+
+    twice = simulate_route_survival(G, [routes[0], routes[0]], trials=10_000, seed=1)
+    assert twice["pairwise"][0]["difference"] == 0.0
+    print("PASS: Correlation keeps the mean, widens the spread; identical routes pair exactly")
+
+
+if __name__ == "__main__":
+    test_independent_matches_exact()
+    test_correlation_and_pairing()
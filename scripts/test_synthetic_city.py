@@ -0,0 +1,81 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import networkx as nx
+import numpy as np
+
+from src.ai.pathfinding import haversine_array
+from src.environment.synthetic_city import ROAD_CLASSES, _add_unique_edges, generate_city_graph
+
+NODE_ATTRIBUTES = {"x", "y", "street_count"}
+EDGE_ATTRIBUTES = {"osmid", "highway", "lanes", "maxspeed", "name", "oneway", "reversed", "length"}
+
+
+def test_size_and_connectivity():
+    print("Testing generated city size and connectivity...")
+    for layout in ("grid", "delaunay"):
+        for n_edges in (5000, 50_000):
+            G = generate_city_graph(n_edges, layout=layout, seed=1)
+            assert abs(G.number_of_edges() - n_edges) <= 0.1 * n_edges, (layout, G.number_of_edges())
+            assert nx.is_strongly_connected(G)
+            assert nx.utils.graphs_equal(G, generate_city_graph(n_edges, layout=layout, seed=1))
+    print("PASS: Within 10% of the requested size, strongly connected, reproducible")
+
+
+def test_osm_attributes():
+    print("Testing OSM-like attributes...")
+    G = generate_city_graph(5000, seed=2, bridge_fraction=0.05, tunnel_fraction=0.05)
+    highways = {c[0] for c in ROAD_CLASSES}
+    for _, d in G.nodes(data=True):
+        assert NODE_ATTRIBUTES <= set(d)
+    for u, v, k, d in G.edges(keys=True, data=True):
+        assert EDGE_ATTRIBUTES <= set(d) and k == 0
+        assert d["highway"] in highways and d["length"] > 0
+        if not d["oneway"]:
+            assert G.has_edge(v, u)
+    assert any("bridge" in d for _, _, d in G.edges(data=True))
+    assert any("tunnel" in d for _, _, d in G.edges(data=True))
+
+    # Straight streets are as long as the chord
+    u, v, d = next(iter(G.edges(data=True)))
+    chord = haversine_array(G.nodes[u]["y"], G.nodes[u]["x"], G.nodes[v]["y"], G.nodes[v]["x"])
+    assert np.isclose(d["length"], chord)
+    print("PASS: Node and edge attributes as osmnx returns them")
+
+
+def test_geometry_lengths():
+    print("Testing edge geometry lengths...")
+    G = generate_city_graph(3000, seed=3, with_geometry=True)
+    for u, v, d in G.edges(data=True):
+        coords = np.asarray(d["geometry"].coords)
+        polyline = haversine_array(coords[:-1, 1], coords[:-1, 0], coords[1:, 1], coords[1:, 0]).sum()
+        assert np.isclose(d["length"], polyline)
+        assert tuple(coords[0]) == (G.nodes[u]["x"], G.nodes[u]["y"])
+        assert tuple(coords[-1]) == (G.nodes[v]["x"], G.nodes[v]["y"])
+        if G.has_edge(v, u):
+            assert np.isclose(G.edges[v, u, 0]["length"], d["length"])
+    print("PASS: Lengths follow the bent geometry, the same in both directions")
+
+
+def test_bulk_insert_matches_networkx():
+    print("Testing bulk edge insertion...")
+    u, v = [1, 2, 2, 3], [2, 1, 3, 1]
+    attrs = [{"length": float(i)} for i in range(4)]
+    fast, slow = nx.MultiDiGraph(), nx.MultiDiGraph()
+    fast.add_nodes_from([1, 2, 3])
+    slow.add_nodes_from([1, 2, 3])
+    _add_unique_edges(fast, u, v, attrs)
+    slow.add_edges_from(zip(u, v, [0] * 4, attrs))
+    assert nx.utils.graphs_equal(fast, slow)
+    assert list(fast.predecessors(1)) == list(slow.predecessors(1)) and fast.in_degree(1) == 2
+    print("PASS: Same graph as add_edges_from")
+
+
+if __name__ == "__main__":
+    test_size_and_connectivity()
+    test_osm_attributes()
+    test_geometry_lengths()
+    test_bulk_insert_matches_networkx()
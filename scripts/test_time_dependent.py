@@ -0,0 +1,109 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from config import ENEMY_PATROLS
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import blocked_edge_mask, find_path_astar
+from src.ai.online_risk import apply_risk_levels
+from src.ai.time_dependent import MovingZone, ZoneSchedule, find_path_time_dependent, get_zone_schedule
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.graph_enricher import enrich_graph
+
+
+def _setup():
+    G = enrich_graph(generate_city_graph(2000, seed=11))
+    a = get_graph_arrays(G)
+    # Two nodes on opposite sides of the city, roughly on the same row
+    west = int(np.argmin(a.x + np.abs(a.y - a.y.mean()) * 10))
+    east = int(np.argmax(a.x - np.abs(a.y - a.y.mean()) * 10))
+    return G, a, a.node_ids[west].item(), a.node_ids[east].item()
+
+
+def test_static_zones_match_blocked_mask():
+    print("Testing static zones in the schedule...")
+    G, a, _, _ = _setup()
+    center = (a.y.mean(), a.x.mean())
+    zones = [(center[0], center[1], 150, "Center"), (center[0] + 0.003, center[1], 80, "North")]
+    schedule = ZoneSchedule(G, zones)
+    for t in (-1e6, 0.0, 1e6):
+        assert np.array_equal(schedule.blocked_mask(t), blocked_edge_mask(a, zones))
+    print("PASS: Static zones block the same edges as blocked_edge_mask.")
+
+
+def test_zone_only_blocks_while_present():
+    print("Testing moving zones...")
+    G, a, west, east = _setup()
+    baseline, _ = find_path_astar(G, west, east, "fast")
+    midpoint = baseline[len(baseline) // 2]
+    lat, lon = G.nodes[midpoint]["y"], G.nodes[midpoint]["x"]
+
+    # A checkpoint on the direct route, active for ten minutes from t=600
+    checkpoint = MovingZone([(0, lat, lon)], 200, "Checkpoint", start=600, end=1200)
+    early, _, times = find_path_time_dependent(G, west, east, "fast", [checkpoint], depart_time=0)
+    assert early == baseline and times[0] == 0
+    print("PASS: Zone not yet active, direct route kept.")
+
+    late, _, _ = find_path_time_dependent(G, west, east, "fast", [checkpoint], depart_time=700)
+    assert late is not None and midpoint not in late
+    print("PASS: Active zone forces a detour.")
+
+    waited, _, times = find_path_time_dependent(
+        G, west, east, "fast", [checkpoint], depart_time=1150, max_wait=600
+    )
+    assert midpoint in waited
+    print(f"PASS: Waiting for the zone to close gives arrival at {times[-1]:.0f}s.")
+
+    # A patrol that sweeps across the route and is gone before we arrive
+    patrol = MovingZone([(0, lat + 0.02, lon), (100, lat, lon), (200, lat - 0.02, lon)], 150, "Patrol")
+    schedule = ZoneSchedule(G, [patrol])
+    assert schedule.affected_edges > 0
+    assert schedule.blocked_mask(100).sum() > 0 and schedule.blocked_mask(1000).sum() == 0
+    path, _, _ = find_path_time_dependent(G, west, east, "fast", schedule=schedule, depart_time=1000)
+    assert path == baseline
+    print("PASS: Patrol blocks edges only while passing.")
+
+
+def test_config_patrols_are_the_default():
+    print("Testing the configured patrols...")
+    G, a, west, east = _setup()
+    assert ZoneSchedule(G, ENEMY_PATROLS).affected_edges > 0
+    for depart_time in (0, 1000):
+        default = find_path_time_dependent(G, west, east, "fast", depart_time=depart_time)
+        assert default == find_path_time_dependent(G, west, east, "fast", ENEMY_PATROLS, depart_time=depart_time)
+    print("PASS: ENEMY_PATROLS are used when no zones are given.")
+
+
+def test_schedules_and_lists_are_cached():
+    print("Testing cached schedules...")
+    G, a, west, east = _setup()
+    center = (a.y.mean(), a.x.mean())
+    # Patrol given with list waypoints; equal zone lists share a schedule
+    zones = [([[0, center[0] - 0.002, center[1]], [3600, center[0] + 0.002, center[1]]], 100, "Patrol")]
+
+    schedule = get_zone_schedule(G, zones)
+    assert get_zone_schedule(G, [list(zones[0])]) is schedule
+    assert get_zone_schedule(G, []) is not schedule
+    cached = find_path_time_dependent(G, west, east, "safe", zones)
+    assert cached == find_path_time_dependent(G, west, east, "safe", zones, schedule=ZoneSchedule(G, zones))
+
+    # Changed risk levels reach the cached weight lists
+    path_nodes = cached[0]
+    on_path = set(zip(path_nodes, path_nodes[1:]))
+    slots = [slot for slot, (u, v, _) in enumerate(a.edge_keys) if (u, v) in on_path]
+    apply_risk_levels(G, slots, [1.0] * len(slots))
+    rerouted = find_path_time_dependent(G, west, east, "safe", zones)
+    assert rerouted == find_path_time_dependent(G, west, east, "safe", zones, schedule=ZoneSchedule(G, zones))
+    assert rerouted[0] != path_nodes
+    print("PASS: Schedules are reused per zones; weight changes are picked up.")
+
+
+if __name__ == "__main__":
+    test_static_zones_match_blocked_mask()
+    test_zone_only_blocks_while_present()
+    test_config_patrols_are_the_default()
+    test_schedules_and_lists_are_cached()
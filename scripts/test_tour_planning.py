@@ -0,0 +1,103 @@
+import sys
+import os
+import itertools
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import networkx as nx
+import numpy as np
+
+from src.ai.pathfinding import calculate_single_edge_weight
+from src.ai.tour_planning import build_cost_table, improve_sequence, plan_supply_tours
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.graph_enricher import enrich_graph
+from src.roles import VolunteerRole
+
+
+def _graph():
+    G = enrich_graph(generate_city_graph(1000, seed=8))
+    largest = max(nx.strongly_connected_components(G), key=len)
+    return G.subgraph(largest).copy()
+
+
+def test_cost_table():
+    print("Testing tour cost table...")
+    G = _graph()
+    nodes = list(G.nodes())[:12]
+    table = build_cost_table(G, nodes, "efficient")
+    weight = lambda u, v, d: min(calculate_single_edge_weight(e, "efficient") for e in d.values())
+    for i, u in enumerate(nodes):
+        lengths = nx.single_source_dijkstra_path_length(G, u, weight=weight)
+        assert np.allclose(table[i], [lengths[v] for v in nodes])
+    assert np.allclose(build_cost_table(G, nodes, "efficient", workers=2), table)
+    print("PASS: Cost table matches networkx, serial and pooled")
+
+
+def test_local_search_reaches_optimum():
+    print("Testing 2-opt / Or-opt...")
+    rng = np.random.default_rng(4)
+    for _ in range(5):
+        costs = rng.random((8, 8)) * 100  # asymmetric; 0 = depot, 7 = trip end
+        costs[7] = np.inf
+        start = [0] + list(rng.permutation(np.arange(1, 7))) + [7]
+        seq, _ = improve_sequence(costs, start)
+        cost = lambda s: costs[s[:-1], s[1:]].sum()
+        best = min(cost([0, *p, 7]) for p in itertools.permutations(range(1, 7)))
+        assert seq[0] == 0 and seq[-1] == 7 and sorted(seq[1:-1]) == list(range(1, 7))
+        assert cost(seq) <= cost(start) + 1e-9
+        assert cost(seq) <= best * 1.2
+    print("PASS: Local search keeps endpoints and lands near the optimum")
+
+
+def test_plan_supply_tours():
+    print("Testing supply tours...")
+    G = _graph()
+    nodes = list(G.nodes())
+    depot, stops = nodes[0], nodes[1::7][:60]
+    demands = np.random.default_rng(1).integers(1, 6, len(stops))
+
+    plan = VolunteerRole().plan_tour(G, depot, stops, demands=demands, capacity=25)
+    visited = [s for trip in plan["trips"] for s in trip["stops"]]
+    assert sorted(visited) == sorted(stops)
+    assert all(trip["load"] <= 25 for trip in plan["trips"])
+    for trip in plan["trips"]:
+        path = trip["path_nodes"]
+        assert path[0] == depot and path[-1] == depot
+        assert all(G.has_edge(u, v) for u, v in zip(path, path[1:]))
+        assert set(trip["stops"]) <= set(path)
+
+    single = plan_supply_tours(G, depot, stops)
+    assert len(single["trips"]) == 1 and single["total_cost"] <= plan["total_cost"] + 1e-6
+    print(f"PASS: {len(stops)} stops in {len(plan['trips'])} trips, capacity respected")
+
+
+def test_duplicate_stops_and_capacity():
+    print("Testing duplicate stops and oversized demands...")
+    G = _graph()
+    nodes = list(G.nodes())
+    depot, stops = nodes[0], nodes[1::7][:10]
+    demands = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+
+    # The depot and a repeated stop are dropped without shifting demands
+    plan = plan_supply_tours(G, depot, [depot] + stops + [stops[0]], demands=[5] + demands + [4], capacity=15)
+    expected = dict(zip(stops, demands))
+    expected[stops[0]] += 4
+    for trip in plan["trips"]:
+        assert trip["load"] == sum(expected[s] for s in trip["stops"]) <= 15
+    assert sorted(s for trip in plan["trips"] for s in trip["stops"]) == sorted(stops)
+
+    for bad in (demands[:-1], demands[:-1] + [16]):
+        try:
+            plan_supply_tours(G, depot, stops, demands=bad, capacity=15)
+            assert False, "invalid demands were accepted"
+        except ValueError:
+            pass
+    print("PASS: Demands follow their stops; bad demands are rejected")
+
+
+if __name__ == "__main__":
+    test_cost_table()
+    test_local_search_reaches_optimum()
+    test_plan_supply_tours()
+    test_duplicate_stops_and_capacity()
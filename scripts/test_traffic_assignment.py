@@ -0,0 +1,85 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from src.ai.traffic_assignment import TrafficAssignment, edge_capacities
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.graph_enricher import enrich_graph
+
+
+def _demand(G, count, seed):
+    rng = np.random.default_rng(seed)
+    nodes = np.array(list(G.nodes()))
+    return rng.choice(nodes, count).tolist(), rng.choice(nodes, count).tolist()
+
+
+def test_uncongested_matches_shortest_paths():
+    print("Testing free-flow assignment...")
+    G = enrich_graph(generate_city_graph(1000, seed=5))
+    origins, destinations = _demand(G, 200, seed=5)
+
+    ta = TrafficAssignment(G, "balanced", capacities=np.full(G.number_of_edges(), 1e9))
+    result = ta.assign(origins, destinations)
+    assert result["converged"] and result["iterations"] == 1
+    assert abs(result["total_cost"] - result["od_costs"].sum()) < 1e-6 * result["total_cost"]
+    print("PASS: Without congestion every trip takes its shortest path.")
+
+
+def test_congestion_spreads_flow():
+    print("Testing congested assignment...")
+    G = enrich_graph(generate_city_graph(2000, seed=6))
+    origins, destinations = _demand(G, 3000, seed=6)
+    capacities = edge_capacities(G) / 40
+
+    ta = TrafficAssignment(G, "balanced", capacities=capacities)
+    gaps = []
+    result = ta.assign(origins, destinations, max_iterations=30, progress_callback=lambda i, g: gaps.append(g))
+    print(f"Relative gap per iteration: {[round(g, 3) for g in gaps]}")
+    assert gaps == result["gaps"]
+    assert gaps[-1] < 0.5 * gaps[0]
+
+    # Every trip leaves its origin: flow out of the origins matches demand
+    a = ta.arrays
+    out_flow = np.bincount(a.edge_u, weights=result["flows"], minlength=a.n_nodes)
+    in_flow = np.bincount(a.edge_v, weights=result["flows"], minlength=a.n_nodes)
+    net = out_flow - in_flow
+    expected = np.bincount(a.nodes_to_indices(origins), minlength=a.n_nodes) - np.bincount(
+        a.nodes_to_indices(destinations), minlength=a.n_nodes
+    )
+    assert np.allclose(net, expected)
+
+    free_flow = TrafficAssignment(G, "balanced", capacities=capacities)
+    free_flow.assign(origins, destinations, max_iterations=0)
+    assert result["flows"].max() < free_flow.flows.max()
+    print("PASS: Congestion spreads flow while conserving demand.")
+
+    parallel = TrafficAssignment(G, "balanced", capacities=capacities, workers=2)
+    assert np.allclose(parallel.assign(origins, destinations, max_iterations=3)["flows"],
+                       TrafficAssignment(G, "balanced", capacities=capacities).assign(
+                           origins, destinations, max_iterations=3)["flows"])
+    print("PASS: Process pool gives the same flows.")
+
+
+def test_unassigned_demand():
+    print("Testing demand that cannot be assigned...")
+    G = enrich_graph(generate_city_graph(1000, seed=5))
+    origins, destinations = _demand(G, 50, seed=7)
+    first = next(iter(G.nodes()))
+    G.add_node("island", x=G.nodes[first]["x"], y=G.nodes[first]["y"])  # no edges
+    destinations[:3] = ["island"] * 3
+    demand = np.arange(1.0, 51.0) * 2.5
+
+    result = TrafficAssignment(G, "balanced").assign(origins, destinations, demand=demand)
+    assert np.all(np.isinf(result["od_costs"][:3]))
+    assert result["unassigned_demand"] == demand[:3].sum()
+    print(f"PASS: {result['unassigned_demand']} units of demand unassigned")
+
+
+if __name__ == "__main__":
+    test_uncongested_matches_shortest_paths()
+    test_congestion_spreads_flow()
+    test_unassigned_demand()
@@ -0,0 +1,75 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pickle
+import random
+import tempfile
+
+import numpy as np
+
+from measure_startup import HEAVY_MODULES, app_imports, run_fresh
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.risk_model import RiskModel
+from src.ai.spatial_index import SpatialIndex, get_spatial_index
+from src.environment.graph_enricher import enrich_graph
+from src.environment.graph_slimmer import slim_graph
+from src.environment.synthetic_city import generate_city_graph
+from src.environment.warm_start import build_snapshot, load_snapshot, save_snapshot
+
+
+def test_risk_model_state():
+    print("Testing risk model snapshot...")
+    random.seed(0)
+    model = RiskModel()
+    restored = RiskModel.from_state(model.get_state())
+    assert restored.is_trained
+    G = generate_city_graph(300, seed=1)
+    for _, _, data in G.edges(data=True):
+        assert restored.predict_risk(data) == model.predict_risk(data)
+    print("PASS: Restored model predicts like the trained one")
+
+
+def test_snapshot_round_trip():
+    print("Testing snapshot round trip...")
+    random.seed(0)
+    model = RiskModel()
+    G = slim_graph(enrich_graph(generate_city_graph(500, seed=2, with_geometry=True), model), report=False)
+    path = os.path.join(tempfile.mkdtemp(), "warm_start.pkl")
+    save_snapshot(build_snapshot(G, (23.7, 90.4, 500), model), path)
+
+    snapshot = load_snapshot(path)
+    H = snapshot["graph"]
+    assert snapshot["key"] == (23.7, 90.4, 500) and snapshot["boundaries"] is None
+    # Indexes come from the file, not rebuilt
+    assert get_graph_arrays(H) is snapshot["arrays"]
+    assert get_spatial_index(H) is snapshot["spatial_index"]
+
+    a = get_graph_arrays(H)
+    lat = np.linspace(a.y.min(), a.y.max(), 40)
+    lon = np.linspace(a.x.min(), a.x.max(), 40)
+    cached, fresh = get_spatial_index(H).nearest_edges(lat, lon), SpatialIndex(H).nearest_edges(lat, lon)
+    for key in fresh:
+        assert np.allclose(cached[key], fresh[key])
+
+    with open(path, "wb") as f:
+        pickle.dump({"version": -1}, f)
+    assert load_snapshot(path) is None
+    assert load_snapshot(path + ".missing") is None
+    print("PASS: Graph, indexes and model restored from the snapshot")
+
+
+def test_app_imports_stay_light():
+    print("Testing app imports...")
+    result = run_fresh("", app_imports())
+    assert result["heavy_modules"] == [], result["heavy_modules"]
+    print(f"PASS: App modules import in {result['import_s']:.2f}s without {', '.join(HEAVY_MODULES)}")
+
+
+if __name__ == "__main__":
+    test_risk_model_state()
+    test_snapshot_round_trip()
+    test_app_imports_stay_light()
@@ -1,49 +1,103 @@
 """
 Disaster Response Simulation
 """
+import random
 from typing import Dict, List
+
 import networkx as nx
-from src.environment import Environment
-from src.roles import Army, Rescuer, Volunteer
+
+from simulations.engine import SimulationEngine
+from simulations.trace import TraceWriter
+from src.roles import ArmyRole, RescuerRole, VolunteerRole
 
 
 class DisasterResponseSimulation:
     """Simulate disaster response scenarios."""
-    
-    def __init__(self, environment: Environment):
-        self.env = environment
+
+    def __init__(self, graph: nx.MultiDiGraph, blocked_zones=None):
+        self.graph = graph
+        self.engine = SimulationEngine(graph, blocked_zones=blocked_zones)
         self.missions = []
         self.stats = {
             'people_rescued': 0,
             'supplies_delivered': 0,
             'total_distance': 0.0
         }
-        
-    def run_rescue_mission(self, rescuer: Rescuer, start: int, goal: int):
-        """Run a rescue mission."""
-        path = rescuer.make_decision(start, goal)
-        
-        if path:
-            rescued = rescuer.count_rescues(path)
-            self.stats['people_rescued'] += rescued
-            self.missions.append({
-                'type': 'rescue',
-                'path': path,
-                'rescued': rescued
-            })
-            
-    def run_supply_mission(self, volunteer: Volunteer, start: int, goal: int):
-        """Run a supply delivery mission."""
-        path = volunteer.make_decision(start, goal)
-        
-        if path:
-            efficiency = volunteer.calculate_efficiency(path)
-            self.missions.append({
-                'type': 'supply',
-                'path': path,
-                'efficiency': efficiency
-            })
-            
+
+    def run_rescue_mission(self, start: int, goal: int, depart_time: float = 0.0):
+        """Schedule a Rescuer mission."""
+        agent = self.engine.add_agent(RescuerRole(), start, goal, depart_time, task='rescue')
+        self.missions.append({'type': 'rescue', 'agent': agent})
+        return agent
+
+    def run_supply_mission(self, start: int, goal: int, depart_time: float = 0.0):
+        """Schedule a Volunteer supply delivery."""
+        agent = self.engine.add_agent(VolunteerRole(), start, goal, depart_time, task='supply')
+        self.missions.append({'type': 'supply', 'agent': agent})
+        return agent
+
+    def run_patrol_mission(self, start: int, goal: int, depart_time: float = 0.0):
+        """Schedule an Army patrol (routes around blocked zones)."""
+        agent = self.engine.add_agent(ArmyRole(), start, goal, depart_time, task='patrol')
+        self.missions.append({'type': 'patrol', 'agent': agent})
+        return agent
+
+    def populate(self, n_agents: int, horizon: float = 3600.0, seed: int = 0) -> List[int]:
+        """
+        Schedule `n_agents` random missions (roles split evenly) departing
+        uniformly within `horizon` seconds.
+        """
+        rng = random.Random(seed)
+        nodes = list(self.graph.nodes())
+        schedulers = [self.run_rescue_mission, self.run_supply_mission, self.run_patrol_mission]
+        return [
+            schedulers[i % 3](rng.choice(nodes), rng.choice(nodes), rng.uniform(0, horizon))
+            for i in range(n_agents)
+        ]
+
+    def record_trace(self, path: str) -> TraceWriter:
+        """Stream every agent position to a replay trace; close the writer after run()."""
+        writer = TraceWriter(path)
+        writer.attach(self.engine)
+        return writer
+
+    def agent_colors(self) -> Dict[int, str]:
+        """Path color of every agent's role, e.g. for a replay layer."""
+        return {agent: role.path_color for agent, role in enumerate(self.engine.roles)}
+
+    def run(self, until: float = None) -> Dict:
+        """Run the event loop and refresh the statistics."""
+        engine_stats = self.engine.run(until=until)
+        self.stats['people_rescued'] = engine_stats['people_rescued']
+        self.stats['supplies_delivered'] = engine_stats['supplies_delivered']
+        self.stats['total_distance'] = engine_stats['total_distance']
+        return engine_stats
+
     def get_statistics(self) -> Dict:
         """Get simulation statistics."""
         return self.stats
+
+
+if __name__ == "__main__":
+    import sys
+
+    from src.environment.map_downloader import load_custom_graph
+
+    n_agents = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    trace_path = sys.argv[2] if len(sys.argv) > 2 else None
+    G = load_custom_graph("data/processed_graph.pkl")
+    simulation = DisasterResponseSimulation(G)
+    simulation.populate(n_agents)
+    trace = simulation.record_trace(trace_path) if trace_path else None
+    results = simulation.run()
+    if trace:
+        trace.close()
+        print(f"Trace: {trace.records} positions in {trace.bytes_written / 1024:.0f} KiB ({trace_path})")
+
+    print(f"Simulated {results['agents']} agents, {results['events']} events: "
+          f"{results['simulated_time']:.0f}s simulated in {results['wall_time']:.2f}s "
+          f"({results['speedup']:.0f}x real time)")
+    for role, role_stats in results['by_role'].items():
+        print(f"  {role}: {role_stats['completed']}/{role_stats['agents']} arrived, "
+              f"{role_stats['distance'] / 1000:.1f} km, risk exposure {role_stats['risk_exposure']:.0f}")
+    print(f"People rescued: {results['people_rescued']}, supplies delivered: {results['supplies_delivered']}")
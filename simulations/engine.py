@@ -0,0 +1,325 @@
+"""
+Discrete-event simulation engine.
+
+Agents of every role move edge by edge over simulated time. The engine keeps
+a single heap-ordered event queue (time, sequence, kind, agent) and jumps
+straight from one event to the next, so simulated hours pass in wall-clock
+seconds. Routes come from the pathfinding layer: all routes known before the
+run are requested in one batch per role (see src/ai/batch_routing.py).
+"""
+
+import heapq
+import time
+
+import numpy as np
+
+from config import (
+    ENEMY_ZONES,
+    SIMULATION_AGENT_SPEEDS,
+    SIMULATION_PEOPLE_PER_RESCUE,
+    SIMULATION_SUPPLIES_PER_DELIVERY,
+)
+from src.ai.batch_routing import BatchRouter
+from src.ai.graph_arrays import get_graph_arrays
+from src.utils import profiler
+
+# Event kinds
+DEPART = 0
+EDGE_DONE = 1
+
+# Agent status
+WAITING = "waiting"
+MOVING = "moving"
+ARRIVED = "arrived"
+UNREACHABLE = "unreachable"
+
+# Route of an agent not routed yet (None means no route exists)
+_NOT_ROUTED = object()
+
+DEFAULT_TASKS = {"Army": "patrol", "Rescuer": "rescue", "Volunteer": "supply"}
+
+
+class SimulationEngine:
+    """
+    Discrete-event simulation of role agents on an enriched street graph.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        blocked_zones (list, optional): Zones the Army routes around.
+            Defaults to ENEMY_ZONES.
+        speeds (dict, optional): Role name -> travel speed in m/s.
+    """
+
+    def __init__(self, G, blocked_zones=None, speeds=None):
+        self.G = G
+        self.arrays = get_graph_arrays(G)
+        self.blocked_zones = ENEMY_ZONES if blocked_zones is None else blocked_zones
+        self.speeds = dict(SIMULATION_AGENT_SPEEDS, **(speeds or {}))
+
+        self.now = 0.0
+        self.events_processed = 0
+        self.wall_time = 0.0  # Summed over run() calls
+        self._queue = []
+        self._sequence = 0
+        self._routers = {}
+        self._listeners = []
+
+        # Per-agent state, indexed by agent id
+        self.roles = []
+        self.tasks = []
+        self.payloads = []
+        self.starts = []
+        self.goals = []
+        self.depart_times = []
+        self.routes = []
+        self.positions = []
+        self.status = []
+        self.arrival_times = []
+        self.distance = []
+        self.risk_exposure = []
+        self.expected_encounters = []
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    def add_agent(self, role, start, goal, depart_time=0.0, task=None, payload=None):
+        """
+        Schedules an agent mission.
+
+        Args:
+            role (BaseRole): Role instance (decides weight mode and speed).
+            start: Start node ID.
+            goal: Goal node ID.
+            depart_time (float): Simulated departure time in seconds.
+            task (str, optional): 'rescue', 'supply' or 'patrol'
+                (defaults by role).
+            payload (int, optional): People rescued / supplies delivered on
+                arrival (defaults from config).
+
+        Returns:
+            int: Agent id.
+        """
+        index = self.arrays.node_index
+        return self._add(role, index[start], index[goal], depart_time, task, payload)
+
+    def add_agents(self, role, starts, goals, depart_times=None, task=None, payload=None):
+        """Vectorized add_agent for many missions of one role; returns the agent ids."""
+        starts = self.arrays.nodes_to_indices(starts)
+        goals = self.arrays.nodes_to_indices(goals)
+        if depart_times is None:
+            depart_times = np.zeros(len(starts))
+        return [
+            self._add(role, s, g, t, task, payload)
+            for s, g, t in zip(starts.tolist(), goals.tolist(), np.asarray(depart_times, float).tolist())
+        ]
+
+    def _add(self, role, start, goal, depart_time, task, payload):
+        agent = len(self.roles)
+        task = task or DEFAULT_TASKS.get(role.name, "patrol")
+        if payload is None:
+            payload = {
+                "rescue": SIMULATION_PEOPLE_PER_RESCUE,
+                "supply": SIMULATION_SUPPLIES_PER_DELIVERY,
+            }.get(task, 0)
+
+        self.roles.append(role)
+        self.tasks.append(task)
+        self.payloads.append(payload)
+        self.starts.append(start)
+        self.goals.append(goal)
+        self.depart_times.append(float(depart_time))
+        self.routes.append(_NOT_ROUTED)
+        self.positions.append(0)
+        self.status.append(WAITING)
+        self.arrival_times.append(None)
+        self.distance.append(0.0)
+        self.risk_exposure.append(0.0)
+        self.expected_encounters.append(0.0)
+        self._schedule(float(depart_time), DEPART, agent)
+        return agent
+
+    def add_listener(self, callback):
+        """
+        Registers callback(time, agent, node_index) called whenever an agent
+        departs from or reaches a node (e.g. to record a replay trace).
+        """
+        self._listeners.append(callback)
+
+    def router_for(self, role):
+        """BatchRouter for a role's weight mode (roles like the Army also avoid blocked zones)."""
+        zones = self.blocked_zones if role.avoids_zones else None
+        key = (role.weight_mode, zones is not None)
+        if key not in self._routers:
+            self._routers[key] = BatchRouter(self.G, role.weight_mode, zones)
+        return self._routers[key]
+
+    def _schedule(self, at, kind, agent):
+        heapq.heappush(self._queue, (at, self._sequence, kind, agent))
+        self._sequence += 1
+
+    # ------------------------------------------------------------------
+    # Running
+    # ------------------------------------------------------------------
+
+    @profiler.timed("simulation.prefetch_routes")
+    def _prefetch_routes(self):
+        """Requests every missing route in one batch per router."""
+        groups = {}
+        for agent, route in enumerate(self.routes):
+            if route is _NOT_ROUTED and self.status[agent] == WAITING:
+                groups.setdefault(id(self.router_for(self.roles[agent])), []).append(agent)
+
+        for agents in groups.values():
+            router = self.router_for(self.roles[agents[0]])
+            routes, _ = router.routes(
+                [self.starts[a] for a in agents], [self.goals[a] for a in agents]
+            )
+            for agent, route in zip(agents, routes):
+                self.routes[agent] = route
+
+    @profiler.timed("simulation.run")
+    def run(self, until=None):
+        """
+        Processes events in time order.
+
+        Args:
+            until (float, optional): Stop at this simulated time (events after
+                it stay queued, so run() can be called again to continue).
+
+        Returns:
+            dict: Aggregated statistics, see statistics().
+        """
+        self._prefetch_routes()
+        wall_start = time.perf_counter()
+
+        a = self.arrays
+        length = a.length.tolist()
+        risk = a.risk_level.tolist()
+        enemy = a.enemy_probability.tolist()
+        edge_v = a.edge_v.tolist()
+        queue = self._queue
+        listeners = self._listeners
+        pop, push = heapq.heappop, heapq.heappush
+        processed = 0
+        now = self.now
+
+        while queue:
+            if until is not None and queue[0][0] > until:
+                break
+            now, _, kind, agent = pop(queue)
+            processed += 1
+
+            if kind == DEPART:
+                route = self.routes[agent]
+                if route is _NOT_ROUTED:
+                    route = self.router_for(self.roles[agent]).route(
+                        self.starts[agent], self.goals[agent]
+                    )[0]
+                    self.routes[agent] = route
+                for listener in listeners:
+                    listener(now, agent, self.starts[agent])
+                if route is None:
+                    self.status[agent] = UNREACHABLE
+                    continue
+                if len(route) == 0:
+                    self._arrive(agent, now)
+                    continue
+                self.status[agent] = MOVING
+                self.routes[agent] = route = route.tolist()
+                speed = self.speeds.get(self.roles[agent].name, 5.0)
+                push(queue, (now + length[route[0]] / speed, self._sequence, EDGE_DONE, agent))
+                self._sequence += 1
+                continue
+
+            # EDGE_DONE: account for the edge just traversed
+            route = self.routes[agent]
+            position = self.positions[agent]
+            slot = route[position]
+            speed = self.speeds.get(self.roles[agent].name, 5.0)
+            travel = length[slot] / speed
+            self.distance[agent] += length[slot]
+            self.risk_exposure[agent] += risk[slot] * travel
+            self.expected_encounters[agent] += enemy[slot]
+            for listener in listeners:
+                listener(now, agent, edge_v[slot])
+
+            position += 1
+            self.positions[agent] = position
+            if position == len(route):
+                self._arrive(agent, now)
+            else:
+                push(queue, (now + length[route[position]] / speed, self._sequence, EDGE_DONE, agent))
+                self._sequence += 1
+
+        self.now = until if until is not None and queue else now
+        self.events_processed += processed
+        self.wall_time += time.perf_counter() - wall_start
+        return self.statistics()
+
+    def _arrive(self, agent, now):
+        self.status[agent] = ARRIVED
+        self.arrival_times[agent] = now
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def statistics(self):
+        """
+        Aggregated results so far.
+
+        Returns:
+            dict: Totals (people_rescued, supplies_delivered, total_distance,
+                total_risk_exposure, ...), a per-role breakdown and run
+                metadata (simulated_time, wall_time and events summed over
+                run() calls, speedup).
+        """
+        stats = {
+            "agents": len(self.roles),
+            "missions_completed": 0,
+            "missions_unreachable": 0,
+            "people_rescued": 0,
+            "supplies_delivered": 0,
+            "total_distance": 0.0,
+            "total_risk_exposure": 0.0,
+            "expected_encounters": 0.0,
+            "by_role": {},
+        }
+        for agent, role in enumerate(self.roles):
+            per_role = stats["by_role"].setdefault(role.name, {
+                "agents": 0,
+                "completed": 0,
+                "unreachable": 0,
+                "distance": 0.0,
+                "risk_exposure": 0.0,
+                "travel_time": 0.0,
+            })
+            per_role["agents"] += 1
+            per_role["distance"] += self.distance[agent]
+            per_role["risk_exposure"] += self.risk_exposure[agent]
+            stats["total_distance"] += self.distance[agent]
+            stats["total_risk_exposure"] += self.risk_exposure[agent]
+            stats["expected_encounters"] += self.expected_encounters[agent]
+
+            if self.status[agent] == UNREACHABLE:
+                per_role["unreachable"] += 1
+                stats["missions_unreachable"] += 1
+            elif self.status[agent] == ARRIVED:
+                per_role["completed"] += 1
+                per_role["travel_time"] += self.arrival_times[agent] - self.depart_times[agent]
+                stats["missions_completed"] += 1
+                if self.tasks[agent] == "rescue":
+                    stats["people_rescued"] += self.payloads[agent]
+                elif self.tasks[agent] == "supply":
+                    stats["supplies_delivered"] += self.payloads[agent]
+
+        for per_role in stats["by_role"].values():
+            completed = per_role.pop("travel_time")
+            per_role["mean_travel_time"] = completed / per_role["completed"] if per_role["completed"] else None
+
+        stats["simulated_time"] = self.now
+        stats["wall_time"] = self.wall_time
+        stats["events"] = self.events_processed
+        stats["speedup"] = self.now / self.wall_time if self.wall_time else None
+        return stats
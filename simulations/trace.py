@@ -0,0 +1,276 @@
+"""
+Compact replay traces of agent movement.
+
+TraceWriter streams (time, agent, lat, lon) records into an append-only file
+of independent chunks. Inside a chunk, records are grouped by agent and
+every column is delta-encoded: time in TRACE_TIME_RESOLUTION steps,
+coordinates at TRACE_COORD_PRECISION decimals, each value relative to the
+agent's previous record. The resulting integers are written with the
+polyline algorithm (zigzag, 5-bit groups, printable bytes; the format of
+Google's encoded polylines), then zlib-compressed.
+
+Every chunk starts with a fixed-size header holding its time range, so
+TraceReader can list the chunks by hopping from header to header and only
+decode the chunks overlapping a requested time window; a replay can be
+scrubbed without loading the whole trace. Appending to an existing file
+just adds chunks.
+
+    with TraceWriter("outputs/replay.trace") as writer:
+        writer.attach(engine)
+        engine.run()
+    window = TraceReader("outputs/replay.trace").window(0, 600)
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+from config import TRACE_CHUNK_RECORDS, TRACE_COORD_PRECISION, TRACE_TIME_RESOLUTION
+
+CHUNK_MAGIC = b"PWT1"
+# magic, payload bytes, records, time resolution, coordinate precision, t_min, t_max
+CHUNK_HEADER = struct.Struct("<4sIIdBdd")
+
+
+def encode_polyline(values):
+    """
+    Encodes signed integers with the polyline algorithm: zigzag, then 5-bit
+    groups (low first, 0x20 = more to come) offset by 63.
+
+    Returns:
+        bytes: Printable ASCII.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    zigzag = ((values << 1) ^ (values >> 63)).astype(np.uint64)
+    groups = np.ones(len(zigzag), dtype=np.int64)
+    rest = zigzag >> np.uint64(5)
+    while rest.any():
+        groups += rest > 0
+        rest >>= np.uint64(5)
+
+    width = int(groups.max()) if len(groups) else 1
+    shifts = np.arange(width, dtype=np.uint64) * np.uint64(5)
+    chars = ((zigzag[:, None] >> shifts[None, :]) & np.uint64(31)).astype(np.uint8)
+    position = np.arange(width)[None, :]
+    chars[position < groups[:, None] - 1] |= 0x20
+    return (chars[position < groups[:, None]] + 63).tobytes()
+
+
+def decode_polyline(data):
+    """Inverse of encode_polyline; returns an int64 array."""
+    chars = np.frombuffer(data, dtype=np.uint8).astype(np.int64) - 63
+    if len(chars) == 0:
+        return np.zeros(0, dtype=np.int64)
+    last = (chars & 0x20) == 0
+    value_id = np.concatenate([[0], np.cumsum(last)[:-1]])
+    starts = np.flatnonzero(np.concatenate([[True], last[:-1]]))
+    position = np.arange(len(chars)) - starts[value_id]
+    parts = (chars & 31).astype(np.uint64) << (position.astype(np.uint64) * np.uint64(5))
+    zigzag = np.bitwise_or.reduceat(parts, starts)
+    return ((zigzag >> np.uint64(1)).astype(np.int64)) ^ -((zigzag & np.uint64(1)).astype(np.int64))
+
+
+def _run_deltas(values, first):
+    """Differences to the previous value, restarting (absolute) at every run start."""
+    deltas = np.diff(values, prepend=0)
+    deltas[first] = values[first]
+    return deltas
+
+
+def _run_sums(deltas, first):
+    """Inverse of _run_deltas."""
+    total = np.cumsum(deltas)
+    run_start = np.maximum.accumulate(np.where(first, np.arange(len(first)), 0))
+    return total - (total - deltas)[run_start]
+
+
+class TraceWriter:
+    """
+    Append-only, chunked writer of agent positions.
+
+    Args:
+        path (str): Trace file (created, or appended to).
+        chunk_records (int): Records buffered per chunk.
+    """
+
+    def __init__(self, path, chunk_records=TRACE_CHUNK_RECORDS):
+        self.path = path
+        self.chunk_records = chunk_records
+        self._file = open(path, "ab")
+        self._times, self._agents, self._lats, self._lons = [], [], [], []
+        self.records = 0
+        self.bytes_written = 0
+
+    def record(self, time, agent, lat, lon):
+        """Buffers one position; writes a chunk when the buffer is full."""
+        self._times.append(time)
+        self._agents.append(agent)
+        self._lats.append(lat)
+        self._lons.append(lon)
+        if len(self._times) >= self.chunk_records:
+            self.flush()
+
+    def record_many(self, times, agents, lats, lons):
+        """Buffers many positions at once."""
+        self._times.extend(np.asarray(times, dtype=np.float64).tolist())
+        self._agents.extend(np.asarray(agents, dtype=np.int64).tolist())
+        self._lats.extend(np.asarray(lats, dtype=np.float64).tolist())
+        self._lons.extend(np.asarray(lons, dtype=np.float64).tolist())
+        while len(self._times) >= self.chunk_records:
+            self.flush()
+
+    def attach(self, engine):
+        """Records every node an agent of a SimulationEngine departs from or reaches."""
+        lat, lon = engine.arrays.y.tolist(), engine.arrays.x.tolist()
+        record = self.record
+
+        def listener(time, agent, node_index):
+            record(time, agent, lat[node_index], lon[node_index])
+
+        engine.add_listener(listener)
+        return listener
+
+    def flush(self):
+        """Writes up to chunk_records buffered records as one chunk."""
+        count = min(len(self._times), self.chunk_records)
+        if count == 0:
+            return
+        times = np.array(self._times[:count])
+        agents = np.array(self._agents[:count], dtype=np.int64)
+        lats = np.array(self._lats[:count])
+        lons = np.array(self._lons[:count])
+        del self._times[:count], self._agents[:count], self._lats[:count], self._lons[:count]
+
+        # Group by agent, in time order within each agent
+        order = np.lexsort((times, agents))
+        agents, times, lats, lons = agents[order], times[order], lats[order], lons[order]
+        t_min, t_max = float(times.min()), float(times.max())
+        unique_agents, counts = np.unique(agents, return_counts=True)
+        first = np.zeros(count, dtype=bool)
+        first[np.cumsum(counts) - counts] = True
+
+        scale = 10 ** TRACE_COORD_PRECISION
+        ticks = np.round((times - t_min) / TRACE_TIME_RESOLUTION).astype(np.int64)
+        columns = [
+            np.diff(unique_agents, prepend=0),
+            counts,
+            _run_deltas(ticks, first),
+            _run_deltas(np.round(lats * scale).astype(np.int64), first),
+            _run_deltas(np.round(lons * scale).astype(np.int64), first),
+        ]
+        payload = zlib.compress(
+            encode_polyline(np.concatenate([[len(unique_agents)]] + columns))
+        )
+        header = CHUNK_HEADER.pack(
+            CHUNK_MAGIC, len(payload), count, TRACE_TIME_RESOLUTION, TRACE_COORD_PRECISION, t_min, t_max
+        )
+        self._file.write(header + payload)
+        self.records += count
+        self.bytes_written += len(header) + len(payload)
+
+    def close(self):
+        """Flushes the remaining records and closes the file."""
+        while self._times:
+            self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    """
+    Random access to a trace by time window.
+
+    Attributes:
+        chunks (list): (offset, payload bytes, records, t_min, t_max) per chunk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.chunks = []
+        self._meta = []
+        with open(path, "rb") as f:
+            offset = 0
+            while True:
+                header = f.read(CHUNK_HEADER.size)
+                if len(header) < CHUNK_HEADER.size:
+                    break
+                magic, size, records, resolution, precision, t_min, t_max = CHUNK_HEADER.unpack(header)
+                if magic != CHUNK_MAGIC:
+                    raise ValueError(f"Not a trace chunk at byte {offset} of {path}")
+                self.chunks.append((offset + CHUNK_HEADER.size, size, records, t_min, t_max))
+                self._meta.append((resolution, precision))
+                offset += CHUNK_HEADER.size + size
+                f.seek(offset)
+
+    @property
+    def records(self):
+        return sum(c[2] for c in self.chunks)
+
+    @property
+    def time_range(self):
+        """(first, last) record time, or None for an empty trace."""
+        if not self.chunks:
+            return None
+        return min(c[3] for c in self.chunks), max(c[4] for c in self.chunks)
+
+    def _decode(self, f, i):
+        offset, size, records, t_min, _ = self.chunks[i]
+        resolution, precision = self._meta[i]
+        f.seek(offset)
+        values = decode_polyline(zlib.decompress(f.read(size)))
+
+        n_agents = int(values[0])
+        agents = np.cumsum(values[1:1 + n_agents])
+        counts = values[1 + n_agents:1 + 2 * n_agents]
+        columns = values[1 + 2 * n_agents:].reshape(3, records)
+        first = np.zeros(records, dtype=bool)
+        first[np.cumsum(counts) - counts] = True
+
+        scale = 10.0 ** precision
+        return (
+            t_min + _run_sums(columns[0], first) * resolution,
+            np.repeat(agents, counts),
+            _run_sums(columns[1], first) / scale,
+            _run_sums(columns[2], first) / scale,
+        )
+
+    def window(self, start, end, agents=None):
+        """
+        Records with start <= time <= end, decoding only the chunks that
+        overlap the window.
+
+        Args:
+            start, end (float): Simulated time window.
+            agents (iterable, optional): Only these agent ids.
+
+        Returns:
+            dict: agent id -> (times, lats, lons) arrays in time order.
+        """
+        parts = []
+        with open(self.path, "rb") as f:
+            for i, (_, _, _, t_min, t_max) in enumerate(self.chunks):
+                if t_max < start or t_min > end:
+                    continue
+                times, ids, lats, lons = self._decode(f, i)
+                keep = (times >= start) & (times <= end)
+                if agents is not None:
+                    keep &= np.isin(ids, np.fromiter(agents, dtype=np.int64))
+                parts.append((times[keep], ids[keep], lats[keep], lons[keep]))
+        if not parts:
+            return {}
+
+        times, ids, lats, lons = (np.concatenate(column) for column in zip(*parts))
+        order = np.lexsort((times, ids))
+        times, ids, lats, lons = times[order], ids[order], lats[order], lons[order]
+        unique_ids, starts = np.unique(ids, return_index=True)
+        bounds = np.append(starts, len(ids))
+        return {
+            int(agent): (times[a:b], lats[a:b], lons[a:b])
+            for agent, a, b in zip(unique_ids, bounds[:-1], bounds[1:])
+        }
@@ -0,0 +1,148 @@
+"""
+Alternative (backup) routes.
+
+find_alternative_routes returns up to k routes for an OD pair that are
+cheap under a role's weight mode yet differ from each other. It uses the
+via-node / plateau method: one shortest-path tree out of the start and one
+into the destination are enough to form a candidate route through every
+node v (start -> v along the first tree, v -> destination along the
+second) at cost dist_from_start[v] + dist_to_end[v]. All candidates come
+from the same two trees; nodes on a shared stretch ("plateau") of both trees
+give the same route and are merged. Candidates are taken cheapest first and
+kept when they overlap each kept route by at most 1 - min_dissimilarity of
+the shorter route's length.
+
+If the plateaus run out before k routes are found, the search falls back to
+the penalty method: edges of the routes found so far get more expensive and
+the search is repeated on a re-weighted copy of the router's pair matrix.
+"""
+
+import numpy as np
+
+from config import ALTERNATIVE_MAX_STRETCH, ALTERNATIVE_MIN_DISSIMILARITY
+from src.ai.batch_routing import BatchRouter, trace_tree_paths
+from src.ai.pathfinding import slot_path_coords
+from src.utils import profiler
+
+CANDIDATES_PER_ROUTE = 64  # Via candidates traced per requested route
+PENALTY_FACTOR = 1.5  # Weight multiplier for used edges in the penalty fallback
+PENALTY_ROUNDS_PER_ROUTE = 3
+
+
+@profiler.timed("find_alternative_routes")
+def find_alternative_routes(
+    G,
+    start_node,
+    end_node,
+    k=3,
+    weight_mode="safe",
+    blocked_zones=None,
+    min_dissimilarity=ALTERNATIVE_MIN_DISSIMILARITY,
+    max_stretch=ALTERNATIVE_MAX_STRETCH,
+    router=None,
+):
+    """
+    Up to k mutually dissimilar routes, the first being the optimal one.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        start_node: Source node ID.
+        end_node: Target node ID.
+        k (int): Number of routes wanted.
+        weight_mode (str): Role weight mode.
+        blocked_zones (list, optional): (lat, lon, radius, name) zones to avoid.
+        min_dissimilarity (float): Minimum share (0-1) of the shorter of
+            any two returned routes that the other does not share.
+        max_stretch (float): Alternatives cost at most this factor times the
+            optimal route.
+        router (BatchRouter, optional): Router for weight_mode/blocked_zones,
+            reused across calls.
+
+    Returns:
+        list: Dicts with path_nodes, path_coords, cost (under weight_mode),
+            length (meters) and stretch (cost / optimal cost). Empty if the
+            destination is unreachable.
+    """
+    if router is None:
+        router = BatchRouter(G, weight_mode, blocked_zones)
+    a = router.arrays
+    source, target = a.node_index[start_node], a.node_index[end_node]
+
+    dist_f, pred_f = router.trees([source])
+    dist_b, pred_b = router.trees([target], reverse=True)
+    best = dist_f[0, target]
+    if not np.isfinite(best):
+        print(f"No path found between {start_node} and {end_node}")
+        return []
+
+    selected = []  # (node_path, slots, cost)
+    max_overlap = 1.0 - min_dissimilarity
+
+    def consider(nodes):
+        slots = router.pair_slot(nodes[:-1], nodes[1:])
+        if (slots < 0).any() or len(set(nodes.tolist())) != len(nodes):
+            return  # not a simple path
+        cost = float(router.weights[slots].sum())
+        if cost > best * max_stretch + 1e-9:
+            return
+        length = a.length[slots]
+        total = length.sum()
+        for _, other, _ in selected:
+            shorter = max(min(total, a.length[other].sum()), 1e-9)
+            if length[np.isin(slots, other)].sum() / shorter > max_overlap:
+                return
+        selected.append((nodes, slots, cost))
+
+    # Via-node candidates, cheapest first; plateau nodes share one route
+    via_cost = dist_f[0] + dist_b[0]
+    limit = best * max_stretch
+    candidates = np.flatnonzero(via_cost <= limit + 1e-9)
+    candidates = candidates[np.argsort(via_cost[candidates], kind="stable")]
+    seen = set()
+    batch = CANDIDATES_PER_ROUTE * k
+    for chunk_start in range(0, len(candidates), batch):
+        if len(selected) >= k:
+            break
+        via = candidates[chunk_start:chunk_start + batch]
+        rows = np.zeros(len(via), dtype=np.int64)
+        heads = trace_tree_paths(pred_f, rows, via, np.full(len(via), source))
+        tails = trace_tree_paths(pred_b, rows, via, np.full(len(via), target))
+        for head, tail in zip(heads, tails):
+            if head is None or tail is None:
+                continue
+            nodes = np.concatenate([head[::-1], tail[1:]])
+            key = nodes.tobytes()
+            if key in seen:
+                continue
+            seen.add(key)
+            consider(nodes)
+            if len(selected) >= k:
+                break
+
+    # Penalty fallback: make used edges more expensive and search again
+    if len(selected) < k:
+        penalized = router.copy()
+        for _, slots, _ in selected:
+            penalized.penalize(slots, PENALTY_FACTOR)
+        for _ in range(PENALTY_ROUNDS_PER_ROUTE * (k - len(selected))):
+            slots, _ = penalized.route(source, target)
+            if slots is None:
+                break
+            consider(np.concatenate([[source], a.edge_v[slots]]))
+            if len(selected) >= k:
+                break
+            # Penalize the new route (kept or rejected) so the next round moves on
+            penalized.penalize(slots, PENALTY_FACTOR)
+
+    routes = []
+    for nodes, slots, cost in selected:
+        routes.append({
+            "path_nodes": [a.node_ids[i].item() for i in nodes],
+            "path_coords": slot_path_coords(G, a, slots),
+            "cost": cost,
+            "length": float(a.length[slots].sum()),
+            "stretch": float(cost / best) if best > 0 else 1.0,
+        })
+    profiler.annotate(k=k, found=len(routes), candidates=len(candidates))
+    return routes
+
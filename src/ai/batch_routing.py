@@ -0,0 +1,218 @@
+"""
+Batched shortest-path routing over GraphArrays.
+
+find_path_astar answers one query at a time through networkx callbacks.
+BatchRouter instead builds a sparse weight matrix for one role mode once and
+answers many origin-destination queries with SciPy's compiled Dijkstra,
+computing one shortest-path tree per distinct source (or per distinct target
+on the reversed graph, whichever set is smaller) and tracing all routes out
+of the predecessor arrays at once.
+"""
+
+import copy
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import calculate_edge_weights
+
+# Sources per Dijkstra call; bounds the (sources x nodes) predecessor matrix.
+TREE_CHUNK_SIZE = 256
+
+
+class BatchRouter:
+    """
+    Shortest paths for one weight assignment.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        weight_mode (str): 'safe', 'balanced', 'efficient' or 'fast'.
+        blocked_zones (list, optional): (lat, lon, radius, name) zones to avoid.
+        weights (np.ndarray, optional): Explicit weight per edge slot,
+            overriding weight_mode/blocked_zones.
+    """
+
+    def __init__(self, G, weight_mode="safe", blocked_zones=None, weights=None):
+        self.arrays = get_graph_arrays(G)
+        if weights is None:
+            weights = calculate_edge_weights(self.arrays, weight_mode, blocked_zones)
+        self.weight_mode = weight_mode
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self._build_matrix()
+
+    def _build_matrix(self):
+        """Collapses parallel edges to their cheapest slot and drops blocked ones."""
+        a = self.arrays
+        self.matrix, self.pair_keys, self.pair_slots = build_pair_matrix(
+            a.edge_u, a.edge_v, a.n_nodes, self.weights
+        )
+        self._matrix_t = None
+
+    def copy(self):
+        """Router sharing this one's arrays and pair index, with its own weight matrix (see penalize)."""
+        router = copy.copy(self)
+        router.matrix = self.matrix.copy()
+        router._matrix_t = None
+        return router
+
+    def penalize(self, slots, factor):
+        """
+        Multiplies the weight of the node pairs behind `slots` by `factor`,
+        in place. The matrix entries are in pair_keys order, so nothing is
+        rebuilt; `weights` keeps the unpenalized slot weights.
+        """
+        a = self.arrays
+        pairs = np.searchsorted(self.pair_keys, a.edge_u[slots] * a.n_nodes + a.edge_v[slots])
+        self.matrix.data[pairs] *= factor
+        self._matrix_t = None
+
+    def pair_slot(self, u, v):
+        """Edge slot used between node indices u and v (vectorized); -1 if none."""
+        return lookup_pair_slots(self.pair_keys, self.pair_slots, self.arrays.n_nodes, u, v)
+
+    def trees(self, sources, reverse=False, limit=np.inf):
+        """
+        Shortest-path trees from every source node index.
+
+        Args:
+            sources (array-like): Node indices.
+            reverse (bool): Search on the reversed graph, i.e. trees *into*
+                the given nodes; pred then points one hop towards the root.
+            limit (float): Stop expanding beyond this cost.
+
+        Returns:
+            tuple: (dist, pred) arrays of shape (len(sources), n_nodes);
+                pred is -9999 where there is no predecessor.
+        """
+        matrix = self.matrix
+        if reverse:
+            if self._matrix_t is None:
+                self._matrix_t = self.matrix.T.tocsr()
+            matrix = self._matrix_t
+        return dijkstra(
+            matrix,
+            directed=True,
+            indices=np.asarray(sources, dtype=np.int64),
+            return_predecessors=True,
+            limit=limit,
+        )
+
+    def routes(self, sources, targets):
+        """
+        Shortest routes for many (source, target) node-index pairs.
+
+        Returns:
+            tuple: (routes, costs)
+                routes: list with an int64 array of edge slots per pair
+                    (empty when source == target, None when unreachable).
+                costs: np.ndarray of route costs (inf when unreachable).
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        routes = [None] * len(sources)
+        costs = np.full(len(sources), np.inf)
+
+        # Grow trees from whichever side has fewer distinct nodes
+        reverse = len(np.unique(targets)) < len(np.unique(sources))
+        roots, leaves = (targets, sources) if reverse else (sources, targets)
+        unique_roots, root_row = np.unique(roots, return_inverse=True)
+
+        for chunk_start in range(0, len(unique_roots), TREE_CHUNK_SIZE):
+            chunk = unique_roots[chunk_start:chunk_start + TREE_CHUNK_SIZE]
+            dist, pred = self.trees(chunk, reverse=reverse)
+            pairs = np.flatnonzero(
+                (root_row >= chunk_start) & (root_row < chunk_start + len(chunk))
+            )
+            rows = root_row[pairs] - chunk_start
+            costs[pairs] = dist[rows, leaves[pairs]]
+            node_paths = trace_tree_paths(pred, rows, leaves[pairs], roots[pairs])
+            for pair, nodes in zip(pairs, node_paths):
+                if nodes is None:
+                    continue
+                if not reverse:
+                    # Traced leaf -> root on a forward tree: flip to source -> target
+                    nodes = nodes[::-1]
+                routes[pair] = self.pair_slot(nodes[:-1], nodes[1:])
+        return routes, costs
+
+    def route(self, source, target):
+        """Single-pair convenience wrapper around routes()."""
+        routes, costs = self.routes([source], [target])
+        return routes[0], costs[0]
+
+
+def build_pair_matrix(edge_u, edge_v, n_nodes, weights):
+    """
+    Sparse (n_nodes x n_nodes) weight matrix with one entry per connected
+    node pair: the cheapest of its parallel edges. Slots with an infinite
+    weight are left out.
+
+    Returns:
+        tuple: (matrix, pair_keys, pair_slots) where pair_keys (u * n_nodes + v,
+            sorted) and pair_slots give the edge slot behind every entry.
+    """
+    usable = np.flatnonzero(np.isfinite(weights))
+    keys = edge_u[usable] * n_nodes + edge_v[usable]
+
+    # Sort by (u, v) then weight so the first slot of every pair is the cheapest
+    order = np.lexsort((weights[usable], keys))
+    keys, slots = keys[order], usable[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+
+    pair_keys = keys[first]
+    pair_slots = slots[first]
+    u, v = np.divmod(pair_keys, n_nodes)
+    matrix = csr_matrix((weights[pair_slots], (u, v)), shape=(n_nodes, n_nodes))
+    return matrix, pair_keys, pair_slots
+
+
+def lookup_pair_slots(pair_keys, pair_slots, n_nodes, u, v):
+    """Edge slot behind matrix entry (u, v) for arrays of node indices; -1 if none."""
+    keys = np.asarray(u, dtype=np.int64) * n_nodes + np.asarray(v, dtype=np.int64)
+    if len(pair_keys) == 0:
+        return np.full(keys.shape, -1, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(pair_keys, keys), len(pair_keys) - 1)
+    return np.where(pair_keys[pos] == keys, pair_slots[pos], -1)
+
+
+def trace_tree_paths(pred, rows, starts, roots):
+    """
+    Follows predecessor pointers from every start node to its tree root,
+    advancing all paths together one hop per iteration.
+
+    Args:
+        pred (np.ndarray): (n_trees, n_nodes) predecessor matrix.
+        rows (np.ndarray): Tree row of every path.
+        starts (np.ndarray): Node index each path is traced from.
+        roots (np.ndarray): Root node index of each path's tree.
+
+    Returns:
+        list: Node-index array (start ... root) per path, or None if the
+            start is not in the tree.
+    """
+    count = len(starts)
+    current = np.asarray(starts, dtype=np.int64).copy()
+    roots = np.asarray(roots, dtype=np.int64)
+    hops = [current.copy()]
+    active = np.flatnonzero(current != roots)
+    reachable = np.ones(count, dtype=bool)
+    length = np.ones(count, dtype=np.int64)
+
+    while len(active):
+        step = pred[rows[active], current[active]]
+        dead = step < 0
+        reachable[active[dead]] = False
+        active, step = active[~dead], step[~dead]
+        current[active] = step
+        length[active] += 1
+        hops.append(current.copy())
+        active = active[step != roots[active]]
+
+    stacked = np.stack(hops, axis=1)
+    return [
+        stacked[i, :length[i]] if reachable[i] else None
+        for i in range(count)
+    ]
@@ -0,0 +1,139 @@
+"""
+Linear edge cost model shared by every role.
+
+A weight mode is a coefficient vector over edge features:
+
+    weight = length * (base + risk_level * c_risk + resource_cost * c_resource
+                       + enemy_probability * c_enemy)
+
+so the built-in modes ('safe' = 1 + 100 * risk, 'balanced' = 1 + 5 * risk,
+'efficient' = 1 + resource_cost, 'fast' = 1) and any custom role are all rows
+of one table (config.WEIGHT_MODE_COEFFICIENTS plus register_weight_mode()).
+The weights of every mode for a graph are one matrix product, an
+(edges x features) feature matrix times a (features x modes) coefficient
+matrix, computed once per graph and cached.
+"""
+
+import weakref
+
+import numpy as np
+
+from config import WEIGHT_MODE_COEFFICIENTS
+
+# Feature order of the coefficient vectors; 'base' is the constant 1.
+EDGE_COST_FEATURES = ("base", "risk_level", "resource_cost", "enemy_probability")
+DEFAULT_WEIGHT_MODE = "fast"
+
+_modes = {}
+_version = 0
+_weight_cache = weakref.WeakKeyDictionary()
+
+
+def register_weight_mode(name, coefficients):
+    """
+    Adds or replaces a weight mode.
+
+    Coefficients must be non-negative (Dijkstra needs non-negative weights)
+    and 'base' at least 1, so every edge costs at least its length and the
+    haversine A* heuristics stay admissible.
+
+    Args:
+        name (str): Mode name, as used in weight_mode arguments.
+        coefficients (dict): Feature name -> coefficient; missing features are 0.
+
+    Raises:
+        ValueError: On an unknown feature name, a negative coefficient or a
+            base below 1.
+    """
+    global _version
+    unknown = set(coefficients) - set(EDGE_COST_FEATURES)
+    if unknown:
+        raise ValueError(
+            f"Unknown cost features {sorted(unknown)}, expected {list(EDGE_COST_FEATURES)}"
+        )
+    vector = tuple(float(coefficients.get(f, 0.0)) for f in EDGE_COST_FEATURES)
+    negative = [f for f, c in zip(EDGE_COST_FEATURES, vector) if c < 0]
+    if negative:
+        raise ValueError(f"Negative cost coefficients for {negative}")
+    if vector[0] < 1.0:
+        raise ValueError(f"Cost coefficient 'base' must be at least 1, got {vector[0]}")
+    if _modes.get(name) != vector:
+        _modes[name] = vector
+        _version += 1
+
+
+def weight_modes():
+    """Names of all registered weight modes."""
+    return list(_modes)
+
+
+def weight_coefficients(mode):
+    """Coefficient vector of a mode (unknown modes fall back to 'fast')."""
+    return _modes.get(mode, _modes[DEFAULT_WEIGHT_MODE])
+
+
+def edge_feature_matrix(arrays, slots=slice(None)):
+    """(n_edges x features) matrix of a GraphArrays (or of some slots), in EDGE_COST_FEATURES order."""
+    return np.column_stack([
+        np.ones(len(arrays.length[slots])),
+        arrays.risk_level[slots],
+        arrays.resource_cost[slots],
+        arrays.enemy_probability[slots],
+    ])
+
+
+def mode_weight_matrix(arrays):
+    """
+    Weights of every registered mode for every edge slot.
+
+    Returns:
+        tuple: (weights, columns) where weights is an (n_edges x modes) array
+            and columns maps mode name -> column index.
+    """
+    cached = _weight_cache.get(arrays)
+    if cached is not None and cached[0] == _version:
+        return cached[1], cached[2]
+
+    columns = {mode: i for i, mode in enumerate(_modes)}
+    coefficients = np.array(list(_modes.values()), dtype=np.float64).T
+    weights = arrays.length[:, None] * (edge_feature_matrix(arrays) @ coefficients)
+    _weight_cache[arrays] = (_version, weights, columns)
+    return weights, columns
+
+
+def refresh_edge_weights(arrays, slots):
+    """
+    Recomputes the cached weights of `slots` in place after their attributes
+    changed in `arrays` (see online_risk.apply_risk_levels); a no-op when
+    nothing is cached.
+    """
+    cached = _weight_cache.get(arrays)
+    if cached is None or cached[0] != _version:
+        return
+    coefficients = np.array(list(_modes.values()), dtype=np.float64).T
+    cached[1][slots] = arrays.length[slots, None] * (edge_feature_matrix(arrays, slots) @ coefficients)
+
+
+def mode_weights(arrays, mode):
+    """Read-only weight column of one mode (see mode_weight_matrix)."""
+    weights, columns = mode_weight_matrix(arrays)
+    column = weights[:, columns.get(mode, columns[DEFAULT_WEIGHT_MODE])]
+    column.flags.writeable = False
+    return column
+
+
+def edge_weight(edge_data, mode):
+    """Scalar version of the model for one edge attribute dict."""
+    base, risk, resource, enemy = weight_coefficients(mode)
+    factor = base
+    if risk:
+        factor += risk * float(edge_data.get("risk_level", 0.0))
+    if resource:
+        factor += resource * float(edge_data.get("resource_cost", 0.0))
+    if enemy:
+        factor += enemy * float(edge_data.get("enemy_probability", 0.0))
+    return float(edge_data.get("length", 1.0)) * factor
+
+
+for _name, _coefficients in WEIGHT_MODE_COEFFICIENTS.items():
+    register_weight_mode(_name, _coefficients)
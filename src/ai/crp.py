@@ -0,0 +1,588 @@
+"""
+Customizable route planning (CRP) over GraphArrays.
+
+Edge weights change often: risk levels are re-predicted, resource costs
+move, zones get blocked, and every role has its own cost function. Static
+speed-up techniques would have to redo all their preprocessing after each
+change. CRP splits the work into a metric-independent part done once per
+graph and a cheap per-metric part:
+
+    1. Partition: nodes are split into nested cells of at most
+       CRP_CELL_SIZES[l] nodes on level l (finest first), by recursive
+       bisection along whichever direction (x, y or a diagonal) cuts the
+       fewest edges.
+    2. Overlay: every cell gets entry nodes (heads of edges coming in from
+       another cell of its level) and exit nodes (tails of edges leaving
+       it). Its clique is an edge from every entry to every exit. The
+       search graph of every cell is laid out once as a sparse matrix.
+    3. Customization (per metric): a clique edge weighs the shortest
+       distance inside its cell. Level 0 computes it with Dijkstra over the
+       original edges. Higher levels use the subcells' cliques plus the
+       edges between subcells. Cells of one level are independent and run
+       in a process pool. After a change, only cells whose edges or
+       subcells changed are recomputed.
+
+A query searches three kinds of overlay edges:
+    - the original edges of the source's and target's finest cells;
+    - the cliques of the other cells inside their parents, on every level;
+    - the edges between those cells.
+Routes are unpacked back to edge slots by repeating the cell searches along
+the overlay path.
+
+Any per-slot weight array is a metric. New role cost functions (see
+cost_model.register_weight_mode) and blocked zones therefore only need a
+customization, never a new partition.
+
+Parallel edges are collapsed into node pairs (the cheapest edge of the
+metric wins), so no search graph holds duplicate entries.
+"""
+
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from config import CRP_CELL_SIZES, CRP_WORKERS
+from src.ai.batch_routing import trace_tree_paths
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import calculate_edge_weights
+from src.utils import profiler
+
+# Bisection directions tried per split, in (x, y) units of local meters
+_DIRECTIONS = ((1.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, -1.0))
+# Edge kind of an original node pair; cliques use their level (>= 0)
+PAIR = -1
+
+
+def _group(keys, n_groups):
+    """(order, offsets): positions sorted by key, and each key's range within them."""
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_groups), out=offsets[1:])
+    return order, offsets
+
+
+def _bisect(nodes, eu, ev, px, py, max_size, side):
+    """
+    Recursively halves `nodes` (with internal edges eu -> ev) until every
+    part has at most max_size nodes.
+
+    Returns:
+        list: (nodes, eu, ev) per part.
+    """
+    parts, stack = [], [(nodes, eu, ev)]
+    while stack:
+        nodes, eu, ev = stack.pop()
+        if len(nodes) <= max_size:
+            parts.append((nodes, eu, ev))
+            continue
+        best_cut, best_left = None, None
+        for dx, dy in _DIRECTIONS:
+            order = np.argsort(px[nodes] * dx + py[nodes] * dy, kind="stable")
+            left = np.zeros(len(nodes), dtype=bool)
+            left[order[:len(nodes) // 2]] = True
+            side[nodes] = left
+            cut = np.count_nonzero(side[eu] != side[ev])
+            if best_cut is None or cut < best_cut:
+                best_cut, best_left = cut, left
+        side[nodes] = best_left
+        same = side[eu] == side[ev]
+        in_left = same & side[eu]
+        in_right = same & ~side[eu]
+        stack.append((nodes[~best_left], eu[in_right], ev[in_right]))
+        stack.append((nodes[best_left], eu[in_left], ev[in_left]))
+    return parts
+
+
+def partition_nodes(arrays, cell_sizes=CRP_CELL_SIZES):
+    """
+    Nested multi-level partition of a graph's nodes.
+
+    Args:
+        arrays (GraphArrays): Graph to partition.
+        cell_sizes (sequence): Largest cell (in nodes) per level.
+
+    Returns:
+        list: One int64 array per level, finest first, with the cell of
+            every node index. Cells of level l + 1 are unions of cells of
+            level l. Levels that would be a single cell, or that repeat the
+            level below, are left out.
+    """
+    a = arrays
+    lat0 = float(a.y.mean()) if a.n_nodes else 0.0
+    px = a.x * math.cos(math.radians(lat0))
+    py = a.y
+    loops = a.edge_u == a.edge_v
+    parts = [(np.arange(a.n_nodes), a.edge_u[~loops], a.edge_v[~loops])]
+    side = np.zeros(a.n_nodes, dtype=bool)
+
+    levels = []  # coarsest first
+    for size in sorted(set(cell_sizes), reverse=True):
+        parts = [p for part in parts for p in _bisect(*part, px, py, size, side)]
+        if len(parts) > 1 and (not levels or len(parts) > levels[-1].max() + 1):
+            cells = np.empty(a.n_nodes, dtype=np.int64)
+            for cell, (nodes, _, _) in enumerate(parts):
+                cells[nodes] = cell
+            levels.append(cells)
+    return levels[::-1]
+
+
+def _compact(n_nodes, *node_arrays):
+    """
+    Renumbers the node indices in node_arrays to 0..k-1 (in order of first
+    appearance) without sorting.
+
+    Returns:
+        tuple: (nodes, *local_arrays) with nodes[local] == global.
+    """
+    joined = np.concatenate(node_arrays)
+    first = np.empty(n_nodes, dtype=np.int64)
+    first[joined[::-1]] = np.arange(len(joined) - 1, -1, -1)  # earliest position wins
+    position = first[joined]
+    is_first = position == np.arange(len(joined))
+    local = (np.cumsum(is_first) - 1)[position]
+    return (joined[is_first], *np.split(local, np.cumsum([len(a) for a in node_arrays])[:-1]))
+
+
+def _hop_edges(src, dst, n_local, path):
+    """Index of the edge behind every hop of a node path (one edge per node pair)."""
+    on_path = np.zeros(n_local, dtype=bool)
+    on_path[path[:-1]] = True
+    candidates = np.flatnonzero(on_path[src])
+    keys = src[candidates] * n_local + dst[candidates]
+    order = np.argsort(keys)
+    wanted = path[:-1] * n_local + path[1:]
+    return candidates[order[np.searchsorted(keys[order], wanted)]]
+
+
+def _shortest_path(matrix, s, t):
+    """(cost, local node path) from s to t; (inf, None) when unreachable."""
+    dist, pred = dijkstra(matrix, directed=True, indices=[s], return_predecessors=True)
+    if not np.isfinite(dist[0, t]):
+        return np.inf, None
+    path = trace_tree_paths(pred, np.array([0]), np.array([t]), np.array([s]))[0][::-1]
+    return float(dist[0, t]), path
+
+
+def _gather_weights(kind, ref, pair_weights, cliques):
+    """Weight of every (kind, ref) overlay edge under a metric."""
+    weights = np.empty(len(ref))
+    pairs = kind == PAIR
+    weights[pairs] = pair_weights[ref[pairs]]
+    for level in np.unique(kind[~pairs]):
+        mask = kind == level
+        weights[mask] = cliques[level][ref[mask]]
+    return weights
+
+
+class _CellGraph:
+    """
+    Metric-independent search graph of one cell, as CSR arrays.
+
+    kind/ref name every entry: kind PAIR with ref a node pair, or a clique
+    level with ref a clique index of that level.
+    """
+
+    __slots__ = ("nodes", "src", "indptr", "indices", "kind", "ref", "entries", "exits", "keep")
+
+    def __init__(self, n_nodes, src, dst, kind, ref, entries, exits):
+        nodes, local_src, local_dst, local_ent, local_ext = _compact(n_nodes, src, dst, entries, exits)
+        order = np.lexsort((local_dst, local_src))
+        self.nodes = nodes
+        self.src = local_src[order]
+        self.indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(local_src, minlength=len(nodes)), out=self.indptr[1:])
+        self.indices = local_dst[order]
+        self.kind = kind[order]
+        self.ref = ref[order]
+        self.entries = local_ent
+        self.exits = local_ext
+        self.keep = (entries[:, None] != exits[None, :]).ravel()
+
+    def matrix(self, pair_weights, cliques):
+        data = _gather_weights(self.kind, self.ref, pair_weights, cliques)
+        return csr_matrix((data, self.indices, self.indptr), shape=(len(self.nodes), len(self.nodes)))
+
+    def hops(self, matrix, source, target):
+        """(kind, ref) of every edge on the shortest source -> target path (global node indices)."""
+        s = int(np.flatnonzero(self.nodes == source)[0])
+        t = int(np.flatnonzero(self.nodes == target)[0])
+        _, path = _shortest_path(matrix, s, t)
+        taken = _hop_edges(self.src, self.indices, len(self.nodes), path)
+        return list(zip(self.kind[taken].tolist(), self.ref[taken].tolist()))
+
+
+class Overlay:
+    """
+    Metric-independent CRP structure: partition, cell edges, entry/exit
+    nodes, clique layout and per-cell search graphs.
+
+    Args:
+        arrays (GraphArrays): Graph to build the overlay for.
+        cell_sizes (sequence): Largest cell (in nodes) per level.
+
+    Attributes:
+        cells (list): Cell of every node index, per level (finest first).
+        n_cells (list): Number of cells per level.
+        pair_u, pair_v (np.ndarray): Node indices of every connected
+            (directed) node pair; parallel edge slots share a pair.
+        clique_src, clique_dst, clique_cell (list): Per level, entry node,
+            exit node and cell of every clique edge, grouped by cell
+            (clique_offsets).
+    """
+
+    def __init__(self, arrays, cell_sizes=CRP_CELL_SIZES):
+        self.n_nodes = arrays.n_nodes
+        keys = arrays.edge_u * self.n_nodes + arrays.edge_v
+        self.pair_order = np.argsort(keys, kind="stable")  # slots grouped by pair
+        sorted_keys = keys[self.pair_order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        self.pair_starts = np.flatnonzero(first)
+        self.pair_u, self.pair_v = np.divmod(sorted_keys[first], self.n_nodes)
+
+        self.cells = partition_nodes(arrays, cell_sizes)
+        self.n_levels = len(self.cells)
+        self.n_cells = [int(c.max()) + 1 for c in self.cells]
+        u, v = self.pair_u, self.pair_v
+
+        # Node pairs inside each finest cell
+        self.inner_pairs, self.inner_offsets = np.arange(len(u)), np.array([0, len(u)])
+        if self.n_levels:
+            inner = np.flatnonzero(self.cells[0][u] == self.cells[0][v])
+            order, self.inner_offsets = _group(self.cells[0][u[inner]], self.n_cells[0])
+            self.inner_pairs = inner[order]
+
+        self.cut_pairs, self.cut_offsets = [], []  # level l cut pairs, by level l + 1 cell
+        self.children, self.children_offsets = [], []  # level l cells, by level l + 1 cell
+        self.parents = []  # level l + 1 cell of every level l cell
+        self.entries, self.exits = [], []
+        self.clique_src, self.clique_dst, self.clique_cell, self.clique_offsets = [], [], [], []
+        for level in range(self.n_levels):
+            cu, cv = self.cells[level][u], self.cells[level][v]
+            top = level + 1 == self.n_levels
+            parent = np.zeros(self.n_nodes, dtype=np.int64) if top else self.cells[level + 1]
+            n_parents = 1 if top else self.n_cells[level + 1]
+
+            crossing = cu != cv
+            cut = np.flatnonzero(crossing & (parent[u] == parent[v]))
+            order, offsets = _group(parent[u[cut]], n_parents)
+            self.cut_pairs.append(cut[order])
+            self.cut_offsets.append(offsets)
+
+            cell_parent = np.zeros(self.n_cells[level], dtype=np.int64)
+            cell_parent[self.cells[level]] = parent
+            order, offsets = _group(cell_parent, n_parents)
+            self.parents.append(cell_parent)
+            self.children.append(order)
+            self.children_offsets.append(offsets)
+
+            self.entries.append(self._boundary(cv[crossing], v[crossing], level))
+            self.exits.append(self._boundary(cu[crossing], u[crossing], level))
+            self._build_cliques(level)
+        self._graphs = {}
+
+    def _boundary(self, cells, nodes, level):
+        """(nodes, offsets): distinct boundary nodes grouped by cell."""
+        keys = np.unique(cells * self.n_nodes + nodes)
+        cell, node = np.divmod(keys, self.n_nodes)
+        offsets = np.zeros(self.n_cells[level] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cell, minlength=self.n_cells[level]), out=offsets[1:])
+        return node, offsets
+
+    def _build_cliques(self, level):
+        src, dst = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        offsets = np.zeros(self.n_cells[level] + 1, dtype=np.int64)
+        for cell in range(self.n_cells[level]):
+            ent, ext = self.cell_entries(level, cell), self.cell_exits(level, cell)
+            keep = (ent[:, None] != ext[None, :]).ravel()
+            src.append(np.repeat(ent, len(ext))[keep])
+            dst.append(np.tile(ext, len(ent))[keep])
+            offsets[cell + 1] = offsets[cell] + np.count_nonzero(keep)
+        self.clique_src.append(np.concatenate(src))
+        self.clique_dst.append(np.concatenate(dst))
+        self.clique_cell.append(np.repeat(np.arange(self.n_cells[level]), np.diff(offsets)))
+        self.clique_offsets.append(offsets)
+
+    def cell_entries(self, level, cell):
+        nodes, offsets = self.entries[level]
+        return nodes[offsets[cell]:offsets[cell + 1]]
+
+    def cell_exits(self, level, cell):
+        nodes, offsets = self.exits[level]
+        return nodes[offsets[cell]:offsets[cell + 1]]
+
+    def child_cells(self, level, parent):
+        """Level `level` cells inside cell `parent` of the level above (0 above the top)."""
+        offsets = self.children_offsets[level]
+        return self.children[level][offsets[parent]:offsets[parent + 1]]
+
+    def cut_edges(self, level, parent):
+        """Pairs between level `level` cells inside cell `parent` of the level above."""
+        offsets = self.cut_offsets[level]
+        return self.cut_pairs[level][offsets[parent]:offsets[parent + 1]]
+
+    def clique_range(self, level, cells):
+        """Clique indices of the given cells of a level, cell by cell."""
+        offsets = self.clique_offsets[level]
+        cells = np.asarray(cells, dtype=np.int64)
+        counts = offsets[cells + 1] - offsets[cells]
+        shift = np.repeat(offsets[cells] - (np.cumsum(counts) - counts), counts)
+        return shift + np.arange(counts.sum())
+
+    def parent_of(self, level, node):
+        """Level level + 1 cell of a node (0 above the top level)."""
+        return int(self.cells[level + 1][node]) if level + 1 < self.n_levels else 0
+
+    def inner_edges(self, cell):
+        pairs = self.inner_pairs[self.inner_offsets[cell]:self.inner_offsets[cell + 1]]
+        return self.pair_edges(pairs)
+
+    def pair_edges(self, pairs):
+        return self.pair_u[pairs], self.pair_v[pairs], np.full(len(pairs), PAIR), pairs
+
+    def clique_edges(self, level, cells):
+        k = self.clique_range(level, cells)
+        return self.clique_src[level][k], self.clique_dst[level][k], np.full(len(k), level), k
+
+    def cell_graph(self, level, cell):
+        """
+        (Cached) search graph of a cell: its original pairs on level 0,
+        otherwise its subcells' cliques plus the pairs between subcells.
+        """
+        graph = self._graphs.get((level, cell))
+        if graph is None:
+            if level == 0:
+                edges = self.inner_edges(cell)
+            else:
+                edges = _concat_edges([
+                    self.clique_edges(level - 1, self.child_cells(level - 1, cell)),
+                    self.pair_edges(self.cut_edges(level - 1, cell)),
+                ])
+            graph = _CellGraph(
+                self.n_nodes, *edges, self.cell_entries(level, cell), self.cell_exits(level, cell)
+            )
+            self._graphs[(level, cell)] = graph
+        return graph
+
+    def customize_cell(self, level, cell, pair_weights, cliques):
+        """Clique weights of one cell (entry x exit distances, in clique order)."""
+        graph = self.cell_graph(level, cell)
+        if len(graph.entries) == 0 or len(graph.exits) == 0:
+            return np.empty(0)
+        dist = dijkstra(graph.matrix(pair_weights, cliques), directed=True, indices=graph.entries)
+        return dist[:, graph.exits].ravel()[graph.keep]
+
+    def affected_cells(self, level, changed_pairs, changed_below):
+        """
+        Cells of a level to re-customize after the weights of changed_pairs
+        changed and the cells changed_below of the level below were
+        re-customized.
+        """
+        u, v = self.pair_u[changed_pairs], self.pair_v[changed_pairs]
+        cells = self.cells[level]
+        if level == 0:
+            return np.unique(cells[u][cells[u] == cells[v]])
+        below = self.cells[level - 1]
+        between_subcells = (below[u] != below[v]) & (cells[u] == cells[v])
+        return np.union1d(cells[u[between_subcells]], self.parents[level - 1][changed_below])
+
+
+def _concat_edges(parts):
+    empty = np.empty(0, dtype=np.int64)
+    parts = [p for p in parts if len(p[0])] or [(empty, empty, empty, empty)]
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+class _Metric:
+    """Per-pair weights (cheapest parallel edge) and clique weights per level."""
+
+    def __init__(self, weights, pair_weights, pair_slots, cliques):
+        self.weights = weights
+        self.pair_weights = pair_weights
+        self.pair_slots = pair_slots
+        self.cliques = cliques
+
+
+_worker_overlay = None
+
+
+def _init_worker(overlay):
+    global _worker_overlay
+    _worker_overlay = overlay
+
+
+def _customize_cells_in_worker(level, cells, pair_weights, cliques):
+    return [_worker_overlay.customize_cell(level, c, pair_weights, cliques) for c in cells]
+
+
+class CRPRouter:
+    """
+    Shortest routes over a CRP overlay, for any number of metrics.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        cell_sizes (sequence): Largest cell (in nodes) per level.
+        workers (int): Processes customizing cells (1 = serial).
+    """
+
+    def __init__(self, G, cell_sizes=CRP_CELL_SIZES, workers=CRP_WORKERS):
+        self.arrays = get_graph_arrays(G)
+        with profiler.span("crp.partition", nodes=self.arrays.n_nodes):
+            self.overlay = Overlay(self.arrays, cell_sizes)
+        self.workers = workers
+        self.metrics = {}
+        self._metric_modes = {}  # metric name -> (weight mode, blocked zones) of customize_mode()
+
+    def _pair_weights(self, weights):
+        """Cheapest weight of every node pair and the slot it comes from."""
+        ov = self.overlay
+        n_slots = len(weights)
+        sorted_weights = weights[ov.pair_order]
+        pair_weights = np.minimum.reduceat(sorted_weights, ov.pair_starts)
+        counts = np.diff(np.append(ov.pair_starts, n_slots))
+        cheapest = sorted_weights == np.repeat(pair_weights, counts)
+        position = np.where(cheapest, np.arange(n_slots), n_slots - 1)
+        return pair_weights, ov.pair_order[np.minimum.reduceat(position, ov.pair_starts)]
+
+    def customize(self, name, weights):
+        """
+        Sets or updates metric `name` to per-slot `weights`. For a known
+        metric only the cells affected by pairs whose weight changed are
+        recomputed.
+
+        Returns:
+            dict: cells (recomputed per level), total_cells (per level) and
+                seconds.
+        """
+        start = time.perf_counter()
+        ov = self.overlay
+        weights = np.asarray(weights, dtype=np.float64)
+        pair_weights, pair_slots = self._pair_weights(weights)
+        old = self.metrics.get(name)
+        if old is not None:
+            changed = np.flatnonzero(old.pair_weights != pair_weights)
+            cliques = list(old.cliques)
+        else:
+            changed = None
+            cliques = [np.full(len(src), np.inf) for src in ov.clique_src]
+
+        recomputed = []
+        pool = None
+        try:
+            dirty = None
+            for level in range(ov.n_levels):
+                if changed is None:
+                    cells = np.arange(ov.n_cells[level])
+                else:
+                    cells = ov.affected_cells(level, changed, dirty)
+                results = []
+                if len(cells):
+                    if self.workers > 1 and len(cells) > 1 and pool is None:
+                        pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(ov,))
+                    with profiler.span("crp.customize_level", level=level, cells=len(cells)):
+                        results = self._customize_cells(pool, level, cells, pair_weights, cliques)
+                    cliques[level] = cliques[level].copy()
+                    cliques[level][ov.clique_range(level, cells)] = np.concatenate(results)
+                recomputed.append(len(cells))
+                # Parents only need work where the recomputed cliques actually moved
+                dirty = cells if old is None else np.array(
+                    [c for c, values in zip(cells, results)
+                     if not np.array_equal(values, old.cliques[level][ov.clique_range(level, [c])])],
+                    dtype=np.int64,
+                )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.metrics[name] = _Metric(weights, pair_weights, pair_slots, cliques)
+        return {
+            "cells": recomputed,
+            "total_cells": list(ov.n_cells),
+            "seconds": time.perf_counter() - start,
+        }
+
+    def _customize_cells(self, pool, level, cells, pair_weights, cliques):
+        if pool is None:
+            return [self.overlay.customize_cell(level, c, pair_weights, cliques) for c in cells]
+        chunks = np.array_split(cells, min(len(cells), self.workers * 4))
+        results = pool.map(
+            _customize_cells_in_worker,
+            [level] * len(chunks), chunks, [pair_weights] * len(chunks), [cliques] * len(chunks),
+        )
+        return [values for chunk in results for values in chunk]
+
+    def customize_mode(self, weight_mode, blocked_zones=None, name=None):
+        """customize() with a role mode's weights (and zones); named after the mode by default."""
+        name = name or (weight_mode + ("+zones" if blocked_zones else ""))
+        self._metric_modes[name] = (weight_mode, blocked_zones)
+        return self.customize(name, calculate_edge_weights(self.arrays, weight_mode, blocked_zones))
+
+    def refresh(self):
+        """
+        Re-customizes every customize_mode() metric from the current edge
+        attributes, e.g. after online risk updates; only changed cells are
+        recomputed.
+
+        Returns:
+            dict: Metric name -> customize() stats.
+        """
+        return {
+            name: self.customize_mode(mode, zones, name=name)
+            for name, (mode, zones) in list(self._metric_modes.items())
+        }
+
+    def _query_edges(self, source, target):
+        """Overlay edges (src, dst, kind, ref) a source -> target search needs."""
+        ov = self.overlay
+        if ov.n_levels == 0:
+            return ov.pair_edges(ov.inner_pairs)
+        parts = [ov.inner_edges(cell) for cell in {int(ov.cells[0][source]), int(ov.cells[0][target])}]
+        for level in range(ov.n_levels):
+            own = [ov.cells[level][source], ov.cells[level][target]]
+            for parent in {ov.parent_of(level, source), ov.parent_of(level, target)}:
+                parts.append(ov.pair_edges(ov.cut_edges(level, parent)))
+                parts.append(ov.clique_edges(level, np.setdiff1d(ov.child_cells(level, parent), own)))
+        return _concat_edges(parts)
+
+    def _unpack(self, hops, metric):
+        """Edge slots behind a list of (kind, ref) hops."""
+        ov = self.overlay
+        slots = []
+        for kind, ref in hops:
+            if kind == PAIR:
+                slots.append(int(metric.pair_slots[ref]))
+                continue
+            graph = ov.cell_graph(kind, int(ov.clique_cell[kind][ref]))
+            matrix = graph.matrix(metric.pair_weights, metric.cliques)
+            inner = graph.hops(matrix, ov.clique_src[kind][ref], ov.clique_dst[kind][ref])
+            slots.extend(self._unpack(inner, metric))
+        return slots
+
+    def route(self, source, target, metric):
+        """
+        Shortest route between two node indices under a customized metric.
+
+        Returns:
+            tuple: (route, cost) like BatchRouter.route: int64 edge slots
+                (empty when source == target), or None and inf when
+                unreachable.
+        """
+        if source == target:
+            return np.empty(0, dtype=np.int64), 0.0
+        m = self.metrics[metric]
+        src, dst, kind, ref = self._query_edges(source, target)
+        nodes, local_src, local_dst, (s, t) = _compact(
+            self.overlay.n_nodes, src, dst, np.array([source, target])
+        )
+        weights = _gather_weights(kind, ref, m.pair_weights, m.cliques)
+        matrix = csr_matrix((weights, (local_src, local_dst)), shape=(len(nodes), len(nodes)))
+        cost, path = _shortest_path(matrix, s, t)
+        if path is None:
+            return None, np.inf
+        taken = _hop_edges(local_src, local_dst, len(nodes), path)
+        hops = list(zip(kind[taken].tolist(), ref[taken].tolist()))
+        return np.array(self._unpack(hops, m), dtype=np.int64), cost
@@ -0,0 +1,324 @@
+"""
+Rescue depot placement.
+
+Chooses p depots among candidate nodes so that demand points (where people
+need help) are served cheaply under a role's weight mode, i.e. the response
+cost is risk-weighted for 'safe'. Everything runs on one precomputed
+(candidates x demand) cost matrix:
+
+    - p-median: minimize the demand-weighted cost from every demand point to
+      its cheapest depot;
+    - max-coverage: maximize the demand weight within `radius` of some depot.
+
+Both start from a greedy solution (add the depot that helps most, p times)
+and improve it by local search (swap one depot for a non-selected candidate
+while that helps). Each greedy step and each swap round scores every
+candidate in a single NumPy expression over the matrix, so thousands of
+candidates times thousands of demand points stay fast.
+"""
+
+import json
+
+import numpy as np
+
+from config import DEPOT_LOCAL_SEARCH_ROUNDS
+from src.ai.batch_routing import TREE_CHUNK_SIZE, BatchRouter
+from src.utils import profiler
+
+OBJECTIVES = ("p_median", "max_coverage")
+UNREACHABLE_PENALTY = 10.0  # Unreachable demand costs this times the largest finite cost
+
+
+def build_cost_matrix(G, candidates, demand, weight_mode="safe", blocked_zones=None, router=None):
+    """
+    Response cost from every candidate depot to every demand point.
+
+    Shortest-path trees are grown from whichever side has fewer nodes (on the
+    reversed graph when growing from the demand side), in chunks of
+    TREE_CHUNK_SIZE.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        candidates (list): Candidate depot node IDs.
+        demand (list): Demand node IDs.
+        weight_mode (str): Role weight mode the costs are measured in.
+        blocked_zones (list, optional): (lat, lon, radius, name) zones to avoid.
+        router (BatchRouter, optional): Router for weight_mode/blocked_zones.
+
+    Returns:
+        np.ndarray: (len(candidates) x len(demand)) costs, inf if unreachable.
+    """
+    if router is None:
+        router = BatchRouter(G, weight_mode, blocked_zones)
+    a = router.arrays
+    cand_idx = a.nodes_to_indices(candidates)
+    demand_idx = a.nodes_to_indices(demand)
+
+    reverse = len(demand_idx) < len(cand_idx)
+    roots, leaves = (demand_idx, cand_idx) if reverse else (cand_idx, demand_idx)
+    costs = np.empty((len(roots), len(leaves)))
+    with profiler.span("build_cost_matrix", roots=len(roots), leaves=len(leaves)):
+        for start in range(0, len(roots), TREE_CHUNK_SIZE):
+            chunk = roots[start:start + TREE_CHUNK_SIZE]
+            dist, _ = router.trees(chunk, reverse=reverse)
+            costs[start:start + len(chunk)] = dist[:, leaves]
+    return costs.T if reverse else costs
+
+
+def _finite_costs(costs):
+    """Replaces inf by a penalty so sums and differences stay meaningful."""
+    finite = np.isfinite(costs)
+    if finite.all():
+        return costs
+    top = costs[finite].max() if finite.any() else 1.0
+    return np.where(finite, costs, max(top, 1.0) * UNREACHABLE_PENALTY)
+
+
+def _best_two(costs, selected):
+    """Cheapest and second-cheapest selected depot cost per demand point."""
+    sub = costs[selected]
+    if len(selected) == 1:
+        return sub[0], np.full(sub.shape[1], np.inf), np.zeros(sub.shape[1], dtype=np.int64)
+    order = np.argpartition(sub, 1, axis=0)[:2]
+    cols = np.arange(sub.shape[1])
+    return sub[order[0], cols], sub[order[1], cols], order[0]
+
+
+def solve_p_median(costs, p, weights=None, max_rounds=DEPOT_LOCAL_SEARCH_ROUNDS):
+    """
+    Greedy + swap local search for the p-median problem.
+
+    Args:
+        costs (np.ndarray): (candidates x demand) cost matrix.
+        p (int): Number of depots.
+        weights (np.ndarray, optional): Demand weight per column (default 1).
+        max_rounds (int): Swap rounds; each round tries every selected depot.
+
+    Returns:
+        tuple: (selected candidate row indices, total weighted cost, swaps made)
+    """
+    costs = _finite_costs(np.asarray(costs, dtype=np.float64))
+    n_candidates, n_demand = costs.shape
+    p = min(p, n_candidates)
+    w = np.ones(n_demand) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    # Candidates are scored in float32 (half the memory traffic); the winner's
+    # total is then recomputed exactly in float64.
+    costs32, w32 = costs.astype(np.float32), w.astype(np.float32)
+    scratch = np.empty_like(costs32)
+
+    def score(assigned):
+        np.minimum(assigned.astype(np.float32), costs32, out=scratch)
+        return scratch @ w32
+
+    # Greedy: add the candidate that lowers the total most
+    selected = []
+    current = np.full(n_demand, np.inf)
+    for _ in range(p):
+        totals = score(current)
+        totals[selected] = np.inf
+        best = int(np.argmin(totals))
+        selected.append(best)
+        current = np.minimum(current, costs[best])
+    total = float(current @ w)
+
+    # Swap (Teitz-Bart): drop one depot, add the best non-selected candidate
+    swaps = 0
+    for _ in range(max_rounds):
+        improved = False
+        for pos in range(p):
+            first, second, closest = _best_two(costs, selected)
+            without = np.where(closest == pos, second, first)
+            totals = score(without)
+            totals[selected] = np.inf
+            best = int(np.argmin(totals))
+            swapped = float(np.minimum(without, costs[best]) @ w)
+            if swapped < total * (1 - 1e-9):
+                selected[pos] = best
+                total = swapped
+                swaps += 1
+                improved = True
+        if not improved:
+            break
+    return np.array(selected, dtype=np.int64), total, swaps
+
+
+def solve_max_coverage(costs, p, radius, weights=None, max_rounds=DEPOT_LOCAL_SEARCH_ROUNDS):
+    """
+    Greedy + swap local search for the maximal covering problem.
+
+    Args:
+        costs (np.ndarray): (candidates x demand) cost matrix.
+        p (int): Number of depots.
+        radius (float): A demand point is covered by depots within this cost.
+        weights (np.ndarray, optional): Demand weight per column (default 1).
+        max_rounds (int): Swap rounds; each round tries every selected depot.
+
+    Returns:
+        tuple: (selected candidate row indices, covered demand weight, swaps made)
+    """
+    cover = np.asarray(costs) <= radius
+    n_candidates, n_demand = cover.shape
+    p = min(p, n_candidates)
+    w = np.ones(n_demand) if weights is None else np.asarray(weights, dtype=np.float64)
+    coverf = cover.astype(np.float32)
+
+    # Greedy: add the candidate covering the most still-uncovered demand
+    selected = []
+    covered = np.zeros(n_demand, dtype=bool)
+    for _ in range(p):
+        gains = coverf[:, ~covered] @ w[~covered].astype(np.float32)
+        gains[selected] = -np.inf
+        best = int(np.argmax(gains))
+        selected.append(best)
+        covered |= cover[best]
+    total = float(w[covered].sum())
+
+    swaps = 0
+    for _ in range(max_rounds):
+        improved = False
+        for pos in range(p):
+            counts = cover[selected].sum(axis=0)
+            kept = counts - cover[selected[pos]] > 0
+            totals = coverf[:, ~kept] @ w[~kept].astype(np.float32)
+            totals[selected] = -np.inf
+            best = int(np.argmax(totals))
+            swapped = float(w[kept | cover[best]].sum())
+            if swapped > total * (1 + 1e-9):
+                selected[pos] = best
+                total = swapped
+                swaps += 1
+                improved = True
+        if not improved:
+            break
+    return np.array(selected, dtype=np.int64), total, swaps
+
+
+@profiler.timed("place_depots")
+def place_depots(
+    G,
+    candidates,
+    demand,
+    n_depots,
+    objective="p_median",
+    weight_mode="safe",
+    blocked_zones=None,
+    radius=None,
+    demand_weights=None,
+    costs=None,
+):
+    """
+    Chooses depots among candidate nodes for a set of demand nodes.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        candidates (list): Candidate depot node IDs.
+        demand (list): Demand node IDs.
+        n_depots (int): Number of depots to place.
+        objective (str): 'p_median' or 'max_coverage'.
+        weight_mode (str): Role weight mode the response cost is measured in.
+        blocked_zones (list, optional): (lat, lon, radius, name) zones to avoid.
+        radius (float, optional): Coverage cost radius (required for max_coverage).
+        demand_weights (list, optional): Weight per demand node (default 1).
+        costs (np.ndarray, optional): Precomputed build_cost_matrix() result,
+            to compare objectives or depot counts without searching again.
+
+    Returns:
+        dict: depots (node IDs), assignment (demand node -> depot node, None if
+            unreachable), costs (cost per demand node), objective, value
+            (total cost or covered weight), covered (share of demand weight
+            within radius, if given), swaps, and coordinates for the map.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}', expected one of {OBJECTIVES}")
+    if objective == "max_coverage" and radius is None:
+        raise ValueError("max_coverage needs a coverage radius")
+
+    if costs is None:
+        costs = build_cost_matrix(G, candidates, demand, weight_mode, blocked_zones)
+    w = np.ones(len(demand)) if demand_weights is None else np.asarray(demand_weights, dtype=np.float64)
+
+    if objective == "p_median":
+        selected, value, swaps = solve_p_median(costs, n_depots, w)
+    else:
+        selected, value, swaps = solve_max_coverage(costs, n_depots, radius, w)
+
+    sub = costs[selected]
+    nearest = np.argmin(sub, axis=0)
+    served = sub[nearest, np.arange(len(demand))]
+    depots = [candidates[i] for i in selected]
+    profiler.annotate(candidates=len(candidates), demand=len(demand), swaps=swaps)
+
+    nodes = G.nodes
+    plan = {
+        "objective": objective,
+        "weight_mode": weight_mode,
+        "depots": depots,
+        "assignment": {
+            d: (depots[j] if np.isfinite(c) else None)
+            for d, j, c in zip(demand, nearest.tolist(), served.tolist())
+        },
+        "costs": served.tolist(),
+        "value": value,
+        "swaps": swaps,
+        "depot_coords": [(nodes[d]["y"], nodes[d]["x"]) for d in depots],
+        "demand_coords": [(nodes[d]["y"], nodes[d]["x"]) for d in demand],
+        "demand_depot": nearest.tolist(),
+    }
+    if radius is not None:
+        plan["radius"] = radius
+        plan["covered"] = float(w[served <= radius].sum() / max(w.sum(), 1e-9))
+    return plan
+
+
+def export_depot_plan(plan, filepath=None):
+    """
+    Converts a depot plan to GeoJSON: one Point per depot (with the number of
+    demand points it serves) and one Point per demand node (with its depot
+    and response cost).
+
+    Args:
+        plan (dict): place_depots() result.
+        filepath (str, optional): Also write the GeoJSON to this path.
+
+    Returns:
+        dict: The GeoJSON FeatureCollection.
+    """
+    features = []
+    served = np.bincount(plan["demand_depot"], minlength=len(plan["depots"]))
+    for i, (node, (lat, lon)) in enumerate(zip(plan["depots"], plan["depot_coords"])):
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {"kind": "depot", "node": node, "served": int(served[i])},
+        })
+    for node, (lat, lon), depot, cost in zip(
+        plan["assignment"], plan["demand_coords"], plan["demand_depot"], plan["costs"]
+    ):
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {
+                "kind": "demand",
+                "node": node,
+                "depot": plan["depots"][depot] if np.isfinite(cost) else None,
+                "cost": cost if np.isfinite(cost) else None,
+            },
+        })
+    collection = {
+        "type": "FeatureCollection",
+        "properties": {
+            key: plan[key]
+            for key in ("objective", "weight_mode", "value", "swaps", "radius", "covered")
+            if key in plan
+        },
+        "features": features,
+    }
+    if filepath:
+        try:
+            with open(filepath, "w") as f:
+                json.dump(collection, f, default=str)
+            print(f"Depot plan saved to {filepath}")
+        except Exception as e:
+            print(f"Error saving depot plan: {e}")
+    return collection
@@ -0,0 +1,169 @@
+"""
+Array (CSR) view of a street graph for the vectorized engines.
+
+networkx stores every edge as a Python dict, which is convenient for
+enrichment and A* but far too slow to sweep thousands of times per second.
+GraphArrays flattens a MultiDiGraph once into compressed sparse row form:
+every (u, v, key) edge gets an integer *slot*, the outgoing edges of node i
+occupy slots indptr[i]:indptr[i + 1], and the attributes the AI layer needs
+live in parallel NumPy arrays indexed by slot.
+"""
+
+import sys
+import weakref
+
+import numpy as np
+
+# Edge attributes copied into float arrays, with the defaults used by
+# calculate_single_edge_weight() for edges that lack them.
+EDGE_FLOAT_ATTRIBUTES = {
+    "length": 1.0,
+    "risk_level": 0.0,
+    "enemy_probability": 0.0,
+    "resource_cost": 0.0,
+}
+
+
+class GraphArrays:
+    """
+    CSR representation of a networkx.MultiDiGraph.
+
+    Attributes:
+        node_ids (np.ndarray): Graph node ID of every node index.
+        node_index (dict): Graph node ID -> node index.
+        x, y (np.ndarray): Node longitude / latitude.
+        indptr (np.ndarray): Outgoing slots of node i are indptr[i]:indptr[i+1].
+        edge_u, edge_v (np.ndarray): Source / target node index of every slot.
+        edge_keys (list): (u, v, key) graph edge of every slot.
+        length, risk_level, enemy_probability, resource_cost (np.ndarray):
+            Edge attributes per slot.
+    """
+
+    def __init__(self, G):
+        self.graph_ref = weakref.ref(G)
+        self.node_ids = np.array(list(G.nodes()))
+        self.node_index = {n: i for i, n in enumerate(G.nodes())}
+        self.n_nodes = len(self.node_ids)
+
+        self.x = np.array([d["x"] for _, d in G.nodes(data=True)], dtype=np.float64)
+        self.y = np.array([d["y"] for _, d in G.nodes(data=True)], dtype=np.float64)
+
+        edges = list(G.edges(keys=True, data=True))
+        self.n_edges = len(edges)
+        index = self.node_index
+        edge_u = np.fromiter((index[u] for u, _, _, _ in edges), dtype=np.int64, count=self.n_edges)
+        edge_v = np.fromiter((index[v] for _, v, _, _ in edges), dtype=np.int64, count=self.n_edges)
+
+        # networkx yields edges grouped by source in node order already; the
+        # stable sort only guards against graphs built some other way.
+        order = np.argsort(edge_u, kind="stable")
+        self.edge_u = edge_u[order]
+        self.edge_v = edge_v[order]
+        self.edge_keys = [edges[i][:3] for i in order]
+        self.indptr = np.zeros(self.n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.edge_u, minlength=self.n_nodes), out=self.indptr[1:])
+
+        for name, default in EDGE_FLOAT_ATTRIBUTES.items():
+            values = np.fromiter(
+                (_as_float(edges[i][3].get(name, default), default) for i in order),
+                dtype=np.float64,
+                count=self.n_edges,
+            )
+            setattr(self, name, values)
+
+        self.signature = _signature(G)
+        self._padded_slots = None
+
+    def __getstate__(self):
+        # Pickled without the graph reference; adopt_graph_arrays() restores it
+        state = self.__dict__.copy()
+        state["graph_ref"] = None
+        state["_padded_slots"] = None
+        return state
+
+    @property
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def padded_out_slots(self):
+        """
+        Outgoing slots of every node as an (n_nodes, max_out_degree) matrix,
+        padded with -1, so per-node reductions can be done for many nodes at once.
+        """
+        if self._padded_slots is None:
+            degree = self.out_degree
+            width = max(1, int(degree.max()) if self.n_nodes else 1)
+            padded = np.full((self.n_nodes, width), -1, dtype=np.int64)
+            column = np.arange(self.n_edges) - self.indptr[self.edge_u]
+            padded[self.edge_u, column] = np.arange(self.n_edges)
+            self._padded_slots = padded
+        return self._padded_slots
+
+    @property
+    def nbytes(self):
+        """Approximate memory: the arrays, the edge key list and the node index."""
+        arrays = sum(v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray))
+        keys = sys.getsizeof(self.edge_keys) + sum(sys.getsizeof(k) for k in self.edge_keys)
+        return arrays + keys + sys.getsizeof(self.node_index)
+
+    def nodes_to_indices(self, nodes):
+        """Graph node IDs -> node indices."""
+        return np.array([self.node_index[n] for n in nodes], dtype=np.int64)
+
+
+def _as_float(value, default):
+    if isinstance(value, list):
+        value = value[0]
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def _signature(G):
+    return (G.number_of_nodes(), G.number_of_edges())
+
+
+_cache = weakref.WeakKeyDictionary()
+
+
+def get_graph_arrays(G):
+    """
+    Returns the (cached) GraphArrays of G.
+
+    The cache is keyed on the graph object and rebuilt when its node or edge
+    count changes. Call invalidate_graph_arrays(G) after editing edge
+    attributes in place (enrich_graph does this itself).
+    """
+    arrays = _cache.get(G)
+    if arrays is None or arrays.signature != _signature(G):
+        arrays = GraphArrays(G)
+        _cache[G] = arrays
+    return arrays
+
+
+def peek_graph_arrays(G):
+    """The cached GraphArrays of G if they are built and current, else None (builds nothing)."""
+    arrays = _cache.get(G)
+    if arrays is None or arrays.signature != _signature(G):
+        return None
+    return arrays
+
+
+def invalidate_graph_arrays(G):
+    """Drops the cached GraphArrays of G."""
+    _cache.pop(G, None)
+
+
+def adopt_graph_arrays(G, arrays):
+    """
+    Caches prebuilt GraphArrays (e.g. unpickled from a snapshot) for G.
+
+    Returns:
+        bool: False (nothing cached) if the arrays do not match G's size.
+    """
+    if arrays.signature != _signature(G):
+        return False
+    arrays.graph_ref = weakref.ref(G)
+    _cache[G] = arrays
+    return True
@@ -0,0 +1,116 @@
+"""
+Isochrones: what a role can reach from a base within a cost budget.
+
+One Dijkstra bounded by the largest requested budget over the role's
+weights gives the cost of every reachable node; each budget is then just a
+threshold on those costs. The area is the concave hull of the reachable
+nodes, returned as a Shapely polygon in (lon, lat) order for folium.
+
+Results are cached per (graph, source, weight mode and its coefficients,
+budget, zones), so changing one budget or switching back to an earlier role
+does not search again, while re-registering a mode with new coefficients
+does. Isochrones over a caller's router are cached per router.
+"""
+
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from config import ISOCHRONE_CACHE_SIZE, ISOCHRONE_HULL_RATIO
+from src.ai.batch_routing import BatchRouter
+from src.ai.cost_model import weight_coefficients
+from src.utils import profiler
+
+_cache = weakref.WeakKeyDictionary()  # graph or BatchRouter -> OrderedDict(key -> isochrone)
+
+
+def compute_isochrones(
+    G,
+    source,
+    budgets,
+    weight_mode="safe",
+    blocked_zones=None,
+    hull_ratio=ISOCHRONE_HULL_RATIO,
+    router=None,
+):
+    """
+    Reachable areas from `source` for several cost budgets in one search.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        source: Start node ID.
+        budgets (list): Cost budgets in the weight mode's units (meters of
+            'fast' length, risk-weighted meters for 'safe', ...).
+        weight_mode (str): Role weight mode.
+        blocked_zones (list, optional): (lat, lon, radius, name) zones to avoid.
+        hull_ratio (float): shapely.concave_hull ratio (0 = tightest, 1 = convex).
+        router (BatchRouter, optional): Router for weight_mode/blocked_zones.
+
+    Returns:
+        list: One dict per budget (in the given order) with budget, nodes
+            (reachable node IDs), costs (cost per node, same order) and
+            polygon (Shapely geometry in lon/lat, None if fewer than 3 nodes).
+    """
+    zones_key = tuple(tuple(z) for z in blocked_zones) if blocked_zones else None
+    # A caller's router brings its own weights, so its results are kept apart
+    cache = _cache.setdefault(G if router is None else router, OrderedDict())
+    mode_key = (weight_mode, weight_coefficients(weight_mode))
+    keys = [(source, mode_key, float(b), zones_key, hull_ratio) for b in budgets]
+
+    missing = [k for k in keys if k not in cache]
+    if missing:
+        with profiler.span("compute_isochrones", weight_mode=weight_mode, budgets=len(missing)):
+            if router is None:
+                router = BatchRouter(G, weight_mode, blocked_zones)
+            a = router.arrays
+            limit = max(k[2] for k in missing)
+            dist = router.trees([a.node_index[source]], limit=limit)[0][0]
+
+            reached = np.flatnonzero(np.isfinite(dist))
+            reached = reached[np.argsort(dist[reached], kind="stable")]
+            reached_costs = dist[reached]
+            for key in missing:
+                count = int(np.searchsorted(reached_costs, key[2], side="right"))
+                nodes = reached[:count]
+                cache[key] = {
+                    "budget": key[2],
+                    "nodes": a.node_ids[nodes].tolist(),
+                    "costs": reached_costs[:count].tolist(),
+                    "polygon": _hull(a.x[nodes], a.y[nodes], hull_ratio),
+                }
+    else:
+        profiler.count("isochrone.cache_hits", len(keys))
+
+    for key in keys:
+        cache.move_to_end(key)
+    while len(cache) > ISOCHRONE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return [cache[k] for k in keys]
+
+
+def compute_isochrone(G, source, budget, weight_mode="safe", blocked_zones=None):
+    """Single-budget convenience wrapper around compute_isochrones."""
+    return compute_isochrones(G, source, [budget], weight_mode, blocked_zones)[0]
+
+
+def clear_isochrone_cache(G=None):
+    """Drops cached isochrones of G and of routers over it (or of every graph)."""
+    if G is None:
+        _cache.clear()
+        return
+    _cache.pop(G, None)
+    for owner in list(_cache.keys()):
+        graph_ref = owner.arrays.graph_ref if isinstance(owner, BatchRouter) else None
+        if graph_ref is not None and graph_ref() is G:
+            _cache.pop(owner, None)
+
+
+def _hull(lon, lat, ratio):
+    import shapely
+
+    if len(lon) < 3:
+        return None
+    points = shapely.multipoints(np.column_stack([lon, lat]))
+    hull = shapely.concave_hull(points, ratio=ratio)
+    return hull if hull.geom_type == "Polygon" else shapely.convex_hull(points)
@@ -1,10 +1,35 @@
 """
 Mission Narrator - Generates contextual mission briefings using Gemini AI.
 Falls back to templates if API is unavailable.
+
+Gemini requests run on a background worker. A caller waits at most
+LLM_LATENCY_BUDGET_SECONDS for the answer and otherwise gets the template
+briefing immediately; the AI briefing is cached once it arrives and is
+returned by the next call with the same mission parameters.
 """
 
+import json
 import random
-from config import GEMINI_API_KEY, LLM_ENABLED
+import threading
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from config import (
+    GEMINI_API_KEY,
+    GEMINI_API_URL,
+    GEMINI_MODEL,
+    LLM_CACHE_SIZE,
+    LLM_ENABLED,
+    LLM_LATENCY_BUDGET_SECONDS,
+    LLM_TIMEOUT_SECONDS,
+)
+from src.utils import profiler
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="briefing")
+_lock = threading.Lock()
+_cache = OrderedDict()  # key -> final briefing text (LRU)
+_pending = {}  # key -> (Future, fallback template text)
 
 
 def generate_briefing_with_gemini(
@@ -12,11 +37,6 @@ def generate_briefing_with_gemini(
 ):
     """Generate briefing using Gemini API."""
     try:
-        import google.generativeai as genai
-
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-2.0-flash")
-
         prompt = f"""Generate a tactical mission briefing (2-3 sentences max) for a simulation game.
 
 Role: {role_name}
@@ -27,13 +47,25 @@ Danger Zones in Area: {danger_zones_count}
 
 Write in a {role_name.lower()} commanding officer's voice. Be dramatic but concise.
 Army = military tactical tone
-Rescuer = emergency medical responder tone  
+Rescuer = emergency medical responder tone
 Volunteer = humanitarian aid worker tone
 
 Do not use markdown formatting. Plain text only."""
 
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        request = urllib.request.Request(
+            f"{GEMINI_API_URL}/models/{GEMINI_MODEL}:generateContent",
+            data=json.dumps({"contents": [{"parts": [{"text": prompt}]}]}).encode(),
+            headers={
+                "Content-Type": "application/json",
+                "x-goog-api-key": GEMINI_API_KEY.strip(),
+            },
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=LLM_TIMEOUT_SECONDS) as response:
+            payload = json.load(response)
+
+        text = payload["candidates"][0]["content"]["parts"][0]["text"]
+        return text.strip()
     except Exception as e:
         print(f"Gemini API error: {e}")
         return None
@@ -76,19 +108,84 @@ def generate_briefing_template(
     return random.choice(role_templates)
 
 
+def _remember(key, text):
+    """Stores a final briefing in the LRU cache (caller holds _lock)."""
+    _cache[key] = text
+    _cache.move_to_end(key)
+    while len(_cache) > LLM_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def request_briefing(
+    role_name, source, destination, steps, danger_zones_count=0, budget=None
+):
+    """
+    Non-blocking briefing lookup.
+
+    Returns the cached briefing if there is one. Otherwise starts (or joins)
+    a background Gemini request, waits at most `budget` seconds for it and
+    falls back to a template briefing if it is not done yet.
+
+    Args:
+        budget (float, optional): Seconds to wait for the LLM. Defaults to
+            LLM_LATENCY_BUDGET_SECONDS.
+
+    Returns:
+        tuple: (briefing, is_final)
+            briefing: Text to display now.
+            is_final: False while an AI briefing is still being generated;
+                call again later to swap it in.
+    """
+    key = (role_name, source, destination, steps, danger_zones_count)
+    args = (role_name, source, destination, steps, danger_zones_count)
+    if budget is None:
+        budget = LLM_LATENCY_BUDGET_SECONDS
+
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key], True
+
+        if not LLM_ENABLED:
+            briefing = generate_briefing_template(*args)
+            _remember(key, briefing)
+            return briefing, True
+
+        if key not in _pending:
+            # The template is picked once so the placeholder does not change
+            # between reruns while the AI briefing is pending.
+            future = _executor.submit(profiler.bind(generate_briefing_with_gemini), *args)
+            _pending[key] = (future, generate_briefing_template(*args))
+        future, fallback = _pending[key]
+
+    if budget > 0:
+        wait([future], timeout=budget)
+
+    if not future.done():
+        return fallback, False
+
+    # A failed request keeps the template, so a dead API is not retried on every rerun
+    briefing = future.result() or fallback
+    with _lock:
+        _pending.pop(key, None)
+        _remember(key, briefing)
+    return briefing, True
+
+
+def clear_briefing_cache():
+    """Drops all cached briefings (pending requests are left to finish)."""
+    with _lock:
+        _cache.clear()
+
+
 def generate_briefing(role_name, source, destination, steps, danger_zones_count=0):
     """
     Generate a mission briefing. Uses Gemini AI if available, otherwise templates.
-    """
-    # Try Gemini API first if enabled
-    if LLM_ENABLED:
-        briefing = generate_briefing_with_gemini(
-            role_name, source, destination, steps, danger_zones_count
-        )
-        if briefing:
-            return briefing
 
-    # Fallback to templates
-    return generate_briefing_template(
+    Never waits longer than LLM_LATENCY_BUDGET_SECONDS; see request_briefing()
+    to find out whether a better briefing is still on its way.
+    """
+    briefing, _ = request_briefing(
         role_name, source, destination, steps, danger_zones_count
     )
+    return briefing
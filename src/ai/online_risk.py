@@ -0,0 +1,162 @@
+"""
+Online risk updates from field reports.
+
+enrich_graph scores every edge once, at load time, with a RiskModel trained
+on synthetic data. OnlineRiskUpdater keeps that model learning from observed
+incidents instead:
+
+    1. report(): RiskModel.partial_fit() on the reported edges (1 = proved
+       hostile, 0 = proved safe).
+    2. sync(): predicts the risk of every edge of a graph at once from a
+       cached feature matrix (one matrix-vector product) and keeps only the
+       edges whose risk moved by more than RISK_UPDATE_THRESHOLD.
+    3. apply_risk_levels(): pushes just those edges into everything routing
+       reads: the graph's edge dicts (A*), the GraphArrays (vectorized
+       engines), the cached mode weights, the isochrone and time-dependent
+       search caches and any CRPRouter passed in (re-customized cell by
+       cell).
+
+Nothing is re-enriched and no index is rebuilt. report() returns the time
+of every step; `seconds` is the report-to-route-visibility latency.
+"""
+
+import time
+import weakref
+
+import numpy as np
+
+from config import RISK_UPDATE_THRESHOLD
+from src.ai.cost_model import refresh_edge_weights
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.isochrone import clear_isochrone_cache
+from src.ai.time_dependent import clear_time_dependent_cache
+from src.utils import profiler
+
+# enrich_graph draws enemy_probability as risk * U(0.7, 1.0); edges without
+# a usable ratio get the mean factor.
+MEAN_ENEMY_FACTOR = 0.85
+
+_features = weakref.WeakKeyDictionary()  # GraphArrays -> RiskModel feature matrix per slot
+
+
+def edge_features(G, risk_model):
+    """(Cached) RiskModel features of every edge slot of G."""
+    a = get_graph_arrays(G)
+    features = _features.get(a)
+    if features is None:
+        features = risk_model.feature_matrix([G.edges[key] for key in a.edge_keys])
+        _features[a] = features
+    return features
+
+
+def apply_risk_levels(G, slots, risk_levels):
+    """
+    Sets new risk levels for some edge slots of G and updates what depends
+    on them, without re-enriching the graph or rebuilding its arrays.
+    enemy_probability keeps its per-edge ratio to the risk level.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        slots (array-like): Edge slots (see GraphArrays).
+        risk_levels (array-like): New risk level per slot.
+    """
+    a = get_graph_arrays(G)
+    slots = np.asarray(slots, dtype=np.int64)
+    risk = np.asarray(risk_levels, dtype=np.float64)
+    old = a.risk_level[slots]
+    ratio = np.divide(
+        a.enemy_probability[slots], old, out=np.full(len(slots), MEAN_ENEMY_FACTOR), where=old > 0
+    )
+    enemy = np.round(np.clip(risk * ratio, 0.0, 1.0), 2)
+
+    for slot, r, e in zip(slots.tolist(), risk.tolist(), enemy.tolist()):
+        data = G.edges[a.edge_keys[slot]]
+        data["risk_level"] = r
+        data["enemy_probability"] = e
+    a.risk_level[slots] = risk
+    a.enemy_probability[slots] = enemy
+    refresh_edge_weights(a, slots)
+    clear_isochrone_cache(G)
+    clear_time_dependent_cache(G)
+
+
+class OnlineRiskUpdater:
+    """
+    Incremental risk model shared by every graph it scores.
+
+    Args:
+        risk_model (RiskModel): Model the graphs were enriched with; it is
+            updated in place.
+        threshold (float): Smallest change of an edge's predicted risk that
+            is pushed into the graph.
+    """
+
+    def __init__(self, risk_model, threshold=RISK_UPDATE_THRESHOLD):
+        self.risk_model = risk_model
+        self.threshold = threshold
+        self.version = 0  # Report batches fitted so far
+        self._synced = weakref.WeakKeyDictionary()  # GraphArrays -> version pushed into it
+        self._refreshed = weakref.WeakKeyDictionary()  # CRPRouter -> version it was refreshed at
+
+    def report(self, G, edges, hostile, routers=()):
+        """
+        Feeds field reports into the model and pushes the resulting risk
+        changes into G.
+
+        Args:
+            G (networkx.MultiDiGraph): Graph of the reported edges.
+            edges (list): (u, v, key) edges the reports are about.
+            hostile (bool or list): Outcome, for all edges or per edge
+                (True = proved hostile, False = proved safe).
+            routers (list, optional): CRPRouters over G to refresh.
+
+        Returns:
+            dict: reports, rescored (edges pushed), fit_s, score_s, push_s
+                and seconds (report until routing sees the change).
+        """
+        start = time.perf_counter()
+        labels = np.broadcast_to(np.asarray(hostile, dtype=np.float64), (len(edges),))
+        with profiler.span("online_risk.partial_fit", reports=len(edges)):
+            self.risk_model.partial_fit([G.edges[e] for e in edges], labels)
+        self.version += 1
+        fit_s = time.perf_counter() - start
+
+        stats = self.sync(G, routers)
+        stats.update(reports=len(edges), fit_s=fit_s, seconds=time.perf_counter() - start)
+        return stats
+
+    def sync(self, G, routers=()):
+        """
+        Pushes the model's current predictions into G where they differ from
+        the stored risk by more than the threshold, then refreshes routers
+        that have not seen the current version. A no-op for graphs and
+        routers that are up to date and before the first report; safe to
+        retry after a router failed to refresh.
+
+        Returns:
+            dict: rescored (edges pushed), score_s and push_s.
+        """
+        stats = {"rescored": 0, "score_s": 0.0, "push_s": 0.0}
+        if self.version == 0:
+            return stats
+        a = get_graph_arrays(G)
+        start = scored = time.perf_counter()
+        if self._synced.get(a) != self.version:
+            with profiler.span("online_risk.score", edges=a.n_edges):
+                predicted = self.risk_model.predict_risks(edge_features(G, self.risk_model))
+                slots = np.flatnonzero(np.abs(predicted - a.risk_level) > self.threshold)
+            scored = time.perf_counter()
+            if len(slots):
+                with profiler.span("online_risk.push", edges=len(slots)):
+                    apply_risk_levels(G, slots, predicted[slots])
+            self._synced[a] = self.version
+            stats["rescored"] = len(slots)
+
+        # Tracked per router, so one that failed is refreshed again on the next sync
+        for router in routers:
+            if self._refreshed.get(router) != self.version:
+                with profiler.span("online_risk.refresh_router"):
+                    router.refresh()
+                self._refreshed[router] = self.version
+        stats.update(score_s=scored - start, push_s=time.perf_counter() - scored)
+        return stats
@@ -0,0 +1,162 @@
+"""
+Multi-objective route search.
+
+Every weight mode collapses (length, risk, resource cost) into one number, so
+comparing trade-offs used to mean one A* run per mode. find_pareto_routes
+runs a single multi-criteria label-setting search (NAMOA*-style) that keeps,
+per node, every label whose cost vector is not dominated by another, and
+returns the whole Pareto front of routes between two nodes.
+
+Safeguards keep it interactive on city graphs:
+    - epsilon-dominance: a label is dropped when another is within a factor
+      (1 + epsilon) of it on every objective, which thins near-duplicates;
+    - a cap on labels kept per node and on labels created in total;
+    - target pruning: labels already dominated by a finished route (using
+      the straight-line distance as a lower bound on the remaining length)
+      are never expanded.
+"""
+
+import heapq
+
+import numpy as np
+
+from config import PARETO_EPSILON, PARETO_MAX_LABELS, PARETO_MAX_LABELS_PER_NODE
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import blocked_edge_mask, haversine_array, slot_path_coords
+from src.utils import profiler
+
+OBJECTIVES = ("length", "risk", "resource_cost")
+
+
+def edge_objectives(arrays):
+    """
+    (n_edges x 3) objective matrix: length in meters, accumulated risk
+    (length * risk_level, i.e. risk-weighted meters) and resource cost.
+    """
+    return np.column_stack([
+        arrays.length,
+        arrays.length * arrays.risk_level,
+        arrays.resource_cost,
+    ])
+
+
+def _dominated(costs, bag, factor):
+    """True if any label in bag is within `factor` of costs on every objective."""
+    c0, c1, c2 = costs
+    for b0, b1, b2 in bag:
+        if b0 <= c0 * factor and b1 <= c1 * factor and b2 <= c2 * factor:
+            return True
+    return False
+
+
+@profiler.timed("find_pareto_routes")
+def find_pareto_routes(
+    G,
+    start_node,
+    end_node,
+    blocked_zones=None,
+    epsilon=PARETO_EPSILON,
+    max_labels_per_node=PARETO_MAX_LABELS_PER_NODE,
+    max_labels=PARETO_MAX_LABELS,
+):
+    """
+    Pareto-optimal routes over (length, risk, resource_cost) in one search.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        start_node: Source node ID.
+        end_node: Target node ID.
+        blocked_zones (list, optional): (lat, lon, radius, name) zones to avoid.
+        epsilon (float): Epsilon-dominance tolerance (0 = exact front).
+        max_labels_per_node (int): Labels kept per node.
+        max_labels (int): Labels created before the search stops early.
+
+    Returns:
+        list: One dict per route, sorted by length, with path_nodes,
+            path_coords, length, risk and resource_cost. Empty if no route
+            exists.
+    """
+    a = get_graph_arrays(G)
+    source, target = a.node_index[start_node], a.node_index[end_node]
+    factor = 1.0 + epsilon
+
+    costs = edge_objectives(a)
+    usable = np.ones(a.n_edges, dtype=bool)
+    if blocked_zones:
+        usable &= ~blocked_edge_mask(a, blocked_zones)
+    edge_costs = costs.tolist()
+    usable = usable.tolist()
+    indptr, edge_v = a.indptr.tolist(), a.edge_v.tolist()
+    # Straight-line distance never exceeds the remaining street length
+    lower_bound = haversine_array(a.y, a.x, a.y[target], a.x[target]).tolist()
+
+    # Label i: costs[i], node[i], parent label, edge slot it arrived by
+    label_costs = [(0.0, 0.0, 0.0)]
+    label_parent = [-1]
+    label_slot = [-1]
+    settled = {}  # node -> cost tuples of its expanded labels
+    front = []  # cost tuples of labels settled at the target
+    front_labels = []
+    queue = [(lower_bound[source], 0.0, 0.0, 0, source)]
+    truncated = False
+
+    while queue:
+        f0, c1, c2, label, node = heapq.heappop(queue)
+        c = label_costs[label]
+        # Re-check against labels settled since this one was queued
+        bag = settled.setdefault(node, [])
+        if _dominated(c, bag, factor) or _dominated((f0, c1, c2), front, factor):
+            continue
+        if len(bag) >= max_labels_per_node:
+            continue
+        bag.append(c)
+
+        if node == target:
+            front.append(c)
+            front_labels.append(label)
+            continue
+
+        for slot in range(indptr[node], indptr[node + 1]):
+            if not usable[slot]:
+                continue
+            nxt = edge_v[slot]
+            e0, e1, e2 = edge_costs[slot]
+            new = (c[0] + e0, c[1] + e1, c[2] + e2)
+            estimate = (new[0] + lower_bound[nxt], new[1], new[2])
+            if _dominated(estimate, front, factor):
+                continue
+            nxt_bag = settled.get(nxt)
+            if nxt_bag and (len(nxt_bag) >= max_labels_per_node or _dominated(new, nxt_bag, factor)):
+                continue
+            if len(label_costs) >= max_labels:
+                truncated = True
+                break
+            label_costs.append(new)
+            label_parent.append(label)
+            label_slot.append(slot)
+            heapq.heappush(queue, (estimate[0], new[1], new[2], len(label_costs) - 1, nxt))
+        if truncated:
+            break
+
+    profiler.annotate(labels=len(label_costs), routes=len(front_labels), truncated=truncated)
+    if truncated:
+        print(f"Pareto search stopped after {max_labels} labels; front may be incomplete.")
+
+    routes = []
+    for final in front_labels:
+        slots = []
+        label = final
+        while label_parent[label] >= 0:
+            slots.append(label_slot[label])
+            label = label_parent[label]
+        slots.reverse()
+        length, risk, resource = label_costs[final]
+        routes.append({
+            "path_nodes": [start_node] + [a.node_ids[a.edge_v[s]].item() for s in slots],
+            "path_coords": slot_path_coords(G, a, slots),
+            "length": length,
+            "risk": risk,
+            "resource_cost": resource,
+        })
+    routes.sort(key=lambda r: r["length"])
+    return routes
@@ -1,5 +1,12 @@
 import networkx as nx
 import math
+import numpy as np
+from src.ai.cost_model import edge_weight, mode_weights
+from src.environment.graph_slimmer import edge_coords
+from src.utils import profiler
+
+# Meters per degree of latitude on the sphere haversine() uses
+METERS_PER_DEG_LAT = 6371000 * math.pi / 180
 
 
 def haversine(u, v, G):
@@ -39,30 +46,32 @@ def calculate_single_edge_weight(edge_data, mode="safe", blocked_zones=None, u_n
             if dist <= zone_radius:
                 return float("inf")  # Impassable
 
-    length = float(edge_data.get("length", 1.0))
-    risk = float(edge_data.get("risk_level", 0.0))
-    resource_cost = float(edge_data.get("resource_cost", 0.0))
+    # Role formulas (e.g. 'safe' = length * (1 + 100 * risk)) live in cost_model
+    return edge_weight(edge_data, mode)
 
-    if mode == "safe":
-        # Army Logic: Avoid risk at all costs.
-        # Cost = Length * (1 + 100 * Risk)
-        # If risk is 0.1, multiplier is 11x
-        return length * (1 + 100 * risk)
 
-    elif mode == "balanced":
-        # Rescuer Logic: Balance
-        # Cost = Length * (1 + 5 * Risk)
-        return length * (1 + 5 * risk)
+def calculate_edge_weights(arrays, mode="safe", blocked_zones=None):
+    """
+    Vectorized calculate_single_edge_weight over every edge slot of a
+    GraphArrays (see src/ai/graph_arrays.py).
 
-    elif mode == "efficient":
-        # Volunteer Logic: Efficiency
-        # Cost = Length * (1 + Resource Cost)
-        # Assuming resource_cost is already scaled (e.g. 1.0 - 10.0)
-        return length * (1 + resource_cost)
+    Returns:
+        np.ndarray: Weight per slot; inf for edges inside a blocked zone.
+    """
+    weights = np.array(mode_weights(arrays, mode))
+    if blocked_zones:
+        weights[blocked_edge_mask(arrays, blocked_zones)] = np.inf
+    return weights
 
-    else:
-        # Fast / Default
-        return length
+
+def blocked_edge_mask(arrays, blocked_zones):
+    """Boolean mask of the edge slots whose midpoint lies inside any zone."""
+    mid_lat = (arrays.y[arrays.edge_u] + arrays.y[arrays.edge_v]) / 2
+    mid_lon = (arrays.x[arrays.edge_u] + arrays.x[arrays.edge_v]) / 2
+    blocked = np.zeros(arrays.n_edges, dtype=bool)
+    for zone_lat, zone_lon, zone_radius, _ in blocked_zones:
+        blocked |= haversine_array(mid_lat, mid_lon, zone_lat, zone_lon) <= zone_radius
+    return blocked
 
 
 def calculate_weight(u, v, d, mode="safe", blocked_zones=None, G=None):
@@ -111,6 +120,90 @@ def haversine_coords(lat1, lon1, lat2, lon2):
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
 
+def haversine_array(lat1, lon1, lat2, lon2):
+    """Vectorized haversine_coords: element-wise distances in meters for NumPy arrays."""
+    R = 6371000  # Earth radius in meters
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def extract_path_coords(G, path_nodes, weight_mode="fast", blocked_zones=None):
+    """
+    Converts a node path into (lat, lon) points following the street geometry.
+
+    Between parallel edges the one with the lowest weight under `weight_mode`
+    is used, i.e. the edge a search with the same settings actually took.
+
+    Returns:
+        list: (lat, lon) tuples.
+    """
+    path_coords = []
+    for i in range(len(path_nodes) - 1):
+        u = path_nodes[i]
+        v = path_nodes[i + 1]
+
+        # Find the best edge key that matches the calculated weight logic
+        # (Re-evaluate to find which edge we actually took)
+        best_edge_data = None
+        min_weight = float("inf")
+
+        edges_data = G.get_edge_data(u, v) # returns {key: attrs}
+
+        if edges_data:
+            for key, data in edges_data.items():
+                u_node = G.nodes[u]
+                v_node = G.nodes[v]
+                w = calculate_single_edge_weight(data, weight_mode, blocked_zones, u_node, v_node)
+                if w < min_weight:
+                    min_weight = w
+                    best_edge_data = data
+
+        # Fallback if something went wrong
+        if best_edge_data is None:
+            # Should not happen if path exists
+            best_edge_data = next(iter(edges_data.values())) if edges_data else {}
+
+        geometry = edge_coords(G, best_edge_data)
+        if geometry is not None:
+            # Use the actual shape of the road
+            # Geometry is a list of (x, y) (LineString or packed, see graph_slimmer)
+            # We need (y, x) for Folium
+            coords = [(float(lat), float(lon)) for lon, lat in geometry]
+            path_coords.extend(coords)
+        else:
+            # Fallback to straight line
+            u_node = G.nodes[u]
+            v_node = G.nodes[v]
+            path_coords.append((u_node["y"], u_node["x"]))
+            path_coords.append((v_node["y"], v_node["x"]))
+
+    return path_coords
+
+
+def slot_path_coords(G, arrays, slots):
+    """
+    Like extract_path_coords, for a route given as GraphArrays edge slots,
+    so the exact parallel edge taken is known.
+
+    Returns:
+        list: (lat, lon) tuples.
+    """
+    path_coords = []
+    for slot in slots:
+        u, v, k = arrays.edge_keys[slot]
+        data = G.edges[u, v, k]
+        geometry = edge_coords(G, data)
+        if geometry is not None:
+            path_coords.extend((float(lat), float(lon)) for lon, lat in geometry)
+        else:
+            path_coords.append((G.nodes[u]["y"], G.nodes[u]["x"]))
+            path_coords.append((G.nodes[v]["y"], G.nodes[v]["x"]))
+    return path_coords
+
+
 def find_path_astar(G, start_node, end_node, weight_mode="safe", blocked_zones=None):
     """
     Finds the optimal path using A* Search.
@@ -127,57 +220,43 @@ def find_path_astar(G, start_node, end_node, weight_mode="safe", blocked_zones=N
             path_nodes: List of node IDs.
             path_coords: List of (lat, lon) tuples following the street geometry.
     """
+    with profiler.span(
+        "find_path_astar", weight_mode=weight_mode, blocked=bool(blocked_zones)
+    ):
+        return _find_path_astar(G, start_node, end_node, weight_mode, blocked_zones)
+
+
+def _find_path_astar(G, start_node, end_node, weight_mode, blocked_zones):
+    """Body of find_path_astar, run inside its profiling span."""
+    heuristic = lambda u, v: haversine(u, v, G)
+    weight = lambda u, v, d: calculate_weight(u, v, d, weight_mode, blocked_zones, G)
+
+    profiling = profiler.is_enabled()
+    if profiling:
+        # networkx calls weight() once per relaxed edge, grouped by the node
+        # being expanded, so both counters fall out of the weight callback.
+        expanded = set()
+        relaxed = 0
+        plain_weight = weight
+
+        def weight(u, v, d):
+            nonlocal relaxed
+            relaxed += 1
+            expanded.add(u)
+            return plain_weight(u, v, d)
+
     try:
         # Define a lambda for the weight to pass context
         path_nodes = nx.astar_path(
             G,
             start_node,
             end_node,
-            heuristic=lambda u, v: haversine(u, v, G),
-            weight=lambda u, v, d: calculate_weight(
-                u, v, d, weight_mode, blocked_zones, G
-            ),
+            heuristic=heuristic,
+            weight=weight,
         )
 
         # Extract full geometry
-        path_coords = []
-        for i in range(len(path_nodes) - 1):
-            u = path_nodes[i]
-            v = path_nodes[i + 1]
-
-            # Find the best edge key that matches the calculated weight logic
-            # (Re-evaluate to find which edge we actually took)
-            best_edge_data = None
-            min_weight = float("inf")
-
-            edges_data = G.get_edge_data(u, v) # returns {key: attrs}
-
-            if edges_data:
-                for key, data in edges_data.items():
-                    u_node = G.nodes[u]
-                    v_node = G.nodes[v]
-                    w = calculate_single_edge_weight(data, weight_mode, blocked_zones, u_node, v_node)
-                    if w < min_weight:
-                        min_weight = w
-                        best_edge_data = data
-
-            # Fallback if something went wrong
-            if best_edge_data is None:
-                # Should not happen if path exists
-                best_edge_data = next(iter(edges_data.values())) if edges_data else {}
-
-            if "geometry" in best_edge_data:
-                # Use the actual shape of the road
-                # Geometry is usually a Shapely LineString -> list of (x, y)
-                # We need (y, x) for Folium
-                coords = [(lat, lon) for lon, lat in best_edge_data["geometry"].coords]
-                path_coords.extend(coords)
-            else:
-                # Fallback to straight line
-                u_node = G.nodes[u]
-                v_node = G.nodes[v]
-                path_coords.append((u_node["y"], u_node["x"]))
-                path_coords.append((v_node["y"], v_node["x"]))
+        path_coords = extract_path_coords(G, path_nodes, weight_mode, blocked_zones)
 
         return path_nodes, path_coords
 
@@ -189,3 +268,8 @@ def find_path_astar(G, start_node, end_node, weight_mode="safe", blocked_zones=N
         import traceback
         traceback.print_exc()
         return None, None
+    finally:
+        if profiling:
+            profiler.annotate(nodes_expanded=len(expanded), edges_relaxed=relaxed)
+            profiler.count("astar.nodes_expanded", len(expanded))
+            profiler.count("astar.edges_relaxed", relaxed)
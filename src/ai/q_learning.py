@@ -0,0 +1,354 @@
+"""
+Q-Learning agent for the Rescuer role.
+
+State = current node, action = outgoing edge. Instead of a dict of dicts the
+Q-table is one flat float array with an entry per CSR edge slot (see
+src/ai/graph_arrays.py), so Q(s, a) is Q[slot] and max_a' Q(s', a') is a
+gather over the padded out-slot matrix. Episodes are simulated in batches:
+every step advances all still-running episodes of the batch at once.
+
+Episodes only start from nodes that can reach the goal. After the episode
+budget, extra rounds start from the nodes the greedy policy still fails
+from, until it covers all of them or stops improving.
+
+    Q(s, a) = Q(s, a) + alpha * [R + gamma * max Q(s', a') - Q(s, a)]
+"""
+
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import breadth_first_order
+
+from config import (
+    Q_LEARNING_BATCH_SIZE,
+    Q_LEARNING_COVERAGE_ROUNDS,
+    Q_LEARNING_DISCOUNT_RATE,
+    Q_LEARNING_EPISODES,
+    Q_LEARNING_EPSILON,
+    Q_LEARNING_LEARNING_RATE,
+    Q_TABLE_PATH,
+)
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import blocked_edge_mask, haversine_array
+from src.utils import profiler
+
+# Reward shaping (docs/phase3_role_logic.md): +100 for reaching the goal,
+# -10 per (average length) step, -50 for entering a danger zone.
+GOAL_REWARD = 100.0
+STEP_PENALTY = 10.0
+DANGER_ZONE_PENALTY = 50.0
+RISK_PENALTY = 5.0  # Same risk multiplier as the Rescuer's 'balanced' A* mode
+RESOURCE_PENALTY = 1.0
+# Flat cost of every move: without it, loops over near zero-length edges are
+# almost free and keep their optimistic initial values for thousands of laps.
+MOVE_PENALTY = 1.0
+MIN_EPSILON = 0.05
+
+
+class QLearningAgent:
+    """
+    Learns a policy for reaching one goal node from anywhere in the graph.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        goal: Goal node ID.
+        learning_rate (float): alpha.
+        discount_rate (float): gamma.
+        epsilon (float): Initial exploration rate, decayed linearly to MIN_EPSILON.
+        batch_size (int): Episodes simulated simultaneously.
+        max_steps (int, optional): Step limit per episode.
+        danger_zones (list, optional): (lat, lon, radius, name) zones whose
+            edges carry DANGER_ZONE_PENALTY.
+        seed (int, optional): Random seed.
+    """
+
+    def __init__(
+        self,
+        G,
+        goal,
+        learning_rate=Q_LEARNING_LEARNING_RATE,
+        discount_rate=Q_LEARNING_DISCOUNT_RATE,
+        epsilon=Q_LEARNING_EPSILON,
+        batch_size=Q_LEARNING_BATCH_SIZE,
+        max_steps=None,
+        danger_zones=None,
+        seed=None,
+    ):
+        self.G = G
+        self.arrays = get_graph_arrays(G)
+        self.goal = goal
+        self.goal_index = self.arrays.node_index[goal]
+        self.learning_rate = learning_rate
+        self.discount_rate = discount_rate
+        self.epsilon = epsilon
+        self.batch_size = batch_size
+        n = self.arrays.n_nodes
+        self.max_steps = max_steps or int(min(n, 50 + 8 * np.sqrt(n)))
+        self.rng = np.random.default_rng(seed)
+
+        self.danger_zones = list(danger_zones or [])
+        self.rewards = self._edge_rewards(self.danger_zones)
+        # Getting stuck must cost more than any route to the goal: the
+        # penalty of spending the whole episode on the riskiest streets.
+        self.dead_end_value = -STEP_PENALTY * (1 + RISK_PENALTY) * self.max_steps * (
+            self.arrays.length.max() / max(self.arrays.length.mean(), 1e-9)
+        )
+        self.q_table = self._initial_q_table()
+        self.episodes_trained = 0
+
+    def _edge_rewards(self, danger_zones):
+        """Immediate reward of traversing every edge slot."""
+        a = self.arrays
+        step = a.length / max(a.length.mean(), 1e-9)
+        resource = a.resource_cost / max(a.resource_cost.mean(), 1e-9)
+        rewards = -STEP_PENALTY * step * (1 + RISK_PENALTY * a.risk_level)
+        rewards -= RESOURCE_PENALTY * resource
+        rewards -= MOVE_PENALTY
+
+        if danger_zones:
+            rewards[blocked_edge_mask(a, danger_zones)] -= DANGER_ZONE_PENALTY
+
+        rewards[a.edge_v == self.goal_index] += GOAL_REWARD
+        return rewards
+
+    def _initial_q_table(self):
+        """
+        Heuristic initialization: the discounted return of walking the edge
+        and then straight to the goal at the minimum step cost. Like the A*
+        heuristic this steers early greedy episodes towards the goal; training
+        then corrects it for risk, resources and the real street layout.
+        """
+        a = self.arrays
+        gamma = self.discount_rate
+        mean_length = max(a.length.mean(), 1e-9)
+        steps_to_goal = haversine_array(
+            a.y[a.edge_v], a.x[a.edge_v], a.y[self.goal_index], a.x[self.goal_index]
+        ) / mean_length
+        # sum_{t < d} gamma^t * -STEP_PENALTY + gamma^d * GOAL_REWARD
+        if gamma < 1:
+            discount = gamma ** steps_to_goal
+            future = -STEP_PENALTY * (1 - discount) / (1 - gamma) + discount * GOAL_REWARD
+        else:
+            future = -STEP_PENALTY * steps_to_goal + GOAL_REWARD
+        q = -STEP_PENALTY * a.length / mean_length + gamma * future
+        return q.astype(np.float64)
+
+    @profiler.timed("q_learning.train")
+    def train(self, episodes=Q_LEARNING_EPISODES, progress_callback=None, start_nodes=None):
+        """
+        Runs `episodes` training episodes in batches of `batch_size`.
+
+        Args:
+            episodes (int): Number of episodes.
+            progress_callback (callable, optional): Called as
+                progress_callback(episodes_done, episodes_total) after every batch.
+            start_nodes (list, optional): Node IDs episodes start from
+                (default: every node that can reach the goal).
+
+        Returns:
+            float: Share of episodes in the run that reached the goal.
+        """
+        a = self.arrays
+        if start_nodes is not None:
+            candidates = a.nodes_to_indices(start_nodes)
+        else:
+            candidates = self._goal_ancestors()
+        candidates = candidates[candidates != self.goal_index]
+        if len(candidates) == 0:
+            return 0.0
+
+        # Curriculum: episodes start close to the goal first and the start
+        # radius grows over the run, so values propagate outwards from the
+        # goal instead of waiting for random walks to stumble onto it.
+        distance = haversine_array(
+            a.y[candidates], a.x[candidates], a.y[self.goal_index], a.x[self.goal_index]
+        )
+        candidates = candidates[np.argsort(distance, kind="stable")]
+
+        done_episodes = 0
+        reached = 0
+        while done_episodes < episodes:
+            batch = min(self.batch_size, episodes - done_episodes)
+            progress = done_episodes / episodes
+            epsilon = self.epsilon + (MIN_EPSILON - self.epsilon) * progress
+            reach = max(1, int(np.ceil(len(candidates) * min(1.0, 2 * (done_episodes + batch) / episodes))))
+            reached += self._run_episodes(candidates[self.rng.integers(0, reach, size=batch)], epsilon)
+            done_episodes += batch
+            if progress_callback:
+                progress_callback(done_episodes, episodes)
+        self.episodes_trained += episodes
+
+        # Coverage rounds: restart from wherever the greedy policy still fails
+        failing = candidates[~self.greedy_reaches(candidates)]
+        for _ in range(Q_LEARNING_COVERAGE_ROUNDS):
+            if len(failing) == 0:
+                break
+            for chunk in range(0, len(failing), self.batch_size):
+                self._run_episodes(failing[chunk:chunk + self.batch_size], MIN_EPSILON)
+            self.episodes_trained += len(failing)
+            still = failing[~self.greedy_reaches(failing)]
+            if len(still) == len(failing):
+                break
+            failing = still
+        profiler.annotate(uncovered=len(failing), starts=len(candidates))
+        return reached / episodes
+
+    def _goal_ancestors(self):
+        """Node indices with a path to the goal."""
+        a = self.arrays
+        reverse = csr_matrix((np.ones(a.n_edges), (a.edge_v, a.edge_u)), shape=(a.n_nodes, a.n_nodes))
+        return np.sort(breadth_first_order(reverse, self.goal_index, directed=True, return_predecessors=False))
+
+    def _run_episodes(self, state, epsilon):
+        """
+        Simulates one batch of episodes from the node indices `state`,
+        updating the Q-table. Returns the number that reached the goal.
+        """
+        a = self.arrays
+        padded = a.padded_out_slots()
+        degree = a.out_degree
+        q = self.q_table
+        state = state.copy()
+        running = np.arange(len(state))
+        reached = 0
+        for _ in range(self.max_steps):
+            if len(running) == 0:
+                break
+            s = state[running]
+
+            # Epsilon-greedy action per running episode
+            options = padded[s]
+            values = np.where(options >= 0, q[options], -np.inf)
+            greedy = options[np.arange(len(s)), values.argmax(axis=1)]
+            random_slot = a.indptr[s] + (self.rng.random(len(s)) * degree[s]).astype(np.int64)
+            explore = self.rng.random(len(s)) < epsilon
+            action = np.where(explore, random_slot, greedy)
+            nxt = a.edge_v[action]
+
+            # max_a' Q(s', a'); terminal at the goal and at dead ends
+            next_values = np.where(padded[nxt] >= 0, q[padded[nxt]], -np.inf).max(axis=1)
+            at_goal = nxt == self.goal_index
+            dead_end = (degree[nxt] == 0) & ~at_goal
+            next_values[at_goal] = 0.0
+            next_values[dead_end] = self.dead_end_value
+
+            target = self.rewards[action] + self.discount_rate * next_values
+            # Episodes taking the same edge in the same step share one
+            # update towards their mean target (summing them would overshoot)
+            slots, inverse, hits = np.unique(action, return_inverse=True, return_counts=True)
+            mean_target = np.bincount(inverse, weights=target) / hits
+            q[slots] += self.learning_rate * (mean_target - q[slots])
+
+            state[running] = nxt
+            reached += int(at_goal.sum())
+            running = running[~(at_goal | dead_end)]
+        return reached
+
+    def greedy_reaches(self, starts):
+        """
+        Whether the greedy policy reaches the goal from each node index in
+        `starts` within max_steps (vectorized get_path).
+        """
+        a = self.arrays
+        padded = a.padded_out_slots()
+        q = self.q_table
+        state = np.asarray(starts, dtype=np.int64).copy()
+        done = state == self.goal_index
+        running = np.flatnonzero(~done)
+        for _ in range(self.max_steps):
+            if len(running) == 0:
+                break
+            options = padded[state[running]]
+            values = np.where(options >= 0, q[options], -np.inf)
+            stuck = np.isneginf(values.max(axis=1))
+            best = options[np.arange(len(running)), values.argmax(axis=1)]
+            state[running] = np.where(stuck, state[running], a.edge_v[best])
+            at_goal = state[running] == self.goal_index
+            done[running[at_goal]] = True
+            running = running[~(at_goal | stuck)]
+        return done
+
+    def get_best_action(self, state):
+        """
+        Returns the next node of the greedy policy from `state`,
+        or None at the goal or a dead end.
+        """
+        s = self.arrays.node_index[state]
+        if s == self.goal_index:
+            return None
+        start, end = self.arrays.indptr[s], self.arrays.indptr[s + 1]
+        if start == end:
+            return None
+        slot = start + int(np.argmax(self.q_table[start:end]))
+        return self.arrays.node_ids[self.arrays.edge_v[slot]].item()
+
+    def get_path(self, start):
+        """
+        Follows the greedy policy from `start`.
+
+        Returns:
+            list: Node IDs from start to the goal, or None if the policy
+                loops or dead-ends before reaching it.
+        """
+        path = [start]
+        visited = {start}
+        node = start
+        while node != self.goal:
+            node = self.get_best_action(node)
+            if node is None or node in visited:
+                return None
+            path.append(node)
+            visited.add(node)
+        return path
+
+    def save(self, filepath=Q_TABLE_PATH):
+        """Saves the Q-table (with the slot -> edge mapping) as a .npz file."""
+        try:
+            os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+            a = self.arrays
+            np.savez_compressed(
+                filepath,
+                q_table=self.q_table,
+                edge_u=a.node_ids[a.edge_u],
+                edge_v=a.node_ids[a.edge_v],
+                goal=np.array(self.goal),
+                episodes_trained=self.episodes_trained,
+                learning_rate=self.learning_rate,
+                discount_rate=self.discount_rate,
+            )
+            print(f"Q-table saved to {filepath}")
+        except Exception as e:
+            print(f"Error saving Q-table: {e}")
+
+    @classmethod
+    def load(cls, G, filepath=Q_TABLE_PATH):
+        """
+        Restores an agent saved with save() for the same graph.
+
+        Returns:
+            QLearningAgent: The agent, or None if the file is missing or was
+                trained on a different graph.
+        """
+        try:
+            with np.load(filepath) as data:
+                agent = cls(
+                    G,
+                    data["goal"].item(),
+                    learning_rate=float(data["learning_rate"]),
+                    discount_rate=float(data["discount_rate"]),
+                )
+                a = agent.arrays
+                if not (
+                    np.array_equal(data["edge_u"], a.node_ids[a.edge_u])
+                    and np.array_equal(data["edge_v"], a.node_ids[a.edge_v])
+                ):
+                    print(f"Q-table in {filepath} was trained on a different graph.")
+                    return None
+                agent.q_table = data["q_table"].copy()
+                agent.episodes_trained = int(data["episodes_trained"])
+            print(f"Q-table loaded from {filepath}")
+            return agent
+        except Exception as e:
+            print(f"Error loading Q-table: {e}")
+            return None
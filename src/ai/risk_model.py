@@ -1,7 +1,7 @@
 import random
 import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
+
+from config import RISK_LEARNING_RATE, RISK_UPDATE_EPOCHS
 
 
 class RiskModel:
@@ -17,8 +17,13 @@ class RiskModel:
     """
 
     def __init__(self):
-        self.model = LogisticRegression()
-        self.scaler = StandardScaler()
+        # Fitted parameters: feature scaling and logistic regression. Training
+        # uses scikit-learn (imported then); prediction only needs NumPy, so a
+        # restored model (see get_state/from_state) never imports it.
+        self.mean = None
+        self.scale = None
+        self.coef = None
+        self.intercept = 0.0
         self.is_trained = False
 
         # Mapping highway types to a numeric rank (Heuristic)
@@ -113,12 +118,76 @@ class RiskModel:
         X = np.array(X)
         y = np.array(y)
 
-        self.scaler.fit(X)
-        X_scaled = self.scaler.transform(X)
-        self.model.fit(X_scaled, y)
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import StandardScaler
+
+        scaler = StandardScaler().fit(X)
+        model = LogisticRegression().fit(scaler.transform(X), y)
+        self.mean = scaler.mean_
+        self.scale = scaler.scale_
+        self.coef = model.coef_[0]
+        self.intercept = float(model.intercept_[0])
         self.is_trained = True
         print("Risk Model trained on synthetic data.")
 
+    def get_state(self):
+        """Fitted parameters as plain arrays (e.g. for a warm-start snapshot)."""
+        if not self.is_trained:
+            self.train_on_synthetic_data()
+        return {
+            "mean": self.mean,
+            "scale": self.scale,
+            "coef": self.coef,
+            "intercept": self.intercept,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """A trained model from get_state() output, without retraining."""
+        model = cls()
+        model.mean = np.asarray(state["mean"], dtype=np.float64)
+        model.scale = np.asarray(state["scale"], dtype=np.float64)
+        model.coef = np.asarray(state["coef"], dtype=np.float64)
+        model.intercept = float(state["intercept"])
+        model.is_trained = True
+        return model
+
+    def feature_matrix(self, edges):
+        """Raw (unscaled) feature rows of many edge attribute dicts."""
+        return np.array([self._extract_features(d) for d in edges], dtype=np.float64).reshape(-1, 6)
+
+    def partial_fit(self, edges, labels, learning_rate=RISK_LEARNING_RATE, epochs=RISK_UPDATE_EPOCHS):
+        """
+        Online update from observed outcomes, e.g. field reports.
+
+        Takes `epochs` gradient steps of the logistic loss on the new samples
+        only, starting from the current coefficients; the feature scaling of
+        the initial fit is kept so earlier predictions stay comparable.
+
+        Args:
+            edges (list): Edge attribute dicts of the observed segments.
+            labels (list): 1 if the segment proved hostile, 0 if it proved safe.
+        """
+        if not self.is_trained:
+            self.train_on_synthetic_data()
+        X = (self.feature_matrix(edges) - self.mean) / self.scale
+        y = np.asarray(labels, dtype=np.float64)
+        if len(y) == 0:
+            return
+        coef, intercept = self.coef.copy(), self.intercept
+        for _ in range(epochs):
+            error = 1.0 / (1.0 + np.exp(-(X @ coef + intercept))) - y
+            coef -= learning_rate * (X.T @ error) / len(y)
+            intercept -= learning_rate * float(error.mean())
+        self.coef, self.intercept = coef, intercept
+
+    def predict_risks(self, features):
+        """Vectorized predict_risk() over a feature_matrix()."""
+        if not self.is_trained:
+            self.train_on_synthetic_data()
+        logit = ((features - self.mean) / self.scale) @ self.coef + self.intercept
+        return np.round(1.0 / (1.0 + np.exp(-logit)), 2)
+
     def predict_risk(self, edge_data):
         """
         Returns a risk probability (0.0 - 1.0) for a single edge.
@@ -126,9 +195,10 @@ class RiskModel:
         if not self.is_trained:
             self.train_on_synthetic_data()
 
-        features = np.array(self._extract_features(edge_data)).reshape(1, -1)
-        features_scaled = self.scaler.transform(features)
+        features = np.array(self._extract_features(edge_data), dtype=np.float64)
+        features_scaled = (features - self.mean) / self.scale
 
-        # Get probability of class 1 (High Risk)
-        prob = self.model.predict_proba(features_scaled)[0][1]
-        return round(prob, 2)
+        # Probability of class 1 (High Risk), as LogisticRegression.predict_proba
+        logit = float(features_scaled @ self.coef) + self.intercept
+        prob = 1.0 / (1.0 + np.exp(-logit))
+        return round(float(prob), 2)
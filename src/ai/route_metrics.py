@@ -0,0 +1,183 @@
+"""
+Route statistics.
+
+route_metrics takes routes as arrays of GraphArrays edge slots (the format
+BatchRouter.routes returns) and computes, per route, in one gather over the
+edge attribute arrays and one reduction per metric:
+
+    - length (meters), accumulated risk (length * risk_level, the
+      risk-weighted meters used by the Pareto search), mean risk, resource
+      cost and expected encounters (sum of enemy_probability);
+    - the riskiest edge (highest risk_level, first one on ties) via segmented
+      max reductions over the concatenated routes;
+    - distance and time travelled inside hostile zones.
+
+Zone exposure uses the street geometry: every edge is cut into the straight
+pieces of its SpatialIndex, each piece is intersected with every zone circle
+analytically, and overlapping zones are merged so shared stretches count
+once. The resulting meters-inside-zones per edge are cached per graph and
+zone list, so a route's exposure is one more gather-and-sum.
+"""
+
+import weakref
+
+import numpy as np
+
+from config import DEFAULT_TRAVEL_SPEED, ENEMY_ZONES
+from src.ai.batch_routing import build_pair_matrix, lookup_pair_slots
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import METERS_PER_DEG_LAT
+from src.ai.spatial_index import get_spatial_index
+from src.utils import profiler
+
+_exposure_cache = weakref.WeakKeyDictionary()  # GraphArrays -> {zones: meters per slot}
+
+
+def route_slots(arrays, path_nodes):
+    """
+    Edge slots of a node path, taking the shortest of any parallel edges
+    (as extract_path_coords does).
+
+    Raises:
+        ValueError: If consecutive nodes are not connected.
+    """
+    _, pair_keys, pair_slots = build_pair_matrix(arrays.edge_u, arrays.edge_v, arrays.n_nodes, arrays.length)
+    nodes = arrays.nodes_to_indices(path_nodes)
+    slots = lookup_pair_slots(pair_keys, pair_slots, arrays.n_nodes, nodes[:-1], nodes[1:])
+    if (slots < 0).any():
+        raise ValueError("Path uses a node pair that is not connected by an edge")
+    return slots
+
+
+def edge_zone_exposure(G, zones=ENEMY_ZONES):
+    """
+    Meters of every edge that lie inside at least one zone.
+
+    Args:
+        G (networkx.MultiDiGraph): Graph.
+        zones (list): (lat, lon, radius, name) circles.
+
+    Returns:
+        np.ndarray: Read-only meters per edge slot, scaled to the edge's
+            length attribute.
+    """
+    a = get_graph_arrays(G)
+    key = tuple(tuple(z[:3]) for z in zones or ())
+    cached = _exposure_cache.setdefault(a, {})
+    if key in cached:
+        return cached[key]
+
+    exposure = np.zeros(a.n_edges)
+    if key:
+        with profiler.span("edge_zone_exposure", zones=len(key)):
+            exposure = _zone_exposure(a, get_spatial_index(G), np.array(key, dtype=np.float64))
+    exposure.flags.writeable = False
+    cached[key] = exposure
+    return exposure
+
+
+def _zone_exposure(a, index, zones):
+    center = np.column_stack([
+        zones[:, 1] * index.meters_per_deg_lon,
+        zones[:, 0] * METERS_PER_DEG_LAT,
+    ])
+    radius = zones[:, 2]
+
+    # Candidate (piece, zone) pairs: piece midpoints within reach of the circle
+    hits = index.piece_tree.query_ball_point(center, radius + index.half_piece)
+    counts = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+    zone = np.repeat(np.arange(len(zones)), counts)
+    piece = np.fromiter((p for h in hits for p in h), dtype=np.int64, count=int(counts.sum()))
+    if len(piece) == 0:
+        return np.zeros(a.n_edges)
+
+    # |start + t * direction - center| = r, solved for t and clipped to [0, 1]
+    start = index.piece_start[piece]
+    direction = index.piece_end[piece] - start
+    offset = start - center[zone]
+    qa = (direction * direction).sum(axis=1)
+    qb = 2 * (offset * direction).sum(axis=1)
+    qc = (offset * offset).sum(axis=1) - radius[zone] ** 2
+    root = np.sqrt(np.maximum(qb * qb - 4 * qa * qc, 0.0))
+    safe = np.where(qa > 0, qa, 1.0)
+    enter = np.clip((-qb - root) / (2 * safe), 0.0, 1.0)
+    leave = np.clip((-qb + root) / (2 * safe), 0.0, 1.0)
+    crossing = (qb * qb - 4 * qa * qc > 0) & (leave > enter) & (qa > 0)
+    piece, enter, leave = piece[crossing], enter[crossing], leave[crossing]
+
+    # Union of the intervals of one piece: sort by (piece, enter) and count
+    # only the part of each interval beyond the furthest earlier end
+    order = np.lexsort((enter, piece))
+    piece, enter, leave = piece[order], enter[order], leave[order]
+    first = np.ones(len(piece), dtype=bool)
+    first[1:] = piece[1:] != piece[:-1]
+    group = np.cumsum(first) - 1
+    # Offsetting by group (ends are <= 1) lets one running max serve all groups
+    reach = np.maximum.accumulate(leave + 2.0 * group) - 2.0 * group
+    previous = np.where(first, 0.0, np.concatenate([[0.0], reach[:-1]]))
+    covered = np.maximum(leave - np.maximum(enter, previous), 0.0)
+
+    piece_length = np.hypot(*(index.piece_end - index.piece_start)[piece].T)
+    inside = np.bincount(index.piece_slot[piece], weights=covered * piece_length, minlength=a.n_edges)
+    geometry_length = index.edge_length
+    return np.divide(
+        inside * a.length, geometry_length, out=np.zeros(a.n_edges), where=geometry_length > 0
+    )
+
+
+@profiler.timed("route_metrics")
+def route_metrics(G, routes, zones=ENEMY_ZONES, speed=DEFAULT_TRAVEL_SPEED):
+    """
+    Statistics of many routes at once.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        routes (list): Edge-slot arrays, one per route (None = no route).
+        zones (list): (lat, lon, radius, name) zones for the exposure metrics.
+        speed (float or array): Travel speed in m/s for zone_time, one for
+            all routes or one per route.
+
+    Returns:
+        dict: Arrays with one value per route: edges, length, risk, mean_risk,
+            resource_cost, expected_encounters, zone_length (meters inside
+            zones), zone_time (seconds), max_risk, max_risk_slot (-1 for empty
+            routes) and reachable.
+    """
+    a = get_graph_arrays(G)
+    reachable = np.array([r is not None for r in routes], dtype=bool)
+    slot_lists = [np.asarray(r if r is not None else [], dtype=np.int64) for r in routes]
+    edges = np.array([len(r) for r in slot_lists], dtype=np.int64)
+    slots = np.concatenate(slot_lists) if slot_lists else np.zeros(0, dtype=np.int64)
+    route = np.repeat(np.arange(len(routes)), edges)
+    n = len(routes)
+
+    length = a.length[slots]
+    risk_level = a.risk_level[slots]
+    exposure = edge_zone_exposure(G, zones)[slots]
+    total_length = np.bincount(route, weights=length, minlength=n)
+    risk = np.bincount(route, weights=length * risk_level, minlength=n)
+
+    # Riskiest edge: per-route max, then the first position reaching it
+    nonempty = edges > 0
+    starts = (np.cumsum(edges) - edges)[nonempty]
+    max_risk = np.zeros(n)
+    max_risk_slot = np.full(n, -1, dtype=np.int64)
+    if len(starts):
+        max_risk[nonempty] = np.maximum.reduceat(risk_level, starts)
+        position = np.where(risk_level == max_risk[route], np.arange(len(slots)), len(slots))
+        max_risk_slot[nonempty] = slots[np.minimum.reduceat(position, starts)]
+
+    zone_length = np.bincount(route, weights=exposure, minlength=n)
+    return {
+        "edges": edges,
+        "length": total_length,
+        "risk": risk,
+        "mean_risk": np.divide(risk, total_length, out=np.zeros(n), where=total_length > 0),
+        "resource_cost": np.bincount(route, weights=a.resource_cost[slots], minlength=n),
+        "expected_encounters": np.bincount(route, weights=a.enemy_probability[slots], minlength=n),
+        "zone_length": zone_length,
+        "zone_time": zone_length / np.asarray(speed, dtype=np.float64),
+        "max_risk": max_risk,
+        "max_risk_slot": max_risk_slot,
+        "reachable": reachable,
+    }
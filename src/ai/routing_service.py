@@ -0,0 +1,631 @@
+"""
+Local HTTP/JSON routing service.
+
+RoutingService loads a graph once and answers three kinds of requests:
+
+    POST /route      {"source", "target", "weight_mode", "avoid_zones"}
+    POST /matrix     {"sources", "targets", "weight_mode", "avoid_zones"}
+    POST /isochrone  {"source", "budgets", "weight_mode", "avoid_zones"}
+    GET  /metrics    p50/p99 latency and throughput
+    GET  /health     graph size and bounding box
+
+Nodes are given as node IDs or as [lat, lon] points, which are snapped to the
+nearest node with the graph's SpatialIndex.
+
+The main process builds, for every weight mode with and without the enemy
+zones blocked, the sparse weight matrix and pair-slot lookup of
+BatchRouter, plus a packed buffer of all edge polylines, and copies them
+into one read-only shared memory block. Worker processes attach to that
+block at start-up and wrap the arrays in place, so N workers cost one copy
+of the graph.
+
+Requests are micro-batched: a batcher thread collects requests for up to
+SERVICE_BATCH_WINDOW seconds (or SERVICE_MAX_BATCH requests), groups them by
+kind and weight profile, and sends every group to a worker as one call. All
+routes of a group then come out of one multi-source Dijkstra.
+
+    python -m src.ai.routing_service --graph data/processed_graph.pkl
+"""
+
+import argparse
+import json
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from config import (
+    ENEMY_ZONES,
+    ISOCHRONE_HULL_RATIO,
+    SERVICE_BATCH_WINDOW,
+    SERVICE_HOST,
+    SERVICE_LATENCY_WINDOW,
+    SERVICE_MAX_BATCH,
+    SERVICE_PORT,
+    SERVICE_REQUEST_TIMEOUT,
+    SERVICE_THROUGHPUT_INTERVAL,
+    SERVICE_WORKERS,
+)
+from src.ai.batch_routing import TREE_CHUNK_SIZE, build_pair_matrix, lookup_pair_slots, trace_tree_paths
+from src.ai.cost_model import weight_modes
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import calculate_edge_weights
+from src.ai.spatial_index import get_spatial_index
+from src.environment.graph_slimmer import geometry_coordinates
+
+REQUEST_KINDS = ("route", "matrix", "isochrone")
+SHARED_ALIGNMENT = 64  # Byte alignment of every array in the shared block
+
+
+def profile_name(weight_mode, avoid_zones=False):
+    """Name of the weight table for a mode, with or without the zones blocked."""
+    return f"{weight_mode}+zones" if avoid_zones else weight_mode
+
+
+# ---------------------------------------------------------------------------
+# Shared tables
+# ---------------------------------------------------------------------------
+
+
+def build_tables(G, zones=ENEMY_ZONES):
+    """
+    Arrays the workers need, keyed by name.
+
+    Returns:
+        dict: Node coordinates, edge lengths, the packed edge polylines
+            (coords as (lat, lon) rows, coord_offsets per slot) and, per
+            profile, the CSR weight matrix and pair-slot lookup.
+    """
+    a = get_graph_arrays(G)
+    tables = {"x": a.x, "y": a.y, "length": a.length}
+
+    # Every slot's polyline: its geometry, or the straight u -> v line
+    coords, owner, curved = geometry_coordinates(G, a.edge_keys)
+    straight = np.flatnonzero(~curved)
+    lon = np.concatenate([coords[:, 0], a.x[a.edge_u[straight]], a.x[a.edge_v[straight]]])
+    lat = np.concatenate([coords[:, 1], a.y[a.edge_u[straight]], a.y[a.edge_v[straight]]])
+    slot = np.concatenate([owner, straight, straight])
+    order = np.argsort(slot, kind="stable")
+    tables["coords"] = np.column_stack([lat[order], lon[order]])
+    tables["coord_offsets"] = np.concatenate(
+        [[0], np.cumsum(np.bincount(slot, minlength=a.n_edges))]
+    ).astype(np.int64)
+
+    for mode in weight_modes():
+        for avoid in (False, True):
+            name = profile_name(mode, avoid)
+            weights = calculate_edge_weights(a, mode, zones if avoid else None)
+            matrix, pair_keys, pair_slots = build_pair_matrix(a.edge_u, a.edge_v, a.n_nodes, weights)
+            tables[f"{name}.data"] = matrix.data
+            tables[f"{name}.indices"] = matrix.indices
+            tables[f"{name}.indptr"] = matrix.indptr
+            tables[f"{name}.pair_keys"] = pair_keys
+            tables[f"{name}.pair_slots"] = pair_slots
+    return tables
+
+
+def share_tables(tables):
+    """
+    Copies arrays into one new shared memory block.
+
+    Returns:
+        tuple: (SharedMemory, manifest) where manifest maps every name to
+            (offset, dtype string, shape) inside the block.
+    """
+    manifest = {}
+    size = 0
+    for name, array in tables.items():
+        array = np.ascontiguousarray(array)
+        size = -(-size // SHARED_ALIGNMENT) * SHARED_ALIGNMENT
+        manifest[name] = (size, array.dtype.str, array.shape)
+        size += array.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for name, array in tables.items():
+        offset, dtype, shape = manifest[name]
+        np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)[...] = array
+    return block, manifest
+
+
+def attach_tables(name, manifest):
+    """
+    Read-only views of a block made by share_tables.
+
+    Returns:
+        tuple: (SharedMemory, {name: np.ndarray}); keep the SharedMemory
+            alive as long as the views are used.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    views = {}
+    for key, (offset, dtype, shape) in manifest.items():
+        view = np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+        view.flags.writeable = False
+        views[key] = view
+    return block, views
+
+
+class _Tables:
+    """Worker-side access to the shared arrays."""
+
+    def __init__(self, views):
+        self.views = views
+        self.n_nodes = len(views["x"])
+        self._matrices = {}
+
+    def matrix(self, profile):
+        matrix = self._matrices.get(profile)
+        if matrix is None:
+            if f"{profile}.data" not in self.views:
+                raise ValueError(f"Unknown weight profile '{profile}'")
+            v = self.views
+            matrix = csr_matrix(
+                (v[f"{profile}.data"], v[f"{profile}.indices"], v[f"{profile}.indptr"]),
+                shape=(self.n_nodes, self.n_nodes),
+            )
+            self._matrices[profile] = matrix
+        return matrix
+
+    def slots(self, profile, u, v):
+        keys, slots = self.views[f"{profile}.pair_keys"], self.views[f"{profile}.pair_slots"]
+        return lookup_pair_slots(keys, slots, self.n_nodes, u, v)
+
+    def slot_coords(self, slots):
+        """[lat, lon] rows of the polylines of consecutive edge slots."""
+        offsets = self.views["coord_offsets"]
+        starts = offsets[slots]
+        counts = offsets[slots + 1] - starts
+        index = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+        return self.views["coords"][index].tolist()
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+_worker = None  # (SharedMemory, _Tables) of this worker process
+
+
+def _init_worker(name, manifest):
+    global _worker
+    block, views = attach_tables(name, manifest)
+    _worker = (block, _Tables(views))
+
+
+def _ping():
+    return True
+
+
+def _run_batch_in_worker(kind, profile, payloads):
+    return run_batch(_worker[1], kind, profile, payloads)
+
+
+def run_batch(tables, kind, profile, payloads):
+    """
+    Answers one group of same-kind, same-profile requests.
+
+    Args:
+        tables (_Tables): Shared arrays.
+        kind (str): 'route', 'matrix' or 'isochrone'.
+        profile (str): Weight profile (see profile_name).
+        payloads (list): Parsed requests with node indices.
+
+    Returns:
+        list: One JSON-ready result per payload (node indices, not IDs).
+    """
+    matrix = tables.matrix(profile)
+    if kind == "route":
+        return _routes(tables, matrix, profile, payloads)
+    if kind == "matrix":
+        return _matrices(matrix, payloads)
+    if kind == "isochrone":
+        return _isochrones(tables, matrix, payloads)
+    raise ValueError(f"Unknown request kind '{kind}'")
+
+
+def _trees(matrix, sources, limit=np.inf):
+    """Yields (chunk of unique sources, dist, pred) in TREE_CHUNK_SIZE chunks."""
+    unique = np.unique(sources)
+    for start in range(0, len(unique), TREE_CHUNK_SIZE):
+        chunk = unique[start:start + TREE_CHUNK_SIZE]
+        dist, pred = dijkstra(matrix, directed=True, indices=chunk, return_predecessors=True, limit=limit)
+        yield chunk, dist, pred
+
+
+def _routes(tables, matrix, profile, payloads):
+    sources = np.array([p["source"] for p in payloads], dtype=np.int64)
+    targets = np.array([p["target"] for p in payloads], dtype=np.int64)
+    results = [None] * len(payloads)
+    for chunk, dist, pred in _trees(matrix, sources):
+        pairs = np.flatnonzero(np.isin(sources, chunk))
+        rows = np.searchsorted(chunk, sources[pairs])
+        paths = trace_tree_paths(pred, rows, targets[pairs], sources[pairs])
+        for pair, row, nodes in zip(pairs, rows, paths):
+            if nodes is None:
+                results[pair] = {"found": False}
+                continue
+            nodes = nodes[::-1]
+            slots = tables.slots(profile, nodes[:-1], nodes[1:])
+            results[pair] = {
+                "found": True,
+                "cost": float(dist[row, targets[pair]]),
+                "length": float(tables.views["length"][slots].sum()),
+                "nodes": nodes.tolist(),
+                "coords": tables.slot_coords(slots),
+            }
+    return results
+
+
+def _matrices(matrix, payloads):
+    sources = np.concatenate([p["sources"] for p in payloads])
+    costs = {}
+    for chunk, dist, _ in _trees(matrix, sources):
+        for row, source in enumerate(chunk):
+            costs[int(source)] = dist[row]
+    results = []
+    for p in payloads:
+        table = np.array([costs[int(s)][p["targets"]] for s in p["sources"]])
+        table = table.reshape(len(p["sources"]), len(p["targets"]))
+        results.append({
+            "costs": [[c if np.isfinite(c) else None for c in row] for row in table.tolist()],
+        })
+    return results
+
+
+def _isochrones(tables, matrix, payloads):
+    from shapely.geometry import mapping
+
+    from src.ai.isochrone import _hull
+
+    sources = np.array([p["source"] for p in payloads], dtype=np.int64)
+    limit = max(max(p["budgets"]) for p in payloads)
+    x, y = tables.views["x"], tables.views["y"]
+    results = [None] * len(payloads)
+    for chunk, dist, _ in _trees(matrix, sources, limit=limit):
+        for i in np.flatnonzero(np.isin(sources, chunk)):
+            row = dist[np.searchsorted(chunk, sources[i])]
+            isochrones = []
+            for budget in payloads[i]["budgets"]:
+                nodes = np.flatnonzero(row <= budget)
+                polygon = _hull(x[nodes], y[nodes], ISOCHRONE_HULL_RATIO)
+                isochrones.append({
+                    "budget": budget,
+                    "nodes": len(nodes),
+                    "polygon": mapping(polygon) if polygon is not None else None,
+                })
+            results[i] = {"isochrones": isochrones}
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+
+class LatencyStats:
+    """Sliding window of request latencies and completion times."""
+
+    def __init__(self, window=SERVICE_LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)  # (finished at, seconds, kind)
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+
+    def add(self, kind, seconds, ok=True):
+        with self._lock:
+            self._samples.append((time.perf_counter(), seconds, kind))
+            self.requests += 1
+            self.errors += not ok
+
+    def add_batch(self, size):
+        with self._lock:
+            self.batches += 1
+            self.batched_requests += size
+
+    def snapshot(self):
+        """p50/p99 latency (ms) overall and per kind, throughput and batching."""
+        with self._lock:
+            samples = list(self._samples)
+            counters = (self.requests, self.errors, self.batches, self.batched_requests)
+        now = time.perf_counter()
+        interval = min(SERVICE_THROUGHPUT_INTERVAL, now - self.started)
+        recent = sum(1 for finished, _, _ in samples if finished >= now - SERVICE_THROUGHPUT_INTERVAL)
+
+        def percentiles(values):
+            if not values:
+                return {"count": 0, "p50_ms": None, "p99_ms": None}
+            p50, p99 = np.percentile(np.array(values) * 1000, [50, 99])
+            return {"count": len(values), "p50_ms": float(p50), "p99_ms": float(p99)}
+
+        return {
+            "uptime_s": now - self.started,
+            "requests": counters[0],
+            "errors": counters[1],
+            "throughput_rps": recent / interval if interval > 0 else 0.0,
+            "mean_batch_size": counters[3] / counters[2] if counters[2] else 0.0,
+            "latency": percentiles([s for _, s, _ in samples]),
+            "by_kind": {
+                kind: percentiles([s for _, s, k in samples if k == kind]) for kind in REQUEST_KINDS
+            },
+        }
+
+
+class RoutingService:
+    """
+    Batched route/matrix/isochrone answers from a pool of worker processes.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        workers (int): Worker processes.
+        batch_window (float): Seconds a batch waits for more requests.
+        max_batch (int): Requests per batch at most.
+        zones (list): Zones blocked for requests with avoid_zones.
+    """
+
+    def __init__(
+        self,
+        G,
+        workers=SERVICE_WORKERS,
+        batch_window=SERVICE_BATCH_WINDOW,
+        max_batch=SERVICE_MAX_BATCH,
+        zones=ENEMY_ZONES,
+    ):
+        self.arrays = get_graph_arrays(G)
+        self.index = get_spatial_index(G)
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+
+        start = time.perf_counter()
+        self._block, manifest = share_tables(build_tables(G, zones))
+        self.profiles = sorted({key.split(".")[0] for key in manifest if key.endswith(".data")})
+        self._pool = ProcessPoolExecutor(
+            max(1, workers),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._block.name, manifest),
+        )
+        for future in [self._pool.submit(_ping) for _ in range(max(1, workers))]:
+            future.result()
+        print(
+            f"Routing service ready: {self.arrays.n_nodes} nodes, {len(self.profiles)} profiles, "
+            f"{self._block.size / 2**20:.1f} MiB shared, {workers} workers "
+            f"({time.perf_counter() - start:.1f}s)"
+        )
+
+        self.stats = LatencyStats()
+        self._queue = queue.Queue()
+        self._batcher = threading.Thread(target=self._batch_loop, name="route-batcher", daemon=True)
+        self._batcher.start()
+        self._server = None
+
+    # -- requests ------------------------------------------------------------
+
+    def _node(self, value):
+        """Node index of a node ID or a [lat, lon] point."""
+        if isinstance(value, (list, tuple)):
+            if len(value) != 2:
+                raise ValueError(f"Points must be [lat, lon], got {value!r}")
+            nodes, _ = self.index.nearest_nodes(float(value[0]), float(value[1]))
+            return self.arrays.node_index[nodes[0].item()]
+        if value not in self.arrays.node_index:
+            raise ValueError(f"Unknown node {value!r}")
+        return self.arrays.node_index[value]
+
+    def _parse(self, kind, body):
+        profile = profile_name(body.get("weight_mode", "safe"), bool(body.get("avoid_zones", False)))
+        if profile not in self.profiles:
+            raise ValueError(f"Unknown weight mode '{body.get('weight_mode')}'")
+        if kind == "route":
+            payload = {"source": self._node(body["source"]), "target": self._node(body["target"])}
+        elif kind == "matrix":
+            payload = {
+                "sources": np.array([self._node(n) for n in body["sources"]], dtype=np.int64),
+                "targets": np.array([self._node(n) for n in body["targets"]], dtype=np.int64),
+            }
+        elif kind == "isochrone":
+            budgets = [float(b) for b in body["budgets"]]
+            if not budgets:
+                raise ValueError("At least one budget is required")
+            payload = {"source": self._node(body["source"]), "budgets": budgets}
+        else:
+            raise ValueError(f"Unknown request kind '{kind}'")
+        return profile, payload
+
+    def submit(self, kind, body):
+        """
+        Queues one request.
+
+        Args:
+            kind (str): 'route', 'matrix' or 'isochrone'.
+            body (dict): Request fields as in the module docstring.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the JSON-ready result
+                (route nodes as node IDs).
+
+        Raises:
+            ValueError, KeyError: On an invalid request.
+        """
+        profile, payload = self._parse(kind, body)
+        future = Future()
+        self._queue.put((kind, profile, payload, future))
+        return future
+
+    def handle(self, kind, body, timeout=SERVICE_REQUEST_TIMEOUT):
+        """Answers one request (blocking) and records its latency."""
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = self.submit(kind, body).result(timeout)
+            ok = True
+            return result
+        finally:
+            self.stats.add(kind, time.perf_counter() - start, ok)
+
+    def metrics(self):
+        return self.stats.snapshot()
+
+    def health(self):
+        a = self.arrays
+        return {
+            "status": "ok",
+            "nodes": a.n_nodes,
+            "edges": a.n_edges,
+            "profiles": self.profiles,
+            "bbox": [float(a.y.min()), float(a.x.min()), float(a.y.max()), float(a.x.max())],
+        }
+
+    # -- batching ------------------------------------------------------------
+
+    def _batch_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.batch_window
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch):
+        groups = {}
+        for kind, profile, payload, future in batch:
+            groups.setdefault((kind, profile), []).append((payload, future))
+        for (kind, profile), items in groups.items():
+            self.stats.add_batch(len(items))
+            done = self._pool.submit(_run_batch_in_worker, kind, profile, [p for p, _ in items])
+            done.add_done_callback(lambda d, futures=[f for _, f in items]: self._resolve(d, futures))
+
+    def _resolve(self, done, futures):
+        error = done.exception()
+        if error is not None:
+            for future in futures:
+                future.set_exception(error)
+            return
+        for future, result in zip(futures, done.result()):
+            if isinstance(result.get("nodes"), list):
+                result["nodes"] = self.arrays.node_ids[result["nodes"]].tolist()
+            future.set_result(result)
+
+    # -- HTTP ----------------------------------------------------------------
+
+    def serve(self, host=SERVICE_HOST, port=SERVICE_PORT):
+        """
+        Starts the HTTP server on a background thread.
+
+        Returns:
+            tuple: (host, port) actually bound (port 0 picks a free port).
+        """
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="route-http", daemon=True).start()
+        return self._server.server_address[:2]
+
+    def close(self):
+        """Stops the server, the batcher and the workers and frees the shared block."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self._queue.put(None)
+        self._batcher.join()
+        self._pool.shutdown()
+        self._block.close()
+        self._block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._reply(200, service.metrics())
+            elif self.path == "/health":
+                self._reply(200, service.health())
+            else:
+                self._reply(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            kind = self.path.strip("/")
+            if kind not in REQUEST_KINDS:
+                self._reply(404, {"error": f"Unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                self._reply(200, service.handle(kind, body))
+            except (ValueError, KeyError, TypeError) as e:
+                self._reply(400, {"error": f"Invalid request: {e}"})
+            except TimeoutError:
+                self._reply(504, {"error": "Request timed out"})
+            except Exception as e:
+                self._reply(500, {"error": repr(e)})
+
+        def log_message(self, format, *args):
+            pass  # One line per request would drown the console under load
+
+    return Handler
+
+
+def main(argv=None):
+    from src.environment.map_downloader import load_custom_graph
+
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON routing service.")
+    parser.add_argument("--graph", default="data/processed_graph.pkl", help="Enriched graph pickle.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS)
+    args = parser.parse_args(argv)
+
+    G = load_custom_graph(args.graph)
+    if G is None:
+        return 1
+    with RoutingService(G, workers=args.workers) as service:
+        host, port = service.serve(args.host, args.port)
+        print(f"Serving on http://{host}:{port} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print("Shutting down.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+"""
+Snapping arbitrary coordinates onto the street graph.
+
+SpatialIndex projects node coordinates and edge geometries into a local
+metric frame (equirectangular around the graph center, fine at city scale)
+and keeps two KD-trees:
+
+    - over nodes, for nearest_nodes();
+    - over edge pieces, for nearest_edges(). Every edge geometry is split into
+      straight pieces of at most SNAP_MAX_PIECE_LENGTH meters, indexed by
+      their midpoints. The true nearest piece is among the k nearest
+      midpoints once the k-th midpoint is farther than the best exact
+      distance plus half a piece length; points where that does not hold yet
+      are queried again with a larger k, so the answer is exact.
+
+Both queries take arrays of points and run in one vectorized pass.
+"""
+
+import math
+import weakref
+
+import numpy as np
+
+from config import SNAP_CANDIDATES, SNAP_MAX_PIECE_LENGTH
+from src.ai.graph_arrays import get_graph_arrays, peek_graph_arrays
+from src.ai.pathfinding import METERS_PER_DEG_LAT
+from src.environment.graph_slimmer import geometry_coordinates
+from src.utils import profiler
+
+_cache = weakref.WeakKeyDictionary()  # GraphArrays -> SpatialIndex
+
+
+class SpatialIndex:
+    """
+    Nearest node / nearest edge point lookups for one graph.
+
+    Args:
+        G (networkx.MultiDiGraph): Graph with node x/y and optional edge geometry.
+        max_piece_length (float): Longest indexed edge piece in meters.
+    """
+
+    def __init__(self, G, max_piece_length=SNAP_MAX_PIECE_LENGTH):
+        from scipy.spatial import cKDTree
+
+        self.arrays = a = get_graph_arrays(G)
+        self.lat0 = float(a.y.mean()) if a.n_nodes else 0.0
+        self.meters_per_deg_lon = METERS_PER_DEG_LAT * math.cos(math.radians(self.lat0))
+        self.node_tree = cKDTree(self._project(a.y, a.x))
+
+        # Polyline of every edge slot: its geometry, or the straight u -> v line
+        coords, owner, curved = geometry_coordinates(G, a.edge_keys)
+        straight = np.flatnonzero(~curved)
+        lon = np.concatenate([coords[:, 0], a.x[a.edge_u[straight]], a.x[a.edge_v[straight]]])
+        lat = np.concatenate([coords[:, 1], a.y[a.edge_u[straight]], a.y[a.edge_v[straight]]])
+        slot = np.concatenate([owner, straight, straight])
+        order = np.argsort(slot, kind="stable")  # keeps vertex order within a slot
+        points, slot = self._project(lat[order], lon[order]), slot[order]
+
+        # Consecutive vertices of the same slot form a segment
+        same = slot[1:] == slot[:-1]
+        start, end, seg_slot = points[:-1][same], points[1:][same], slot[1:][same]
+        seg_length = np.hypot(*(end - start).T)
+        cumulative = np.cumsum(seg_length)
+        first = np.ones(len(seg_slot), dtype=bool)
+        first[1:] = seg_slot[1:] != seg_slot[:-1]
+        slot_base = np.maximum.accumulate(np.where(first, cumulative - seg_length, 0.0))
+        seg_offset = cumulative - seg_length - slot_base
+        self.edge_length = np.zeros(a.n_edges)
+        np.add.at(self.edge_length, seg_slot, seg_length)
+
+        # Split long segments into equal pieces
+        pieces = np.maximum(1, np.ceil(seg_length / max_piece_length)).astype(np.int64)
+        seg = np.repeat(np.arange(len(seg_slot)), pieces)
+        part = np.arange(len(seg)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        t0 = (part / pieces[seg])[:, None]
+        t1 = ((part + 1) / pieces[seg])[:, None]
+        direction = (end - start)[seg]
+        self.piece_start = start[seg] + direction * t0
+        self.piece_end = start[seg] + direction * t1
+        self.piece_slot = seg_slot[seg]
+        self.piece_offset = seg_offset[seg] + seg_length[seg] * t0[:, 0]
+        self.half_piece = float((seg_length / pieces).max() / 2) if len(seg) else 0.0
+        self.piece_tree = cKDTree((self.piece_start + self.piece_end) / 2)
+
+        # Flat per-piece components for the exact distance computation
+        self._start_x, self._start_y = self.piece_start[:, 0].copy(), self.piece_start[:, 1].copy()
+        piece_dir = self.piece_end - self.piece_start
+        self._dir_x, self._dir_y = piece_dir[:, 0].copy(), piece_dir[:, 1].copy()
+        squared = (piece_dir * piece_dir).sum(axis=1)
+        self._inv_squared = np.divide(1.0, squared, out=np.zeros(len(squared)), where=squared > 0)
+
+    @property
+    def nbytes(self):
+        """Approximate memory: the piece arrays and both KD-trees' points and indices."""
+        arrays = sum(v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray))
+        trees = sum(t.data.nbytes + t.indices.nbytes for t in (self.node_tree, self.piece_tree))
+        return arrays + trees
+
+    def _project(self, lat, lon):
+        return np.column_stack([
+            np.asarray(lon, dtype=np.float64) * self.meters_per_deg_lon,
+            np.asarray(lat, dtype=np.float64) * METERS_PER_DEG_LAT,
+        ])
+
+    def nearest_nodes(self, lat, lon):
+        """
+        Nearest graph node of every point.
+
+        Args:
+            lat, lon (array-like): Point coordinates (scalars or arrays).
+
+        Returns:
+            tuple: (node IDs, distances in meters) as arrays.
+        """
+        distance, index = self.node_tree.query(self._project(np.ravel(lat), np.ravel(lon)))
+        return self.arrays.node_ids[index], distance
+
+    def nearest_edges(self, lat, lon):
+        """
+        Closest point on the street network for every point.
+
+        Args:
+            lat, lon (array-like): Point coordinates (scalars or arrays).
+
+        Returns:
+            dict: Arrays per point: slot (GraphArrays edge slot; the graph edge
+                is arrays.edge_keys[slot]), lat/lon of the projected point,
+                distance in meters and fraction (0 at u, 1 at v) along the edge.
+        """
+        points = self._project(np.ravel(lat), np.ravel(lon))
+        count = len(points)
+        best_piece = np.zeros(count, dtype=np.int64)
+        best_t = np.zeros(count)
+        best_distance = np.full(count, np.inf)
+
+        n_pieces = len(self.piece_slot)
+        todo = np.arange(count)
+        k = min(SNAP_CANDIDATES, n_pieces)
+        with profiler.span("nearest_edges", points=count):
+            while len(todo) and k:
+                mid_distance, candidates = self.piece_tree.query(points[todo], k=k)
+                mid_distance = mid_distance.reshape(len(todo), k)
+                candidates = candidates.reshape(len(todo), k)
+
+                # Exact point-to-piece distance for all candidates at once
+                px, py = points[todo, 0][:, None], points[todo, 1][:, None]
+                ox = px - self._start_x[candidates]
+                oy = py - self._start_y[candidates]
+                dx, dy = self._dir_x[candidates], self._dir_y[candidates]
+                t = np.clip((ox * dx + oy * dy) * self._inv_squared[candidates], 0.0, 1.0)
+                distance = np.hypot(ox - dx * t, oy - dy * t)
+                column = np.argmin(distance, axis=1)
+                rows = np.arange(len(todo))
+                best_piece[todo] = candidates[rows, column]
+                best_t[todo] = t[rows, column]
+                best_distance[todo] = distance[rows, column]
+
+                # Exact once no unseen piece can be closer
+                if k == n_pieces:
+                    break
+                todo = todo[mid_distance[:, -1] - self.half_piece < best_distance[todo]]
+                k = min(k * 4, n_pieces)
+
+        slot = self.piece_slot[best_piece]
+        start = self.piece_start[best_piece]
+        projected = start + (self.piece_end[best_piece] - start) * best_t[:, None]
+        length = np.hypot(*(self.piece_end[best_piece] - start).T)
+        along = self.piece_offset[best_piece] + length * best_t
+        return {
+            "slot": slot,
+            "lat": projected[:, 1] / METERS_PER_DEG_LAT,
+            "lon": projected[:, 0] / self.meters_per_deg_lon,
+            "distance": best_distance,
+            "fraction": np.divide(
+                along, self.edge_length[slot], out=np.zeros(count), where=self.edge_length[slot] > 0
+            ),
+        }
+
+
+def get_spatial_index(G):
+    """Returns the (cached) SpatialIndex of G, rebuilt with its GraphArrays."""
+    arrays = get_graph_arrays(G)
+    index = _cache.get(arrays)
+    if index is None:
+        index = SpatialIndex(G)
+        _cache[arrays] = index
+    return index
+
+
+def peek_spatial_index(G):
+    """The cached SpatialIndex of G if it is built, else None (builds nothing)."""
+    arrays = peek_graph_arrays(G)
+    return None if arrays is None else _cache.get(arrays)
+
+
+def adopt_spatial_index(G, index):
+    """Caches a prebuilt SpatialIndex (e.g. from a snapshot) if it was built for G's arrays."""
+    arrays = get_graph_arrays(G)
+    if index.arrays is not arrays:
+        return False
+    _cache[arrays] = index
+    return True
+
+
+def snap_to_node(G, lat, lon):
+    """Nearest node ID of a single point (e.g. a map click)."""
+    nodes, _ = get_spatial_index(G).nearest_nodes(lat, lon)
+    return nodes[0].item()
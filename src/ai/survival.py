@@ -0,0 +1,141 @@
+"""
+Monte Carlo route survival.
+
+enrich_graph gives every edge an enemy_probability: the chance of a hostile
+encounter while travelling it. simulate_route_survival samples encounters on
+every edge of one or more routes for many trials at once:
+
+    - Independent edges: an encounter happens on edge e when a uniform draw
+      falls below enemy_probability[e].
+    - Spatially correlated edges: each edge gets a latent standard normal
+      z = sqrt(c) * g[cell] + sqrt(1 - c) * noise, where g is shared by all
+      edges in the same grid cell of `correlation_length` meters. An
+      encounter happens when z < Phi^-1(enemy_probability), so every edge
+      keeps its marginal probability while nearby edges tend to be hostile
+      together.
+
+Each encounter is fatal with probability `lethality`. Rather than sampling
+that too, a trial with N encounters contributes its conditional survival
+(1 - lethality) ** N, which gives the same mean with less noise.
+
+All routes share the same draws per edge (common random numbers), so
+differences between routes, e.g. the paths of the three roles, come with
+tight paired confidence intervals.
+"""
+
+import math
+
+import numpy as np
+from scipy.special import ndtri
+
+from config import (
+    SURVIVAL_CORRELATION_LENGTH,
+    SURVIVAL_ENCOUNTER_LETHALITY,
+    SURVIVAL_TRIAL_CHUNK,
+    SURVIVAL_TRIALS,
+)
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import METERS_PER_DEG_LAT
+from src.ai.route_metrics import route_slots
+from src.utils import profiler
+
+Z_95 = 1.959963984540054  # Two-sided 95% normal quantile
+
+
+def _interval(samples):
+    """Mean and 95% normal-approximation confidence interval of per-trial values."""
+    mean = float(samples.mean())
+    half = Z_95 * float(samples.std(ddof=1)) / math.sqrt(len(samples)) if len(samples) > 1 else 0.0
+    return mean, (mean - half, mean + half)
+
+
+@profiler.timed("simulate_route_survival")
+def simulate_route_survival(
+    G,
+    routes,
+    trials=SURVIVAL_TRIALS,
+    correlation=0.0,
+    correlation_length=SURVIVAL_CORRELATION_LENGTH,
+    lethality=SURVIVAL_ENCOUNTER_LETHALITY,
+    seed=None,
+):
+    """
+    Samples hostile encounters along routes.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        routes (list): Node-ID paths (e.g. path_nodes from find_path_astar).
+        trials (int): Monte Carlo trials.
+        correlation (float): 0-1 share of each edge's latent variance shared
+            with edges in the same grid cell (0 = independent edges).
+        correlation_length (float): Grid cell size in meters.
+        lethality (float): Chance a single encounter ends the mission.
+        seed (int, optional): Random seed.
+
+    Returns:
+        dict: routes (one dict per route with survival, survival_ci,
+            expected_encounters, encounters_ci, p_no_encounter and edges),
+            pairwise (paired survival differences as dicts with a, b,
+            difference and ci) and trials.
+    """
+    a = get_graph_arrays(G)
+    slot_lists = [route_slots(a, path) for path in routes]
+    used, inverse = np.unique(np.concatenate(slot_lists + [np.zeros(0, np.int64)]), return_inverse=True)
+
+    # (used edges x routes) visit counts, so encounters = hits @ incidence
+    incidence = np.zeros((len(used), len(routes)), dtype=np.float32)
+    offsets = np.cumsum([0] + [len(s) for s in slot_lists])
+    for r in range(len(routes)):
+        np.add.at(incidence[:, r], inverse[offsets[r]:offsets[r + 1]], 1.0)
+
+    probability = np.clip(a.enemy_probability[used], 0.0, 1.0)
+    if correlation > 0:
+        threshold = ndtri(probability).astype(np.float32)
+        mid_x = (a.x[a.edge_u[used]] + a.x[a.edge_v[used]]) / 2
+        mid_y = (a.y[a.edge_u[used]] + a.y[a.edge_v[used]]) / 2
+        lat0 = float(mid_y.mean()) if len(used) else 0.0
+        cell_x = np.floor(mid_x * METERS_PER_DEG_LAT * math.cos(math.radians(lat0)) / correlation_length)
+        cell_y = np.floor(mid_y * METERS_PER_DEG_LAT / correlation_length)
+        _, cell = np.unique(np.column_stack([cell_x, cell_y]), axis=0, return_inverse=True)
+        cell = cell.ravel()
+        n_cells = int(cell.max()) + 1 if len(cell) else 0
+        shared, own = np.float32(math.sqrt(correlation)), np.float32(math.sqrt(1.0 - correlation))
+    else:
+        threshold = probability.astype(np.float32)
+
+    rng = np.random.default_rng(seed)
+    encounters = np.empty((trials, len(routes)), dtype=np.float32)
+    with profiler.span("survival_trials", trials=trials, edges=len(used), routes=len(routes)):
+        for start in range(0, trials, SURVIVAL_TRIAL_CHUNK):
+            count = min(SURVIVAL_TRIAL_CHUNK, trials - start)
+            if correlation > 0:
+                latent = rng.standard_normal((count, len(used)), dtype=np.float32) * own
+                latent += rng.standard_normal((count, n_cells), dtype=np.float32)[:, cell] * shared
+            else:
+                latent = rng.random((count, len(used)), dtype=np.float32)
+            hits = (latent < threshold).astype(np.float32)
+            encounters[start:start + count] = hits @ incidence
+
+    survival = np.power(np.float32(1.0 - lethality), encounters, dtype=np.float32).astype(np.float64)
+    encounters = encounters.astype(np.float64)
+
+    results = []
+    for r, slots in enumerate(slot_lists):
+        surv, surv_ci = _interval(survival[:, r])
+        mean, mean_ci = _interval(encounters[:, r])
+        results.append({
+            "survival": surv,
+            "survival_ci": surv_ci,
+            "expected_encounters": mean,
+            "encounters_ci": mean_ci,
+            "p_no_encounter": float((encounters[:, r] == 0).mean()),
+            "edges": len(slots),
+        })
+
+    pairwise = []
+    for i in range(len(routes)):
+        for j in range(i + 1, len(routes)):
+            difference, ci = _interval(survival[:, i] - survival[:, j])
+            pairwise.append({"a": i, "b": j, "difference": difference, "ci": ci})
+    profiler.annotate(trials=trials, routes=len(routes), edges=len(used))
+    return {"routes": results, "pairwise": pairwise, "trials": trials}
@@ -0,0 +1,420 @@
+"""
+Time-dependent routing around moving hostile zones.
+
+ENEMY_ZONES are fixed circles, but patrols move and checkpoints only exist
+for a while. A MovingZone is a circle following a piecewise-linear track of
+(time, lat, lon) waypoints, optionally limited to an active time window.
+
+ZoneSchedule is the spatio-temporal index: for every edge it precomputes
+the time intervals during which any zone covers the edge midpoint (the same
+test blocked_edge_mask uses for static zones). Candidate (edge, track
+segment) pairs come from a KD-tree over edge midpoints; the exact interval
+of each pair is the solution of a quadratic, solved for all pairs at once.
+At query time "is this edge passable between t0 and t1" is a binary search
+in that edge's interval list, so the time-dependent A* stays interactive
+with hundreds of zones.
+
+Schedules are cached per (GraphArrays, zones), and the plain-list copies
+of the arrays the search loop reads per (GraphArrays, weight mode and its
+coefficients, speed), so repeated queries only pay for the search itself.
+"""
+
+import heapq
+import math
+import weakref
+from bisect import bisect_right
+from collections import OrderedDict
+
+import numpy as np
+
+from config import DEFAULT_TRAVEL_SPEED, ENEMY_PATROLS, TIME_DEPENDENT_SCHEDULE_CACHE_SIZE
+from src.ai.cost_model import weight_coefficients
+from src.ai.graph_arrays import get_graph_arrays, peek_graph_arrays
+from src.ai.pathfinding import METERS_PER_DEG_LAT, calculate_edge_weights, extract_path_coords, haversine_array
+from src.utils import profiler
+
+_schedule_cache = weakref.WeakKeyDictionary()  # GraphArrays -> OrderedDict(zones key -> ZoneSchedule)
+_list_cache = weakref.WeakKeyDictionary()  # GraphArrays -> {key: list}
+
+
+class MovingZone:
+    """
+    A circular hostile zone moving along a track.
+
+    Args:
+        track (list): (time_seconds, lat, lon) waypoints in time order. The
+            zone moves in a straight line between waypoints and rests at the
+            first/last waypoint before/after the track.
+        radius (float): Radius in meters.
+        name (str): Label shown on the map.
+        start (float, optional): Zone appears at this time (default: always).
+        end (float, optional): Zone disappears at this time (default: never).
+    """
+
+    def __init__(self, track, radius, name="Moving Zone", start=None, end=None):
+        self.track = sorted((float(t), float(lat), float(lon)) for t, lat, lon in track)
+        self.radius = float(radius)
+        self.name = name
+        self.start = -math.inf if start is None else float(start)
+        self.end = math.inf if end is None else float(end)
+
+    @classmethod
+    def from_static(cls, zone, start=None, end=None):
+        """Wraps a (lat, lon, radius, name) zone tuple, optionally for a time window."""
+        lat, lon, radius, name = zone
+        return cls([(0.0, lat, lon)], radius, name, start, end)
+
+    def position_at(self, t):
+        """(lat, lon) at time t, or None while the zone is inactive."""
+        if not self.start <= t <= self.end:
+            return None
+        times = [p[0] for p in self.track]
+        i = bisect_right(times, t)
+        if i == 0:
+            return self.track[0][1:]
+        if i == len(self.track):
+            return self.track[-1][1:]
+        (t0, lat0, lon0), (t1, lat1, lon1) = self.track[i - 1], self.track[i]
+        f = (t - t0) / (t1 - t0)
+        return lat0 + f * (lat1 - lat0), lon0 + f * (lon1 - lon0)
+
+    def segments(self):
+        """
+        Track as (t0, t1, lat0, lon0, lat1, lon1) pieces covering the whole
+        active window, including the resting periods at both ends.
+        """
+        track = self.track
+        pieces = [(-math.inf, track[0][0]) + track[0][1:] + track[0][1:]]
+        for (t0, lat0, lon0), (t1, lat1, lon1) in zip(track, track[1:]):
+            if t1 > t0:
+                pieces.append((t0, t1, lat0, lon0, lat1, lon1))
+        pieces.append((track[-1][0], math.inf) + track[-1][1:] + track[-1][1:])
+
+        clipped = []
+        for t0, t1, *coords in pieces:
+            lo, hi = max(t0, self.start), min(t1, self.end)
+            if lo < hi:
+                clipped.append((t0, t1, *coords, lo, hi))
+        return clipped
+
+
+def load_zones(zones):
+    """
+    Normalizes a mixed zone list: MovingZone objects pass through,
+    (lat, lon, radius, name) tuples become permanent static zones and
+    (track, radius, name[, start, end]) tuples (see ENEMY_PATROLS) become
+    MovingZone objects.
+    """
+    result = []
+    for zone in zones or []:
+        if isinstance(zone, MovingZone):
+            result.append(zone)
+        elif isinstance(zone[0], (list, tuple)):
+            result.append(MovingZone(*zone))
+        else:
+            result.append(MovingZone.from_static(zone))
+    return result
+
+
+class ZoneSchedule:
+    """
+    Spatio-temporal index of when each edge of a graph is inside a zone.
+
+    Args:
+        G (networkx.MultiDiGraph): Graph.
+        zones (list): Zones accepted by load_zones().
+
+    Attributes:
+        interval_ptr (np.ndarray): Blocked intervals of slot i are
+            interval_ptr[i]:interval_ptr[i + 1] of starts/ends.
+        interval_list (list): interval_ptr as a list, for the search loop.
+        starts, ends (list): Merged, sorted blocked intervals.
+    """
+
+    def __init__(self, G, zones):
+        from scipy.spatial import cKDTree
+
+        self.arrays = a = get_graph_arrays(G)
+        self.zones = load_zones(zones)
+
+        # Local metric frame around the graph center
+        self.lat0 = float(a.y.mean()) if a.n_nodes else 0.0
+        self.meters_per_deg_lon = METERS_PER_DEG_LAT * math.cos(math.radians(self.lat0))
+        mid = np.column_stack([
+            (a.x[a.edge_u] + a.x[a.edge_v]) / 2 * self.meters_per_deg_lon,
+            (a.y[a.edge_u] + a.y[a.edge_v]) / 2 * METERS_PER_DEG_LAT,
+        ])
+
+        rows = [
+            (t0, t1, lat0, lon0, lat1, lon1, lo, hi, zone.radius)
+            for zone in self.zones
+            for t0, t1, lat0, lon0, lat1, lon1, lo, hi in zone.segments()
+        ]
+        if not rows or a.n_edges == 0:
+            self._set_intervals(np.zeros(0, np.int64), np.zeros(0), np.zeros(0))
+            return
+        seg = np.array(rows, dtype=np.float64)
+        p0 = np.column_stack([seg[:, 3] * self.meters_per_deg_lon, seg[:, 2] * METERS_PER_DEG_LAT])
+        p1 = np.column_stack([seg[:, 5] * self.meters_per_deg_lon, seg[:, 4] * METERS_PER_DEG_LAT])
+        radius = seg[:, 8]
+
+        # Candidate edges: midpoints within reach of the segment's sweep
+        tree = cKDTree(mid)
+        # (1% slack for the flat-earth approximation of the local frame)
+        reach = (np.hypot(*(p1 - p0).T) / 2 + radius) * 1.01
+        hits = tree.query_ball_point((p0 + p1) / 2, reach)
+        counts = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+        pair_seg = np.repeat(np.arange(len(seg)), counts)
+        pair_edge = np.fromiter(
+            (e for h in hits for e in h), dtype=np.int64, count=int(counts.sum())
+        )
+
+        # |p0 + v * s - m|^2 <= r^2 for s = t - t0, solved for all pairs at once
+        t0, t1 = seg[pair_seg, 0], seg[pair_seg, 1]
+        lo, hi = seg[pair_seg, 6], seg[pair_seg, 7]
+        moving = np.isfinite(t0) & np.isfinite(t1) & (t1 > t0)
+        duration = np.where(moving, t1 - t0, 1.0)
+        v = np.where(moving[:, None], (p1[pair_seg] - p0[pair_seg]) / duration[:, None], 0.0)
+        w = p0[pair_seg] - mid[pair_edge]
+        qa = (v * v).sum(axis=1)
+        qb = 2 * (w * v).sum(axis=1)
+        qc = (w * w).sum(axis=1) - radius[pair_seg] ** 2
+
+        start = np.full(len(pair_seg), np.nan)
+        end = np.full(len(pair_seg), np.nan)
+        still = qa == 0
+        # Resting zones: exact great-circle test, like blocked_edge_mask
+        qc[still] = haversine_array(
+            seg[pair_seg[still], 2], seg[pair_seg[still], 3],
+            mid[pair_edge[still], 1] / METERS_PER_DEG_LAT,
+            mid[pair_edge[still], 0] / self.meters_per_deg_lon,
+        ) ** 2 - radius[pair_seg[still]] ** 2
+        inside = still & (qc <= 0)
+        start[inside], end[inside] = lo[inside], hi[inside]
+
+        disc = qb * qb - 4 * qa * qc
+        crossing = ~still & (disc >= 0)
+        root = np.sqrt(np.where(crossing, disc, 0.0))
+        a2 = np.where(crossing, 2 * qa, 1.0)
+        enter = t0 + (-qb - root) / a2
+        leave = t0 + (-qb + root) / a2
+        start[crossing] = np.maximum(enter, lo)[crossing]
+        end[crossing] = np.minimum(leave, hi)[crossing]
+
+        keep = ~np.isnan(start) & (start <= end)
+        self._set_intervals(pair_edge[keep], start[keep], end[keep])
+
+    def _set_intervals(self, edges, starts, ends):
+        """Sorts intervals per edge slot and merges overlapping ones."""
+        order = np.lexsort((starts, edges))
+        edges, starts, ends = edges[order], starts[order], ends[order]
+
+        merged_edges, merged_starts, merged_ends = [], [], []
+        for e, s, t in zip(edges.tolist(), starts.tolist(), ends.tolist()):
+            if merged_edges and merged_edges[-1] == e and s <= merged_ends[-1]:
+                merged_ends[-1] = max(merged_ends[-1], t)
+            else:
+                merged_edges.append(e)
+                merged_starts.append(s)
+                merged_ends.append(t)
+
+        self.interval_ptr = np.zeros(self.arrays.n_edges + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(np.array(merged_edges, dtype=np.int64), minlength=self.arrays.n_edges),
+            out=self.interval_ptr[1:],
+        )
+        self.interval_list = self.interval_ptr.tolist()
+        self.starts = merged_starts
+        self.ends = merged_ends
+        self.affected_edges = int(np.count_nonzero(np.diff(self.interval_ptr)))
+
+    def blocked_until(self, slot, t0, t1, lo=None, hi=None):
+        """
+        End of the first blocked interval of `slot` overlapping [t0, t1],
+        or None if the edge is free for the whole traversal.
+        """
+        if lo is None:
+            lo, hi = self.interval_ptr[slot], self.interval_ptr[slot + 1]
+        if lo == hi:
+            return None
+        # Last interval starting at or before t1
+        i = bisect_right(self.starts, t1, lo, hi) - 1
+        if i >= lo and self.ends[i] >= t0:
+            # Intervals are merged, so no earlier one can reach t0 either
+            return self.ends[i]
+        return None
+
+    def blocked_mask(self, t):
+        """Boolean mask of the edge slots blocked at time t (e.g. for drawing)."""
+        mask = np.zeros(self.arrays.n_edges, dtype=bool)
+        for slot in np.flatnonzero(np.diff(self.interval_ptr)).tolist():
+            mask[slot] = self.blocked_until(slot, t, t) is not None
+        return mask
+
+
+def _zones_key(zones):
+    """Hashable form of a zone list (nested lists become tuples), or None."""
+
+    def freeze(value):
+        if isinstance(value, (list, tuple)):
+            return tuple(freeze(v) for v in value)
+        return value
+
+    key = freeze(zones)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def get_zone_schedule(G, zones):
+    """
+    (Cached) ZoneSchedule of G for `zones`; the TIME_DEPENDENT_SCHEDULE_CACHE_SIZE
+    most recently used ones are kept per graph.
+    """
+    a = get_graph_arrays(G)
+    key = _zones_key(zones)
+    if key is None:
+        return ZoneSchedule(G, zones)
+    cache = _schedule_cache.setdefault(a, OrderedDict())
+    schedule = cache.get(key)
+    if schedule is None:
+        schedule = cache[key] = ZoneSchedule(G, zones)
+        while len(cache) > TIME_DEPENDENT_SCHEDULE_CACHE_SIZE:
+            cache.popitem(last=False)
+    cache.move_to_end(key)
+    return schedule
+
+
+def _search_lists(a, weight_mode, speed):
+    """(Cached) plain-list weights, travel times, indptr and edge_v of `a`."""
+    cache = _list_cache.setdefault(a, {})
+    weights_key = ("weights", weight_mode, weight_coefficients(weight_mode))
+    travel_key = ("travel", float(speed))
+    if weights_key not in cache:
+        cache[weights_key] = calculate_edge_weights(a, weight_mode).tolist()
+    if travel_key not in cache:
+        cache[travel_key] = (a.length / speed).tolist()
+    if "indptr" not in cache:
+        cache["indptr"], cache["edge_v"] = a.indptr.tolist(), a.edge_v.tolist()
+    return cache[weights_key], cache[travel_key], cache["indptr"], cache["edge_v"]
+
+
+def clear_time_dependent_cache(G=None):
+    """
+    Drops the cached search lists of G (or of every graph), e.g. after its
+    edge weights changed. Schedules only depend on geometry and are kept.
+    """
+    if G is None:
+        _list_cache.clear()
+        return
+    a = peek_graph_arrays(G)
+    if a is not None:
+        _list_cache.pop(a, None)
+
+
+def find_path_time_dependent(
+    G,
+    start_node,
+    end_node,
+    weight_mode="safe",
+    zones=None,
+    depart_time=0.0,
+    speed=DEFAULT_TRAVEL_SPEED,
+    max_wait=0.0,
+    schedule=None,
+):
+    """
+    A* in which edge passability depends on when the edge is traversed.
+
+    An edge is impassable while any zone covers its midpoint during the
+    traversal [arrival, arrival + length / speed]. With max_wait > 0 an
+    agent may instead wait at the node for the zone to pass (waiting costs
+    as much as driving the distance it could have covered, at fast-mode rate).
+
+    Every node is settled once, at the arrival time of its cheapest path.
+    Blocking is not FIFO (arriving later can find an edge open again, e.g.
+    once a checkpoint closes), so a route that only works because it reaches
+    some node later than the cheapest path does can be missed. Without
+    waiting (max_wait=0) such routes are never found; max_wait > 0 recovers
+    those where the delay can be spent waiting right before the blocked edge.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        start_node: Source node ID.
+        end_node: Target node ID.
+        weight_mode (str): 'safe', 'balanced', 'efficient', or 'fast'.
+        zones (list, optional): Zones accepted by load_zones(). Defaults to
+            config.ENEMY_PATROLS; pass [] for none.
+        depart_time (float): Departure time in seconds (zone track time).
+        speed (float): Travel speed in m/s.
+        max_wait (float): Longest wait allowed before a single edge.
+        schedule (ZoneSchedule, optional): Prebuilt index for `zones`
+            (default: get_zone_schedule(), cached per graph and zones).
+
+    Returns:
+        tuple: (path_nodes, path_coords, arrival_times)
+            arrival_times: Time the agent reaches each node of path_nodes.
+            All three are None if no path exists.
+    """
+    with profiler.span("find_path_time_dependent", weight_mode=weight_mode):
+        if schedule is None:
+            schedule = get_zone_schedule(G, ENEMY_PATROLS if zones is None else zones)
+        a = schedule.arrays
+        source, target = a.node_index[start_node], a.node_index[end_node]
+
+        weights, travel, indptr, edge_v = _search_lists(a, weight_mode, speed)
+        heuristic = haversine_array(a.y, a.x, a.y[target], a.x[target]).tolist()
+        interval_ptr = schedule.interval_list
+
+        best = {source: 0.0}
+        time_at = {source: float(depart_time)}
+        came_from = {}
+        closed = set()
+        queue = [(heuristic[source], 0.0, source)]
+        while queue:
+            _, cost, node = heapq.heappop(queue)
+            if node in closed:
+                continue
+            if node == target:
+                break
+            closed.add(node)
+            now = time_at[node]
+
+            for slot in range(indptr[node], indptr[node + 1]):
+                nxt = edge_v[slot]
+                if nxt in closed:
+                    continue
+                leave = now
+                lo, hi = interval_ptr[slot], interval_ptr[slot + 1]
+                while True:
+                    blocked = schedule.blocked_until(slot, leave, leave + travel[slot], lo, hi)
+                    if blocked is None:
+                        break
+                    leave = blocked + 1e-6
+                    if leave - now > max_wait:
+                        break
+                if blocked is not None:
+                    continue
+
+                new_cost = cost + weights[slot] + (leave - now) * speed
+                if new_cost < best.get(nxt, math.inf):
+                    best[nxt] = new_cost
+                    time_at[nxt] = leave + travel[slot]
+                    came_from[nxt] = node
+                    heapq.heappush(queue, (new_cost + heuristic[nxt], new_cost, nxt))
+
+        if target not in best:
+            print(f"No time-dependent path found between {start_node} and {end_node}")
+            return None, None, None
+
+        path = [target]
+        while path[-1] != source:
+            path.append(came_from[path[-1]])
+        path.reverse()
+
+        path_nodes = [a.node_ids[i].item() for i in path]
+        arrival_times = [time_at[i] for i in path]
+        path_coords = extract_path_coords(G, path_nodes, weight_mode)
+        return path_nodes, path_coords, arrival_times
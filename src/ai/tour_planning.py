@@ -0,0 +1,318 @@
+"""
+Multi-stop supply tours.
+
+A supply run starts at a depot, visits many drop points and (by default)
+comes back. plan_supply_tours solves this as a travelling salesman problem,
+or as a capacitated vehicle routing problem when stops have demands and the
+vehicle a capacity:
+
+    1. Cost table: shortest-path costs between every pair of stops (depot
+       included) under the role's weight mode, from one-to-many Dijkstra
+       trees grown in chunks of sources, optionally across a process pool.
+    2. Construction: nearest-neighbour tour through all stops.
+    3. Split (capacity only): the tour is cut into vehicle trips by the
+       optimal split of Prins' route-first cluster-second method.
+    4. Improvement: 2-opt (reverse a stretch) and Or-opt (move a run of up to
+       three stops) moves, best move first, until none helps. Every move type
+       is evaluated for all positions at once with NumPy; street costs are
+       asymmetric (one-way streets), so 2-opt accounts for the reversed
+       stretch's own cost.
+    5. Geometry: the legs of every trip are routed on the graph and stitched
+       into one street path.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from config import TOUR_IMPROVEMENT_MOVES, TOUR_WORKERS
+from src.ai.batch_routing import TREE_CHUNK_SIZE, BatchRouter
+from src.ai.pathfinding import slot_path_coords
+from src.utils import profiler
+
+OR_OPT_MAX_SEGMENT = 3  # Longest run of stops moved by one Or-opt move
+UNREACHABLE_PENALTY = 1e3  # Unreachable legs cost this times the largest finite leg
+
+
+def build_cost_table(G, nodes, weight_mode="efficient", blocked_zones=None, workers=TOUR_WORKERS, router=None):
+    """
+    Shortest-path cost between every ordered pair of nodes.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        nodes (list): Node IDs (depot and stops).
+        weight_mode (str): Role weight mode.
+        blocked_zones (list, optional): (lat, lon, radius, name) zones to avoid.
+        workers (int): Processes growing the trees (1 = in this process).
+        router (BatchRouter, optional): Router for weight_mode/blocked_zones.
+
+    Returns:
+        np.ndarray: (n x n) costs, inf where no path exists.
+    """
+    if router is None:
+        router = BatchRouter(G, weight_mode, blocked_zones)
+    index = router.arrays.nodes_to_indices(nodes)
+    chunk_size = min(TREE_CHUNK_SIZE, max(1, -(-len(index) // max(workers, 1))))
+    chunks = [index[i:i + chunk_size] for i in range(0, len(index), chunk_size)]
+
+    with profiler.span("tour_cost_table", stops=len(index), workers=workers):
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(
+                workers, initializer=_init_worker, initargs=(router.matrix, index)
+            ) as pool:
+                rows = list(pool.map(_cost_rows_in_worker, chunks))
+        else:
+            rows = [_cost_rows(router.matrix, chunk, index) for chunk in chunks]
+    return np.vstack(rows)
+
+
+_worker_table = None
+
+
+def _init_worker(matrix, targets):
+    global _worker_table
+    _worker_table = (matrix, targets)
+
+
+def _cost_rows_in_worker(sources):
+    matrix, targets = _worker_table
+    return _cost_rows(matrix, sources, targets)
+
+
+def _cost_rows(matrix, sources, targets):
+    dist = dijkstra(matrix, directed=True, indices=sources)
+    return dist[:, targets]
+
+
+def _nearest_neighbour(costs, stops):
+    """Greedy tour from the depot (index 0) through the given stop indices."""
+    order = []
+    remaining = np.array(stops, dtype=np.int64)
+    current = 0
+    while len(remaining):
+        nearest = int(np.argmin(costs[current, remaining]))
+        current = int(remaining[nearest])
+        order.append(current)
+        remaining = np.delete(remaining, nearest)
+    return order
+
+
+def _split(costs, tour, demands, capacity, end):
+    """
+    Optimal cut of a giant tour into capacity-feasible trips (Prins' split):
+    a shortest path over tour positions where an arc i -> j is the trip
+    serving tour[i:j].
+
+    Returns:
+        list: Stop index lists, one per trip.
+    """
+    n = len(tour)
+    best = np.full(n + 1, np.inf)
+    best[0] = 0.0
+    cut = np.zeros(n + 1, dtype=np.int64)
+    for i in range(n):
+        load = 0.0
+        cost = 0.0
+        for j in range(i, n):
+            load += demands[tour[j]]
+            if load > capacity and j > i:
+                break
+            cost += costs[0, tour[j]] if j == i else costs[tour[j - 1], tour[j]]
+            total = best[i] + cost + costs[tour[j], end]
+            if total < best[j + 1]:
+                best[j + 1] = total
+                cut[j + 1] = i
+    trips = []
+    j = n
+    while j > 0:
+        trips.append(tour[cut[j]:j])
+        j = cut[j]
+    return trips[::-1]
+
+
+def _two_opt_move(costs, seq):
+    """Best 2-opt move on seq (endpoints fixed); returns (delta, i, j)."""
+    n = len(seq)
+    if n < 4:
+        return 0.0, 0, 0
+    forward = np.concatenate([[0.0], np.cumsum(costs[seq[:-1], seq[1:]])])
+    backward = np.concatenate([[0.0], np.cumsum(costs[seq[1:], seq[:-1]])])
+    i, j = np.triu_indices(n - 1, k=1)
+    keep = i >= 1
+    i, j = i[keep], j[keep]
+    # Reverse seq[i..j]: swap the two boundary edges and flip the stretch
+    delta = (
+        costs[seq[i - 1], seq[j]] + costs[seq[i], seq[j + 1]]
+        - costs[seq[i - 1], seq[i]] - costs[seq[j], seq[j + 1]]
+        + (backward[j] - backward[i]) - (forward[j] - forward[i])
+    )
+    best = int(np.argmin(delta))
+    return float(delta[best]), int(i[best]), int(j[best])
+
+
+def _or_opt_move(costs, seq):
+    """Best Or-opt move on seq (endpoints fixed); returns (delta, i, length, k)."""
+    n = len(seq)
+    best = (0.0, 0, 0, 0)
+    edge_cost = costs[seq[:-1], seq[1:]]
+    for length in range(1, min(OR_OPT_MAX_SEGMENT, n - 3) + 1):
+        i = np.arange(1, n - length)  # segment seq[i:i + length]
+        first, last = seq[i], seq[i + length - 1]
+        before, after = seq[i - 1], seq[i + length]
+        gain = costs[before, first] + costs[last, after] - costs[before, after]
+        # Re-insert between seq[k] and seq[k + 1] for every edge k
+        k = np.arange(n - 1)
+        insert = (
+            costs[seq[k][None, :], first[:, None]] + costs[last[:, None], seq[k + 1][None, :]]
+            - edge_cost[None, :]
+        )
+        delta = insert - gain[:, None]
+        touching = (k[None, :] >= i[:, None] - 1) & (k[None, :] <= (i + length - 1)[:, None])
+        delta[touching] = np.inf
+        row, col = np.unravel_index(int(np.argmin(delta)), delta.shape)
+        if delta[row, col] < best[0]:
+            best = (float(delta[row, col]), int(i[row]), length, int(k[col]))
+    return best
+
+
+def improve_sequence(costs, seq, max_moves=TOUR_IMPROVEMENT_MOVES):
+    """
+    2-opt + Or-opt local search on a sequence whose first and last entries
+    (depot and trip end) stay fixed.
+
+    Returns:
+        tuple: (improved sequence as a list, moves applied)
+    """
+    seq = np.array(seq, dtype=np.int64)
+    moves = 0
+    while moves < max_moves:
+        tolerance = 1e-9 * max(1.0, float(costs[seq[:-1], seq[1:]].sum()))
+        delta, i, j = _two_opt_move(costs, seq)
+        if delta < -tolerance:
+            seq[i:j + 1] = seq[i:j + 1][::-1]
+            moves += 1
+            continue
+        delta, i, length, k = _or_opt_move(costs, seq)
+        if delta < -tolerance:
+            segment = seq[i:i + length]
+            rest = np.concatenate([seq[:i], seq[i + length:]])
+            at = k + 1 if k < i else k + 1 - length
+            seq = np.concatenate([rest[:at], segment, rest[at:]])
+            moves += 1
+            continue
+        break
+    return seq.tolist(), moves
+
+
+@profiler.timed("plan_supply_tours")
+def plan_supply_tours(
+    G,
+    depot,
+    stops,
+    demands=None,
+    capacity=None,
+    weight_mode="efficient",
+    blocked_zones=None,
+    return_to_depot=True,
+    workers=TOUR_WORKERS,
+    router=None,
+):
+    """
+    Orders drop points into one tour, or several capacity-feasible trips.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        depot: Start (and end) node ID.
+        stops (list): Drop point node IDs.
+        demands (list, optional): Supplies needed per stop (default 1 each);
+            a stop listed twice gets the sum of its demands.
+        capacity (float, optional): Vehicle capacity; None means one tour.
+        weight_mode (str): Role weight mode the tour cost is measured in.
+        blocked_zones (list, optional): (lat, lon, radius, name) zones to avoid.
+        return_to_depot (bool): Close every trip at the depot.
+        workers (int): Processes used for the cost table.
+        router (BatchRouter, optional): Router for weight_mode/blocked_zones.
+
+    Returns:
+        dict: trips (list of dicts with stops, load, cost, path_nodes and
+            path_coords), total_cost, unreachable (stops skipped because no
+            route leads there and back), moves (improvement moves applied).
+
+    Raises:
+        ValueError: If demands and stops differ in length, or a stop needs
+            more than the capacity.
+    """
+    stops = list(stops)
+    demands = np.ones(len(stops)) if demands is None else np.asarray(demands, dtype=np.float64)
+    if len(demands) != len(stops):
+        raise ValueError(f"Got {len(demands)} demands for {len(stops)} stops")
+    # One visit per stop (duplicates add up their demand); the depot needs none
+    merged = {}
+    for stop, demand in zip(stops, demands.tolist()):
+        if stop != depot:
+            merged[stop] = merged.get(stop, 0.0) + demand
+    stops, demands = list(merged), np.array(list(merged.values()), dtype=np.float64)
+    if capacity is not None and np.any(demands > capacity):
+        too_large = [s for s, d in zip(stops, demands) if d > capacity]
+        raise ValueError(f"Stops {too_large} need more than the vehicle capacity {capacity}")
+
+    if router is None:
+        router = BatchRouter(G, weight_mode, blocked_zones)
+    nodes = [depot] + stops
+    raw = build_cost_table(G, nodes, workers=workers, router=router)
+
+    # Stops the depot cannot reach (or, for closed trips, get back from)
+    reachable = np.isfinite(raw[0, 1:])
+    if return_to_depot:
+        reachable &= np.isfinite(raw[1:, 0])
+    unreachable = [s for s, ok in zip(stops, reachable) if not ok]
+    if unreachable:
+        print(f"Skipping {len(unreachable)} unreachable stops.")
+
+    # Append a virtual end node: back at the depot, or anywhere for open trips
+    n = len(nodes)
+    costs = np.zeros((n + 1, n + 1))
+    costs[:n, :n] = raw
+    costs[:n, n] = raw[:, 0] if return_to_depot else 0.0
+    costs[n, :] = np.inf
+    finite = np.isfinite(costs)
+    costs[~finite] = costs[finite].max() * UNREACHABLE_PENALTY if finite.any() else 1.0
+    np.fill_diagonal(costs, 0.0)
+    end = n
+    node_demand = np.concatenate([[0.0], demands, [0.0]])
+
+    with profiler.span("tour_solve", stops=int(reachable.sum())):
+        tour = _nearest_neighbour(costs, np.flatnonzero(reachable) + 1)
+        if capacity is None:
+            trips = [tour] if tour else []
+        else:
+            tour, _ = improve_sequence(costs, [0] + tour + [end])
+            trips = _split(costs, tour[1:-1], node_demand, capacity, end)
+        improved, moves = [], 0
+        for trip in trips:
+            seq, count = improve_sequence(costs, [0] + list(trip) + [end])
+            improved.append(seq[1:-1])
+            moves += count
+
+    results = []
+    for trip in improved:
+        legs = [0] + trip + ([0] if return_to_depot else [])
+        legs = router.arrays.nodes_to_indices([nodes[i] for i in legs])
+        slot_lists, leg_costs = router.routes(legs[:-1], legs[1:])
+        slots = np.concatenate([s for s in slot_lists if s is not None] or [np.empty(0, dtype=np.int64)])
+        results.append({
+            "stops": [nodes[i] for i in trip],
+            "load": float(node_demand[trip].sum()),
+            "cost": float(leg_costs.sum()),
+            "path_nodes": [depot] + [router.arrays.node_ids[v].item() for v in router.arrays.edge_v[slots]],
+            "path_coords": slot_path_coords(G, router.arrays, slots),
+        })
+    profiler.annotate(stops=len(stops), trips=len(results), moves=moves)
+    return {
+        "trips": results,
+        "total_cost": float(sum(t["cost"] for t in results)),
+        "unreachable": unreachable,
+        "moves": moves,
+    }
+
@@ -0,0 +1,305 @@
+"""
+Congestion-aware traffic assignment.
+
+Routing every agent on its own shortest path sends a whole batch of rescuers
+down the same streets. TrafficAssignment instead finds the user equilibrium
+of a batch of origin-destination (OD) demands with the Frank-Wolfe method:
+edge travel costs follow the BPR volume-delay function
+
+    cost(x) = base_cost * (1 + alpha * (x / capacity) ** beta)
+
+where base_cost is the role's usual edge weight (see calculate_edge_weights)
+and x the flow on the edge. Every iteration loads all demand onto the
+current shortest paths ("all-or-nothing"), then moves the flows part of the
+way towards that loading. Flows and costs are NumPy arrays per edge slot;
+shortest-path trees are grown per distinct origin in chunks, which run in a
+process pool when workers > 1 (SciPy's Dijkstra holds the GIL, so threads
+would not help).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from config import (
+    TRAFFIC_BPR_ALPHA,
+    TRAFFIC_BPR_BETA,
+    TRAFFIC_GAP_TOLERANCE,
+    TRAFFIC_LANE_CAPACITY,
+    TRAFFIC_MAX_ITERATIONS,
+    TRAFFIC_WORKERS,
+)
+from src.ai.batch_routing import TREE_CHUNK_SIZE, build_pair_matrix, lookup_pair_slots
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.pathfinding import calculate_edge_weights
+from src.utils import profiler
+
+LINE_SEARCH_STEPS = 24  # Bisection steps for the Frank-Wolfe step size
+
+
+class TrafficAssignment:
+    """
+    Equilibrium assignment of OD demand for one role weight mode.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph.
+        weight_mode (str): 'safe', 'balanced', 'efficient' or 'fast';
+            gives the free-flow cost of every edge.
+        blocked_zones (list, optional): (lat, lon, radius, name) zones to avoid.
+        capacities (np.ndarray, optional): Capacity per edge slot, in demand
+            units. Defaults to edge_capacities(G).
+        alpha (float): BPR alpha.
+        beta (float): BPR beta.
+        workers (int): Processes used for the shortest-path trees (1 = serial).
+    """
+
+    def __init__(
+        self,
+        G,
+        weight_mode="balanced",
+        blocked_zones=None,
+        capacities=None,
+        alpha=TRAFFIC_BPR_ALPHA,
+        beta=TRAFFIC_BPR_BETA,
+        workers=TRAFFIC_WORKERS,
+    ):
+        self.arrays = get_graph_arrays(G)
+        self.weight_mode = weight_mode
+        self.free_flow_costs = calculate_edge_weights(self.arrays, weight_mode, blocked_zones)
+        self.capacities = edge_capacities(G) if capacities is None else np.asarray(capacities, float)
+        self.alpha = alpha
+        self.beta = beta
+        self.workers = max(1, int(workers))
+
+        self.usable = np.isfinite(self.free_flow_costs)
+        self.flows = np.zeros(self.arrays.n_edges)
+
+    def edge_costs(self, flows=None):
+        """BPR cost of every edge slot at the given (default: current) flows."""
+        flows = self.flows if flows is None else flows
+        ratio = flows / np.maximum(self.capacities, 1e-9)
+        return self.free_flow_costs * (1 + self.alpha * ratio ** self.beta)
+
+    @profiler.timed("traffic_assignment.assign")
+    def assign(
+        self,
+        origins,
+        destinations,
+        demand=None,
+        max_iterations=TRAFFIC_MAX_ITERATIONS,
+        tolerance=TRAFFIC_GAP_TOLERANCE,
+        progress_callback=None,
+    ):
+        """
+        Distributes OD demand over the network until the relative gap drops
+        below `tolerance` or `max_iterations` is reached.
+
+        Args:
+            origins (list): Origin node IDs.
+            destinations (list): Destination node IDs (same length).
+            demand (array-like, optional): Demand per OD pair (default 1 each).
+            max_iterations (int): Frank-Wolfe iterations after the initial loading.
+            tolerance (float): Target relative gap.
+            progress_callback (callable, optional): Called as
+                progress_callback(iteration, relative_gap) after every iteration.
+
+        Returns:
+            dict: flows and costs per edge slot, od_costs (equilibrium cost per
+                OD pair, inf if unreachable), gaps (relative gap per iteration),
+                iterations, converged, unassigned_demand and total_cost.
+        """
+        a = self.arrays
+        origins = a.nodes_to_indices(origins)
+        destinations = a.nodes_to_indices(destinations)
+        demand = np.ones(len(origins)) if demand is None else np.asarray(demand, dtype=np.float64)
+
+        with _TreeLoader(a, self.workers) as loader:
+            # Initial all-or-nothing loading at free-flow costs
+            self.flows, od_costs = loader.load(self.free_flow_costs, origins, destinations, demand)
+            reachable = np.isfinite(od_costs)
+            unassigned = float(demand[~reachable].sum())
+            demand = np.where(reachable, demand, 0.0)
+
+            gaps = []
+            converged = False
+            for iteration in range(1, max_iterations + 1):
+                costs = self.edge_costs()
+                target, od_costs = loader.load(costs, origins, destinations, demand)
+
+                # Relative gap: how much cheaper the current shortest paths are
+                # than the routes the flows actually use.
+                current = _dot(costs, self.flows, self.usable)
+                shortest = float(np.dot(demand[reachable], od_costs[reachable]))
+                gap = (current - shortest) / current if current > 0 else 0.0
+                gaps.append(gap)
+                if progress_callback:
+                    progress_callback(iteration, gap)
+                if gap <= tolerance:
+                    converged = True
+                    break
+
+                step = self._line_search(target - self.flows)
+                self.flows += step * (target - self.flows)
+
+        costs = self.edge_costs()
+        return {
+            "flows": self.flows,
+            "costs": costs,
+            "od_costs": np.where(reachable, od_costs, np.inf),
+            "gaps": gaps,
+            "iterations": len(gaps),
+            "converged": converged,
+            "unassigned_demand": unassigned,
+            "total_cost": _dot(costs, self.flows, self.usable),
+        }
+
+    def _line_search(self, direction):
+        """
+        Step size in [0, 1] minimizing the Beckmann objective along `direction`,
+        by bisection on its derivative sum(cost(x + step * d) * d).
+        """
+        usable = self.usable & (direction != 0)
+        flows, d = self.flows[usable], direction[usable]
+        free, capacity = self.free_flow_costs[usable], np.maximum(self.capacities[usable], 1e-9)
+
+        def slope(step):
+            ratio = np.maximum(flows + step * d, 0.0) / capacity
+            return np.dot(free * (1 + self.alpha * ratio ** self.beta), d)
+
+        low, high = 0.0, 1.0
+        if slope(high) <= 0:
+            return 1.0
+        for _ in range(LINE_SEARCH_STEPS):
+            middle = (low + high) / 2
+            if slope(middle) > 0:
+                high = middle
+            else:
+                low = middle
+        return (low + high) / 2
+
+
+def edge_capacities(G, lane_capacity=TRAFFIC_LANE_CAPACITY):
+    """
+    Capacity per edge slot: number of lanes (OSM 'lanes' tag, default 1)
+    times `lane_capacity`.
+    """
+    arrays = get_graph_arrays(G)
+    lanes = np.ones(arrays.n_edges)
+    for slot, (u, v, k) in enumerate(arrays.edge_keys):
+        value = G.edges[u, v, k].get("lanes")
+        if isinstance(value, list):
+            value = value[0]
+        try:
+            # Tags like "2;3" list lanes per section; use the narrowest
+            lanes[slot] = max(1.0, min(float(x) for x in str(value).split(";")))
+        except (TypeError, ValueError):
+            pass
+    return lanes * lane_capacity
+
+
+def _dot(costs, flows, usable):
+    return float(np.dot(costs[usable], flows[usable]))
+
+
+# ----------------------------------------------------------------------
+# All-or-nothing loading
+# ----------------------------------------------------------------------
+
+
+class _TreeLoader:
+    """Runs all-or-nothing loadings, serially or across a process pool."""
+
+    def __init__(self, arrays, workers):
+        self.edge_u = arrays.edge_u
+        self.edge_v = arrays.edge_v
+        self.n_nodes = arrays.n_nodes
+        self.workers = workers
+        self.pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(
+                self.workers,
+                initializer=_init_worker,
+                initargs=(self.edge_u, self.edge_v, self.n_nodes),
+            )
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    @profiler.timed("traffic_assignment.all_or_nothing")
+    def load(self, costs, origins, destinations, demand):
+        """
+        Loads all demand onto the shortest paths under `costs`.
+
+        Returns:
+            tuple: (flows per edge slot, cost per OD pair)
+        """
+        unique_origins, origin_row = np.unique(origins, return_inverse=True)
+        chunks = []
+        for start in range(0, len(unique_origins), TREE_CHUNK_SIZE):
+            pairs = np.flatnonzero((origin_row >= start) & (origin_row < start + TREE_CHUNK_SIZE))
+            chunks.append((
+                unique_origins[start:start + TREE_CHUNK_SIZE],
+                origin_row[pairs] - start,
+                destinations[pairs],
+                demand[pairs],
+                pairs,
+            ))
+
+        if self.pool is None:
+            results = [
+                _load_chunk(self.edge_u, self.edge_v, self.n_nodes, costs, *chunk[:4])
+                for chunk in chunks
+            ]
+        else:
+            results = list(self.pool.map(
+                _load_chunk_in_worker,
+                [costs] * len(chunks),
+                *zip(*(chunk[:4] for chunk in chunks)),
+            ))
+
+        flows = np.zeros(len(costs))
+        od_costs = np.full(len(origins), np.inf)
+        for (_, _, _, _, pairs), (chunk_flows, chunk_costs) in zip(chunks, results):
+            flows += chunk_flows
+            od_costs[pairs] = chunk_costs
+        return flows, od_costs
+
+
+_worker_graph = None
+
+
+def _init_worker(edge_u, edge_v, n_nodes):
+    global _worker_graph
+    _worker_graph = (edge_u, edge_v, n_nodes)
+
+
+def _load_chunk_in_worker(costs, roots, rows, leaves, demand):
+    return _load_chunk(*_worker_graph, costs, roots, rows, leaves, demand)
+
+
+def _load_chunk(edge_u, edge_v, n_nodes, costs, roots, rows, leaves, demand):
+    """
+    One Dijkstra call for a chunk of origins, then walks every OD path back
+    from its destination to its origin, all paths one hop per iteration,
+    adding the pair's demand to each edge on the way.
+    """
+    matrix, pair_keys, pair_slots = build_pair_matrix(edge_u, edge_v, n_nodes, costs)
+    dist, pred = dijkstra(matrix, directed=True, indices=roots, return_predecessors=True)
+
+    od_costs = dist[rows, leaves]
+    flows = np.zeros(len(costs))
+    origin = roots[rows]
+    current = leaves.copy()
+    active = np.flatnonzero(np.isfinite(od_costs) & (current != origin) & (demand > 0))
+    while len(active):
+        step = pred[rows[active], current[active]]
+        slots = lookup_pair_slots(pair_keys, pair_slots, n_nodes, step, current[active])
+        flows += np.bincount(slots, weights=demand[active], minlength=len(costs))
+        current[active] = step
+        active = active[step != origin[active]]
+    return flows, od_costs
@@ -0,0 +1,253 @@
+"""
+Memory-bounded cache of enriched street graphs.
+
+The app asks for a graph around (lat, lon) within `radius` meters. GraphCache
+makes those requests cheap and bounded:
+
+    - Quantized keys: the center is snapped to a GRAPH_CACHE_GRID meter grid
+      and the radius rounded up to a multiple of GRAPH_CACHE_RADIUS_STEP, so
+      nearly identical inputs share one graph.
+    - Subgraph reuse: a request whose bounding box lies inside a cached
+      graph's bounding box is cut out of that graph (nodes inside the box,
+      largest weakly connected component, as osmnx does after a download)
+      instead of downloading and enriching again. Enriched attributes come
+      along with the edges.
+    - Byte-size-aware LRU: every graph's in-memory size is estimated when it
+      is added; the GraphArrays and SpatialIndex that live as long as the
+      graph are counted whenever the total is taken. Least recently used
+      graphs are evicted until the total fits in GRAPH_CACHE_MAX_BYTES.
+"""
+
+import math
+import random
+import sys
+import threading
+from collections import OrderedDict
+
+import networkx as nx
+
+from config import (
+    GRAPH_CACHE_GRID,
+    GRAPH_CACHE_MAX_BYTES,
+    GRAPH_CACHE_RADIUS_STEP,
+    GRAPH_CACHE_SIZE_SAMPLE,
+)
+from src.ai.graph_arrays import peek_graph_arrays
+from src.ai.pathfinding import METERS_PER_DEG_LAT
+from src.ai.spatial_index import peek_spatial_index
+from src.environment.graph_slimmer import PACKED_GEOMETRY_KEY, deep_size
+from src.utils import profiler
+
+
+def bbox_from_point(lat, lon, radius):
+    """(north, south, east, west) of the square osmnx downloads for graph_from_point."""
+    delta_lat = radius / METERS_PER_DEG_LAT
+    delta_lon = radius / (METERS_PER_DEG_LAT * math.cos(math.radians(lat)))
+    return lat + delta_lat, lat - delta_lat, lon + delta_lon, lon - delta_lon
+
+
+def estimate_graph_bytes(G, sample=GRAPH_CACHE_SIZE_SAMPLE):
+    """
+    Approximate in-memory size of a graph: sys.getsizeof of a sample of node
+    and edge attribute dicts (values included, see graph_slimmer.deep_size)
+    and of the adjacency dicts holding them, scaled to the whole graph, plus
+    its packed edge geometry. Derived structures are counted separately
+    (derived_graph_bytes), as they may be built after the graph is cached.
+
+    Returns:
+        int: Estimated bytes.
+    """
+    rng = random.Random(0)
+    n_nodes, n_edges = G.number_of_nodes(), G.number_of_edges()
+    # Node attribute, successor and predecessor dicts keyed by node
+    total = 3 * sys.getsizeof(dict.fromkeys(G.nodes)) + sys.getsizeof(G.graph)
+    packed = G.graph.get(PACKED_GEOMETRY_KEY)
+    if packed is not None:
+        total += packed.nbytes
+
+    nodes = list(G.nodes(data=True))
+    picked = nodes if n_nodes <= sample else rng.sample(nodes, sample)
+    seen = set()
+    node_bytes = sum(
+        deep_size(n, seen) + deep_size(d, seen) + sum(deep_size(v, seen) for v in d.values())
+        + sys.getsizeof(dict(G.succ[n])) + sys.getsizeof(dict(G.pred[n]))
+        for n, d in picked
+    )
+    if picked:
+        total += node_bytes * n_nodes / len(picked)
+
+    edges = list(G.edges(keys=True, data=True))
+    picked = edges if n_edges <= sample else rng.sample(edges, sample)
+    seen = set()
+    # Parallel edges share one key dict, referenced from both adjacency sides
+    edge_bytes = sum(
+        deep_size(d, seen) + sum(deep_size(v, seen) for v in d.values())
+        + deep_size(k, seen) + sys.getsizeof(dict(G.succ[u][v])) / len(G.succ[u][v])
+        for u, v, k, d in picked
+    )
+    if picked:
+        total += edge_bytes * n_edges / len(picked)
+    return int(total)
+
+
+def derived_graph_bytes(G):
+    """Bytes of the GraphArrays and SpatialIndex cached for G (0 for those not built)."""
+    arrays = peek_graph_arrays(G)
+    index = peek_spatial_index(G)
+    return (arrays.nbytes if arrays is not None else 0) + (index.nbytes if index is not None else 0)
+
+
+def extract_subgraph(G, lat, lon, radius):
+    """
+    Part of G inside the bounding box of (lat, lon, radius), reduced to its
+    largest weakly connected component.
+
+    Returns:
+        networkx.MultiDiGraph: Independent copy (attributes included).
+    """
+    north, south, east, west = bbox_from_point(lat, lon, radius)
+    inside = [
+        n for n, d in G.nodes(data=True)
+        if south <= d["y"] <= north and west <= d["x"] <= east
+    ]
+    H = G.subgraph(inside)
+    if H.number_of_nodes():
+        H = H.subgraph(max(nx.weakly_connected_components(H), key=len))
+    return H.copy()
+
+
+class GraphCache:
+    """
+    LRU cache of graphs keyed by quantized (lat, lon, radius).
+
+    Args:
+        max_bytes (int): Estimated bytes kept at most (the newest graph is
+            always kept, even if it alone is larger).
+        grid (float): Center quantization step in meters.
+        radius_step (float): Radius rounding step in meters.
+    """
+
+    def __init__(self, max_bytes=GRAPH_CACHE_MAX_BYTES, grid=GRAPH_CACHE_GRID, radius_step=GRAPH_CACHE_RADIUS_STEP):
+        self.max_bytes = max_bytes
+        self.grid = grid
+        self.radius_step = radius_step
+        self._entries = OrderedDict()  # key -> (graph, bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.subgraph_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def total_bytes(self):
+        return sum(self._entry_bytes(entry) for entry in self._entries.values())
+
+    @staticmethod
+    def _entry_bytes(entry):
+        G, size = entry
+        return size + derived_graph_bytes(G)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def quantize(self, lat, lon, radius):
+        """Cache key of a request: snapped center and rounded-up radius."""
+        step_lat = self.grid / METERS_PER_DEG_LAT
+        q_lat = round(round(lat / step_lat) * step_lat, 6)
+        # Longitude step from the snapped latitude, so one cell has one key
+        step_lon = self.grid / (METERS_PER_DEG_LAT * math.cos(math.radians(q_lat)))
+        return (
+            q_lat,
+            round(round(lon / step_lon) * step_lon, 6),
+            int(math.ceil(radius / self.radius_step) * self.radius_step),
+        )
+
+    def get(self, lat, lon, radius, loader):
+        """
+        Graph for a request, from the cache or from `loader`.
+
+        Args:
+            lat, lon, radius (float): Requested center and radius in meters.
+            loader (callable): loader(lat, lon, radius) -> graph or None,
+                called with the quantized values on a miss.
+
+        Returns:
+            networkx.MultiDiGraph: Cached graph (do not modify), or None if
+                the loader failed.
+        """
+        G = self.lookup(lat, lon, radius)
+        if G is None:
+            key = self.quantize(lat, lon, radius)
+            G = loader(*key)
+            if G is not None:
+                self.put(key, G)
+        return G
+
+    def lookup(self, lat, lon, radius):
+        """
+        Graph for a request without loading anything: a cached graph for
+        the quantized key, or one cut out of a larger cached graph (then
+        cached too).
+
+        Returns:
+            networkx.MultiDiGraph: Cached graph (do not modify), or None on
+                a miss (the caller loads the graph and put()s it).
+        """
+        key = self.quantize(lat, lon, radius)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                profiler.count("graph_cache.hits")
+                return entry[0]
+            container = self._container(key)
+
+        if container is None:
+            self.misses += 1
+            return None
+        with profiler.span("graph_cache.extract_subgraph", radius=key[2]):
+            G = extract_subgraph(container, *key)
+        self.subgraph_hits += 1
+        print(f"Graph cache: cut radius {key[2]}m out of a cached graph ({G.number_of_nodes()} nodes).")
+        self.put(key, G)
+        return G
+
+    def _container(self, key):
+        """Most recently used cached graph whose box contains the key's box."""
+        north, south, east, west = bbox_from_point(*key)
+        for other in reversed(self._entries):
+            o_north, o_south, o_east, o_west = bbox_from_point(*other)
+            if o_south <= south and north <= o_north and o_west <= west and east <= o_east:
+                self._entries.move_to_end(other)
+                return self._entries[other][0]
+        return None
+
+    def put(self, key, G):
+        """Adds a graph under a quantized key and evicts down to max_bytes."""
+        size = estimate_graph_bytes(G)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (G, size)
+            total = self.total_bytes
+            while total > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                total -= self._entry_bytes(evicted)
+                self.evictions += 1
+        profiler.annotate(graph_cache_bytes=total, graph_cache_graphs=len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counters and current size."""
+        return {
+            "graphs": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "subgraph_hits": self.subgraph_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
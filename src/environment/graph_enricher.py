@@ -1,8 +1,11 @@
 import random
 from src.ai.risk_model import RiskModel
+from src.ai.graph_arrays import invalidate_graph_arrays
+from src.utils import profiler
 
 
-def enrich_graph(graph):
+@profiler.timed("enrich_graph")
+def enrich_graph(graph, risk_model=None):
     """
     Adds synthetic simulation attributes to a real-world graph.
 
@@ -13,13 +16,16 @@ def enrich_graph(graph):
 
     Args:
         graph (networkx.MultiDiGraph): The input graph (modified in-place).
+        risk_model (RiskModel, optional): Trained model to use, e.g. the one
+            restored from the warm-start snapshot. A new one is trained otherwise.
 
     Returns:
         networkx.MultiDiGraph: The enriched graph.
     """
     print("Enriching graph with simulation attributes (using AI Risk Model)...")
 
-    risk_model = RiskModel()
+    if risk_model is None:
+        risk_model = RiskModel()
 
     for u, v, k, data in graph.edges(keys=True, data=True):
         # 1. Predict Risk using ML
@@ -43,5 +49,6 @@ def enrich_graph(graph):
         data["enemy_probability"] = round(enemy_prob, 2)
         data["resource_cost"] = round(resource_cost, 2)
 
+    invalidate_graph_arrays(graph)
     print(f"Enriched {graph.number_of_edges()} edges.")
     return graph
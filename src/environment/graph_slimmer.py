@@ -0,0 +1,282 @@
+"""
+Graph slimming: smaller enriched graphs with the same routing behaviour.
+
+An osmnx download keeps every OSM tag as per-edge Python objects and a
+Shapely LineString per curved edge. slim_graph, run after enrich_graph:
+
+    1. Drops node and edge attributes nothing reads (SLIM_NODE_ATTRIBUTES
+       and SLIM_EDGE_ATTRIBUTES list the ones kept: the RiskModel features,
+       the cost model inputs, street names and the enrichment results).
+    2. Interns repeated strings (highway values, street names, maxspeed and
+       lanes tags) and floats (the rounded enrichment values), so equal
+       values share one object, and turns NumPy scalars into plain floats.
+       Attribute dicts are rebuilt, as a dict never shrinks on deletion.
+    3. Moves edge geometries into one PackedGeometry stored in
+       G.graph["packed_geometry"]: a (lon, lat) coordinate array with
+       per-geometry offsets. The edge keeps only a small integer
+       'geometry_id'. edge_coords() and geometry_coordinates() read both the
+       packed and the LineString form, so slimmed and raw graphs work alike.
+
+measure_graph_bytes() estimates the attribute memory per node and per edge,
+and slim_graph prints it before and after.
+"""
+
+import sys
+
+import numpy as np
+
+from config import SLIM_EDGE_ATTRIBUTES, SLIM_NODE_ATTRIBUTES
+from src.ai.graph_arrays import invalidate_graph_arrays
+from src.utils import profiler
+
+PACKED_GEOMETRY_KEY = "packed_geometry"
+
+
+class PackedGeometry:
+    """
+    Edge polylines in one coordinate buffer.
+
+    Attributes:
+        coords (np.ndarray): (points x 2) float64 (lon, lat) rows.
+        offsets (np.ndarray): int64; geometry i is coords[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, coords, offsets):
+        self.coords = coords
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self):
+        return self.coords.nbytes + self.offsets.nbytes
+
+    def coords_of(self, geometry_id):
+        """(lon, lat) rows of one geometry (a view into the buffer)."""
+        return self.coords[self.offsets[geometry_id]:self.offsets[geometry_id + 1]]
+
+    def gather(self, geometry_ids):
+        """
+        Coordinates of many geometries at once.
+
+        Returns:
+            tuple: (coords, owner) where owner is the position in geometry_ids
+                of every row, like shapely.get_coordinates(return_index=True).
+        """
+        ids = np.asarray(geometry_ids, dtype=np.int64)
+        starts = self.offsets[ids]
+        counts = self.offsets[ids + 1] - starts
+        rows = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+        return self.coords[rows], np.repeat(np.arange(len(ids)), counts)
+
+    def linestrings(self, geometry_ids):
+        """Shapely LineStrings of the given geometries (vectorized)."""
+        import shapely
+
+        coords, owner = self.gather(geometry_ids)
+        return shapely.linestrings(coords, indices=owner)
+
+
+def edge_coords(G, data):
+    """
+    (lon, lat) sequence of an edge's geometry, packed or LineString.
+
+    Returns:
+        Sequence of (lon, lat) pairs, or None for a straight edge.
+    """
+    geometry = data.get("geometry")
+    if geometry is not None:
+        return geometry.coords
+    geometry_id = data.get("geometry_id")
+    if geometry_id is not None:
+        return G.graph[PACKED_GEOMETRY_KEY].coords_of(geometry_id)
+    return None
+
+
+def geometry_coordinates(G, edge_keys):
+    """
+    Coordinates of every edge in edge_keys that has a geometry.
+
+    Args:
+        G (networkx.MultiDiGraph): Raw or slimmed graph.
+        edge_keys (list): (u, v, k) edges.
+
+    Returns:
+        tuple: (coords, owner, curved) where coords are (lon, lat) rows,
+            owner the position in edge_keys of every row (in vertex order
+            within an edge) and curved a boolean mask of the edges with a
+            geometry.
+    """
+    import shapely
+
+    n = len(edge_keys)
+    lines = np.full(n, None, dtype=object)
+    packed_ids = np.full(n, -1, dtype=np.int64)
+    for i, key in enumerate(edge_keys):
+        data = G.edges[key]
+        geometry = data.get("geometry")
+        if geometry is not None:
+            lines[i] = geometry
+        elif data.get("geometry_id") is not None:
+            packed_ids[i] = data["geometry_id"]
+
+    with_line = np.flatnonzero(lines != None)  # noqa: E711 (element-wise)
+    coords, owner = shapely.get_coordinates(lines[with_line], return_index=True)
+    owner = with_line[owner]
+    with_packed = np.flatnonzero(packed_ids >= 0)
+    if len(with_packed):
+        packed_coords, packed_owner = G.graph[PACKED_GEOMETRY_KEY].gather(packed_ids[with_packed])
+        coords = np.concatenate([coords, packed_coords])
+        owner = np.concatenate([owner, with_packed[packed_owner]])
+        order = np.argsort(owner, kind="stable")
+        coords, owner = coords[order], owner[order]
+
+    curved = np.zeros(n, dtype=bool)
+    curved[with_line] = True
+    curved[with_packed] = True
+    return coords, owner, curved
+
+
+def deep_size(value, seen):
+    """sys.getsizeof of a value and everything it holds, skipping objects in `seen`."""
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(deep_size(item, seen) for item in value)
+    if hasattr(value, "coords") and hasattr(value, "geom_type"):
+        # Shapely keeps coordinates in GEOS memory, invisible to getsizeof
+        import shapely
+
+        return sys.getsizeof(value) + 16 * int(shapely.get_num_coordinates(value))
+    return sys.getsizeof(value)
+
+
+def measure_graph_bytes(G):
+    """
+    Approximate attribute memory of a graph: sys.getsizeof of every node and
+    edge attribute dict and its values (shared objects, e.g. interned
+    strings, counted once), LineStrings by their coordinates, plus the
+    packed geometry buffer. The adjacency structure itself is the same
+    before and after slimming and is left out.
+
+    Returns:
+        dict: node_bytes, edge_bytes, bytes_per_node, bytes_per_edge.
+    """
+    seen = set()
+    node_bytes = sum(
+        sys.getsizeof(d) + sum(deep_size(v, seen) for v in d.values())
+        for _, d in G.nodes(data=True)
+    )
+    edge_bytes = sum(
+        sys.getsizeof(d) + sum(deep_size(v, seen) for v in d.values())
+        for _, _, d in G.edges(data=True)
+    )
+    packed = G.graph.get(PACKED_GEOMETRY_KEY)
+    if packed is not None:
+        edge_bytes += packed.nbytes
+    n_nodes, n_edges = G.number_of_nodes(), G.number_of_edges()
+    return {
+        "node_bytes": node_bytes,
+        "edge_bytes": edge_bytes,
+        "bytes_per_node": node_bytes / n_nodes if n_nodes else 0.0,
+        "bytes_per_edge": edge_bytes / n_edges if n_edges else 0.0,
+    }
+
+
+def _slim_value(value, shared):
+    """Plain Python value, reusing one object per distinct string or float."""
+    if isinstance(value, list):
+        return [_slim_value(item, shared) for item in value]
+    if isinstance(value, np.floating):
+        value = float(value)
+    elif isinstance(value, np.integer):
+        value = int(value)
+    if isinstance(value, str):
+        return shared.setdefault(value, sys.intern(value))
+    if isinstance(value, float):
+        return shared.setdefault(("float", value), value)
+    return value
+
+
+def _slim_dict(data, keep, shared):
+    """Keeps only `keep` keys; rebuilt in place, since deleting keys never shrinks a dict."""
+    kept = {k: _slim_value(v, shared) for k, v in data.items() if k in keep}
+    data.clear()
+    data.update(kept)
+
+
+@profiler.timed("slim_graph")
+def slim_graph(G, node_attributes=SLIM_NODE_ATTRIBUTES, edge_attributes=SLIM_EDGE_ATTRIBUTES, report=True):
+    """
+    Prunes, interns and packs a graph in place.
+
+    Args:
+        G (networkx.MultiDiGraph): Enriched graph (modified in place).
+        node_attributes (iterable): Node attributes to keep.
+        edge_attributes (iterable): Edge attributes to keep (geometry is
+            always packed, not kept as a LineString).
+        report (bool): Print bytes per node and per edge before and after.
+
+    Returns:
+        networkx.MultiDiGraph: The slimmed graph.
+    """
+    import shapely
+
+    before = measure_graph_bytes(G) if report else None
+    node_attributes = set(node_attributes)
+    edge_attributes = set(edge_attributes) - {"geometry", "geometry_id"}
+    shared = {}
+
+    for _, data in G.nodes(data=True):
+        _slim_dict(data, node_attributes, shared)
+
+    # Existing packed geometries (re-slimming) are carried over first
+    old = G.graph.get(PACKED_GEOMETRY_KEY)
+    lines, line_ids, packed_ids = [], [], []
+    for _, _, data in G.edges(data=True):
+        geometry = data.pop("geometry", None)
+        geometry_id = data.pop("geometry_id", None)
+        _slim_dict(data, edge_attributes, shared)
+        if geometry is not None:
+            lines.append(geometry)
+            line_ids.append(data)
+        elif geometry_id is not None and old is not None:
+            packed_ids.append((data, geometry_id))
+
+    parts, counts = [], []
+    if packed_ids:
+        coords, owner = old.gather([g for _, g in packed_ids])
+        parts.append(coords)
+        counts.append(np.bincount(owner, minlength=len(packed_ids)))
+    if lines:
+        coords, owner = shapely.get_coordinates(lines, return_index=True)
+        parts.append(coords)
+        counts.append(np.bincount(owner, minlength=len(lines)))
+    for geometry_id, data in enumerate([d for d, _ in packed_ids] + line_ids):
+        data["geometry_id"] = geometry_id
+
+    if parts:
+        G.graph[PACKED_GEOMETRY_KEY] = PackedGeometry(
+            np.ascontiguousarray(np.concatenate(parts)),
+            np.concatenate([[0], np.cumsum(np.concatenate(counts))]).astype(np.int64),
+        )
+    else:
+        G.graph.pop(PACKED_GEOMETRY_KEY, None)
+    invalidate_graph_arrays(G)
+
+    if report:
+        after = measure_graph_bytes(G)
+        print(
+            f"Slimmed graph: {before['bytes_per_node']:.0f} -> {after['bytes_per_node']:.0f} bytes/node, "
+            f"{before['bytes_per_edge']:.0f} -> {after['bytes_per_edge']:.0f} bytes/edge "
+            f"({sum(isinstance(k, str) for k in shared)} distinct strings)."
+        )
+        profiler.annotate(
+            bytes_per_node_before=before["bytes_per_node"],
+            bytes_per_node_after=after["bytes_per_node"],
+            bytes_per_edge_before=before["bytes_per_edge"],
+            bytes_per_edge_after=after["bytes_per_edge"],
+        )
+    return G
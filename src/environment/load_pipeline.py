@@ -0,0 +1,201 @@
+"""
+Staged background loading of a new map area.
+
+Loading an area used to be strictly sequential: download the graph, enrich
+it, download the boundaries, build the street index. LoadPipeline runs the
+stages on background threads and publishes every stage's result as soon
+as it is ready:
+
+    graph       download_graph()                      (thread 1)
+    boundaries  download_boundaries()                 (thread 2, concurrent)
+    risk_model  train the RiskModel, or restore it    (thread 3, concurrent)
+    streets     raw street GeoJSON + street index     (after graph)
+    enrich      enrich_graph() + slim_graph()         (after streets, risk_model)
+    index       GraphArrays + SpatialIndex            (after enrich)
+
+The downloads are network bound and overlap each other and the model
+training; streets gives the app something to draw (raw streets, then
+boundaries) long before the graph is enriched and indexed.
+
+status() reports the state and duration of every stage; results holds the
+published values ("graph" is the raw graph until enrich replaces it with
+the enriched one, which is the same object modified in place).
+"""
+
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from src.ai.graph_arrays import get_graph_arrays
+from src.ai.risk_model import RiskModel
+from src.ai.spatial_index import get_spatial_index
+from src.environment.graph_enricher import enrich_graph
+from src.environment.graph_slimmer import slim_graph
+from src.environment.map_downloader import download_boundaries, download_graph
+from src.utils import profiler
+
+STAGES = ("graph", "boundaries", "risk_model", "streets", "enrich", "index")
+
+_street_indexes = weakref.WeakKeyDictionary()  # graph -> {street name: node}
+
+
+def street_index(G):
+    """
+    (Cached) street name -> source node of the first edge with that name.
+    Only string names count (osmnx gives lists for merged ways).
+    """
+    index = _street_indexes.get(G)
+    if index is None:
+        index = {}
+        for u, _, name in G.edges(data="name"):
+            if isinstance(name, str) and name not in index:
+                index[name] = u
+        _street_indexes[G] = index
+    return index
+
+
+class LoadPipeline:
+    """
+    Background load of one area; starts on construction.
+
+    Args:
+        lat, lon, radius (float): Area to load (meters).
+        risk_model_state (dict, optional): RiskModel.get_state() to enrich
+            with instead of training a new model.
+        download (callable): download(location, dist) -> graph or None.
+        boundaries (callable): boundaries(location) -> GeoDataFrame or None.
+    """
+
+    def __init__(self, lat, lon, radius, risk_model_state=None, download=None, boundaries=None):
+        self.lat, self.lon, self.radius = lat, lon, radius
+        self.results = {}
+        self.started = time.perf_counter()
+        self._stages = {name: {"state": "pending", "start": None, "end": None} for name in STAGES}
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._reported = False
+        self._download = download or download_graph
+        self._download_boundaries = boundaries or download_boundaries
+
+        # Stages record their spans to the caller's profiler recorder
+        executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="load")
+        self._boundaries = executor.submit(
+            profiler.bind(self._run_stage), "boundaries", lambda: self._download_boundaries(location=(lat, lon))
+        )
+        self._risk_model = executor.submit(
+            profiler.bind(self._run_stage), "risk_model", lambda: self._load_risk_model(risk_model_state)
+        )
+        main = executor.submit(profiler.bind(self._run_graph_stages))
+        executor.shutdown(wait=False)
+        # Done once every branch is (failures included)
+        self._branches = (self._boundaries, self._risk_model, main)
+        for future in self._branches:
+            future.add_done_callback(self._check_finished)
+
+    @property
+    def done(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks until every stage has finished; returns done."""
+        return self._finished.wait(timeout)
+
+    def _check_finished(self, _future):
+        with self._lock:
+            if self._reported or not all(f.done() for f in self._branches):
+                return
+            self._reported = True
+        print(self.summary())
+        self._finished.set()
+
+    @staticmethod
+    def _load_risk_model(state):
+        if state is not None:
+            return RiskModel.from_state(state)
+        model = RiskModel()
+        model.train_on_synthetic_data()
+        return model
+
+    def _run_stage(self, name, func):
+        stage = self._stages[name]
+        with self._lock:
+            stage.update(state="running", start=time.perf_counter())
+        try:
+            value = func()
+        except Exception as e:
+            with self._lock:
+                stage.update(state="failed", end=time.perf_counter(), error=repr(e))
+            print(f"Load stage '{name}' failed: {e!r}")
+            return None
+        with self._lock:
+            self.results[name] = value
+            stage.update(state="done", end=time.perf_counter())
+        return value
+
+    def _skip(self, *names):
+        with self._lock:
+            for name in names:
+                self._stages[name]["state"] = "skipped"
+
+    def _run_graph_stages(self):
+        G = self._run_stage(
+            "graph", lambda: self._download(location=(self.lat, self.lon), dist=self.radius)
+        )
+        if G is None:
+            self._skip("streets", "enrich", "index")
+            return
+
+        # Straight from the raw graph: the map can show streets right away
+        from src.utils.visualizer import edges_geojson
+
+        self._run_stage("streets", lambda: {
+            "geojson": edges_geojson(G),
+            "street_index": street_index(G),
+            "center": (
+                sum(y for _, y in G.nodes(data="y")) / G.number_of_nodes(),
+                sum(x for _, x in G.nodes(data="x")) / G.number_of_nodes(),
+            ),
+        })
+        risk_model = self._risk_model.result()
+        if self._run_stage("enrich", lambda: slim_graph(enrich_graph(G, risk_model))) is None:
+            self._skip("index")
+            return
+        self._run_stage("index", lambda: self._build_indexes(G))
+
+    @staticmethod
+    def _build_indexes(G):
+        get_spatial_index(G)  # builds the GraphArrays too
+        return get_graph_arrays(G)
+
+    def status(self):
+        """
+        Per-stage progress.
+
+        Returns:
+            list: One dict per stage: stage, state (pending, running, done,
+                failed, skipped), start_s (since the pipeline started) and
+                seconds (so far, while running).
+        """
+        now = time.perf_counter()
+        rows = []
+        with self._lock:
+            for name in STAGES:
+                stage = self._stages[name]
+                start, end = stage["start"], stage["end"]
+                rows.append({
+                    "stage": name,
+                    "state": stage["state"],
+                    "start_s": None if start is None else round(start - self.started, 3),
+                    "seconds": None if start is None else round((end or now) - start, 3),
+                })
+        return rows
+
+    def summary(self):
+        """One-line stage timing report."""
+        total = max((r["start_s"] + r["seconds"] for r in self.status() if r["seconds"] is not None), default=0.0)
+        stages = ", ".join(
+            f"{r['stage']} {r['seconds']:.2f}s" if r["seconds"] is not None else f"{r['stage']} {r['state']}"
+            for r in self.status()
+        )
+        return f"Loaded ({self.lat}, {self.lon}, {self.radius}m) in {total:.2f}s: {stages}"
@@ -1,10 +1,11 @@
-import osmnx as ox
 import networkx as nx
 import pickle
 import os
 from config import MAP_CENTER_LAT, MAP_CENTER_LON, MAP_DEFAULT_RADIUS
+from src.utils import profiler
 
 
+@profiler.timed("download_graph")
 def download_graph(location=None, dist=None, network_type="drive"):
     if location is None:
         location = (MAP_CENTER_LAT, MAP_CENTER_LON)
@@ -14,6 +15,8 @@ def download_graph(location=None, dist=None, network_type="drive"):
 
     print(f"Downloading graph for {location} with radius {dist}m...")
     try:
+        import osmnx as ox  # Heavy (pulls in scikit-learn); only needed to download
+
         if isinstance(location, (tuple, list)) and len(location) == 2:
             # Input is (latitude, longitude)
             print(f"Using coordinates: {location}")
@@ -30,6 +33,7 @@ def download_graph(location=None, dist=None, network_type="drive"):
         return None
 
 
+@profiler.timed("download_boundaries")
 def download_boundaries(location=None, dist=None):
     """
     Downloads administrative boundaries (polygons) for a given location.
@@ -50,6 +54,8 @@ def download_boundaries(location=None, dist=None):
 
     print(f"Downloading administrative boundaries for {query}...")
     try:
+        import osmnx as ox
+
         # Get boundaries for the area containing the point
         boundaries = ox.geocode_to_gdf(query)
 
@@ -66,6 +72,7 @@ def download_boundaries(location=None, dist=None):
         return None
 
 
+@profiler.timed("save_custom_graph")
 def save_custom_graph(graph, filepath):
     try:
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
@@ -76,6 +83,7 @@ def save_custom_graph(graph, filepath):
         print(f"Error saving graph: {e}")
 
 
+@profiler.timed("load_custom_graph")
 def load_custom_graph(filepath):
     try:
         with open(filepath, "rb") as f:
@@ -0,0 +1,86 @@
+"""
+Warm-start snapshot: the first map without a download.
+
+A cold start downloads the area with osmnx, trains the RiskModel, enriches
+and slims the graph and builds its GraphArrays and SpatialIndex before
+anything is drawn. build_snapshot() does all of that once and
+save_snapshot() pickles the result to WARM_START_PATH (see
+scripts/build_warm_start.py); load_snapshot() reads it back with the
+indexes attached to the graph, so the app's first render only unpickles.
+
+A snapshot is a dict:
+
+    version: SNAPSHOT_VERSION; other versions are ignored
+    key: GraphCache.quantize() key (lat, lon, radius) of the area
+    graph: enriched, slimmed graph
+    arrays, spatial_index: its GraphArrays and SpatialIndex
+    risk_model: RiskModel.get_state(), reused to enrich later downloads
+    boundaries: administrative boundaries GeoDataFrame, or None
+"""
+
+import os
+import pickle
+
+from config import WARM_START_PATH
+from src.ai.graph_arrays import adopt_graph_arrays, get_graph_arrays
+from src.ai.spatial_index import adopt_spatial_index, get_spatial_index
+from src.utils import profiler
+
+SNAPSHOT_VERSION = 1
+
+
+def build_snapshot(G, key, risk_model, boundaries=None):
+    """
+    Snapshot dict of an enriched, slimmed graph, building its indexes.
+
+    Args:
+        G (networkx.MultiDiGraph): Graph as the app would cache it.
+        key (tuple): GraphCache.quantize() key of the area G covers.
+        risk_model (RiskModel): The model G was enriched with.
+        boundaries (geopandas.GeoDataFrame, optional): Boundaries of the area.
+    """
+    return {
+        "version": SNAPSHOT_VERSION,
+        "key": tuple(key),
+        "graph": G,
+        "arrays": get_graph_arrays(G),
+        "spatial_index": get_spatial_index(G),
+        "risk_model": risk_model.get_state(),
+        "boundaries": boundaries,
+    }
+
+
+@profiler.timed("save_snapshot")
+def save_snapshot(snapshot, path=WARM_START_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"Warm-start snapshot saved to {path} ({os.path.getsize(path) / 2**20:.1f} MiB)")
+
+
+@profiler.timed("load_snapshot")
+def load_snapshot(path=WARM_START_PATH):
+    """
+    Reads a snapshot and caches its indexes for its graph.
+
+    Returns:
+        dict: The snapshot, or None if the file is missing, unreadable or
+            of another version.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except Exception as e:
+        print(f"Error loading warm-start snapshot: {e}")
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        print(f"Ignoring warm-start snapshot {path}: unsupported version.")
+        return None
+
+    G = snapshot["graph"]
+    if adopt_graph_arrays(G, snapshot["arrays"]):
+        adopt_spatial_index(G, snapshot["spatial_index"])
+    print(f"Warm start: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges from {path}")
+    return snapshot
@@ -4,5 +4,6 @@ from .base_role import BaseRole
 from .army import ArmyRole
 from .rescuer import RescuerRole
 from .volunteer import VolunteerRole
+from .custom_role import CustomRole, load_custom_roles
 
-__all__ = ["BaseRole", "ArmyRole", "RescuerRole", "VolunteerRole"]
+__all__ = ["BaseRole", "ArmyRole", "RescuerRole", "VolunteerRole", "CustomRole", "load_custom_roles"]
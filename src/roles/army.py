@@ -27,10 +27,6 @@ class ArmyRole(BaseRole):
     def description(self) -> str:
         return "Strategic & Cautious: Avoids all danger zones, prioritizes safety over speed."
 
-    def decide_path(self, G, start, end, pathfinder_func, blocked_zones=None):
-        """
-        Army avoids all blocked zones by treating them as impassable.
-        """
-        # For now, use the standard pathfinder with 'safe' mode
-        # Future: Filter edges inside blocked_zones before pathfinding
-        return pathfinder_func(G, start, end, weight_mode=self.weight_mode)
+    @property
+    def avoids_zones(self) -> bool:
+        return True
@@ -5,6 +5,8 @@ Each role defines a unique pathfinding strategy.
 
 from abc import ABC, abstractmethod
 
+from src.ai.cost_model import EDGE_COST_FEATURES, weight_coefficients
+
 
 class BaseRole(ABC):
     """Abstract base class for simulation roles."""
@@ -18,9 +20,19 @@ class BaseRole(ABC):
     @property
     @abstractmethod
     def weight_mode(self) -> str:
-        """Pathfinding weight mode: 'safe', 'balanced', or 'fast'."""
+        """Pathfinding weight mode: 'safe', 'balanced', 'efficient', 'fast' or a custom mode."""
         pass
 
+    @property
+    def cost_coefficients(self) -> dict:
+        """Edge feature -> coefficient of the role's weight mode (see src/ai/cost_model.py)."""
+        return dict(zip(EDGE_COST_FEATURES, weight_coefficients(self.weight_mode)))
+
+    @property
+    def avoids_zones(self) -> bool:
+        """Whether the role treats enemy zones as impassable."""
+        return False
+
     @property
     @abstractmethod
     def path_color(self) -> str:
@@ -46,4 +58,6 @@ class BaseRole(ABC):
         Returns:
             tuple: (path_nodes, path_coords)
         """
-        return pathfinder_func(G, start, end, weight_mode=self.weight_mode)
+        return pathfinder_func(
+            G, start, end, weight_mode=self.weight_mode, blocked_zones=blocked_zones
+        )
@@ -0,0 +1,89 @@
+"""
+Custom Role: defined in configuration instead of code.
+"""
+
+import json
+import os
+
+from config import CUSTOM_ROLES, CUSTOM_ROLES_PATH
+from src.ai.cost_model import register_weight_mode
+from .base_role import BaseRole
+
+_role_names = {}  # weight mode -> name of the role that registered it
+
+
+class CustomRole(BaseRole):
+    """
+    A role described by a cost coefficient vector (see src/ai/cost_model.py).
+
+    Creating the role registers its weight mode, so it is routed by every
+    pathfinder exactly like the built-in roles. Mode names are lower case,
+    so two roles whose names differ only in case are rejected.
+
+    Args:
+        name (str): Role name.
+        coefficients (dict): Edge feature -> coefficient, e.g.
+            {"base": 1, "risk_level": 20}.
+        path_color (str): Hex color for path visualization.
+        description (str): Short description.
+        avoid_zones (bool): Treat enemy zones as impassable.
+
+    Raises:
+        ValueError: On invalid coefficients (see register_weight_mode) or a
+            name that differs from an existing role's only in case.
+    """
+
+    def __init__(self, name, coefficients, path_color="#6f42c1", description="", avoid_zones=False):
+        self._name = name
+        self._weight_mode = f"custom:{name.lower()}"
+        if _role_names.setdefault(self._weight_mode, name) != name:
+            raise ValueError(f"Role '{name}' clashes with role '{_role_names[self._weight_mode]}'")
+        self._path_color = path_color
+        self._description = description
+        self._avoids_zones = bool(avoid_zones)
+        register_weight_mode(self._weight_mode, coefficients)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def weight_mode(self) -> str:
+        return self._weight_mode
+
+    @property
+    def path_color(self) -> str:
+        return self._path_color
+
+    @property
+    def description(self) -> str:
+        return self._description
+
+    @property
+    def avoids_zones(self) -> bool:
+        return self._avoids_zones
+
+
+def load_custom_roles(filepath=CUSTOM_ROLES_PATH):
+    """
+    Builds the roles listed in config.CUSTOM_ROLES and in the JSON file at
+    `filepath` (a list of objects with CustomRole's arguments), if it exists.
+
+    Returns:
+        list: CustomRole objects; invalid entries are reported and skipped.
+    """
+    specs = list(CUSTOM_ROLES)
+    if filepath and os.path.exists(filepath):
+        try:
+            with open(filepath) as f:
+                specs.extend(json.load(f))
+        except Exception as e:
+            print(f"Error loading custom roles from {filepath}: {e}")
+
+    roles = []
+    for spec in specs:
+        try:
+            roles.append(CustomRole(**spec))
+        except Exception as e:
+            print(f"Error creating custom role {spec.get('name', spec)}: {e}")
+    return roles
@@ -2,6 +2,7 @@
 Volunteer Role: Balanced efficiency, avoids high-cost edges.
 """
 
+from config import VOLUNTEER_VEHICLE_CAPACITY
 from .base_role import BaseRole
 
 
@@ -26,3 +27,30 @@ class VolunteerRole(BaseRole):
     @property
     def description(self) -> str:
         return "Balanced & Efficient: Seeks middle-ground paths, avoids resource-heavy routes."
+
+    def plan_tour(self, G, depot, stops, demands=None, capacity=VOLUNTEER_VEHICLE_CAPACITY, blocked_zones=None):
+        """
+        Plans a multi-stop supply run from a depot (see src/ai/tour_planning.py).
+
+        Args:
+            G: NetworkX graph
+            depot: Start and end node ID
+            stops: Drop point node IDs
+            demands: Supplies needed per stop (default 1 each)
+            capacity: Supplies carried per trip (None = one trip)
+            blocked_zones: List of (lat, lon, radius, name) zones to avoid
+
+        Returns:
+            dict: Trips with stop order and stitched street geometry
+        """
+        from src.ai.tour_planning import plan_supply_tours
+
+        return plan_supply_tours(
+            G,
+            depot,
+            stops,
+            demands=demands,
+            capacity=capacity,
+            weight_mode=self.weight_mode,
+            blocked_zones=blocked_zones,
+        )
@@ -0,0 +1,273 @@
+"""
+Lightweight span/timer instrumentation for the hot paths.
+
+Usage:
+    from src.utils import profiler
+
+    @profiler.timed("enrich_graph")
+    def enrich_graph(graph): ...
+
+    with profiler.span("graph_to_gdfs", caller="app"):
+        ox.graph_to_gdfs(G)
+
+    profiler.count("astar.edges_relaxed", 42)
+
+When profiling is disabled (the default, see PROFILING_ENABLED in config.py)
+`span()` returns a shared no-op context manager and `timed` wrappers fall
+straight through to the wrapped function, so the cost is one flag check.
+
+The enabled flag and the active recorder are context variables: activate()
+sets both for the current context only (one Streamlit rerun), so sessions
+do not switch each other's profiling on or off; enable()/disable() set the
+process-wide default that contexts without their own flag follow. Work
+handed to executor threads keeps the caller's recorder and flag when the
+callable is wrapped with bind(). Anything recorded without an active
+recorder lands in a process-wide one that keeps only the latest
+DEFAULT_RECORDER_EVENTS spans and counter samples.
+
+Recorded spans can be summarized per name (for the Streamlit performance
+panel) or exported as Chrome-trace JSON, which opens in chrome://tracing and
+https://ui.perfetto.dev.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from config import PROFILING_ENABLED
+
+_enabled = PROFILING_ENABLED
+DEFAULT_RECORDER_EVENTS = 100_000
+
+
+class Recorder:
+    """
+    Collects finished spans and counter samples.
+
+    Args:
+        max_events (int, optional): Keep only the latest `max_events` spans
+            and counter samples (default: unbounded).
+    """
+
+    def __init__(self, max_events=None):
+        self.origin_ns = time.perf_counter_ns()
+        if max_events is None:
+            self.spans = []  # (name, start_ns, duration_ns, thread_id, args)
+            self.counter_samples = []  # (name, ts_ns, running_total)
+        else:
+            self.spans = deque(maxlen=max_events)
+            self.counter_samples = deque(maxlen=max_events)
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name, start_ns, duration_ns, args):
+        self.spans.append((name, start_ns, duration_ns, threading.get_ident(), args))
+
+    def add_count(self, name, value):
+        with self._lock:
+            total = self.counters.get(name, 0) + value
+            self.counters[name] = total
+        self.counter_samples.append((name, time.perf_counter_ns(), total))
+
+    def summary(self):
+        """
+        Aggregates spans by name.
+
+        Returns:
+            list: Dicts with name, calls, total_ms, max_ms, sorted by total time.
+        """
+        totals = {}
+        for name, _, duration_ns, _, _ in self.spans:
+            entry = totals.setdefault(name, {"name": name, "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            ms = duration_ns / 1e6
+            entry["calls"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+        return sorted(totals.values(), key=lambda e: e["total_ms"], reverse=True)
+
+    def to_chrome_trace(self):
+        """Returns the recording as a Chrome-trace / Perfetto JSON object."""
+        pid = os.getpid()
+        events = []
+        for name, start_ns, duration_ns, tid, args in self.spans:
+            events.append({
+                "name": name,
+                "cat": "pathway",
+                "ph": "X",
+                "ts": (start_ns - self.origin_ns) / 1e3,
+                "dur": duration_ns / 1e3,
+                "pid": pid,
+                "tid": tid,
+                "args": {k: _jsonable(v) for k, v in args.items()},
+            })
+        for name, ts_ns, total in self.counter_samples:
+            events.append({
+                "name": name,
+                "ph": "C",
+                "ts": (ts_ns - self.origin_ns) / 1e3,
+                "pid": pid,
+                "args": {"value": total},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _jsonable(value):
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    return str(value)
+
+
+_default_recorder = Recorder(max_events=DEFAULT_RECORDER_EVENTS)
+_active_recorder = contextvars.ContextVar("pathway_recorder", default=None)
+_context_enabled = contextvars.ContextVar("pathway_profiling", default=None)
+_active_span = contextvars.ContextVar("pathway_span", default=None)
+
+
+class _NullSpan:
+    """Shared no-op span returned while profiling is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "recorder", "start_ns", "_token")
+
+    def __init__(self, name, args, recorder):
+        self.name = name
+        self.args = args
+        self.recorder = recorder
+
+    def __enter__(self):
+        self._token = _active_span.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        _active_span.reset(self._token)
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.recorder.add_span(self.name, self.start_ns, duration_ns, self.args)
+        return False
+
+    def set(self, **args):
+        """Attaches extra arguments (e.g. counters) to this span."""
+        self.args.update(args)
+
+
+def is_enabled():
+    """Whether profiling is on in the current context."""
+    enabled = _context_enabled.get()
+    return _enabled if enabled is None else enabled
+
+
+def enable():
+    """Turns profiling on for every context without its own flag (see activate)."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Turns profiling off for every context without its own flag (see activate)."""
+    global _enabled
+    _enabled = False
+
+
+def current_recorder():
+    """Returns the recorder active in this context (falls back to the process-wide one)."""
+    return _active_recorder.get() or _default_recorder
+
+
+def activate(recorder=None, enabled=None):
+    """
+    Makes `recorder` (or a fresh one) the active recorder for the current
+    context, e.g. once per Streamlit rerun so every session gets its own
+    timing breakdown.
+
+    Args:
+        recorder (Recorder, optional): Recorder to activate.
+        enabled (bool, optional): Profiling on/off for this context only
+            (default: follow enable()/disable()).
+
+    Returns:
+        Recorder: The activated recorder.
+    """
+    recorder = recorder or Recorder()
+    _active_recorder.set(recorder)
+    _context_enabled.set(enabled)
+    return recorder
+
+
+def bind(func):
+    """
+    Wraps `func` to run in a copy of the current context, so spans it
+    records on an executor thread go to the caller's recorder under the
+    caller's enabled flag.
+    """
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
+
+
+def span(name, **args):
+    """Context manager timing the enclosed block under `name`."""
+    if not is_enabled():
+        return _NULL_SPAN
+    return _Span(name, args, current_recorder())
+
+
+def timed(name=None):
+    """Decorator timing every call of the wrapped function."""
+
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return func(*args, **kwargs)
+            with _Span(span_name, {}, current_recorder()):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name, value=1):
+    """Adds `value` to the named counter (no-op while disabled)."""
+    if is_enabled():
+        current_recorder().add_count(name, value)
+
+
+def annotate(**args):
+    """Attaches arguments to the innermost open span (no-op while disabled)."""
+    if is_enabled():
+        active = _active_span.get()
+        if active is not None:
+            active.set(**args)
+
+
+def export_chrome_trace(filepath, recorder=None):
+    """Writes the recording to `filepath` as Chrome-trace / Perfetto JSON."""
+    recorder = recorder or current_recorder()
+    try:
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        with open(filepath, "w") as f:
+            json.dump(recorder.to_chrome_trace(), f)
+        print(f"Trace saved to {filepath}")
+    except Exception as e:
+        print(f"Error saving trace: {e}")
@@ -1,9 +1,93 @@
-import osmnx as ox
 import folium
 import os
+from src.environment.graph_slimmer import edge_coords
+from src.utils import profiler
+
+
+def edges_geojson(graph):
+    """
+    GeoJSON FeatureCollection of the street edges, following the edge
+    geometry (LineString or packed). Built straight from the graph, so
+    drawing a map needs neither osmnx nor geopandas.
+    """
+    nodes = graph.nodes
+    features = []
+    for u, v, data in graph.edges(data=True):
+        coords = edge_coords(graph, data)
+        if coords is None:
+            coords = [(nodes[u]["x"], nodes[u]["y"]), (nodes[v]["x"], nodes[v]["y"])]
+        name = data.get("name")
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": [[float(x), float(y)] for x, y in coords]},
+            "properties": {"name": name} if isinstance(name, str) else {},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def add_boundaries_to_map(m, boundaries_gdf):
+    """Administrative boundaries as a dashed background layer (no-op if None or empty)."""
+    if boundaries_gdf is None or boundaries_gdf.empty:
+        return m
+    print(f"Adding {len(boundaries_gdf)} administrative boundaries to map...")
+    folium.GeoJson(
+        boundaries_gdf,
+        name="Administrative Boundaries",
+        style_function=lambda feature: {
+            "fillColor": "#f2f2f2",
+            "color": "#666666",
+            "weight": 1,
+            "dashArray": "5, 5",
+            "fillOpacity": 0.2,
+        },
+        tooltip=folium.GeoJsonTooltip(
+            fields=["name"] if "name" in boundaries_gdf.columns else []
+        ),
+    ).add_to(m)
+    return m
+
+
+def add_streets_to_map(m, street_network, edge_color):
+    """Street layer from an edges_geojson() FeatureCollection."""
+    folium.GeoJson(
+        street_network,
+        name="Street Network",
+        style_function=lambda feature: {
+            "color": edge_color,
+            "weight": 2,
+            "opacity": 0.7,
+        },
+    ).add_to(m)
+    return m
+
+
+def preview_map(street_network, center, boundaries_gdf=None, edge_color="#5474D0"):
+    """
+    Map shown while an area is still loading (see load_pipeline): the raw
+    streets and, once downloaded, the boundaries. Risk data and enemy zones
+    come with the full map.
+
+    Args:
+        street_network (dict): edges_geojson() FeatureCollection.
+        center (tuple): (lat, lon) the map is centered on.
+        boundaries_gdf (geopandas.GeoDataFrame, optional): Boundaries.
+        edge_color (str): Street color.
+
+    Returns:
+        folium.Map: The preview map.
+    """
+    m = folium.Map(
+        location=list(center),
+        zoom_start=14,
+        tiles="cartodbpositron",
+        attribution_control=False,
+    )
+    add_boundaries_to_map(m, boundaries_gdf)
+    return add_streets_to_map(m, street_network, edge_color)
 
 
 # 1. Add color parameter with a default
+@profiler.timed("visualize_graph_static")
 def visualize_graph_static(
     graph,
     filename="output/map.html",
@@ -29,10 +113,11 @@ def visualize_graph_static(
     try:
         os.makedirs(os.path.dirname(filename), exist_ok=True)
 
-        gdf_nodes, gdf_edges = ox.graph_to_gdfs(graph)
+        with profiler.span("edges_geojson", caller="visualize_graph_static"):
+            street_network = edges_geojson(graph)
 
-        center_y = gdf_nodes.geometry.y.mean()
-        center_x = gdf_nodes.geometry.x.mean()
+        center_y = sum(y for _, y in graph.nodes(data="y")) / graph.number_of_nodes()
+        center_x = sum(x for _, x in graph.nodes(data="x")) / graph.number_of_nodes()
 
         m = folium.Map(
             location=[center_y, center_x],
@@ -44,22 +129,7 @@ def visualize_graph_static(
         # Custom styling is now handled by assets/style.css
 
         # Plot boundaries first (so they are in the background)
-        if boundaries_gdf is not None and not boundaries_gdf.empty:
-            print(f"Adding {len(boundaries_gdf)} administrative boundaries to map...")
-            folium.GeoJson(
-                boundaries_gdf,
-                name="Administrative Boundaries",
-                style_function=lambda feature: {
-                    "fillColor": "#f2f2f2",
-                    "color": "#666666",
-                    "weight": 1,
-                    "dashArray": "5, 5",
-                    "fillOpacity": 0.2,
-                },
-                tooltip=folium.GeoJsonTooltip(
-                    fields=["name"] if "name" in boundaries_gdf.columns else []
-                ),
-            ).add_to(m)
+        add_boundaries_to_map(m, boundaries_gdf)
 
         # Plot radius circle
         if center_coords is not None and radius is not None:
@@ -131,21 +201,119 @@ def visualize_graph_static(
             print(f"Added {len(enemy_zones)} enemy zones to map.")
 
         # Plot edges
-        folium.GeoJson(
-            gdf_edges,
-            name="Street Network",
-            style_function=lambda feature: {
-                "color": edge_color,
-                "weight": 2,
-                "opacity": 0.7,
-            },
-        ).add_to(m)
+        add_streets_to_map(m, street_network, edge_color)
 
         folium.LayerControl().add_to(m)
 
-        m.save(filename)
+        with profiler.span("folium_save", filename=filename):
+            m.save(filename)
         print("Map visualization saved.")
         return m
     except Exception as e:
         print(f"Error visualizing graph: {e}")
         return None
+
+
+def add_isochrones_to_map(m, isochrones, color="#6f42c1", name="Reachable Area"):
+    """
+    Draws isochrone polygons (see src/ai/isochrone.py) on a folium map,
+    largest budget first so smaller areas stay visible on top.
+
+    Args:
+        m (folium.Map): Map to draw on.
+        isochrones (list): Results of compute_isochrones().
+        color (str): Fill and outline color.
+        name (str): Layer name.
+    """
+    layer = folium.FeatureGroup(name=name)
+    ordered = sorted(isochrones, key=lambda iso: iso["budget"], reverse=True)
+    for i, iso in enumerate(ordered):
+        if iso["polygon"] is None:
+            continue
+        folium.GeoJson(
+            iso["polygon"].__geo_interface__,
+            style_function=lambda feature, opacity=0.1 + 0.1 * i: {
+                "fillColor": color,
+                "color": color,
+                "weight": 1,
+                "fillOpacity": opacity,
+            },
+            tooltip=f"Budget {iso['budget']:.0f}: {len(iso['nodes'])} nodes",
+        ).add_to(layer)
+    layer.add_to(m)
+    return m
+
+
+DEPOT_COLORS = ["#d62728", "#1f77b4", "#2ca02c", "#ff7f0e", "#9467bd", "#8c564b", "#e377c2", "#17becf"]
+
+
+def add_depots_to_map(m, plan, name="Depots"):
+    """
+    Draws a depot plan (see src/ai/facility_location.py): one marker per
+    depot and a small dot per demand point in the color of its depot.
+
+    Args:
+        m (folium.Map): Map to draw on.
+        plan (dict): Result of place_depots().
+        name (str): Layer name.
+    """
+    layer = folium.FeatureGroup(name=name)
+    for (lat, lon), depot, cost in zip(plan["demand_coords"], plan["demand_depot"], plan["costs"]):
+        color = DEPOT_COLORS[depot % len(DEPOT_COLORS)] if cost != float("inf") else "#777777"
+        folium.CircleMarker(
+            location=[lat, lon], radius=2, color=color, fill=True, fill_opacity=0.8, weight=0
+        ).add_to(layer)
+    served = [0] * len(plan["depots"])
+    for depot in plan["demand_depot"]:
+        served[depot] += 1
+    for i, (lat, lon) in enumerate(plan["depot_coords"]):
+        folium.Marker(
+            location=[lat, lon],
+            popup=f"Depot {i + 1}: serves {served[i]} points",
+            icon=folium.Icon(color="darkred", icon="plus-sign"),
+        ).add_to(layer)
+    layer.add_to(m)
+    return m
+
+
+def add_trace_to_map(m, window, colors=None, period="PT30S", start="2025-01-01T00:00:00"):
+    """
+    Adds an animated replay of a trace window (see simulations/trace.py) as a
+    folium TimestampedGeoJson layer with a time slider.
+
+    Args:
+        m (folium.Map): Map to draw on.
+        window (dict): agent id -> (times, lats, lons), as TraceReader.window() returns.
+        colors (dict, optional): agent id -> line color.
+        period (str): ISO 8601 duration between animation frames.
+        start (str): ISO timestamp shown for simulated time 0.
+    """
+    from datetime import datetime, timedelta
+
+    from folium.plugins import TimestampedGeoJson
+
+    origin = datetime.fromisoformat(start)
+    features = []
+    for agent, (times, lats, lons) in window.items():
+        if len(times) < 2:
+            continue
+        color = (colors or {}).get(agent, "#FF4B4B")
+        features.append({
+            "type": "Feature",
+            "geometry": {
+                "type": "LineString",
+                "coordinates": [[float(x), float(y)] for y, x in zip(lats, lons)],
+            },
+            "properties": {
+                "times": [(origin + timedelta(seconds=float(t))).isoformat() for t in times],
+                "popup": f"Agent {agent}",
+                "style": {"color": color, "weight": 3},
+            },
+        })
+    TimestampedGeoJson(
+        {"type": "FeatureCollection", "features": features},
+        period=period,
+        add_last_point=True,
+        transition_time=100,
+    ).add_to(m)
+    return m